@@ -0,0 +1,96 @@
+"""
+Coinbase Advanced Trade API - asyncio Interface
+Awaitable mirror of CoinbaseCompleteAPI for issuing independent calls concurrently
+"""
+import asyncio
+import functools
+import inspect
+from concurrent.futures import ThreadPoolExecutor
+
+from coinbase_complete_api import CoinbaseCompleteAPI
+from config import Config
+
+
+class AsyncCoinbaseCompleteAPI:
+    """
+    Awaitable version of every CoinbaseCompleteAPI endpoint method
+
+    Calls run on a bounded worker pool on top of the synchronous client, so
+    they share its pooled keep-alive connections and JWT cache. At most
+    `max_concurrency` requests are in flight at once.
+
+    Example:
+        async with AsyncCoinbaseCompleteAPI() as api:
+            accounts, quotes, orders, fills = await api.gather(
+                api.list_accounts(),
+                api.get_best_bid_ask(['BTC-USD']),
+                api.list_orders(order_status='OPEN'),
+                api.list_fills(product_id='BTC-USD'),
+            )
+    """
+
+    def __init__(self, api=None, max_concurrency=None):
+        """Initialize API client"""
+        self.api = api or CoinbaseCompleteAPI()
+        self.max_concurrency = max_concurrency or Config.API_MAX_CONCURRENCY
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrency,
+            thread_name_prefix='coinbase-async'
+        )
+        self._semaphore = None
+        self._semaphore_loop = None
+
+    def _get_semaphore(self):
+        """Concurrency limiter bound to the running event loop"""
+        loop = asyncio.get_running_loop()
+        if self._semaphore is None or self._semaphore_loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            self._semaphore_loop = loop
+        return self._semaphore
+
+    async def _call(self, name, *args, **kwargs):
+        """Run one synchronous client method on the worker pool"""
+        async with self._get_semaphore():
+            loop = asyncio.get_running_loop()
+            method = functools.partial(getattr(self.api, name), *args, **kwargs)
+            return await loop.run_in_executor(self._executor, method)
+
+    async def gather(self, *calls, return_exceptions=False):
+        """
+        Await independent calls concurrently
+
+        Args:
+            *calls: Coroutines from this client (e.g. api.list_accounts())
+            return_exceptions (bool): Return errors in place of results
+                instead of raising the first one
+
+        Returns:
+            list: Results in the same order as the calls
+        """
+        return await asyncio.gather(*calls, return_exceptions=return_exceptions)
+
+    def close(self):
+        """Shut down the worker pool"""
+        self._executor.shutdown(wait=False)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+
+def _make_async_method(name, sync_method):
+    """Build an awaitable wrapper for a CoinbaseCompleteAPI method"""
+    @functools.wraps(sync_method)
+    async def method(self, *args, **kwargs):
+        return await self._call(name, *args, **kwargs)
+    return method
+
+
+# Mirror the full public endpoint surface of the synchronous client
+# (the iter_* generators page lazily and are used from the sync client directly)
+for _name, _method in inspect.getmembers(CoinbaseCompleteAPI, inspect.isfunction):
+    if not _name.startswith('_') and not _name.startswith('iter_'):
+        setattr(AsyncCoinbaseCompleteAPI, _name, _make_async_method(_name, _method))
@@ -0,0 +1,520 @@
+"""
+Backtester
+Replays historical candles through the auto-buy / auto-sell loop
+
+The default mode jumps from trigger to trigger with NumPy searches over the
+bar arrays, so a year of 1-minute bars runs in well under a second. The
+engine mode feeds every close through TradingEngine as a tick (slower, but
+it is the live code path) and is used to cross-check the fast mode.
+
+Usage:
+    python backtester.py --csv candles.csv
+    python backtester.py --fetch --start 2024-01-01 --end 2025-01-01 --cache candles.csv
+    python backtester.py --store --start 2021-01-01 --end 2025-01-01
+"""
+import argparse
+import contextlib
+import logging
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import Config
+from indicators import atr
+from trailing_stop import TrailingStop, trailing_stop_levels
+
+
+CANDLE_FIELDS = ('time', 'open', 'high', 'low', 'close', 'volume')
+
+GRANULARITY_SECONDS = {
+    'ONE_MINUTE': 60,
+    'FIVE_MINUTE': 300,
+    'FIFTEEN_MINUTE': 900,
+    'THIRTY_MINUTE': 1800,
+    'ONE_HOUR': 3600,
+    'TWO_HOUR': 7200,
+    'SIX_HOUR': 21600,
+    'ONE_DAY': 86400,
+}
+
+# Coinbase returns at most 350 candles per request
+CANDLES_PER_REQUEST = 300
+
+
+# ==================== CANDLE DATA ====================
+
+def parse_date(value):
+    """YYYY-MM-DD (UTC) to UNIX seconds"""
+    return int(datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=timezone.utc).timestamp())
+
+
+def candles_from_rows(rows):
+    """
+    Build candle arrays from API rows (dicts with start/open/high/low/close/volume)
+
+    Returns:
+        dict: {'time', 'open', 'high', 'low', 'close', 'volume'} NumPy arrays,
+              sorted by time with duplicate bars removed
+    """
+    data = np.array([
+        (float(r['start']), float(r['open']), float(r['high']),
+         float(r['low']), float(r['close']), float(r.get('volume', 0)))
+        for r in rows
+    ], dtype=float).reshape(-1, 6)
+    return _candles_from_matrix(data)
+
+
+def _candles_from_matrix(data):
+    """Split an (n, 6) matrix into sorted, de-duplicated candle arrays"""
+    _, unique = np.unique(data[:, 0], return_index=True)
+    data = data[unique]  # np.unique also sorts by time
+    candles = {name: np.ascontiguousarray(data[:, i]) for i, name in enumerate(CANDLE_FIELDS)}
+    candles['time'] = candles['time'].astype(np.int64)
+    return candles
+
+
+def load_candles(path):
+    """
+    Load candles from a CSV (time,open,high,low,close,volume) or Parquet file
+
+    Parquet needs pandas with pyarrow installed.
+    """
+    if path.endswith('.parquet'):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise Exception("Reading Parquet requires pandas and pyarrow (pip install pandas pyarrow)")
+        frame = pd.read_parquet(path, columns=list(CANDLE_FIELDS))
+        return _candles_from_matrix(frame.to_numpy(dtype=float))
+
+    data = np.loadtxt(path, delimiter=',', skiprows=1, ndmin=2)
+    return _candles_from_matrix(data)
+
+
+def save_candles(candles, path):
+    """Write candles to CSV (or Parquet when the path ends in .parquet)"""
+    matrix = np.column_stack([candles[name] for name in CANDLE_FIELDS])
+
+    if path.endswith('.parquet'):
+        try:
+            import pandas as pd
+        except ImportError:
+            raise Exception("Writing Parquet requires pandas and pyarrow (pip install pandas pyarrow)")
+        pd.DataFrame(matrix, columns=list(CANDLE_FIELDS)).astype({'time': 'int64'}).to_parquet(path)
+        return
+
+    np.savetxt(path, matrix, delimiter=',', header=','.join(CANDLE_FIELDS), comments='',
+               fmt=['%d', '%.8f', '%.8f', '%.8f', '%.8f', '%.8f'])
+
+
+def fetch_candles(api, product_id, start, end, granularity='ONE_MINUTE'):
+    """
+    Download candles between two UNIX timestamps with the public candles endpoint
+
+    Args:
+        api: CoinbaseCompleteAPI
+        product_id (str): e.g. 'BTC-USD'
+        start (int): UNIX seconds (inclusive)
+        end (int): UNIX seconds (exclusive)
+        granularity (str): One of GRANULARITY_SECONDS
+
+    Returns:
+        dict: Candle arrays (see candles_from_rows)
+    """
+    step = GRANULARITY_SECONDS[granularity] * CANDLES_PER_REQUEST
+    rows = []
+
+    for chunk_start in range(int(start), int(end), step):
+        chunk_end = min(chunk_start + step, int(end))
+        response = api.get_public_product_candles(
+            product_id, start=str(chunk_start), end=str(chunk_end), granularity=granularity
+        )
+        rows.extend(response.get('candles', []))
+
+    return candles_from_rows(rows)
+
+
+# ==================== SIMULATION ====================
+
+class BacktestParams:
+    """Strategy settings (defaults match TradingEngine)"""
+
+    def __init__(self, position_size=100.0, profit_rate=0.015, stop_loss=1.0,
+                 buy_fee_rate=0.006, sell_fee_rate=0.006, rebuy_drop=2.0,
+                 initial_usd=1000.0, entry_price=None, trailing_activation=5.0,
+                 trailing_atr=0.0, atr_period=14):
+        self.position_size = position_size
+        self.profit_rate = profit_rate      # net profit target (decimal)
+        self.stop_loss = stop_loss          # percent below entry
+        self.buy_fee_rate = buy_fee_rate
+        self.sell_fee_rate = sell_fee_rate
+        self.rebuy_drop = rebuy_drop        # percent below the last sale
+        self.initial_usd = initial_usd
+        self.entry_price = entry_price      # first auto-buy trigger (None = buy at once)
+        self.trailing_activation = trailing_activation  # percent above entry where the stop starts trailing (None = fixed stop)
+        self.trailing_atr = trailing_atr    # trail distance in ATRs (0 = stop_loss percent)
+        self.atr_period = atr_period
+
+    def sell_target(self, entry_price):
+        """Auto-loop sell target, same formula as TradingEngine.execute_buy"""
+        profit_target_pct = self.profit_rate * 100
+        buy_fee_pct = self.buy_fee_rate * 100
+        sell_fee_pct = self.sell_fee_rate * 100
+        return entry_price * (1 + (profit_target_pct + buy_fee_pct + sell_fee_pct) / 100)
+
+    def stop_price(self, entry_price):
+        """Stop loss level for an entry"""
+        return entry_price * (1 - self.stop_loss / 100)
+
+    def rebuy_price(self, sell_price):
+        """Auto-loop rebuy trigger, same formula as TradingEngine.execute_sell"""
+        return sell_price * (1 - self.rebuy_drop / 100)
+
+
+def _find_first(condition, start, n, window=512):
+    """
+    Index of the first bar >= start where condition(lo, hi) is true (-1 if none)
+
+    Scans growing windows so a trigger a few bars away costs a few bars and a
+    trigger never reached costs one pass over the data.
+    """
+    lo = start
+    while lo < n:
+        hi = min(n, lo + window)
+        hits = condition(lo, hi)
+        k = int(hits.argmax())
+        if hits[k]:
+            return lo + k
+        lo = hi
+        window *= 2
+    return -1
+
+
+def run_backtest(candles, params=None, fill='intrabar'):
+    """
+    Simulate the auto-loop over candle arrays
+
+    Args:
+        candles (dict): Arrays from load_candles / fetch_candles
+        params (BacktestParams): Strategy settings
+        fill (str): 'intrabar' - triggers use each bar's high/low and fill at
+                    the trigger price (or the open when the bar gaps past it);
+                    if target and stop are both inside one bar the stop is
+                    assumed to hit first.
+                    'close' - triggers and fills use closes only (matches
+                    replaying closes as ticks through TradingEngine).
+
+    Returns:
+        dict: Trades, PnL, win rate, drawdown and timing (see summarize)
+    """
+    params = params or BacktestParams()
+    started = time.perf_counter()
+
+    close = candles['close']
+    if fill == 'close':
+        open_ = high = low = close
+    else:
+        open_, high, low = candles['open'], candles['high'], candles['low']
+
+    n = len(close)
+    trades = []
+    cash = params.initial_usd
+
+    # ATR known at the start of each bar (from the bars before it), for ATR trailing distances
+    atr_known = None
+    if params.trailing_activation is not None and params.trailing_atr > 0 and n:
+        atr_known = np.concatenate(([np.nan], atr(high, low, close, params.atr_period)[:-1]))
+    buy_trigger = params.entry_price if params.entry_price is not None else np.inf
+    i = 0
+
+    while i < n:
+        # Flat: wait for the auto-buy trigger
+        trigger = buy_trigger
+        entry = _find_first(lambda lo, hi: low[lo:hi] <= trigger, i, n)
+        if entry < 0 or cash < params.position_size:
+            break
+
+        entry_price = min(open_[entry], trigger)
+        buy_fee = params.position_size * params.buy_fee_rate
+        btc_amount = (params.position_size - buy_fee) / entry_price
+        cash -= params.position_size
+
+        # In position: wait for the target or the stop (from the next bar on)
+        target = params.sell_target(entry_price)
+        stop = params.stop_price(entry_price)
+        if params.trailing_activation is None:
+            stop_levels = None
+            exit_ = _find_first(lambda lo, hi: (high[lo:hi] >= target) | (low[lo:hi] <= stop), entry + 1, n)
+        else:
+            def stop_levels(lo, hi, entry=entry, entry_price=entry_price):
+                """Trailing stop per bar in [lo, hi) (the path since entry decides the level)"""
+                levels = trailing_stop_levels(
+                    high[entry + 1:hi], entry_price, params.stop_loss, params.trailing_activation,
+                    None if atr_known is None else atr_known[entry + 1:hi], params.trailing_atr
+                )
+                return levels[lo - entry - 1:]
+
+            exit_ = _find_first(lambda lo, hi: (high[lo:hi] >= target) | (low[lo:hi] <= stop_levels(lo, hi)),
+                                entry + 1, n)
+
+        trade = {
+            'buy_index': entry,
+            'buy_time': int(candles['time'][entry]),
+            'buy_price': float(entry_price),
+            'btc_amount': float(btc_amount),
+            'cost': params.position_size
+        }
+        trades.append(trade)
+
+        if exit_ < 0:
+            break  # still open at the end of the data
+
+        if stop_levels is not None:
+            stop = float(stop_levels(exit_, exit_ + 1)[0])
+        if low[exit_] <= stop:
+            trailed = stop > params.stop_price(entry_price)
+            sell_price, reason = min(open_[exit_], stop), 'Trailing Stop' if trailed else 'Stop Loss'
+        else:
+            sell_price, reason = max(open_[exit_], target), 'Auto Sell'
+
+        net_proceeds = btc_amount * sell_price * (1 - params.sell_fee_rate)
+        cash += net_proceeds
+        trade.update({
+            'sell_index': exit_,
+            'sell_time': int(candles['time'][exit_]),
+            'sell_price': float(sell_price),
+            'reason': reason,
+            'net_profit': float(net_proceeds - params.position_size)
+        })
+
+        buy_trigger = params.rebuy_price(sell_price)
+        i = exit_ + 1
+
+    return summarize(candles, trades, params, time.perf_counter() - started)
+
+
+def run_engine_backtest(candles, params=None):
+    """
+    Replay each close as a tick through TradingEngine (auto mode, dry run)
+
+    Event-by-event and much slower than run_backtest, but it executes the
+    live decision code; results should match run_backtest(fill='close').
+    """
+    from candle_aggregator import CandleAggregator
+    from market_data import Tick
+    from trading_engine import TradingEngine, TradingObserver
+
+    params = params or BacktestParams()
+    started = time.perf_counter()
+
+    engine = TradingEngine(api=_NoAPI())
+    engine.balance_usd = params.initial_usd
+    engine.position_size = params.position_size
+    engine.profit_rate = params.profit_rate
+    engine.stop_loss = params.stop_loss
+    engine.buy_fee_rate = params.buy_fee_rate
+    engine.sell_fee_rate = params.sell_fee_rate
+    engine.rebuy_drop = params.rebuy_drop
+    # One bar per candle, so the engine's indicators follow the candle interval
+    step = int(candles['time'][1] - candles['time'][0]) if len(candles['time']) > 1 else 60
+    engine.candles = CandleAggregator(engine.product_id, intervals=[step])
+    engine.candles.add_listener(engine._on_bar)
+    engine.indicator_interval = step
+    engine.trailing_stop = TrailingStop(params.stop_loss, params.trailing_activation
+                                        if params.trailing_activation is not None else float('inf'),
+                                        params.trailing_atr)
+    engine.auto_mode = True
+    engine.dry_run = True
+    engine.auto_buy_enabled = True
+    engine.auto_buy_price = params.entry_price if params.entry_price is not None else float('inf')
+
+    trades = []
+    bar = [0]
+
+    class Recorder(TradingObserver):
+        def on_trade(self, engine, trade):
+            i = bar[0]
+            if trade['side'] == 'BUY':
+                trades.append({
+                    'buy_index': i,
+                    'buy_time': int(candles['time'][i]),
+                    'buy_price': trade['price'],
+                    'btc_amount': trade['btc_amount'],
+                    'cost': trade['usd_amount']
+                })
+            else:
+                trades[-1].update({
+                    'sell_index': i,
+                    'sell_time': int(candles['time'][i]),
+                    'sell_price': trade['price'],
+                    'reason': trade['reason'],
+                    'net_profit': trade['net_profit']
+                })
+
+    engine.add_observer(Recorder())
+    closes = candles['close'].tolist()
+    times = candles['time'].tolist()
+
+    # The engine logs every trade; keep the replay quiet
+    with _silenced('engine'):
+        for i, price in enumerate(closes):
+            bar[0] = i
+            engine.on_tick(Tick(engine.product_id, price, times[i], None, None, None))
+
+    return summarize(candles, trades, params, time.perf_counter() - started)
+
+
+@contextlib.contextmanager
+def _silenced(*subsystems):
+    """Drop the subsystems' log records (below the queue) until the block exits"""
+    from structured_logging import get_logger
+    loggers = [get_logger(name) for name in subsystems]
+    levels = [log.level for log in loggers]
+    for log in loggers:
+        log.setLevel(logging.CRITICAL + 1)
+    try:
+        yield
+    finally:
+        for log, level in zip(loggers, levels):
+            log.setLevel(level)
+
+
+class _NoAPI:
+    """Placeholder API for offline replays (dry run never calls it)"""
+    is_jwt_format = False
+
+
+def summarize(candles, trades, params, elapsed):
+    """
+    Aggregate trades into PnL, win rate and a mark-to-market drawdown
+
+    Returns:
+        dict: {
+            'trades': list,            # one dict per round trip (last may be open)
+            'trades_count': int,       # closed round trips
+            'winning_trades': int,
+            'win_rate': float,         # percent
+            'total_profit': float,     # realized USD
+            'final_equity': float,     # cash + open BTC at the last close
+            'return_pct': float,
+            'max_drawdown': float,     # USD, peak to trough of equity
+            'max_drawdown_pct': float,
+            'bars': int,
+            'elapsed': float           # seconds
+        }
+    """
+    close = candles['close']
+    n = len(close)
+    closed = [t for t in trades if 'sell_index' in t]
+    wins = sum(1 for t in closed if t['net_profit'] > 0)
+    total_profit = sum(t['net_profit'] for t in closed)
+
+    # Equity per bar = cash + BTC held x close, built from step changes
+    cash_delta = np.zeros(n + 1)
+    btc_delta = np.zeros(n + 1)
+    cash_delta[0] = params.initial_usd
+    for t in trades:
+        cash_delta[t['buy_index']] -= t['cost']
+        btc_delta[t['buy_index']] += t['btc_amount']
+        if 'sell_index' in t:
+            cash_delta[t['sell_index']] += t['cost'] + t['net_profit']
+            btc_delta[t['sell_index']] -= t['btc_amount']
+
+    if n:
+        equity = np.cumsum(cash_delta[:n]) + np.cumsum(btc_delta[:n]) * close
+        # Starting capital counts as the first peak (fees paid on entry are drawdown)
+        peak = np.maximum(np.maximum.accumulate(equity), params.initial_usd)
+        drawdown = peak - equity
+        worst = int(drawdown.argmax())
+        max_drawdown = float(drawdown[worst])
+        max_drawdown_pct = float(drawdown[worst] / peak[worst] * 100) if peak[worst] > 0 else 0.0
+        final_equity = float(equity[-1])
+    else:
+        max_drawdown = max_drawdown_pct = 0.0
+        final_equity = params.initial_usd
+
+    return {
+        'trades': trades,
+        'trades_count': len(closed),
+        'winning_trades': wins,
+        'win_rate': (wins / len(closed) * 100) if closed else 0.0,
+        'total_profit': total_profit,
+        'final_equity': final_equity,
+        'return_pct': (final_equity - params.initial_usd) / params.initial_usd * 100,
+        'max_drawdown': max_drawdown,
+        'max_drawdown_pct': max_drawdown_pct,
+        'bars': n,
+        'elapsed': elapsed
+    }
+
+
+def print_report(result):
+    """Print a backtest summary"""
+    print("\n" + "="*70)
+    print("📈 BACKTEST RESULTS")
+    print("="*70)
+    print(f"Bars:           {result['bars']:,} ({result['elapsed']:.2f}s)")
+    print(f"Trades:         {result['trades_count']} | Win: {result['win_rate']:.1f}%")
+    print(f"Total Profit:   ${result['total_profit']:+,.2f}")
+    print(f"Final Equity:   ${result['final_equity']:,.2f} ({result['return_pct']:+.2f}%)")
+    print(f"Max Drawdown:   ${result['max_drawdown']:,.2f} ({result['max_drawdown_pct']:.2f}%)")
+    print("="*70)
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description="Backtest the auto-buy / auto-sell loop")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument('--csv', help="Candle file (.csv or .parquet)")
+    source.add_argument('--fetch', action='store_true', help="Download candles from Coinbase")
+    source.add_argument('--store', action='store_true', help="Read candles from the local store (gaps downloaded)")
+    parser.add_argument('--product', default=Config.TRADING_PAIR)
+    parser.add_argument('--start', help="Fetch start date (YYYY-MM-DD)")
+    parser.add_argument('--end', help="Fetch end date (YYYY-MM-DD)")
+    parser.add_argument('--granularity', default='ONE_MINUTE', choices=sorted(GRANULARITY_SECONDS))
+    parser.add_argument('--cache', help="Save fetched candles to this file")
+    parser.add_argument('--size', type=float, default=100.0)
+    parser.add_argument('--profit', type=float, default=1.5, help="Net profit target (%%)")
+    parser.add_argument('--stop', type=float, default=1.0, help="Stop loss (%%)")
+    parser.add_argument('--rebuy-drop', type=float, default=2.0, help="Rebuy drop (%%)")
+    parser.add_argument('--entry', type=float, default=None, help="First auto-buy price (default: buy at once)")
+    parser.add_argument('--fill', default='intrabar', choices=['intrabar', 'close'])
+    parser.add_argument('--engine', action='store_true', help="Replay closes through TradingEngine")
+    args = parser.parse_args()
+
+    if (args.fetch or args.store) and not (args.start and args.end):
+        parser.error("--fetch and --store need --start and --end")
+
+    if args.store:
+        from candle_store import get_candle_store
+        candles = get_candle_store().get(args.product, parse_date(args.start), parse_date(args.end),
+                                         args.granularity)
+    elif args.fetch:
+        from coinbase_complete_api import CoinbaseCompleteAPI
+        candles = fetch_candles(CoinbaseCompleteAPI(), args.product,
+                                parse_date(args.start), parse_date(args.end), args.granularity)
+        if args.cache:
+            save_candles(candles, args.cache)
+            print(f"✅ Saved {len(candles['close']):,} candles to {args.cache}")
+    else:
+        candles = load_candles(args.csv)
+
+    params = BacktestParams(
+        position_size=args.size,
+        profit_rate=args.profit / 100,
+        stop_loss=args.stop,
+        rebuy_drop=args.rebuy_drop,
+        entry_price=args.entry
+    )
+
+    if args.engine:
+        result = run_engine_backtest(candles, params)
+    else:
+        result = run_backtest(candles, params, fill=args.fill)
+
+    print_report(result)
+
+
+if __name__ == '__main__':
+    main()
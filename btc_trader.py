@@ -1,14 +1,33 @@
 import tkinter as tk
 from tkinter import ttk
-import requests
-import threading
 import time
+import queue
+import threading
 from datetime import datetime
 import os
 from coinbase_complete_api import CoinbaseCompleteAPI
+from candle_aggregator import attach_live_store
+from market_data import create_market_data_source, SequenceGapError
+from latency import start_exporter
+from metrics import get_registry, start_metrics_server
+from order_service import OrderExecutionService
+from trading_engine import TradingEngine, TradingObserver
+from structured_logging import fields, get_logger
 from config import Config
 
-class BTCTrader:
+
+logger = get_logger('gui')
+
+
+def _engine_property(name):
+    """Expose a TradingEngine attribute on the view"""
+    return property(
+        lambda self: getattr(self.engine, name),
+        lambda self, value: setattr(self.engine, name, value)
+    )
+
+
+class BTCTrader(TradingObserver):
     def __init__(self):
         # Create main window
         self.root = tk.Tk()
@@ -17,50 +36,36 @@ class BTCTrader:
         
         # Initialize Coinbase API
         self.api = CoinbaseCompleteAPI()
-        self.using_real_balance = False
         
-        # Trading variables
-        self.balance_usd = 1000.0  # Default mock balance
-        self.balance_btc = 0.0     # Default mock balance
-        self.last_buy_price = 0.0
-        self.current_price = 0.0
+        # One order path for the whole session (warmed up before the first trigger)
+        self.order_service = OrderExecutionService(api=self.api)
+        
+        # Strategy state and decisions live in the GUI-free engine (product: TRADING_PAIR)
+        self.engine = TradingEngine(api=self.api, order_service=self.order_service)
+        self.engine.add_observer(self)
         self.is_running = False
-        self.manual_entry_price = 0.0  # For existing BTC positions
         
         # Try to load real balance
         if Config.is_live_mode() and self.api.is_jwt_format:
             self.load_real_balance()
-        
-        # Strategy parameters
-        self.profit_rate = 0.015   # 1.5% net profit target
-        self.stop_loss = 1.0      # 1.0% stop loss
-        self.position_size = 100.0 # $100 per trade
-        self.buy_fee_rate = 0.006 # 0.6% buy fee
-        self.sell_fee_rate = 0.006 # 0.6% sell fee
-        self.rebuy_drop = 2.0     # 2.0% price drop for rebuy in auto-loop
-        
-        # Trading mode
-        self.auto_mode = False
-        self.dry_run = True
-        
-        # Auto buy settings
-        self.auto_buy_enabled = False
-        self.auto_buy_price = 0.0
-        self.auto_buy_executed = False  # Track if auto-buy was already executed
-        
-        # Auto sell settings
-        self.auto_sell_enabled = False
-        self.auto_sell_price = 0.0
-        
-        # Statistics
-        self.trades_count = 0
-        self.winning_trades = 0
-        self.total_profit = 0.0
+            self.order_service.warm_up()
         
         # Connection status
         self.price_connection_ok = True
         self.balance_connection_ok = True
         self.last_price_error = None
+        self.error_count = 0
+        self.consecutive_errors = 0
+        self.last_error_time = 0
+        
+        # Market data source (created when monitoring starts)
+        self.market_data = None
+        
+        # Price thread -> Tk main loop hand-off (drained at Config.GUI_FPS)
+        self.ui_queue = queue.Queue()
+        self._ui_thread = threading.get_ident()
+        self.ui_interval_ms = max(1, int(1000 / Config.GUI_FPS))
+        self._rendered = {}  # last text/options pushed to each widget
         
         # Entry price variable (used internally, not displayed)
         self.entry_price_var = None
@@ -68,57 +73,29 @@ class BTCTrader:
         # Create GUI elements
         self.create_gui()
         
+        # Start the coalesced UI refresh loop
+        self.root.after(self.ui_interval_ms, self.process_ui_queue)
+        
+        # Trigger-to-order latency histograms (LATENCY_EXPORTER_PORT)
+        start_exporter()
+        
+        # Connection health next to the engine metrics (METRICS_PORT)
+        self.register_metrics()
+        start_metrics_server()
+        
+    def register_metrics(self):
+        """Export price feed health (read at scrape time)"""
+        registry = get_registry()
+        for name, documentation, attr in (
+            ('trader_price_connection_ok', "1 while the price feed is healthy", 'price_connection_ok'),
+            ('trader_consecutive_price_errors', "Price errors since the last good tick", 'consecutive_errors'),
+            ('trader_price_errors', "Price errors since monitoring started", 'error_count'),
+        ):
+            registry.gauge(name, documentation).labels().set_function(lambda attr=attr: getattr(self, attr))
+        
     def load_real_balance(self):
         """Load real balance from Coinbase"""
-        try:
-            print("\n🔄 Loading real balance from Coinbase...")
-            accounts = self.api.list_accounts()
-            
-            # Extract USD and BTC balances
-            for account in accounts.get('accounts', []):
-                currency = account.get('currency')
-                available = float(account.get('available_balance', {}).get('value', 0))
-                
-                if currency == 'USD':
-                    self.balance_usd = available
-                elif currency == 'BTC':
-                    self.balance_btc = available
-            
-            self.using_real_balance = True
-            
-            # Update Position Size to reflect real BTC value
-            if self.balance_btc > 0:
-                try:
-                    # Get current BTC price
-                    import requests
-                    response = requests.get('https://api.coinbase.com/v2/prices/BTC-USD/spot', timeout=5)
-                    if response.status_code == 200:
-                        btc_price = float(response.json()['data']['amount'])
-                        btc_value_usd = self.balance_btc * btc_price
-                        self.position_size = btc_value_usd
-                        
-                        print(f"✅ Real balance loaded:")
-                        print(f"   USD: ${self.balance_usd:.2f}")
-                        print(f"   BTC: {self.balance_btc:.8f}")
-                        print(f"   BTC Value: ${btc_value_usd:.2f} (at ${btc_price:,.2f})")
-                        print(f"   ✅ Position Size updated to: ${btc_value_usd:.2f}")
-                    else:
-                        print(f"✅ Real balance loaded:")
-                        print(f"   USD: ${self.balance_usd:.2f}")
-                        print(f"   BTC: {self.balance_btc:.8f}")
-                except:
-                    print(f"✅ Real balance loaded:")
-                    print(f"   USD: ${self.balance_usd:.2f}")
-                    print(f"   BTC: {self.balance_btc:.8f}")
-            else:
-                print(f"✅ Real balance loaded:")
-                print(f"   USD: ${self.balance_usd:.2f}")
-                print(f"   BTC: {self.balance_btc:.8f}")
-            
-        except Exception as e:
-            print(f"⚠️  Could not load real balance: {e}")
-            print(f"   Using mock balance: USD: ${self.balance_usd:.2f}, BTC: {self.balance_btc:.8f}")
-            self.using_real_balance = False
+        self.engine.load_real_balance()
     
     def refresh_balance(self):
         """Refresh balance from Coinbase (manual or periodic)"""
@@ -137,14 +114,14 @@ class BTCTrader:
                         status = "✅ Connected to Coinbase - Balance Updated" if self.using_real_balance else "⚠️ Connection Failed"
                         self.balance_status_var.set(status)
                     self.update_statistics()
-                    print("✅ Balance refreshed from Coinbase")
+                    logger.info("✅ Balance refreshed from Coinbase")
             except Exception as e:
                 self.balance_connection_ok = False
-                print(f"❌ Error refreshing balance: {e}")
+                logger.error(f"❌ Error refreshing balance: {e}")
                 if hasattr(self, 'balance_status_var'):
                     self.balance_status_var.set("❌ Sin Conexión a Coinbase")
         else:
-            print("⚠️  Real balance only available in LIVE mode with ECDSA credentials")
+            logger.warning("⚠️  Real balance only available in LIVE mode with ECDSA credentials")
             if hasattr(self, 'balance_status_var'):
                 self.balance_status_var.set("⚠️ Using Mock Balance (Set TRADING_MODE=LIVE for real balance)")
     
@@ -154,7 +131,7 @@ class BTCTrader:
             entry_price_str = self.avg_entry_var.get().strip()
             
             if not entry_price_str or entry_price_str == "0":
-                print("\n❌ Please enter a valid entry price")
+                logger.error("\n❌ Please enter a valid entry price")
                 return
             
             # Remove commas and any other formatting
@@ -162,20 +139,18 @@ class BTCTrader:
             entry_price = float(entry_price_str)
             
             if entry_price <= 0:
-                print("\n❌ Entry price must be positive")
+                logger.error("\n❌ Entry price must be positive")
                 return
             
             # Set as last_buy_price so calculations use it
             self.last_buy_price = entry_price
             self.manual_entry_price = entry_price
             
-            print("\n" + "="*70)
-            print("✅ AVERAGE ENTRY PRICE SET")
-            print("="*70)
-            print(f"Entry Price:  ${entry_price:,.2f}")
-            print(f"BTC Amount:   {self.balance_btc:.8f}")
-            print(f"Cost Basis:   ${entry_price * self.balance_btc:,.2f}")
-            print("="*70)
+            logger.info(f"\n✅ AVERAGE ENTRY PRICE SET\n"
+                        f"   Entry Price:  ${entry_price:,.2f}\n"
+                        f"   BTC Amount:   {self.balance_btc:.8f}\n"
+                        f"   Cost Basis:   ${entry_price * self.balance_btc:,.2f}",
+                        extra=fields(entry_price=entry_price, btc_amount=self.balance_btc))
             
             # Update calculations - THIS WILL UPDATE THE GUI
             self.check_position()
@@ -190,10 +165,10 @@ class BTCTrader:
                 self.root.update_idletasks()
             
         except ValueError as e:
-            print(f"\n❌ Invalid entry price format: {e}")
-            print(f"   Please enter a number (e.g., 70000)")
+            logger.error(f"\n❌ Invalid entry price format: {e}\n"
+                         f"   Please enter a number (e.g., 70000)")
         except Exception as e:
-            print(f"\n❌ Error setting entry price: {e}")
+            logger.error(f"\n❌ Error setting entry price: {e}")
         
     def create_gui(self):
         # Initialize entry_price_var (used internally, not displayed)
@@ -219,6 +194,15 @@ class BTCTrader:
             foreground='gray'
         ).pack()
         
+        # Last closed 1-minute bar (built from the ticks)
+        self.candle_var = tk.StringVar(value="")
+        ttk.Label(
+            price_frame,
+            textvariable=self.candle_var,
+            font=('Helvetica', 8),
+            foreground='gray'
+        ).pack()
+        
         # Connection status indicator for price
         self.price_status_var = tk.StringVar(value="⚪ Esperando conexión...")
         ttk.Label(
@@ -535,27 +519,27 @@ class BTCTrader:
                 
                 self.autobuy_status_var.set(f"🟢 Auto Buy: ACTIVE at ${self.auto_buy_price:,.2f}")
                 self.autobuy_price_entry.configure(state='disabled')
-                print(f"\n🤖 Auto Buy ENABLED: Will buy when price drops to ${self.auto_buy_price:,.2f}")
+                logger.info(f"\n🤖 Auto Buy ENABLED: Will buy when price drops to ${self.auto_buy_price:,.2f}")
                 
             except ValueError as e:
                 self.autobuy_enabled_var.set(False)
                 self.auto_buy_enabled = False
                 self.autobuy_status_var.set("⚪ Auto Buy: Disabled")
-                print(f"\n❌ Invalid auto buy price: {e}")
+                logger.error(f"\n❌ Invalid auto buy price: {e}")
         else:
             self.autobuy_status_var.set("⚪ Auto Buy: Disabled")
             self.autobuy_price_entry.configure(state='normal')
             self.auto_buy_executed = False
-            print("\n⚪ Auto Buy DISABLED")
+            logger.info("\n⚪ Auto Buy DISABLED")
     
     def set_autobuy_current_minus(self):
         """Set auto buy price to current price - 1%"""
         if self.current_price > 0:
             trigger_price = self.current_price * 0.99  # -1%
             self.autobuy_price_var.set(f"{trigger_price:.2f}")
-            print(f"\n✓ Auto Buy price set to ${trigger_price:,.2f} (Current -1%)")
+            logger.info(f"\n✓ Auto Buy price set to ${trigger_price:,.2f} (Current -1%)")
         else:
-            print("\n❌ Waiting for price data...")
+            logger.error("\n❌ Waiting for price data...")
     
     def toggle_auto_sell(self):
         """Enable/disable auto sell"""
@@ -570,17 +554,17 @@ class BTCTrader:
                 
                 self.autosell_status_var.set(f"🟢 Auto Sell: ACTIVE at ${self.auto_sell_price:,.2f}")
                 self.autosell_price_entry.configure(state='disabled')
-                print(f"\n🤖 Auto Sell ENABLED: Will sell when price reaches ${self.auto_sell_price:,.2f}")
+                logger.info(f"\n🤖 Auto Sell ENABLED: Will sell when price reaches ${self.auto_sell_price:,.2f}")
                 
             except ValueError as e:
                 self.autosell_enabled_var.set(False)
                 self.auto_sell_enabled = False
                 self.autosell_status_var.set("⚪ Auto Sell: Disabled")
-                print(f"\n❌ Invalid auto sell price: {e}")
+                logger.error(f"\n❌ Invalid auto sell price: {e}")
         else:
             self.autosell_status_var.set("⚪ Auto Sell: Disabled")
             self.autosell_price_entry.configure(state='normal')
-            print("\n⚪ Auto Sell DISABLED")
+            logger.info("\n⚪ Auto Sell DISABLED")
     
     def set_autosell_target(self):
         """Set auto sell price to calculated target price"""
@@ -589,11 +573,11 @@ class BTCTrader:
             try:
                 target_price = float(target_str)
                 self.autosell_price_var.set(f"{target_price:.2f}")
-                print(f"\n✓ Auto Sell price set to ${target_price:,.2f} (Target Price)")
+                logger.info(f"\n✓ Auto Sell price set to ${target_price:,.2f} (Target Price)")
             except:
-                print("\n❌ No target price available")
+                logger.error("\n❌ No target price available")
         else:
-            print("\n❌ No target price calculated yet")
+            logger.error("\n❌ No target price calculated yet")
     
     def update_autosell_current_target(self):
         """Update auto sell price with current calculated target (recalculates on click)"""
@@ -613,14 +597,14 @@ class BTCTrader:
                     self.auto_sell_price = current_target
                     self.autosell_status_var.set(f"🟢 Auto Sell: ACTIVE at ${current_target:,.2f}")
                 
-                print(f"\n🔄 Auto Sell price UPDATED to ${current_target:,.2f}")
-                print(f"   Based on Current Price: ${self.current_price:,.2f}")
-                print(f"   Profit Target: {profit_target_pct:.1f}% + Sell Fee: {sell_fee_pct:.1f}%")
+                logger.info(f"\n🔄 Auto Sell price UPDATED to ${current_target:,.2f}\n"
+                            f"   Based on Current Price: ${self.current_price:,.2f}\n"
+                            f"   Profit Target: {profit_target_pct:.1f}% + Sell Fee: {sell_fee_pct:.1f}%")
             else:
                 # Use regular target price
                 self.set_autosell_target()
         else:
-            print("\n❌ Waiting for price data...")
+            logger.error("\n❌ Waiting for price data...")
     
     def apply_settings(self):
         """Apply new trading settings"""
@@ -648,546 +632,281 @@ class BTCTrader:
             mode_str = "AUTO" if self.auto_mode else "MANUAL"
             run_str = "DRY RUN" if self.dry_run else "LIVE"
             
-            print(f"\n⚙️  Settings Updated:")
-            print(f"Position Size: ${self.position_size:.2f} (auto from balance)")
-            print(f"Net Profit Target: {self.profit_rate*100:.1f}%")
-            print(f"Stop Loss: {self.stop_loss:.1f}%")
-            print(f"Rebuy Drop: {self.rebuy_drop:.1f}% (for auto-loop)")
-            print(f"Mode: {mode_str} | {run_str}")
+            logger.info(f"\n⚙️  Settings Updated:\n"
+                        f"Position Size: ${self.position_size:.2f} (auto from balance)\n"
+                        f"Net Profit Target: {self.profit_rate*100:.1f}%\n"
+                        f"Stop Loss: {self.stop_loss:.1f}%\n"
+                        f"Rebuy Drop: {self.rebuy_drop:.1f}% (for auto-loop)\n"
+                        f"Mode: {mode_str} | {run_str}")
             
             # Update display
             self.check_position()
             
         except ValueError as e:
-            print(f"\n❌ Error: {str(e)}")
+            logger.error(f"\n❌ Error: {str(e)}")
             
-    def update_price(self):
-        """Update BTC price and check trading conditions"""
-        last_error_time = 0
-        error_count = 0
-        consecutive_errors = 0
+    def post_tick(self, tick):
+        """
+        Apply a price tick on the market data thread and queue it for display
         
-        while self.is_running:
+        Every tick reaches the engine here, so a price that touches a trigger
+        between two frames is still acted on. Only rendering waits for Tk.
+        """
+        self.engine.on_tick(tick)
+        self.ui_queue.put(('tick', tick))
+    
+    def post_price_error(self, error):
+        """Queue a market data error from the market data thread"""
+        self.ui_queue.put(('error', error))
+    
+    def process_ui_queue(self):
+        """
+        Drain queued market data events on the Tk main loop
+        
+        Runs every ui_interval_ms. The engine has already applied every
+        tick, so they are coalesced: only the newest one of the frame is
+        rendered. Errors and observer updates are handled in order.
+        """
+        events = []
+        while True:
             try:
-                # Get price from Coinbase API
-                response = requests.get(
-                    'https://api.coinbase.com/v2/prices/BTC-USD/spot',
-                    timeout=10
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    if 'data' in data and 'amount' in data['data']:
-                        self.current_price = float(data['data']['amount'])
-                        self.price_var.set(f"${self.current_price:,.2f}")
-                        
-                        # Update timestamp
-                        current_time = datetime.now()
-                        self.last_update_var.set(
-                            f"Updated: {current_time.strftime('%H:%M:%S.%f')[:-3]}"
-                        )
-                        
-                        # Connection successful
-                        error_count = 0
-                        consecutive_errors = 0
-                        self.price_connection_ok = True
-                        self.last_price_error = None
-                        
-                        # Update connection status indicator
-                        if hasattr(self, 'price_status_var'):
-                            self.price_status_var.set("✅ Conectado a Coinbase")
-                        
-                        # Check auto buy trigger
-                        if (self.auto_buy_enabled and 
-                            not self.auto_buy_executed and 
-                            self.balance_btc == 0 and
-                            self.current_price <= self.auto_buy_price):
-                            
-                            print(f"\n🤖 AUTO BUY TRIGGERED!")
-                            print(f"   Current Price: ${self.current_price:,.2f}")
-                            print(f"   Trigger Price: ${self.auto_buy_price:,.2f}")
-                            
-                            # Execute auto buy (uses current price automatically)
-                            self.auto_buy_executed = True
-                            self.execute_buy()
-                            
-                            # Disable auto buy after execution
-                            self.autobuy_enabled_var.set(False)
-                            self.auto_buy_enabled = False
-                            self.autobuy_status_var.set("⚪ Auto Buy: Disabled (Executed)")
-                            self.autobuy_price_entry.configure(state='normal')
-                        
-                        # Check auto sell trigger
-                        if (self.auto_sell_enabled and 
-                            self.balance_btc > 0 and
-                            self.current_price >= self.auto_sell_price):
-                            
-                            print(f"\n🤖 AUTO SELL TRIGGERED!")
-                            print(f"   Current Price: ${self.current_price:,.2f}")
-                            print(f"   Trigger Price: ${self.auto_sell_price:,.2f}")
-                            
-                            # Execute auto sell
-                            self.execute_sell("Auto Sell")
-                            
-                            # Disable auto sell after execution
-                            self.autosell_enabled_var.set(False)
-                            self.auto_sell_enabled = False
-                            self.autosell_status_var.set("⚪ Auto Sell: Disabled (Executed)")
-                            self.autosell_price_entry.configure(state='normal')
-                        
-                        # Update display
-                        self.check_position()
-                    else:
-                        raise ValueError("Invalid response format")
-                else:
-                    raise requests.RequestException(f"Status: {response.status_code}")
-                        
-            except (requests.RequestException, ValueError) as e:
-                current_time = time.time()
-                error_count += 1
-                consecutive_errors += 1
-                
-                # Update connection status
-                self.price_connection_ok = False
-                self.last_price_error = str(e)
-                
-                # After 3 consecutive errors, show "Sin Conexión" in GUI
-                if consecutive_errors >= 3:
-                    self.price_var.set("❌ Sin Conexión")
-                    self.last_update_var.set("❌ No se puede conectar a Coinbase")
-                    if hasattr(self, 'price_status_var'):
-                        self.price_status_var.set("❌ Sin Conexión a Coinbase")
-                
-                if current_time - last_error_time >= 5:
-                    print(f"\n❌ Price error: {str(e)}")
-                    if error_count > 5:
-                        print("   ⚠️  Verifique su conexión a internet")
-                    last_error_time = current_time
-            
-            finally:
-                time.sleep(0.1)  # Update every 100ms (10 times per second)
+                events.append(self.ui_queue.get_nowait())
+            except queue.Empty:
+                break
+        
+        last_tick = max((i for i, (kind, _) in enumerate(events) if kind == 'tick'), default=-1)
+        
+        for i, (kind, payload) in enumerate(events):
+            try:
+                if kind == 'error':
+                    self.on_price_error(payload)
+                elif kind == 'call':
+                    callback, args = payload
+                    callback(*args)
+                elif i == last_tick:
+                    self.update_price(payload)
+            except Exception as e:
+                logger.error(f"❌ UI update error: {str(e)}")
+        
+        self.root.after(self.ui_interval_ms, self.process_ui_queue)
+    
+    def _on_ui_thread(self, callback, *args):
+        """Run callback now on the Tk thread, otherwise queue it for the next frame"""
+        if threading.get_ident() == self._ui_thread:
+            callback(*args)
+        else:
+            self.ui_queue.put(('call', (callback, args)))
+    
+    def _set_var(self, var, text):
+        """Set a Tk variable only if its text changed"""
+        key = id(var)
+        if self._rendered.get(key) != text:
+            self._rendered[key] = text
+            var.set(text)
+    
+    def _set_label(self, name, **options):
+        """Configure an amount label only if its options changed"""
+        key = ('label', name)
+        if self._rendered.get(key) != options:
+            self._rendered[key] = options
+            self.amount_labels[name].configure(**options)
+    
+    def update_price(self, tick):
+        """Render the latest price tick (Tk main loop; the engine has already applied it)"""
+        self._set_var(self.price_var, f"${self.current_price:,.2f}")
+        
+        # Update timestamp
+        current_time = datetime.now()
+        self._set_var(self.last_update_var,
+            f"Updated: {current_time.strftime('%H:%M:%S.%f')[:-3]}"
+        )
+        
+        # Connection successful
+        self.error_count = 0
+        self.consecutive_errors = 0
+        self.price_connection_ok = True
+        self.last_price_error = None
+        
+        # Update connection status indicator
+        if hasattr(self, 'price_status_var'):
+            self._set_var(self.price_status_var, "✅ Conectado a Coinbase")
+        
+        # Update display
+        self.check_position()
+    
+    def on_price_error(self, error):
+        """Handle an error reported by the market data source"""
+        if isinstance(error, SequenceGapError):
+            # Ticker messages carry the full price, so a gap is not a disconnect
+            logger.warning(f"\n⚠️  Price feed: {error}")
+            return
+        
+        current_time = time.time()
+        self.error_count += 1
+        self.consecutive_errors += 1
+        
+        # Update connection status
+        self.price_connection_ok = False
+        self.last_price_error = str(error)
+        
+        # After 3 consecutive errors, show "Sin Conexión" in GUI
+        if self.consecutive_errors >= 3:
+            self._set_var(self.price_var, "❌ Sin Conexión")
+            self._set_var(self.last_update_var, "❌ No se puede conectar a Coinbase")
+            if hasattr(self, 'price_status_var'):
+                self._set_var(self.price_status_var, "❌ Sin Conexión a Coinbase")
+        
+        if current_time - self.last_error_time >= 5:
+            logger.error(f"\n❌ Price error: {str(error)}")
+            if self.error_count > 5:
+                logger.warning("   ⚠️  Verifique su conexión a internet")
+            self.last_error_time = current_time
             
     def check_position(self):
         """Check current position and update profit table"""
         try:
-            if self.current_price <= 0:
+            # Display only: exits are checked by the engine on every tick
+            summary = self.engine.position_summary()
+            if summary is None:
                 return
             
-            if self.balance_btc > 0:
-                # Active position - use CORRECT formula
-                btc_amount = self.balance_btc
-                position_value = btc_amount * self.current_price
-                
-                # KEY: Check if using real balance from Coinbase
-                if self.using_real_balance:
-                    # REAL COINBASE BALANCE - Always use actual BTC value
-                    if self.last_buy_price > 0:
-                        # Manual entry price was set
-                        entry_price = self.last_buy_price
-                        cost_basis = btc_amount * entry_price
-                    else:
-                        # No entry price yet - use current value
-                        entry_price = self.current_price
-                        cost_basis = position_value
-                    
-                    # Display real balance values
-                    self.amount_labels['Initial Investment:'].configure(text=f'${cost_basis:,.2f}')
-                    self.amount_labels['Buy Fee (0.6%):'].configure(text='$0.00')
-                    self.amount_labels['Actual BTC Purchase:'].configure(text=f'${cost_basis:,.2f}')
-                else:
-                    # NORMAL TRADING SCENARIO (bought through app)
-                    if self.last_buy_price > 0:
-                        entry_price = self.last_buy_price
-                        cost_basis = self.position_size
-                        buy_fee = cost_basis * self.buy_fee_rate
-                        net_investment = cost_basis - buy_fee
-                        
-                        # Display trading values
-                        self.amount_labels['Initial Investment:'].configure(text=f'${cost_basis:,.2f}')
-                        self.amount_labels['Buy Fee (0.6%):'].configure(text=f'${buy_fee:,.2f}')
-                        self.amount_labels['Actual BTC Purchase:'].configure(text=f'${net_investment:,.2f}')
-                    else:
-                        # No entry price
-                        entry_price = self.current_price
-                        cost_basis = position_value
-                        self.amount_labels['Initial Investment:'].configure(text=f'${cost_basis:,.2f}')
-                        self.amount_labels['Buy Fee (0.6%):'].configure(text='$0.00')
-                        self.amount_labels['Actual BTC Purchase:'].configure(text=f'${cost_basis:,.2f}')
-                
-                # Calculate TARGET PRICE
-                profit_target_pct = self.profit_rate * 100  # Convert to percentage
-                buy_fee_pct = self.buy_fee_rate * 100       # 0.6%
-                sell_fee_pct = self.sell_fee_rate * 100     # 0.6%
-                
-                # LOGIC CORRECTION: 
-                # - For OPEN & PROFITABLE position: Use current price as base
-                # - For NEW position: Use entry price as base
-                
-                if self.last_buy_price > 0 and self.current_price > entry_price * 1.05:
-                    # Position is OPEN and PROFITABLE (current > 5% above entry)
-                    # Calculate target from CURRENT PRICE (buy fee already paid)
-                    # TARGET = Current Price × (1 + Profit Target % + Sell Fee %)
-                    target_price = self.current_price * (1 + (profit_target_pct + sell_fee_pct) / 100)
-                else:
-                    # Position is NEW or in LOSS
-                    # Calculate target from ENTRY PRICE (include both fees)
-                    # TARGET = Entry Price × (1 + Profit Target % + Buy Fee % + Sell Fee %)
-                    target_price = entry_price * (1 + (profit_target_pct + buy_fee_pct + sell_fee_pct) / 100)
-                
-                # Calculate P/L
-                unrealized_pl = position_value - cost_basis
-                
-                # Avoid division by zero if last_buy_price is 0
-                if self.last_buy_price > 0:
-                    profit_pct = ((self.current_price - self.last_buy_price) / self.last_buy_price * 100)
-                else:
-                    # If no entry price recorded, use current position value vs cost basis
-                    profit_pct = ((position_value - cost_basis) / cost_basis * 100) if cost_basis > 0 else 0
-                
-                # Calculate Final Profit using correct formula:
-                # LOGIC CORRECTION: For profitable positions, calculate from CURRENT value
-                
-                if self.last_buy_price > 0 and self.current_price > entry_price * 1.05:
-                    # OPEN & PROFITABLE position
-                    # Value at Target = Current Value × (1 + Profit Target % / 100)
-                    value_at_target = position_value * (1 + profit_target_pct / 100)
-                    
-                    # Sell Fee = Value at Target × Sell Fee %
-                    sell_fee = value_at_target * self.sell_fee_rate
-                    
-                    # Final Profit = Profit Target % of Current Value - Sell Fee
-                    potential_profit = value_at_target - position_value - sell_fee
-                else:
-                    # NEW position
-                    # Value at Target = Initial Investment × (1 + Profit Target % / 100)
-                    value_at_target = cost_basis * (1 + profit_target_pct / 100)
-                    
-                    # Sell Fee = Value at Target × Sell Fee %
-                    sell_fee = value_at_target * self.sell_fee_rate
-                    
-                    # Final Profit = Value at Target - Initial Investment - Sell Fee
-                    potential_profit = value_at_target - cost_basis - sell_fee
-                
-                # Gross sell value (for display)
-                gross_sell_value = btc_amount * target_price
-                
-                # Update display
-                self.amount_labels['--- Current Position ---'].configure(text='------------------------')
-                self.amount_labels['Current BTC Value:'].configure(text=f'${position_value:,.2f}')
-                self.amount_labels['Current P/L (if sold now):'].configure(
-                    text=f'${unrealized_pl:+,.2f}',
-                    foreground='green' if unrealized_pl > 0 else 'red'
-                )
-                
-                self.amount_labels['--- At Target Price ---'].configure(text='------------------------')
-                self.amount_labels['Value at Target:'].configure(text=f'${value_at_target:,.2f}')
-                self.amount_labels['Sell Fee (0.6%):'].configure(text=f'${sell_fee:,.2f}')
-                self.amount_labels['Final Profit (at target):'].configure(
-                    text=f'${potential_profit:+,.2f}',
-                    foreground='green' if potential_profit > 0 else 'red'
+            self._set_label('Initial Investment:', text=f"${summary['cost_basis']:,.2f}")
+            self._set_label('Buy Fee (0.6%):', text=f"${summary['buy_fee']:,.2f}")
+            self._set_label('Actual BTC Purchase:', text=f"${summary['net_investment']:,.2f}")
+            
+            self._set_label('--- Current Position ---', text='------------------------')
+            self._set_label('Current BTC Value:', text=f"${summary['position_value']:,.2f}")
+            if summary['has_position']:
+                self._set_label('Current P/L (if sold now):',
+                    text=f"${summary['unrealized_pl']:+,.2f}",
+                    foreground='green' if summary['unrealized_pl'] > 0 else 'red'
                 )
-                
-                self.entry_var.set(f"Entry: ${self.last_buy_price:,.2f} | Current: ${self.current_price:,.2f} ({profit_pct:+.2f}%)")
-                
-                # Update target and stop loss
-                # CRITICAL FIX: Stop loss must be based on CURRENT PRICE for open profitable positions
-                
-                if self.last_buy_price > 0 and self.current_price > entry_price * 1.05:
-                    # OPEN & PROFITABLE position
-                    # Stop Loss = Current Price × (1 - Stop Loss %)
-                    # This protects your gains, not your entry
-                    stop_price = self.current_price * (1 - self.stop_loss / 100)
-                elif self.last_buy_price > 0:
-                    # NEW or LOSS position
-                    # Stop Loss = Entry Price × (1 - Stop Loss %)
-                    stop_price = self.last_buy_price * (1 - self.stop_loss / 100)
-                else:
-                    # No entry price
-                    stop_price = self.current_price * (1 - self.stop_loss / 100)
-                
-                self.target_price_var.set(f"${target_price:,.2f}")
-                self.stop_price_var.set(f"${stop_price:,.2f}")
+            else:
+                self._set_label('Current P/L (if sold now):', text='No Position')
+            
+            self._set_label('--- At Target Price ---', text='------------------------')
+            self._set_label('Value at Target:', text=f"${summary['value_at_target']:,.2f}")
+            self._set_label('Sell Fee (0.6%):', text=f"${summary['sell_fee']:,.2f}")
+            self._set_label('Final Profit (at target):',
+                text=f"${summary['potential_profit']:+,.2f}",
+                foreground='green' if summary['potential_profit'] > 0 else 'red'
+            )
+            
+            self._set_var(self.target_price_var, f"${summary['target_price']:,.2f}")
+            self._set_var(self.stop_price_var, f"${summary['stop_price']:,.2f}")
+            
+            profit_target_pct = self.profit_rate * 100
+            buy_fee_pct = self.buy_fee_rate * 100
+            sell_fee_pct = self.sell_fee_rate * 100
+            
+            if summary['has_position']:
+                self._set_var(self.entry_var, f"Entry: ${self.last_buy_price:,.2f} | Current: ${self.current_price:,.2f} ({summary['profit_pct']:+.2f}%)")
                 
                 # Show CORRECT calculation formula based on position type
-                if self.last_buy_price > 0 and self.current_price > entry_price * 1.05:
+                if summary['trailing']:
                     # Profitable position - calculated from current price
-                    self.calc_info_var.set(
-                        f"Target = Current ${self.current_price:,.2f} × (1 + {profit_target_pct + sell_fee_pct:.1f}%) | Stop = Current × (1 - {self.stop_loss:.1f}%) = ${stop_price:,.2f}"
+                    self._set_var(self.calc_info_var,
+                        f"Target = Current ${self.current_price:,.2f} × (1 + {profit_target_pct + sell_fee_pct:.1f}%) | Stop (trailing high ${summary['high_water']:,.2f}) = ${summary['stop_price']:,.2f}"
                     )
                 else:
                     # New position - calculated from entry price
-                    self.calc_info_var.set(
-                        f"Target = Entry ${entry_price:.2f} × (1 + {profit_target_pct + buy_fee_pct + sell_fee_pct:.1f}%) | Stop = Entry × (1 - {self.stop_loss:.1f}%) = ${stop_price:,.2f}"
+                    self._set_var(self.calc_info_var,
+                        f"Target = Entry ${summary['entry_price']:.2f} × (1 + {profit_target_pct + buy_fee_pct + sell_fee_pct:.1f}%) | Stop = Entry × (1 - {self.stop_loss:.1f}%) = ${summary['stop_price']:,.2f}"
                     )
-                
-                # Check sell conditions
-                if self.last_buy_price > 0:
-                    target_pct_increase = ((target_price - self.last_buy_price) / self.last_buy_price) * 100
-                else:
-                    target_pct_increase = 0
-                
-                if self.auto_mode and self.last_buy_price > 0 and profit_pct >= target_pct_increase:
-                    print(f"\n🎯 Target reached! Price: ${self.current_price:,.2f} >= ${target_price:,.2f}")
-                    self.execute_sell("Take Profit")
-                elif self.auto_mode and profit_pct <= -self.stop_loss:
-                    print(f"\n🛑 Stop Loss triggered! Price dropped {profit_pct:.2f}%")
-                    self.execute_sell("Stop Loss")
             else:
-                # No position - show potential trade based on configured entry price
-                # Use position_size for potential trade calculations
-                initial_investment = self.position_size
-                buy_fee = initial_investment * self.buy_fee_rate
-                net_investment = initial_investment - buy_fee
-                
-                # Update display with potential trade values
-                self.amount_labels['Initial Investment:'].configure(text=f'${initial_investment:,.2f}')
-                self.amount_labels['Buy Fee (0.6%):'].configure(text=f'${buy_fee:,.2f}')
-                self.amount_labels['Actual BTC Purchase:'].configure(text=f'${net_investment:,.2f}')
-                
-                # Use current price for calculations (no manual entry field)
-                configured_entry = self.current_price
-                
-                if configured_entry <= 0:
-                    configured_entry = self.current_price
-                
-                # Use configured entry price for calculations with CORRECT formula
-                btc_amount = net_investment / configured_entry
-                current_value = btc_amount * self.current_price
-                
-                # Apply CORRECT formula for target price
-                desired_net_proceeds = initial_investment * (1 + self.profit_rate)
-                required_gross_proceeds = desired_net_proceeds / (1 - self.sell_fee_rate)
-                target_price = required_gross_proceeds / btc_amount
-                
-                gross_sell_value = btc_amount * target_price
-                sell_fee = gross_sell_value * self.sell_fee_rate
-                net_sell_value = gross_sell_value - sell_fee
-                potential_profit = net_sell_value - initial_investment
-                
-                self.amount_labels['--- Current Position ---'].configure(text='------------------------')
-                self.amount_labels['Current BTC Value:'].configure(text=f'${current_value:,.2f}')
-                self.amount_labels['Current P/L (if sold now):'].configure(text='No Position')
-                
-                self.amount_labels['--- At Target Price ---'].configure(text='------------------------')
-                self.amount_labels['Value at Target:'].configure(text=f'${gross_sell_value:,.2f}')
-                self.amount_labels['Sell Fee (0.6%):'].configure(text=f'${sell_fee:,.2f}')
-                self.amount_labels['Final Profit (at target):'].configure(
-                    text=f'${potential_profit:+,.2f}',
-                    foreground='green' if potential_profit > 0 else 'red'
-                )
-                
-                self.entry_var.set(f"No Position - Entry will be: ${configured_entry:,.2f}")
-                
-                # Update target and stop loss for potential trade
-                stop_price = configured_entry * (1 - self.stop_loss / 100)
-                self.target_price_var.set(f"${target_price:,.2f}")
-                self.stop_price_var.set(f"${stop_price:,.2f}")
+                self._set_var(self.entry_var, f"No Position - Entry will be: ${summary['entry_price']:,.2f}")
                 
                 # Show CORRECT calculation breakdown
-                self.calc_info_var.set(
-                    f"Target = [${initial_investment:.2f} × 1.{self.profit_rate*100:.0f}] / (1 - 0.{self.sell_fee_rate*1000:.0f}) / {btc_amount:.8f} BTC = ${target_price:,.2f}"
+                self._set_var(self.calc_info_var,
+                    f"Target = [${summary['cost_basis']:.2f} × 1.{self.profit_rate*100:.0f}] / (1 - 0.{self.sell_fee_rate*1000:.0f}) / {summary['btc_amount']:.8f} BTC = ${summary['target_price']:,.2f}"
                 )
                 
         except Exception as e:
-            print(f"❌ Calculation error: {str(e)}")
+            logger.error(f"❌ Calculation error: {str(e)}")
             
     def manual_buy(self):
         """Manually execute buy order"""
         if self.balance_btc > 0:
-            print("\n❌ Already have an open position! Close it first.")
+            logger.error("\n❌ Already have an open position! Close it first.")
             return
         
         if self.balance_usd < self.position_size:
-            print(f"\n❌ Insufficient funds! Need ${self.position_size:.2f}, have ${self.balance_usd:.2f}")
+            logger.error(f"\n❌ Insufficient funds! Need ${self.position_size:.2f}, have ${self.balance_usd:.2f}")
             return
             
         self.execute_buy()
     
     def execute_buy(self):
         """Execute buy order"""
-        try:
-            # Use current market price as entry
-            entry_price = self.current_price
-            
-            if entry_price <= 0:
-                print("\n❌ Invalid entry price - no price data available")
-                return
-            
-            # Calculate buy using CORRECT formula
-            buy_fee = self.position_size * self.buy_fee_rate
-            net_investment = self.position_size - buy_fee
-            btc_amount = net_investment / entry_price
-            
-            # Validate balance
-            if self.position_size > self.balance_usd:
-                print(f"\n❌ Insufficient funds! Need ${self.position_size:.2f}, have ${self.balance_usd:.2f}")
-                return
-            
-            # Execute REAL buy order if in LIVE mode
-            if not self.dry_run:
-                from trading_helpers import TradingHelpers
-                helpers = TradingHelpers()
-                
-                print(f"\n🔴 EXECUTING REAL BUY ORDER...")
-                result = helpers.buy_btc_market(usd_amount=self.position_size)
-                
-                if not result.get('success'):
-                    print(f"\n❌ REAL BUY ORDER FAILED: {result.get('error')}")
-                    return
-                
-                print(f"✅ REAL BUY ORDER EXECUTED: Order ID {result.get('order_id')}")
-            
-            # Update balances
-            self.balance_usd -= self.position_size
-            self.balance_btc = btc_amount
-            self.last_buy_price = entry_price
-            
-            # Calculate target price using CORRECT formula
-            desired_net = self.position_size * (1 + self.profit_rate)
-            required_gross = desired_net / (1 - self.sell_fee_rate)
-            target_price = required_gross / btc_amount
-            stop_price = entry_price * (1 - self.stop_loss / 100)
-            
-            # Verification
-            expected_net_profit = self.position_size * self.profit_rate
-            
-            mode_indicator = " [DRY RUN]" if self.dry_run else " [LIVE]"
-            print(f"\n✓ BUY EXECUTED{mode_indicator}:")
-            print(f"   Entry Price: ${entry_price:,.2f}")
-            print(f"   Position: ${self.position_size:.2f}")
-            print(f"   Buy Fee ({self.buy_fee_rate*100}%): ${buy_fee:.2f}")
-            print(f"   Net Investment: ${net_investment:.2f}")
-            print(f"   BTC Qty: {btc_amount:.8f}")
-            print(f"\n   🎯 TARGET PRICE: ${target_price:,.2f}")
-            print(f"      Formula: [${self.position_size:.2f} × (1 + {self.profit_rate*100}%)] / (1 - {self.sell_fee_rate*100}%) / {btc_amount:.8f}")
-            print(f"      Expected Net Profit: ${expected_net_profit:.2f}")
-            print(f"\n   🛑 STOP LOSS: ${stop_price:,.2f} (-{self.stop_loss}%)")
-            
-            self.balance_var.set(f"USD: ${self.balance_usd:.2f}\nBTC: {self.balance_btc:.8f}")
-            self.check_position()
-            
-            # Disable buy button and entry price field during active position
-            self.buy_button.configure(state='disabled')
-            self.entry_price_entry.configure(state='disabled')
-            
-            # AUTO-LOOP: Calculate sell target and activate Auto Sell
-            if self.auto_mode or self.auto_sell_enabled:
-                # Calculate sell target price from current entry
-                profit_target_pct = self.profit_rate * 100
-                buy_fee_pct = self.buy_fee_rate * 100
-                sell_fee_pct = self.sell_fee_rate * 100
-                
-                # Target = Entry × (1 + Profit% + Buy Fee% + Sell Fee%)
-                auto_sell_target = entry_price * (1 + (profit_target_pct + buy_fee_pct + sell_fee_pct) / 100)
-                
-                # Activate Auto Sell at the target price
-                self.auto_sell_price = auto_sell_target
-                self.autosell_price_var.set(f"{auto_sell_target:.2f}")
-                self.auto_sell_enabled = True
-                self.autosell_enabled_var.set(True)
-                self.autosell_status_var.set(f"🟢 Auto Sell: ACTIVE at ${auto_sell_target:,.2f}")
-                self.autosell_price_entry.configure(state='disabled')
-                
-                print(f"\n🔄 AUTO-LOOP ACTIVATED:")
-                print(f"   Bought at: ${entry_price:,.2f}")
-                print(f"   Target price: ${auto_sell_target:,.2f} (+{profit_target_pct + buy_fee_pct + sell_fee_pct:.1f}%)")
-                print(f"   🤖 Auto Sell ENABLED - Waiting for target")
-            
-        except Exception as e:
-            print(f"❌ Buy error: {str(e)}")
-            
+        self.engine.execute_buy()
+    
     def execute_sell(self, reason: str):
         """Execute sell order"""
-        try:
-            # Calculate sell
-            btc_qty = self.balance_btc  # Store before clearing
-            gross_proceeds = btc_qty * self.current_price
-            sell_fee = gross_proceeds * self.sell_fee_rate
-            net_proceeds = gross_proceeds - sell_fee
-            
-            # Calculate profit
-            cost_basis = self.position_size
-            net_profit = net_proceeds - cost_basis
-            profit_pct = (net_profit / cost_basis) * 100
-            
-            # Execute REAL sell order if in LIVE mode
-            if not self.dry_run:
-                from trading_helpers import TradingHelpers
-                helpers = TradingHelpers()
-                
-                print(f"\n🔴 EXECUTING REAL SELL ORDER...")
-                result = helpers.sell_btc_market(btc_amount=btc_qty)
-                
-                if not result.get('success'):
-                    print(f"\n❌ REAL SELL ORDER FAILED: {result.get('error')}")
-                    return
-                
-                print(f"✅ REAL SELL ORDER EXECUTED: Order ID {result.get('order_id')}")
-            
-            self.trades_count += 1
-            if net_profit > 0:
-                self.winning_trades += 1
-            self.total_profit += net_profit
-            
-            self.balance_usd += net_proceeds
-            self.balance_btc = 0
-            self.last_buy_price = 0
-            
-            mode_indicator = " [DRY RUN]" if self.dry_run else " [LIVE]"
-            print(f"\n✓ SELL EXECUTED ({reason}){mode_indicator}:")
-            print(f"   Sale Price: ${self.current_price:,.2f}")
-            print(f"   BTC Qty: {btc_qty:.8f}")
-            print(f"   Gross Value: ${gross_proceeds:.2f}")
-            print(f"   Sell Fee ({self.sell_fee_rate*100}%): ${sell_fee:.2f}")
-            print(f"   Net Proceeds: ${net_proceeds:.2f}")
-            print(f"   Cost Basis: ${cost_basis:.2f}")
-            print(f"   Net Profit/Loss: ${net_profit:+.2f} ({profit_pct:+.2f}%)")
-            
-            self.balance_var.set(f"USD: ${self.balance_usd:.2f}\nBTC: {self.balance_btc:.8f}")
+        self.engine.execute_sell(reason)
+    
+    def on_trade(self, engine, trade):
+        """Refresh balances, statistics and buttons after a trade"""
+        self._on_ui_thread(self.show_trade, trade)
+    
+    def show_trade(self, trade):
+        """Render a trade (Tk main loop)"""
+        self.balance_var.set(f"USD: ${self.balance_usd:.2f}\nBTC: {self.balance_btc:.8f}")
+        
+        if trade['side'] == 'SELL':
             self.update_statistics()
-            self.check_position()
-            
-            # Re-enable buy button and entry price field after selling
-            if self.is_running:
-                self.buy_button.configure(state='normal')
-            self.entry_price_entry.configure(state='normal')
-            
-            # Reset auto buy flag so it can trigger again
-            self.auto_buy_executed = False
-            
-            # AUTO-LOOP: Calculate rebuy price and activate Auto Buy
-            if self.auto_mode or self.auto_buy_enabled:
-                # Calculate rebuy price: Sell price - X% (to profit on the cycle)
-                # Use configurable rebuy drop %
-                rebuy_drop_pct = self.rebuy_drop
-                rebuy_price = self.current_price * (1 - rebuy_drop_pct / 100)
-                
-                # Activate Auto Buy at the rebuy price
-                self.auto_buy_price = rebuy_price
-                self.autobuy_price_var.set(f"{rebuy_price:.2f}")
-                self.auto_buy_enabled = True
-                self.autobuy_enabled_var.set(True)
-                self.autobuy_status_var.set(f"🟢 Auto Buy: ACTIVE at ${rebuy_price:,.2f}")
-                self.autobuy_price_entry.configure(state='disabled')
-                
-                print(f"\n🔄 AUTO-LOOP ACTIVATED:")
-                print(f"   Sold at: ${self.current_price:,.2f}")
-                print(f"   Rebuy price: ${rebuy_price:,.2f} (-{rebuy_drop_pct}%)")
-                print(f"   🤖 Auto Buy ENABLED - Waiting for price to drop")
-            elif self.auto_buy_enabled:
-                print(f"\n🤖 Auto Buy re-armed: Will buy again when price drops to ${self.auto_buy_price:,.2f}")
-            
-        except Exception as e:
-            print(f"❌ Sell error: {str(e)}")
+        
+        if trade['side'] == 'BUY' or trade.get('partial'):
+            # Disable buy button during active position (a partial sell leaves one)
+            self.buy_button.configure(state='disabled')
+        elif self.is_running:
+            # Re-enable buy button after selling
+            self.buy_button.configure(state='normal')
+        
+        self.check_position()
+    
+    def on_bar(self, engine, seconds, bar):
+        """Show the last closed 1-minute bar"""
+        if seconds == 60:
+            self._on_ui_thread(self.show_bar, bar)
+    
+    def show_bar(self, bar):
+        """Render a closed 1-minute bar (Tk main loop)"""
+        self._set_var(self.candle_var,
+                f"1m  O ${bar.open:,.2f}  H ${bar.high:,.2f}  L ${bar.low:,.2f}  C ${bar.close:,.2f}  ({bar.volume:.0f} ticks)"
+            )
+    
+    def on_trigger(self, engine, side, reason):
+        """Mirror auto buy / auto sell trigger changes in the controls"""
+        self._on_ui_thread(self.show_trigger, side, reason)
+    
+    def show_trigger(self, side, reason):
+        """Render a trigger change (Tk main loop)"""
+        if side == 'BUY':
+            enabled_var, price_var = self.autobuy_enabled_var, self.autobuy_price_var
+            status_var, entry = self.autobuy_status_var, self.autobuy_price_entry
+            label, price = "Auto Buy", self.auto_buy_price
+        else:
+            enabled_var, price_var = self.autosell_enabled_var, self.autosell_price_var
+            status_var, entry = self.autosell_status_var, self.autosell_price_entry
+            label, price = "Auto Sell", self.auto_sell_price
+        
+        if reason == 'armed':
+            price_var.set(f"{price:.2f}")
+            enabled_var.set(True)
+            status_var.set(f"🟢 {label}: ACTIVE at ${price:,.2f}")
+            entry.configure(state='disabled')
+        else:
+            enabled_var.set(False)
+            status_var.set(f"⚪ {label}: Disabled (Executed)")
+            entry.configure(state='normal')
             
     def update_statistics(self):
         """Update trading statistics"""
-        win_rate = (self.winning_trades / self.trades_count * 100) if self.trades_count > 0 else 0
-        roi = ((self.balance_usd - 1000) / 1000 * 100)
+        stats = self.engine.statistics()
         
         self.stats_var.set(
-            f"Trades: {self.trades_count} | Win: {win_rate:.1f}% | "
-            f"Profit: ${self.total_profit:.2f} | ROI: {roi:+.2f}%"
+            f"Trades: {stats['trades']} | Win: {stats['win_rate']:.1f}% | "
+            f"Profit: ${stats['total_profit']:.2f} | ROI: {stats['roi']:+.2f}%"
         )
         
     def toggle_trading(self):
@@ -1196,25 +915,41 @@ class BTCTrader:
         
         if self.is_running:
             self.start_button.configure(text="Stop Monitoring")
-            self.update_thread = threading.Thread(target=self.update_price)
-            self.update_thread.daemon = True
-            self.update_thread.start()
+            if self.market_data is None:
+                api = self.api if Config.is_live_mode() and self.api.is_jwt_format else None
+                self.market_data = create_market_data_source(self.engine.product_id, api=api)
+                self.market_data.subscribe(self.post_tick, self.post_price_error)
+                attach_live_store([self.engine.candles])
+            self.market_data.start()
             
             # Enable buy button only if we don't have a position
             if self.balance_btc == 0:
                 self.buy_button.configure(state='normal')
             
-            print("\n📊 Live Monitoring Started")
-            print("   🔄 Price updates: 10 times per second (100ms intervals)")
-            print("   💰 Click 'Execute Buy' when ready to open a position")
+            logger.info("\n📊 Live Monitoring Started\n"
+                        f"   🔄 Price feed: {self.market_data.name}\n"
+                        "   💰 Click 'Execute Buy' when ready to open a position")
         else:
             self.start_button.configure(text="Start Monitoring")
             self.buy_button.configure(state='disabled')
-            print("\n⏸️  Monitoring stopped")
+            if self.market_data is not None:
+                self.market_data.stop()
+            logger.info("\n⏸️  Monitoring stopped")
             
     def run(self):
         """Start the application"""
         self.root.mainloop()
+        self.engine.candles.close()
+
+# Strategy state is owned by the engine; the view reads and writes it through these
+for _name in ('using_real_balance', 'balance_usd', 'balance_btc', 'last_buy_price',
+              'current_price', 'manual_entry_price', 'profit_rate', 'stop_loss',
+              'position_size', 'buy_fee_rate', 'sell_fee_rate', 'rebuy_drop',
+              'auto_mode', 'dry_run', 'auto_buy_enabled', 'auto_buy_price',
+              'auto_buy_executed', 'auto_sell_enabled', 'auto_sell_price',
+              'trades_count', 'winning_trades', 'total_profit'):
+    setattr(BTCTrader, _name, _engine_property(_name))
+
 
 if __name__ == "__main__":
     app = BTCTrader()
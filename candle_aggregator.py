@@ -0,0 +1,236 @@
+"""
+Candle Aggregator
+OHLCV bars built from the live tick stream
+
+Each interval (1s, 1m, 5m by default) keeps its closed bars in fixed-size
+NumPy ring buffers and the forming bar in plain attributes, so a tick is a
+few comparisons and assignments: nothing is allocated and nothing is
+recomputed. A bar closes when the first tick of a later bar arrives;
+intervals without ticks become flat bars at the previous close.
+
+The ticker carries no trade size, so `volume` is the number of ticks in the
+bar. Closed bars go to listeners and, when a CandleStore is attached, are
+written in batches under LIVE_<granularity> (kept apart from the exchange
+candles downloaded into the same store).
+"""
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from backtester import CANDLE_FIELDS, GRANULARITY_SECONDS
+from config import Config
+from structured_logging import get_logger
+
+
+logger = get_logger('market_data')
+
+
+Bar = namedtuple('Bar', CANDLE_FIELDS)
+
+SERIES_NAMES = {seconds: name for name, seconds in GRANULARITY_SECONDS.items()}
+SERIES_NAMES[1] = 'ONE_SECOND'
+
+
+def series_name(seconds):
+    """Store granularity label for live bars of `seconds`"""
+    return f"LIVE_{SERIES_NAMES.get(seconds, f'{seconds}S')}"
+
+
+class CandleSeries:
+    """Closed bars of one interval in ring buffers, plus the forming bar"""
+
+    def __init__(self, seconds, capacity):
+        self.seconds = seconds
+        self.capacity = capacity
+        self.time = np.zeros(capacity, dtype=np.int64)
+        self.open = np.zeros(capacity)
+        self.high = np.zeros(capacity)
+        self.low = np.zeros(capacity)
+        self.close = np.zeros(capacity)
+        self.volume = np.zeros(capacity)
+        self.head = 0          # next slot to write
+        self.count = 0         # closed bars held (<= capacity)
+        self.total = 0         # closed bars since start
+
+        # Forming bar
+        self.bar_time = None
+        self._open = self._high = self._low = self._close = 0.0
+        self._volume = 0
+
+    def __len__(self):
+        return self.count
+
+    def update(self, price, timestamp):
+        """
+        Apply one tick
+
+        Returns:
+            int: Bars closed by this tick (0 while the bar is forming)
+        """
+        bucket = int(timestamp // self.seconds) * self.seconds
+        if bucket == self.bar_time:
+            if price > self._high:
+                self._high = price
+            elif price < self._low:
+                self._low = price
+            self._close = price
+            self._volume += 1
+            return 0
+
+        closed = 0
+        if self.bar_time is not None:
+            if bucket < self.bar_time:
+                return 0  # late tick from a feed switch; the bar it belongs to is closed
+            self._push(self.bar_time, self._open, self._high, self._low, self._close, self._volume)
+            closed = 1
+
+            # Quiet intervals become flat bars (at most one buffer's worth)
+            empty = (bucket - self.bar_time) // self.seconds - 1
+            first = bucket - min(empty, self.capacity) * self.seconds
+            for bar_time in range(first, bucket, self.seconds):
+                self._push(bar_time, self._close, self._close, self._close, self._close, 0)
+                closed += 1
+
+        self.bar_time = bucket
+        self._open = self._high = self._low = self._close = price
+        self._volume = 1
+        return closed
+
+    def _push(self, bar_time, open_, high, low, close, volume):
+        i = self.head
+        self.time[i] = bar_time
+        self.open[i] = open_
+        self.high[i] = high
+        self.low[i] = low
+        self.close[i] = close
+        self.volume[i] = volume
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+        self.total += 1
+
+    def bar(self, age=0):
+        """Closed bar `age` bars back (0 = the last closed bar), or None"""
+        if age >= self.count:
+            return None
+        i = (self.head - 1 - age) % self.capacity
+        return Bar(int(self.time[i]), float(self.open[i]), float(self.high[i]),
+                   float(self.low[i]), float(self.close[i]), float(self.volume[i]))
+
+    def current(self):
+        """The forming bar, or None before the first tick"""
+        if self.bar_time is None:
+            return None
+        return Bar(self.bar_time, self._open, self._high, self._low, self._close, float(self._volume))
+
+    def arrays(self, count=None):
+        """
+        The last `count` closed bars (default: all held), oldest first
+
+        Returns:
+            dict: Candle arrays in the layout backtester and CandleStore use
+        """
+        count = self.count if count is None else min(count, self.count)
+        start = (self.head - count) % self.capacity
+        if start + count <= self.capacity:
+            index = slice(start, start + count)
+        else:
+            index = np.r_[start:self.capacity, 0:self.head]
+        return {name: getattr(self, name)[index].copy() for name in CANDLE_FIELDS}
+
+
+class CandleAggregator:
+    """
+    Bars of several intervals for one product, fed tick by tick
+
+    Not thread-safe: feed it from one thread (the engine calls it under
+    its lock). Store writes run on a background thread.
+    """
+
+    def __init__(self, product_id, intervals=None, capacity=None, store=None, flush_every=None):
+        self.product_id = product_id
+        intervals = Config.CANDLE_INTERVALS if intervals is None else intervals
+        capacity = Config.CANDLE_BUFFER_BARS if capacity is None else capacity
+        self.series = {seconds: CandleSeries(seconds, capacity) for seconds in sorted(intervals)}
+        self._series = list(self.series.values())
+        self.store = store
+        self.flush_every = Config.CANDLE_FLUSH_BARS if flush_every is None else flush_every
+
+        self._listeners = []
+        self._unflushed = {seconds: 0 for seconds in self.series}
+        self._writer = None
+
+    def __getitem__(self, seconds):
+        return self.series[seconds]
+
+    def add_listener(self, on_bar):
+        """Register on_bar(seconds, bar), called for every closed bar"""
+        self._listeners.append(on_bar)
+
+    def on_tick(self, tick):
+        """Apply a market_data.Tick to every interval"""
+        timestamp = tick.timestamp if tick.timestamp is not None else time.time()
+        price = tick.price
+        for series in self._series:
+            closed = series.update(price, timestamp)
+            if closed:
+                self._closed(series, closed)
+
+    def _closed(self, series, closed):
+        for listener in self._listeners:
+            for age in range(min(closed, series.count) - 1, -1, -1):
+                try:
+                    listener(series.seconds, series.bar(age))
+                except Exception as e:
+                    logger.error(f"❌ Bar listener error: {e}")
+
+        if self.store is not None:
+            unflushed = min(self._unflushed[series.seconds] + closed, series.capacity)
+            self._unflushed[series.seconds] = unflushed
+            if unflushed >= self.flush_every:
+                self._flush_series(series)
+
+    def _flush_series(self, series, wait=False):
+        """Hand the closed bars not yet written to the store writer"""
+        count = self._unflushed[series.seconds]
+        if not count:
+            return
+        self._unflushed[series.seconds] = 0
+        candles = series.arrays(count)
+        if self._writer is None:
+            self._writer = ThreadPoolExecutor(max_workers=1)
+        future = self._writer.submit(self._write, series_name(series.seconds), candles)
+        if wait:
+            future.result()
+
+    def _write(self, granularity, candles):
+        try:
+            self.store.append(self.product_id, candles, granularity)
+        except Exception as e:
+            logger.warning(f"⚠️  Could not store {granularity} bars for {self.product_id}: {e}")
+
+    def flush(self):
+        """Write every closed bar not yet stored and wait for the writes"""
+        if self.store is None:
+            return
+        for series in self._series:
+            self._flush_series(series, wait=True)
+
+    def close(self):
+        """Flush and stop the writer thread"""
+        self.flush()
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+
+
+def attach_live_store(aggregators):
+    """Write closed live bars to the shared CandleStore (if CANDLE_LIVE_STORE is on)"""
+    if not Config.CANDLE_LIVE_STORE:
+        return
+    from candle_store import get_candle_store
+    store = get_candle_store()
+    for aggregator in aggregators:
+        aggregator.store = store
@@ -0,0 +1,409 @@
+"""
+Candle Store
+Local OHLCV history per product and granularity, downloaded once
+
+Each product/granularity pair is a directory of segments - sorted,
+non-overlapping runs of bars, one .npy file per column (time as int64,
+prices and volume as float64) - listed with their time ranges in
+segments.json, plus coverage.npy, the [start, end) ranges already
+downloaded. Columns are opened with mmap_mode='r', so a range query is a
+binary search on the time column and returns views into the mapped files -
+nothing is copied or parsed (a range spanning several segments is joined).
+
+Segment files are never overwritten: a write stores the new bars merged
+with the segments they overlap as a new segment, swaps segments.json, and
+removes the segments it replaced once nothing maps them (Windows refuses to
+replace or delete a mapped file, so those are retried after later writes).
+Bars after the end of the series only extend a last segment smaller than
+CANDLE_SEGMENT_BARS, so live appends never rewrite the stored history.
+
+Missing ranges (requested minus covered) are cut into request-sized chunks
+and downloaded by a thread pool. Every request goes through the shared
+rate limiter, so adding workers never exceeds the public request budget.
+Coverage is tracked separately from the bars, so windows in which Coinbase
+has no candles (no trades) are not downloaded again.
+
+Usage:
+    python candle_store.py --product BTC-USD --start 2021-01-01 --end 2025-01-01
+    python backtester.py --store --product BTC-USD --start 2024-01-01 --end 2025-01-01
+"""
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import numpy as np
+
+from backtester import CANDLE_FIELDS, CANDLES_PER_REQUEST, GRANULARITY_SECONDS, candles_from_rows, parse_date
+from config import Config
+from structured_logging import get_logger
+
+
+logger = get_logger('market_data')
+
+
+MANIFEST = 'segments.json'
+ALL_TIME = (np.iinfo(np.int64).min, np.iinfo(np.int64).max)
+
+
+class CandleStore:
+    """
+    Memory-mapped candle cache under `root` (one directory per product and granularity)
+
+    Reads are safe from any thread; downloads and writes for the same
+    series are serialized by a per-store lock.
+    """
+
+    def __init__(self, root=None, api=None, workers=None, flush_every=None, segment_bars=None):
+        self.root = root or Config.CANDLE_STORE_DIR
+        self._api = api
+        self.workers = Config.CANDLE_DOWNLOAD_WORKERS if workers is None else workers
+        self.flush_every = Config.CANDLE_FLUSH_EVERY if flush_every is None else flush_every
+        self.segment_bars = Config.CANDLE_SEGMENT_BARS if segment_bars is None else segment_bars
+        self._maps = {}  # segment directory -> mapped column dict
+        self._manifests = {}  # (product_id, granularity) -> segment list of segments.json
+        self._lock = threading.Lock()
+        self._map_lock = threading.Lock()
+
+    @property
+    def api(self):
+        if self._api is None:
+            from coinbase_complete_api import CoinbaseCompleteAPI
+            self._api = CoinbaseCompleteAPI()
+        return self._api
+
+    def path(self, product_id, granularity):
+        """Directory holding one series"""
+        return os.path.join(self.root, product_id, granularity)
+
+    # ==================== READS ====================
+
+    def segments(self, product_id, granularity='ONE_MINUTE'):
+        """
+        Stored segments of a series in time order
+
+        Returns:
+            list: [{'name', 'start', 'end', 'bars'}, ...] (start/end are the
+                  first and last bar times)
+        """
+        key = (product_id, granularity)
+        segments = self._manifests.get(key)
+        if segments is None:
+            path = os.path.join(self.path(product_id, granularity), MANIFEST)
+            try:
+                with open(path) as f:
+                    segments = json.load(f)
+            except FileNotFoundError:
+                segments = []
+            self._manifests[key] = segments
+        return segments
+
+    def _columns(self, product_id, granularity, segment):
+        """Mapped columns of one segment (mapped on first use)"""
+        directory = os.path.join(self.path(product_id, granularity), segment['name'])
+        columns = self._maps.get(directory)
+        if columns is None:
+            with self._map_lock:
+                columns = self._maps.get(directory)
+                if columns is None:
+                    columns = {name: np.load(os.path.join(directory, f'{name}.npy'), mmap_mode='r')
+                               for name in CANDLE_FIELDS}
+                    self._maps[directory] = columns
+        return columns
+
+    def _read(self, product_id, granularity, start, end):
+        """Bars of [start, end) from the segments it touches (views if it touches one)"""
+        for attempt in range(3):
+            try:
+                parts = [self._columns(product_id, granularity, segment)
+                         for segment in self.segments(product_id, granularity)
+                         if segment['end'] >= start and segment['start'] < end]
+                break
+            except FileNotFoundError:
+                # Another process replaced the segments after segments.json was read
+                self._manifests.pop((product_id, granularity), None)
+        else:
+            raise FileNotFoundError(f"Candle segments of {product_id} {granularity} keep changing")
+
+        sliced = []
+        for columns in parts:
+            lo, hi = np.searchsorted(columns['time'], [start, end])
+            if hi > lo:
+                sliced.append({name: column[lo:hi] for name, column in columns.items()})
+        if not sliced:
+            return _empty()
+        if len(sliced) == 1:
+            return sliced[0]
+        return {name: np.concatenate([columns[name] for columns in sliced]) for name in CANDLE_FIELDS}
+
+    def load(self, product_id, granularity='ONE_MINUTE'):
+        """
+        Every stored bar of a series as memory-mapped arrays
+
+        Returns:
+            dict: {'time', 'open', 'high', 'low', 'close', 'volume'} (read-only,
+                  empty arrays if nothing is stored)
+        """
+        return self._read(product_id, granularity, ALL_TIME[0], ALL_TIME[1])
+
+    def query(self, product_id, start, end, granularity='ONE_MINUTE'):
+        """
+        Stored bars with start <= time < end, as views (no copy within one segment)
+
+        The views stay valid after later writes: segment files are never
+        rewritten in place.
+
+        Args:
+            start (int): UNIX seconds (inclusive)
+            end (int): UNIX seconds (exclusive)
+
+        Returns:
+            dict: Candle arrays in the layout backtester.run_backtest takes
+        """
+        return self._read(product_id, granularity, int(start), int(end))
+
+    def coverage(self, product_id, granularity='ONE_MINUTE'):
+        """Downloaded [start, end) ranges as an (n, 2) int64 array, sorted and disjoint"""
+        path = os.path.join(self.path(product_id, granularity), 'coverage.npy')
+        if not os.path.exists(path):
+            return np.empty((0, 2), dtype=np.int64)
+        return np.load(path)
+
+    def missing_ranges(self, product_id, start, end, granularity='ONE_MINUTE'):
+        """
+        Parts of [start, end) not downloaded yet
+
+        start is rounded down and end up to the bar grid; the bar still
+        forming (and anything later) is never reported missing.
+
+        Returns:
+            list: [(start, end), ...] in time order
+        """
+        step = GRANULARITY_SECONDS[granularity]
+        start = int(start) // step * step
+        end = min(-(-int(end) // step) * step, int(time.time()) // step * step)
+
+        missing = []
+        cursor = start
+        for covered_start, covered_end in self.coverage(product_id, granularity):
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, int(covered_start)))
+            cursor = max(cursor, int(covered_end))
+        if cursor < end:
+            missing.append((cursor, end))
+        return missing
+
+    # ==================== DOWNLOADS ====================
+
+    def ensure(self, product_id, start, end, granularity='ONE_MINUTE'):
+        """
+        Download whatever part of [start, end) is missing
+
+        Chunks are fetched in parallel and written every `flush_every`
+        chunks, so an interrupted download keeps what it already has. Failed
+        chunks stay missing and are retried by the next call.
+
+        Returns:
+            dict: requests (chunks fetched), candles (bars received),
+                  failed (chunks that raised)
+        """
+        step = GRANULARITY_SECONDS[granularity] * CANDLES_PER_REQUEST
+        with self._lock:
+            chunks = [
+                (chunk_start, min(chunk_start + step, range_end))
+                for range_start, range_end in self.missing_ranges(product_id, start, end, granularity)
+                for chunk_start in range(range_start, range_end, step)
+            ]
+            stats = {'requests': 0, 'candles': 0, 'failed': 0}
+            if not chunks:
+                return stats
+
+            logger.info(f"📥 Downloading {len(chunks)} candle chunks for {product_id} {granularity} "
+                        f"({self.workers} workers)")
+            rows, covered = [], []
+            with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+                futures = {pool.submit(self._fetch_chunk, product_id, chunk, granularity): chunk
+                           for chunk in chunks}
+                for future in as_completed(futures):
+                    try:
+                        chunk_rows = future.result()
+                    except Exception as e:
+                        stats['failed'] += 1
+                        logger.warning(f"⚠️  Candle chunk {futures[future]} failed: {e}")
+                        continue
+                    rows.extend(chunk_rows)
+                    covered.append(futures[future])
+                    stats['requests'] += 1
+                    stats['candles'] += len(chunk_rows)
+                    if len(covered) >= self.flush_every:
+                        self._merge(product_id, granularity, rows, covered)
+                        rows, covered = [], []
+
+            if covered:
+                self._merge(product_id, granularity, rows, covered)
+        return stats
+
+    def get(self, product_id, start, end, granularity='ONE_MINUTE'):
+        """Fill gaps in [start, end), then return the range as views"""
+        self.ensure(product_id, start, end, granularity)
+        return self.query(product_id, start, end, granularity)
+
+    def _fetch_chunk(self, product_id, chunk, granularity):
+        """One candles request (the API client applies the public rate limit)"""
+        chunk_start, chunk_end = chunk
+        response = self.api.get_public_product_candles(
+            product_id, start=str(chunk_start), end=str(chunk_end), granularity=granularity
+        )
+        # The endpoint's end bound is inclusive; the next chunk owns that bar
+        return [row for row in response.get('candles', []) if chunk_start <= int(row['start']) < chunk_end]
+
+    # ==================== WRITES ====================
+
+    def append(self, product_id, candles, granularity='ONE_MINUTE', covered=None):
+        """
+        Merge candle arrays into a series (newer values replace stored bars)
+
+        Args:
+            candles (dict): Candle arrays (e.g. closed bars from a live aggregator)
+            covered (list): [(start, end), ...] ranges these bars complete
+        """
+        with self._lock:
+            self._write(product_id, granularity, candles, covered or [])
+
+    def _merge(self, product_id, granularity, rows, covered):
+        self._write(product_id, granularity, candles_from_rows(rows), covered)
+        logger.debug("Stored %d candles for %s %s", len(rows), product_id, granularity)
+
+    def _write(self, product_id, granularity, candles, covered):
+        """Store the new bars merged with the segments they overlap as a new segment"""
+        directory = self.path(product_id, granularity)
+        os.makedirs(directory, exist_ok=True)
+        segments = list(self.segments(product_id, granularity))
+        new = {name: np.asarray(candles[name], dtype=_dtype(name)) for name in CANDLE_FIELDS}
+
+        if len(new['time']):
+            first, last = int(new['time'].min()), int(new['time'].max())
+            # Segments are sorted and disjoint: the overlapped ones are contiguous
+            lo = next((i for i, segment in enumerate(segments) if segment['end'] >= first), len(segments))
+            hi = lo
+            while hi < len(segments) and segments[hi]['start'] <= last:
+                hi += 1
+            # Bars after the last segment (live flushes) extend it only while it is small,
+            # so a write costs at most segment_bars stored bars however long the series grows
+            if lo == hi == len(segments) and segments and segments[-1]['bars'] < self.segment_bars:
+                lo -= 1
+            retired = segments[lo:hi]
+
+            # New bars first, so np.unique keeps them over stored duplicates
+            stored = [self._columns(product_id, granularity, segment) for segment in retired]
+            times = np.concatenate([new['time']] + [columns['time'] for columns in stored])
+            _, keep = np.unique(times, return_index=True)
+            merged = {name: np.concatenate([new[name]] + [columns[name] for columns in stored])[keep]
+                      for name in CANDLE_FIELDS}
+            segments[lo:hi] = [self._save_segment(directory, merged)]
+
+            # Swap the segment list; views already handed out keep mapping the old files
+            _save_atomic(os.path.join(directory, MANIFEST), lambda f: f.write(json.dumps(segments).encode()))
+            with self._map_lock:
+                self._manifests[(product_id, granularity)] = segments
+                for segment in retired:
+                    self._maps.pop(os.path.join(directory, segment['name']), None)
+            self._sweep(directory, segments)
+
+        ranges = np.concatenate([self.coverage(product_id, granularity),
+                                 np.asarray(covered, dtype=np.int64).reshape(-1, 2)])
+        _save_atomic(os.path.join(directory, 'coverage.npy'), lambda f: np.save(f, _union(ranges)))
+
+    def _save_segment(self, directory, columns):
+        """Write columns as a segment under a name never used before"""
+        name = f'seg-{uuid.uuid4().hex}'
+        tmp = os.path.join(directory, f'tmp-{name}')
+        os.makedirs(tmp)
+        for field, column in columns.items():
+            np.save(os.path.join(tmp, f'{field}.npy'), column)
+        os.rename(tmp, os.path.join(directory, name))
+        return {'name': name, 'start': int(columns['time'][0]), 'end': int(columns['time'][-1]),
+                'bars': len(columns['time'])}
+
+    def _sweep(self, directory, segments):
+        """Remove unlisted segments (one still mapped, e.g. on Windows, is retried after the next write)"""
+        active = {segment['name'] for segment in segments}
+        for name in os.listdir(directory):
+            if name.startswith(('seg-', 'tmp-')) and name not in active:
+                shutil.rmtree(os.path.join(directory, name), ignore_errors=True)
+
+
+def _dtype(name):
+    return np.int64 if name == 'time' else np.float64
+
+
+def _empty():
+    return {name: np.empty(0, dtype=_dtype(name)) for name in CANDLE_FIELDS}
+
+
+def _union(ranges):
+    """Merge overlapping or touching [start, end) ranges"""
+    if len(ranges) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    ranges = ranges[np.argsort(ranges[:, 0], kind='stable')]
+    merged = [list(ranges[0])]
+    for start, end in ranges[1:]:
+        if start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return np.array(merged, dtype=np.int64)
+
+
+def _save_atomic(path, write):
+    """write(file) to a temporary file, then rename over `path` (only files that are never mapped)"""
+    tmp = f'{path}.tmp'
+    with open(tmp, 'wb') as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+_shared_store = None
+_shared_store_lock = threading.Lock()
+
+
+def get_candle_store():
+    """Process-wide CandleStore under Config.CANDLE_STORE_DIR"""
+    global _shared_store
+    if _shared_store is None:
+        with _shared_store_lock:
+            if _shared_store is None:
+                _shared_store = CandleStore()
+    return _shared_store
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description="Download candles into the local store")
+    parser.add_argument('--product', default=Config.TRADING_PAIR, help="Comma-separated products")
+    parser.add_argument('--start', required=True, help="Start date (YYYY-MM-DD)")
+    parser.add_argument('--end', required=True, help="End date (YYYY-MM-DD)")
+    parser.add_argument('--granularity', default='ONE_MINUTE', choices=sorted(GRANULARITY_SECONDS))
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--root', default=None, help=f"Store directory (default: {Config.CANDLE_STORE_DIR})")
+    args = parser.parse_args()
+
+    store = CandleStore(args.root, workers=args.workers)
+    start, end = parse_date(args.start), parse_date(args.end)
+    for product_id in [p.strip() for p in args.product.split(',') if p.strip()]:
+        stats = store.ensure(product_id, start, end, args.granularity)
+        bars = len(store.query(product_id, start, end, args.granularity)['time'])
+        print(f"✅ {product_id} {args.granularity}: {bars:,} bars stored "
+              f"({stats['requests']} requests, {stats['candles']:,} new, {stats['failed']} failed)")
+
+
+if __name__ == '__main__':
+    main()
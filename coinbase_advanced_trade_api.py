@@ -2,12 +2,12 @@
 Coinbase Advanced Trade API Integration
 Using official v3 brokerage endpoints
 """
-import requests
 import hmac
 import hashlib
 import time
 import json
 from config import Config
+from http_transport import get_transport
 
 
 class CoinbaseAdvancedTradeAPI:
@@ -20,6 +20,7 @@ class CoinbaseAdvancedTradeAPI:
         self.api_key = Config.COINBASE_API_KEY
         self.api_secret = Config.COINBASE_API_SECRET
         self.is_live = Config.is_live_mode()
+        self.http = get_transport()
     
     def _generate_signature(self, timestamp, method, path, body=''):
         """Generate HMAC-SHA256 signature for API request"""
@@ -52,9 +53,9 @@ class CoinbaseAdvancedTradeAPI:
         url = f"{self.BASE_URL}{path}"
         
         if method == 'GET':
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.http.get(url, headers=headers, timeout=10)
         elif method == 'POST':
-            response = requests.post(url, headers=headers, data=body, timeout=10)
+            response = self.http.post(url, headers=headers, data=body, timeout=10)
         else:
             raise ValueError(f"Unsupported method: {method}")
         
@@ -64,7 +65,7 @@ class CoinbaseAdvancedTradeAPI:
     def get_spot_price(self, pair='BTC-USD'):
         """Get current spot price (public endpoint - no auth needed)"""
         url = f"{self.BASE_URL}/v2/prices/{pair}/spot"
-        response = requests.get(url, timeout=10)
+        response = self.http.get(url, timeout=10)
         response.raise_for_status()
         data = response.json()
         return float(data['data']['amount'])
@@ -39,10 +39,91 @@ class Config:
     
     # Trading Pair
     TRADING_PAIR = os.getenv('TRADING_PAIR', 'BTC-USD')
+    TRADING_PAIRS = [p.strip() for p in os.getenv('TRADING_PAIRS', TRADING_PAIR).split(',') if p.strip()]  # headless engine, comma-separated
+    
+    # Market Data
+    MARKET_DATA_SOURCE = os.getenv('MARKET_DATA_SOURCE', 'websocket')  # websocket or rest
+    COINBASE_WS_URL = os.getenv('COINBASE_WS_URL', 'wss://advanced-trade-ws.coinbase.com')
+    PRICE_POLL_INTERVAL = float(os.getenv('PRICE_POLL_INTERVAL', '0.1'))  # seconds (rest source)
+    QUOTE_POLL_MIN_INTERVAL = float(os.getenv('QUOTE_POLL_MIN_INTERVAL', '0.2'))  # seconds (batched best bid/ask)
+    QUOTE_POLL_MAX_INTERVAL = float(os.getenv('QUOTE_POLL_MAX_INTERVAL', '5.0'))  # seconds (slow API / errors)
+    QUOTE_POLL_LATENCY_FACTOR = float(os.getenv('QUOTE_POLL_LATENCY_FACTOR', '2.0'))  # cycle = latency x factor
+    GUI_FPS = float(os.getenv('GUI_FPS', '30'))  # GUI refreshes per second (display only; every tick is traded on)
+    
+    # Candle Store
+    CANDLE_STORE_DIR = os.getenv('CANDLE_STORE_DIR', os.path.join('data', 'candles'))  # .npy columns per product
+    CANDLE_DOWNLOAD_WORKERS = int(os.getenv('CANDLE_DOWNLOAD_WORKERS', '4'))  # parallel chunk downloads
+    CANDLE_FLUSH_EVERY = int(os.getenv('CANDLE_FLUSH_EVERY', '500'))  # chunks per write during downloads
+    CANDLE_SEGMENT_BARS = int(os.getenv('CANDLE_SEGMENT_BARS', '50000'))  # bars appended to a segment before a new one starts
+    
+    # Live Candles (built from ticks)
+    CANDLE_INTERVALS = [int(s) for s in os.getenv('CANDLE_INTERVALS', '1,60,300').split(',') if s.strip()]  # seconds
+    CANDLE_BUFFER_BARS = int(os.getenv('CANDLE_BUFFER_BARS', '1440'))  # closed bars kept per interval
+    CANDLE_LIVE_STORE = os.getenv('CANDLE_LIVE_STORE', 'false').lower() == 'true'  # write closed bars to the store
+    CANDLE_FLUSH_BARS = int(os.getenv('CANDLE_FLUSH_BARS', '60'))  # closed bars per store write
+    
+    # Indicators (over live bars)
+    INDICATOR_INTERVAL = int(os.getenv('INDICATOR_INTERVAL', '60'))  # bar seconds the indicators follow
+    INDICATOR_EMA_PERIOD = int(os.getenv('INDICATOR_EMA_PERIOD', '20'))
+    INDICATOR_RSI_PERIOD = int(os.getenv('INDICATOR_RSI_PERIOD', '14'))
+    INDICATOR_ATR_PERIOD = int(os.getenv('INDICATOR_ATR_PERIOD', '14'))
+    INDICATOR_BOLLINGER_PERIOD = int(os.getenv('INDICATOR_BOLLINGER_PERIOD', '20'))
+    INDICATOR_BOLLINGER_K = float(os.getenv('INDICATOR_BOLLINGER_K', '2.0'))  # standard deviations
+    RSI_BUY_MAX = float(os.getenv('RSI_BUY_MAX', '0'))  # auto buys wait for RSI <= this (0 = off)
+    
+    # Order pre-validation (product increments and size limits)
+    ORDER_VALIDATION = os.getenv('ORDER_VALIDATION', 'true').lower() == 'true'  # round and check orders locally
+    PRODUCT_METADATA_TTL = float(os.getenv('PRODUCT_METADATA_TTL', '3600'))  # seconds before product rules are refreshed
+    
+    # HTTP Connection Pool
+    HTTP_POOL_CONNECTIONS = int(os.getenv('HTTP_POOL_CONNECTIONS', '4'))  # hosts kept pooled
+    HTTP_POOL_MAXSIZE = int(os.getenv('HTTP_POOL_MAXSIZE', '16'))  # connections per host
+    API_MAX_CONCURRENCY = int(os.getenv('API_MAX_CONCURRENCY', '8'))  # async client in-flight limit
+    
+    # Rate Limits (Coinbase: 30/s private per key, 10/s public per IP)
+    RATE_LIMIT_PRIVATE = float(os.getenv('RATE_LIMIT_PRIVATE', '30'))  # requests per second
+    RATE_LIMIT_PUBLIC = float(os.getenv('RATE_LIMIT_PUBLIC', '10'))  # requests per second
+    RATE_LIMIT_MAX_RETRIES = int(os.getenv('RATE_LIMIT_MAX_RETRIES', '3'))  # retries after HTTP 429
+    
+    # Order Retries (same client_order_id on every attempt)
+    ORDER_MAX_ATTEMPTS = int(os.getenv('ORDER_MAX_ATTEMPTS', '4'))
+    ORDER_RETRY_BASE = float(os.getenv('ORDER_RETRY_BASE', '0.5'))  # seconds, doubled per attempt
+    ORDER_RETRY_MAX = float(os.getenv('ORDER_RETRY_MAX', '8.0'))  # seconds
+    ORDER_KEEPALIVE_INTERVAL = float(os.getenv('ORDER_KEEPALIVE_INTERVAL', '30'))  # seconds, 0 = off
+    ORDER_FILL_TIMEOUT = float(os.getenv('ORDER_FILL_TIMEOUT', '5.0'))  # seconds to wait for an order to settle
+    ORDER_FILL_POLL = float(os.getenv('ORDER_FILL_POLL', '0.25'))  # seconds between get_order checks
+    
+    # Slippage Check (order book walk before market orders)
+    SLIPPAGE_CHECK = os.getenv('SLIPPAGE_CHECK', 'true').lower() == 'true'
+    SLIPPAGE_MAX_PCT = float(os.getenv('SLIPPAGE_MAX_PCT', '0.5'))  # vs best bid/ask
+    SLIPPAGE_ACTION = os.getenv('SLIPPAGE_ACTION', 'none')  # none, split or limit
+    SLIPPAGE_BOOK_MAX_AGE = float(os.getenv('SLIPPAGE_BOOK_MAX_AGE', '2.0'))  # seconds between background book polls
+    SLIPPAGE_BOOK_LIMIT = int(os.getenv('SLIPPAGE_BOOK_LIMIT', '100'))  # levels per side
+    ORDER_MAX_CHILDREN = int(os.getenv('ORDER_MAX_CHILDREN', '5'))
+    ORDER_SPLIT_DELAY = float(os.getenv('ORDER_SPLIT_DELAY', '1.0'))  # seconds between child orders
+    
+    # Latency Instrumentation
+    LATENCY_EXPORTER_PORT = int(os.getenv('LATENCY_EXPORTER_PORT', '0'))  # 0 = exporter off
+    
+    # Metrics
+    METRICS_PORT = int(os.getenv('METRICS_PORT', '0'))  # Prometheus /metrics, 0 = off
+    
+    # Logging
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_LEVELS = os.getenv('LOG_LEVELS', '')  # per subsystem, e.g. engine=DEBUG,api=WARNING
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'text')  # text or json
+    LOG_FILE = os.getenv('LOG_FILE', '')  # JSON lines, empty = console only
+    LOG_REPEAT_WINDOW = float(os.getenv('LOG_REPEAT_WINDOW', '10'))  # seconds info/debug repeats are collapsed, 0 = keep all
+    LOG_TICK_SAMPLE = int(os.getenv('LOG_TICK_SAMPLE', '100'))  # log every Nth tick at DEBUG
+    
+    # Fill Ledger
+    FILL_LEDGER_PATH = os.getenv('FILL_LEDGER_PATH', 'data/fills.sqlite3')
     
     # Strategy Parameters
     PROFIT_TARGET = float(os.getenv('PROFIT_TARGET', '1.5'))
     STOP_LOSS = float(os.getenv('STOP_LOSS', '1.0'))
+    TRAILING_ACTIVATION_PCT = float(os.getenv('TRAILING_ACTIVATION_PCT', '5.0'))  # stop trails the high above entry + this
+    TRAILING_ATR_MULTIPLE = float(os.getenv('TRAILING_ATR_MULTIPLE', '0'))  # trail distance in ATRs (0 = STOP_LOSS %)
     
     # Auto Trading
     AUTO_BUY_ENABLED = os.getenv('AUTO_BUY_ENABLED', 'false').lower() == 'true'
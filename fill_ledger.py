@@ -0,0 +1,257 @@
+"""
+Fill Ledger
+Local SQLite store of fills with incremental sync and running buy totals
+
+Average entry price becomes a single-row lookup instead of downloading and
+summing every fill on each call.
+
+Usage:
+    python fill_ledger.py sync    [--product BTC-USD] [--db path]
+    python fill_ledger.py average [--product BTC-USD] [--db path]
+    python fill_ledger.py resync  [--product BTC-USD] [--db path]
+    python fill_ledger.py compact [--keep-days 90] [--db path]
+"""
+import argparse
+import os
+import sqlite3
+import threading
+from datetime import datetime, timedelta, timezone
+
+from config import Config
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fills (
+    fill_id     TEXT PRIMARY KEY,
+    product_id  TEXT NOT NULL,
+    order_id    TEXT,
+    side        TEXT,
+    price       REAL,
+    size        REAL,
+    commission  REAL,
+    trade_time  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_fills_product_time ON fills (product_id, trade_time);
+
+CREATE TABLE IF NOT EXISTS totals (
+    product_id       TEXT PRIMARY KEY,
+    total_bought     REAL NOT NULL DEFAULT 0,
+    total_spent      REAL NOT NULL DEFAULT 0,
+    buy_count        INTEGER NOT NULL DEFAULT 0,
+    fill_count       INTEGER NOT NULL DEFAULT 0,
+    last_trade_time  TEXT
+);
+"""
+
+
+class FillLedger:
+    """
+    SQLite-backed fill store
+
+    - sync() only asks the API for fills at or after the last synced
+      trade_time; duplicates are ignored by fill id
+    - Running totals (bought, spent, buy count) are updated in the same
+      transaction as the inserted fills, so average_entry() is O(1)
+    - resync() rebuilds a product from scratch, compact() prunes old raw
+      fills (totals are kept) and reclaims disk space
+    """
+
+    def __init__(self, path=None):
+        self.path = path or Config.FILL_LEDGER_PATH
+
+        if self.path != ':memory:':
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._lock = threading.Lock()
+
+        with self._lock, self._conn:
+            self._conn.executescript(SCHEMA)
+
+    def close(self):
+        """Close the database"""
+        self._conn.close()
+
+    def last_trade_time(self, product_id):
+        """Newest synced trade_time for a product (None before the first sync)"""
+        row = self._conn.execute(
+            "SELECT last_trade_time FROM totals WHERE product_id = ?", (product_id,)
+        ).fetchone()
+        return row['last_trade_time'] if row else None
+
+    def add_fills(self, product_id, fills):
+        """
+        Insert fills and update running totals
+
+        Args:
+            product_id (str): Product the fills belong to
+            fills (iterable): Fill dicts as returned by list_fills (read in full first)
+
+        Returns:
+            list: Fills that were new to the ledger
+        """
+        # Fetch every page (iter_fills is lazy) before taking the lock and opening the transaction
+        fills = list(fills)
+        added = []
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR IGNORE INTO totals (product_id) VALUES (?)", (product_id,)
+            )
+
+            bought = spent = 0.0
+            buys = count = 0
+            newest = self.last_trade_time(product_id)
+
+            for fill in fills:
+                fill_id = fill.get('entry_id') or fill.get('trade_id')
+                side = fill.get('side')
+                price = float(fill.get('price', 0))
+                size = float(fill.get('size', 0))
+                trade_time = fill.get('trade_time')
+
+                cursor = self._conn.execute(
+                    "INSERT OR IGNORE INTO fills "
+                    "(fill_id, product_id, order_id, side, price, size, commission, trade_time) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (fill_id, product_id, fill.get('order_id'), side, price, size,
+                     float(fill.get('commission', 0) or 0), trade_time)
+                )
+                if cursor.rowcount != 1:
+                    continue  # already in the ledger
+
+                added.append(fill)
+                count += 1
+                if side == 'BUY':
+                    bought += size
+                    spent += size * price
+                    buys += 1
+                if trade_time and (newest is None or trade_time > newest):
+                    newest = trade_time
+
+            self._conn.execute(
+                "UPDATE totals SET total_bought = total_bought + ?, total_spent = total_spent + ?, "
+                "buy_count = buy_count + ?, fill_count = fill_count + ?, last_trade_time = ? "
+                "WHERE product_id = ?",
+                (bought, spent, buys, count, newest, product_id)
+            )
+
+        return added
+
+    def sync(self, api, product_id='BTC-USD', page_size=100):
+        """
+        Fetch only fills newer than the last sync
+
+        Args:
+            api: CoinbaseCompleteAPI (anything with iter_fills)
+            product_id (str): Product to sync
+            page_size (int): Fills requested per page
+
+        Returns:
+            list: Newly stored fills
+        """
+        since = self.last_trade_time(product_id)
+        fills = api.iter_fills(product_id=product_id, start_date=since, page_size=page_size)
+        return self.add_fills(product_id, fills)
+
+    def resync(self, api, product_id='BTC-USD', page_size=100):
+        """Drop a product's fills and totals and download them again"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM fills WHERE product_id = ?", (product_id,))
+            self._conn.execute("DELETE FROM totals WHERE product_id = ?", (product_id,))
+        return self.sync(api, product_id, page_size=page_size)
+
+    def compact(self, keep_days=None):
+        """
+        Prune raw fills older than keep_days (totals are untouched) and VACUUM
+
+        Returns:
+            int: Number of fill rows removed
+        """
+        removed = 0
+        if keep_days is not None:
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=keep_days)).strftime('%Y-%m-%dT%H:%M:%S')
+            with self._lock, self._conn:
+                removed = self._conn.execute(
+                    "DELETE FROM fills WHERE trade_time < ?", (cutoff,)
+                ).rowcount
+
+        with self._lock:
+            self._conn.execute("VACUUM")
+
+        return removed
+
+    def average_entry(self, product_id='BTC-USD'):
+        """
+        Average entry price from running totals
+
+        Returns:
+            dict: {
+                'average_price': float,
+                'total_btc_bought': float,
+                'total_usd_spent': float,
+                'buy_count': int,
+                'fill_count': int,
+                'last_trade_time': str or None
+            }
+        """
+        row = self._conn.execute(
+            "SELECT * FROM totals WHERE product_id = ?", (product_id,)
+        ).fetchone()
+
+        if row is None or row['total_bought'] <= 0:
+            return {
+                'average_price': 0,
+                'total_btc_bought': 0,
+                'total_usd_spent': 0,
+                'buy_count': 0,
+                'fill_count': row['fill_count'] if row else 0,
+                'last_trade_time': row['last_trade_time'] if row else None
+            }
+
+        return {
+            'average_price': row['total_spent'] / row['total_bought'],
+            'total_btc_bought': row['total_bought'],
+            'total_usd_spent': row['total_spent'],
+            'buy_count': row['buy_count'],
+            'fill_count': row['fill_count'],
+            'last_trade_time': row['last_trade_time']
+        }
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description="Local fill ledger")
+    parser.add_argument('command', choices=['sync', 'average', 'resync', 'compact'])
+    parser.add_argument('--product', default=Config.TRADING_PAIR)
+    parser.add_argument('--db', default=None, help="SQLite file (default: FILL_LEDGER_PATH)")
+    parser.add_argument('--keep-days', type=int, default=None, help="compact: keep raw fills this many days")
+    args = parser.parse_args()
+
+    ledger = FillLedger(args.db)
+
+    if args.command in ('sync', 'resync'):
+        from coinbase_complete_api import CoinbaseCompleteAPI
+        api = CoinbaseCompleteAPI()
+        if args.command == 'sync':
+            added = ledger.sync(api, args.product)
+        else:
+            added = ledger.resync(api, args.product)
+        print(f"✅ {args.command}: {len(added)} new fills for {args.product}")
+    elif args.command == 'compact':
+        removed = ledger.compact(keep_days=args.keep_days)
+        print(f"✅ compact: removed {removed} raw fills, database vacuumed")
+
+    totals = ledger.average_entry(args.product)
+    print(f"   Fills stored:   {totals['fill_count']}")
+    print(f"   Total Bought:   {totals['total_btc_bought']:.8f}")
+    print(f"   Total Spent:    ${totals['total_usd_spent']:,.2f}")
+    print(f"   ⭐ AVERAGE PRICE: ${totals['average_price']:,.2f}")
+
+    ledger.close()
+
+
+if __name__ == '__main__':
+    main()
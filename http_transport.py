@@ -0,0 +1,120 @@
+"""
+Shared HTTP Transport
+One pooled, keep-alive requests.Session used by every Coinbase client
+"""
+import threading
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+
+from config import Config
+
+
+class HttpTransport:
+    """
+    Pooled HTTP session with connection reuse metrics
+
+    Connections are kept alive and reused across requests (and threads), and
+    responses are requested compressed (gzip/deflate, plus br/zstd when the
+    decoders are installed). pool_stats() reports per host how many
+    connections were opened versus how many requests reused one.
+    """
+
+    def __init__(self, pool_connections=None, pool_maxsize=None, timeout=10):
+        self.pool_connections = pool_connections or Config.HTTP_POOL_CONNECTIONS
+        self.pool_maxsize = pool_maxsize or Config.HTTP_POOL_MAXSIZE
+        self.timeout = timeout
+
+        self.session = requests.Session()
+        self.session.headers.update({
+            'Accept-Encoding': ACCEPT_ENCODING,
+            'Connection': 'keep-alive',
+        })
+
+        # Retries are handled by the callers; the adapter only pools
+        self.adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=0,
+            pool_block=False
+        )
+        self.session.mount('https://', self.adapter)
+        self.session.mount('http://', self.adapter)
+
+    def request(self, method, url, **kwargs):
+        """Send a request through the shared pool"""
+        kwargs.setdefault('timeout', self.timeout)
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url, **kwargs):
+        """GET through the shared pool"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """POST through the shared pool"""
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url, **kwargs):
+        """PUT through the shared pool"""
+        return self.request('PUT', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        """DELETE through the shared pool"""
+        return self.request('DELETE', url, **kwargs)
+
+    def pool_stats(self):
+        """
+        Connection pool metrics per host
+
+        Returns:
+            dict: {
+                'https://api.coinbase.com:443': {
+                    'requests': int,             # requests sent through the pool
+                    'connections_opened': int,   # new TCP/TLS connections
+                    'connections_reused': int,   # requests served on an existing connection
+                    'idle_connections': int      # connections parked in the pool
+                }
+            }
+        """
+        stats = {}
+        pools = self.adapter.poolmanager.pools
+
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+
+            host = f"{key.key_scheme}://{key.key_host}:{key.key_port or pool.port}"
+            entry = stats.setdefault(host, {
+                'requests': 0,
+                'connections_opened': 0,
+                'connections_reused': 0,
+                'idle_connections': 0
+            })
+            entry['requests'] += pool.num_requests
+            entry['connections_opened'] += pool.num_connections
+            entry['connections_reused'] += max(0, pool.num_requests - pool.num_connections)
+            if pool.pool is not None:
+                # The pool queue is pre-filled with None placeholders; count real connections
+                entry['idle_connections'] += sum(1 for conn in list(pool.pool.queue) if conn is not None)
+
+        return stats
+
+    def close(self):
+        """Close every pooled connection"""
+        self.session.close()
+
+
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide shared transport (created on first use)"""
+    global _shared_transport
+    if _shared_transport is None:
+        with _shared_lock:
+            if _shared_transport is None:
+                _shared_transport = HttpTransport()
+    return _shared_transport
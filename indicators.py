@@ -0,0 +1,371 @@
+"""
+Indicators
+EMA, RSI, ATR and Bollinger Bands, streaming (O(1) per update) and batch
+
+The streaming classes keep only the state their formula needs (the last
+average, or a ring buffer of the window for Bollinger) and update it per
+bar or tick. The batch functions compute the same series over NumPy arrays
+for backtests: differences, true ranges, window sums (np.cumsum adds in
+order) and the final formulas are vectorized, and the recursive smoothing
+(EMA, Wilder) runs as a plain loop over the prepared values. Both paths do
+the same floating point operations in the same order, so their results are
+bit-identical - benchmark() checks that while timing them.
+
+Bollinger sums are taken over prices shifted by the first price, which
+keeps the running variance accurate at BTC price levels.
+
+Benchmark:
+    python indicators.py --benchmark
+"""
+import argparse
+import math
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from config import Config
+
+
+Bands = namedtuple('Bands', ['middle', 'upper', 'lower'])
+
+
+# ==================== STREAMING ====================
+
+class EMA:
+    """Exponential moving average seeded with the simple average of the first `period` values"""
+
+    def __init__(self, period):
+        self.period = period
+        self.alpha = 2.0 / (period + 1)
+        self.value = None
+        self._count = 0
+        self._sum = 0.0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def update(self, x):
+        """Add one value; returns the EMA (None while warming up)"""
+        if self.value is not None:
+            self.value += self.alpha * (x - self.value)
+        else:
+            self._sum += x
+            self._count += 1
+            if self._count == self.period:
+                self.value = self._sum / self.period
+        return self.value
+
+
+class _Wilder:
+    """Wilder's smoothing: simple average of the first `period` inputs, then (avg x (n-1) + x) / n"""
+
+    def __init__(self, period):
+        self.period = period
+        self.value = None
+        self._count = 0
+        self._sum = 0.0
+
+    def update(self, x):
+        if self.value is not None:
+            self.value = (self.value * (self.period - 1) + x) / self.period
+        else:
+            self._sum += x
+            self._count += 1
+            if self._count == self.period:
+                self.value = self._sum / self.period
+        return self.value
+
+
+class RSI:
+    """Relative Strength Index with Wilder's smoothing"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self.value = None
+        self._previous = None
+        self._gain = _Wilder(period)
+        self._loss = _Wilder(period)
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def update(self, x):
+        """Add one close; returns the RSI (None while warming up)"""
+        if self._previous is not None:
+            change = x - self._previous
+            gain = self._gain.update(change if change > 0 else 0.0)
+            loss = self._loss.update(-change if change < 0 else 0.0)
+            if gain is not None:
+                self.value = _rsi_value(gain, loss)
+        self._previous = x
+        return self.value
+
+
+def _rsi_value(gain, loss):
+    if loss == 0:
+        return 50.0 if gain == 0 else 100.0
+    return 100.0 - 100.0 / (1.0 + gain / loss)
+
+
+class ATR:
+    """Average True Range with Wilder's smoothing (the first bar's range is high - low)"""
+
+    def __init__(self, period=14):
+        self.period = period
+        self._close = None
+        self._average = _Wilder(period)
+
+    @property
+    def value(self):
+        return self._average.value
+
+    @property
+    def ready(self):
+        return self._average.value is not None
+
+    def update(self, high, low, close):
+        """Add one bar; returns the ATR (None while warming up)"""
+        true_range = high - low
+        if self._close is not None:
+            true_range = max(true_range, abs(high - self._close), abs(low - self._close))
+        self._close = close
+        return self._average.update(true_range)
+
+
+class BollingerBands:
+    """Moving average +/- k population standard deviations over `period` values"""
+
+    def __init__(self, period=20, k=2.0):
+        self.period = period
+        self.k = k
+        self.value = None
+        self._window = [0.0] * period  # ring buffer of shifted values
+        self._index = 0
+        self._count = 0
+        self._shift = None
+        self._sum = 0.0
+        self._sum_sq = 0.0
+
+    @property
+    def ready(self):
+        return self.value is not None
+
+    def update(self, x):
+        """Add one value; returns Bands (None while warming up)"""
+        if self._shift is None:
+            self._shift = x
+        d = x - self._shift
+        i = self._index
+        old = self._window[i]  # 0.0 until the window is full
+        self._window[i] = d
+        self._index = (i + 1) % self.period
+        self._sum += d - old
+        self._sum_sq += d * d - old * old
+        self._count += 1
+        if self._count >= self.period:
+            mean = self._sum / self.period
+            variance = self._sum_sq / self.period - mean * mean
+            std = math.sqrt(variance) if variance > 0 else 0.0
+            middle = self._shift + mean
+            self.value = Bands(middle, middle + self.k * std, middle - self.k * std)
+        return self.value
+
+
+class IndicatorSet:
+    """
+    The indicators the engine's rules read, fed one closed bar at a time
+
+    Periods default to Config (INDICATOR_*). Every update is O(1).
+    """
+
+    def __init__(self, ema_period=None, rsi_period=None, atr_period=None, bollinger_period=None, bollinger_k=None):
+        self.ema = EMA(Config.INDICATOR_EMA_PERIOD if ema_period is None else ema_period)
+        self.rsi = RSI(Config.INDICATOR_RSI_PERIOD if rsi_period is None else rsi_period)
+        self.atr = ATR(Config.INDICATOR_ATR_PERIOD if atr_period is None else atr_period)
+        self.bollinger = BollingerBands(
+            Config.INDICATOR_BOLLINGER_PERIOD if bollinger_period is None else bollinger_period,
+            Config.INDICATOR_BOLLINGER_K if bollinger_k is None else bollinger_k
+        )
+        self.bars = 0
+
+    def update(self, bar):
+        """Add one candle_aggregator.Bar (or any object with high/low/close)"""
+        close = bar.close
+        self.ema.update(close)
+        self.rsi.update(close)
+        self.atr.update(bar.high, bar.low, close)
+        self.bollinger.update(close)
+        self.bars += 1
+
+    def snapshot(self):
+        """Current values (None while warming up)"""
+        return {
+            'ema': self.ema.value,
+            'rsi': self.rsi.value,
+            'atr': self.atr.value,
+            'bollinger': self.bollinger.value
+        }
+
+
+# ==================== BATCH ====================
+
+def _smooth(inputs, period, first, recurrence):
+    """
+    Run a seeded recursive average over `inputs` (a list) into a NaN-padded array
+
+    The seed is the simple average of the first `period` inputs; output[first
+    + k] holds the value after input k.
+    """
+    out = np.full(first + len(inputs), np.nan)
+    if len(inputs) < period:
+        return out
+    total = 0.0
+    for x in inputs[:period]:
+        total += x
+    value = total / period
+    values = [value]
+    for x in inputs[period:]:
+        value = recurrence(value, x)
+        values.append(value)
+    out[first + period - 1:] = values
+    return out
+
+
+def ema(values, period):
+    """EMA of an array (NaN while warming up); matches EMA.update value for value"""
+    alpha = 2.0 / (period + 1)
+    values = np.asarray(values, dtype=float)
+    return _smooth(values.tolist(), period, 0, lambda v, x: v + alpha * (x - v))
+
+
+def _wilder(inputs, period, first):
+    return _smooth(inputs, period, first, lambda v, x: (v * (period - 1) + x) / period)
+
+
+def rsi(values, period=14):
+    """RSI of an array of closes (NaN while warming up); matches RSI.update"""
+    values = np.asarray(values, dtype=float)
+    change = np.diff(values)
+    gains = np.where(change > 0, change, 0.0)
+    losses = np.where(change < 0, -change, 0.0)
+    gain = _wilder(gains.tolist(), period, 1)
+    loss = _wilder(losses.tolist(), period, 1)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        result = 100.0 - 100.0 / (1.0 + gain / loss)
+    result = np.where(loss == 0, np.where(gain == 0, 50.0, 100.0), result)
+    result[np.isnan(gain)] = np.nan
+    return result
+
+
+def atr(high, low, close, period=14):
+    """ATR of bar arrays (NaN while warming up); matches ATR.update"""
+    high, low, close = (np.asarray(a, dtype=float) for a in (high, low, close))
+    true_range = high - low
+    if len(close) > 1:
+        previous = close[:-1]
+        true_range[1:] = np.maximum(np.maximum(true_range[1:], np.abs(high[1:] - previous)),
+                                    np.abs(low[1:] - previous))
+    return _wilder(true_range.tolist(), period, 0)
+
+
+def bollinger(values, period=20, k=2.0):
+    """
+    Bollinger Bands of an array (NaN while warming up); matches BollingerBands.update
+
+    Returns:
+        Bands: middle, upper and lower arrays
+    """
+    values = np.asarray(values, dtype=float)
+    n = len(values)
+    middle = np.full(n, np.nan)
+    if n < period:
+        return Bands(middle, middle.copy(), middle.copy())
+
+    shift = values[0]
+    d = values - shift
+    old = np.zeros(n)
+    old[period:] = d[:-period]
+    sums = np.cumsum(d - old)
+    sums_sq = np.cumsum(d * d - old * old)
+
+    mean = sums[period - 1:] / period
+    variance = sums_sq[period - 1:] / period - mean * mean
+    std = np.sqrt(np.where(variance > 0, variance, 0.0))
+    middle[period - 1:] = shift + mean
+    upper, lower = middle.copy(), middle.copy()
+    upper[period - 1:] = middle[period - 1:] + k * std
+    lower[period - 1:] = middle[period - 1:] - k * std
+    return Bands(middle, upper, lower)
+
+
+# ==================== BENCHMARK ====================
+
+def benchmark(bars=100000, seed=1):
+    """
+    Compute every indicator both ways over a random walk, compare and time them
+
+    Returns:
+        dict: bars, streaming_seconds, batch_seconds, identical (bool)
+    """
+    rng = np.random.default_rng(seed)
+    close = 60000.0 * np.exp(np.cumsum(rng.normal(0, 0.001, bars)))
+    spread = np.abs(rng.normal(0, 20.0, bars))
+    high, low = close + spread, close - spread
+
+    start = time.perf_counter()
+    indicators = IndicatorSet(ema_period=20, rsi_period=14, atr_period=14, bollinger_period=20, bollinger_k=2.0)
+    streamed = {name: np.full(bars, np.nan) for name in ('ema', 'rsi', 'atr', 'upper', 'lower')}
+    Bar = namedtuple('Bar', ['high', 'low', 'close'])
+    for i, row in enumerate(zip(high.tolist(), low.tolist(), close.tolist())):
+        indicators.update(Bar(*row))
+        values = indicators.snapshot()
+        for name in ('ema', 'rsi', 'atr'):
+            if values[name] is not None:
+                streamed[name][i] = values[name]
+        if values['bollinger'] is not None:
+            streamed['upper'][i] = values['bollinger'].upper
+            streamed['lower'][i] = values['bollinger'].lower
+    streaming_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    bands = bollinger(close, 20, 2.0)
+    batched = {
+        'ema': ema(close, 20),
+        'rsi': rsi(close, 14),
+        'atr': atr(high, low, close, 14),
+        'upper': bands.upper,
+        'lower': bands.lower
+    }
+    batch_seconds = time.perf_counter() - start
+
+    identical = all(np.array_equal(streamed[name], batched[name], equal_nan=True) for name in streamed)
+    return {
+        'bars': bars,
+        'streaming_seconds': streaming_seconds,
+        'batch_seconds': batch_seconds,
+        'identical': identical
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming and batch technical indicators")
+    parser.add_argument('--benchmark', action='store_true', help="Time and compare both modes")
+    parser.add_argument('--bars', type=int, default=100000)
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark(args.bars)
+        print(f"📈 {result['bars']:,} bars | streaming {result['streaming_seconds']:.3f}s "
+              f"({result['bars'] / result['streaming_seconds']:,.0f} bars/s) | "
+              f"batch {result['batch_seconds']:.3f}s | "
+              f"{'✅ identical' if result['identical'] else '❌ values differ'}")
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
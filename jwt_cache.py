@@ -0,0 +1,79 @@
+"""
+JWT Token Cache
+Reuses signed REST JWTs per (method, request_path) until shortly before they expire
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from coinbase import jwt_generator
+
+
+# Lifetime coinbase.jwt_generator gives every REST token (exp = nbf + 120s)
+JWT_LIFETIME = 120
+
+
+class JWTCache:
+    """
+    Thread-safe, size-bounded cache of signed REST JWTs
+
+    A token is reused for the same method and path until `refresh_margin`
+    seconds before it expires, so a burst of polling calls costs one ECDSA
+    signature instead of one per request. Least recently used entries are
+    evicted once `max_size` is reached.
+    """
+
+    def __init__(self, api_key, api_secret, max_size=256, lifetime=JWT_LIFETIME,
+                 refresh_margin=15, clock=time.time):
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.max_size = max_size
+        self.ttl = lifetime - refresh_margin
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+
+        self._tokens = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_token(self, method, request_path):
+        """Return a valid JWT for this request, signing a new one only when needed"""
+        key = (method, request_path)
+        now = self.clock()
+
+        with self._lock:
+            entry = self._tokens.get(key)
+            if entry is not None and entry[1] > now:
+                self.hits += 1
+                self._tokens.move_to_end(key)
+                return entry[0]
+            self.misses += 1
+
+        # Sign outside the lock so other paths are not blocked behind ECDSA
+        jwt_uri = jwt_generator.format_jwt_uri(method, request_path)
+        token = jwt_generator.build_rest_jwt(jwt_uri, self.api_key, self.api_secret)
+
+        with self._lock:
+            self._tokens[key] = (token, now + self.ttl)
+            self._tokens.move_to_end(key)
+            while len(self._tokens) > self.max_size:
+                self._tokens.popitem(last=False)
+
+        return token
+
+    def clear(self):
+        """Drop every cached token (e.g. after rotating credentials)"""
+        with self._lock:
+            self._tokens.clear()
+
+    def stats(self):
+        """Cache counters"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'size': len(self._tokens),
+                'hit_rate': (self.hits / total) if total else 0.0
+            }
@@ -0,0 +1,295 @@
+"""
+Latency Instrumentation
+Per-stage timings from a price trigger to the order acknowledgement
+
+A trace is started on the thread that evaluates the trigger; the layers
+below it (order building, JWT signing, the HTTP call) mark their stage with
+the module-level mark() without the trace being passed down. Marks are
+time.perf_counter_ns() stamps. When the order returns, the gap between
+consecutive stages is recorded into log-linear (HDR-style) histograms.
+
+Report:
+    python latency.py --url http://127.0.0.1:9102/latency
+    python latency.py --file latency.json
+"""
+import argparse
+import json
+import math
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import Config
+from structured_logging import get_logger
+
+
+logger = get_logger('latency')
+
+
+# Stages in the order they happen; each histogram measures the gap from the previous stage
+STAGES = ('tick_received', 'trigger_evaluated', 'order_built', 'jwt_signed', 'http_sent', 'response_parsed')
+PERCENTILES = (50.0, 90.0, 99.0, 99.9)
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of nanosecond values (HDR-style)
+
+    Values below 128ns are counted exactly; above that every power of two
+    is split into 64 sub-buckets, so a reported percentile is within 1/64
+    (1.6%) of the true value. Recording is an index calculation and one
+    list increment.
+    """
+
+    SUB_BUCKETS = 64
+    MAX_EXPONENT = 40  # up to ~2**46 ns (about 19 hours)
+
+    def __init__(self):
+        self.counts = [0] * (2 * self.SUB_BUCKETS + self.MAX_EXPONENT * self.SUB_BUCKETS)
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def _index(self, value):
+        """Bucket index of a value"""
+        if value < 2 * self.SUB_BUCKETS:
+            return value
+        shift = min(value.bit_length() - 7, self.MAX_EXPONENT)
+        return 2 * self.SUB_BUCKETS + (shift - 1) * self.SUB_BUCKETS + (value >> shift) - self.SUB_BUCKETS
+
+    def _value_at(self, index):
+        """Midpoint of a bucket"""
+        if index < 2 * self.SUB_BUCKETS:
+            return index
+        shift = (index - 2 * self.SUB_BUCKETS) // self.SUB_BUCKETS + 1
+        top = (index - 2 * self.SUB_BUCKETS) % self.SUB_BUCKETS + self.SUB_BUCKETS
+        return (top << shift) + (1 << (shift - 1))
+
+    def record(self, value):
+        """Add one value in nanoseconds"""
+        value = max(0, int(value))
+        self.counts[min(self._index(value), len(self.counts) - 1)] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def percentile(self, pct):
+        """Value (ns) at or below which pct percent of the samples fall"""
+        if self.count == 0:
+            return None
+        target = max(1, math.ceil(self.count * pct / 100.0))
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= target:
+                if index == len(self.counts) - 1:
+                    return self.max  # overflow bucket
+                return min(self._value_at(index), self.max)
+        return self.max
+
+    def summary(self):
+        """Count, mean, min, max and percentiles in microseconds"""
+        if self.count == 0:
+            return {'count': 0}
+        result = {
+            'count': self.count,
+            'mean_us': self.total / self.count / 1000,
+            'min_us': self.min / 1000,
+            'max_us': self.max / 1000
+        }
+        for pct in PERCENTILES:
+            result[f"p{pct:g}_us"] = self.percentile(pct) / 1000
+        return result
+
+
+class LatencyTrace:
+    """Stage timestamps of one triggered order"""
+
+    __slots__ = ('name', 'marks')
+
+    def __init__(self, name, started_ns=None):
+        self.name = name
+        self.marks = {'tick_received': started_ns if started_ns is not None else time.perf_counter_ns()}
+
+    def mark(self, stage, ns=None):
+        """Stamp a stage (a repeated stage, e.g. after a retry, keeps the latest time)"""
+        self.marks[stage] = ns if ns is not None else time.perf_counter_ns()
+
+    def durations(self):
+        """Gap from the previous marked stage, per stage, plus 'total' (ns)"""
+        result = {}
+        previous = None
+        for stage in STAGES:
+            if stage not in self.marks:
+                continue
+            if previous is not None:
+                result[stage] = self.marks[stage] - self.marks[previous]
+            previous = stage
+        result['total'] = self.marks[previous] - self.marks['tick_received']
+        return result
+
+
+class LatencyRecorder:
+    """Active trace per thread and the histograms of finished traces"""
+
+    def __init__(self):
+        self.histograms = {stage: LatencyHistogram() for stage in STAGES[1:] + ('total',)}
+        self.traces = {}  # trace name -> finished count
+        self.dropped = 0  # traces that never reached the exchange (dry run, rejected)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start(self, name, started_ns=None):
+        """Begin a trace on this thread (replaces an unfinished one)"""
+        trace = LatencyTrace(name, started_ns)
+        self._local.trace = trace
+        return trace
+
+    def current(self):
+        """The active trace of this thread, or None"""
+        return getattr(self._local, 'trace', None)
+
+    def mark(self, stage):
+        """Stamp a stage on this thread's trace (no-op without one)"""
+        trace = getattr(self._local, 'trace', None)
+        if trace is not None:
+            trace.marks[stage] = time.perf_counter_ns()
+
+    def finish(self):
+        """
+        End this thread's trace and record it if the order got a response
+
+        Returns:
+            dict or None: Stage durations in ns (None if dropped)
+        """
+        trace = getattr(self._local, 'trace', None)
+        self._local.trace = None
+        if trace is None:
+            return None
+
+        if 'response_parsed' not in trace.marks:
+            with self._lock:
+                self.dropped += 1
+            return None
+
+        durations = trace.durations()
+        with self._lock:
+            for stage, ns in durations.items():
+                self.histograms[stage].record(ns)
+            self.traces[trace.name] = self.traces.get(trace.name, 0) + 1
+        return durations
+
+    def snapshot(self):
+        """Histogram summaries for the exporter and report"""
+        with self._lock:
+            return {
+                'stages': {stage: hist.summary() for stage, hist in self.histograms.items()},
+                'traces': dict(self.traces),
+                'dropped': self.dropped
+            }
+
+    def dump(self, path):
+        """Write the snapshot as JSON"""
+        with open(path, 'w') as f:
+            json.dump(self.snapshot(), f, indent=2)
+
+
+_shared_recorder = None
+_shared_lock = threading.Lock()
+
+
+def get_latency_recorder():
+    """Return the process-wide latency recorder (created on first use)"""
+    global _shared_recorder
+    if _shared_recorder is None:
+        with _shared_lock:
+            if _shared_recorder is None:
+                _shared_recorder = LatencyRecorder()
+    return _shared_recorder
+
+
+def mark(stage):
+    """Stamp a stage on the current thread's trace, if one is active"""
+    get_latency_recorder().mark(stage)
+
+
+# ==================== EXPORTER ====================
+
+def start_exporter(port=None, host='127.0.0.1', recorder=None):
+    """
+    Serve the snapshot as JSON at http://host:port/latency from a daemon thread
+
+    Returns:
+        ThreadingHTTPServer or None: None if the port is 0 (disabled)
+    """
+    port = Config.LATENCY_EXPORTER_PORT if port is None else port
+    if not port:
+        return None
+    recorder = recorder or get_latency_recorder()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip('/') != '/latency':
+                self.send_error(404)
+                return
+            body = json.dumps(recorder.snapshot()).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True, name='latency-exporter').start()
+    logger.info(f"⏱️  Latency exporter on http://{host}:{server.server_port}/latency")
+    return server
+
+
+# ==================== REPORT ====================
+
+def print_report(snapshot):
+    """Print a stage table from a snapshot"""
+    print("\n" + "="*82)
+    traces = ', '.join(f"{name}: {n}" for name, n in snapshot['traces'].items()) or 'none'
+    print(f"⏱️  TRIGGER-TO-ORDER LATENCY ({traces}; dropped: {snapshot['dropped']})")
+    print("="*82)
+    print(f"{'Stage':<20} {'Count':>7} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'p99.9 ms':>9} {'Max ms':>9}")
+    for stage in STAGES[1:] + ('total',):
+        s = snapshot['stages'].get(stage, {'count': 0})
+        if not s['count']:
+            print(f"{stage:<20} {0:>7}")
+            continue
+        print(f"{stage:<20} {s['count']:>7} {s['p50_us']/1000:>9.3f} {s['p90_us']/1000:>9.3f} "
+              f"{s['p99_us']/1000:>9.3f} {s['p99.9_us']/1000:>9.3f} {s['max_us']/1000:>9.3f}")
+    print("="*82)
+
+
+def main():
+    """Command line report"""
+    parser = argparse.ArgumentParser(description="Trigger-to-order latency report")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument('--url', default=None, help="Exporter URL (default: local exporter port)")
+    source.add_argument('--file', default=None, help="Snapshot written by LatencyRecorder.dump()")
+    args = parser.parse_args()
+
+    if args.file:
+        with open(args.file) as f:
+            snapshot = json.load(f)
+    else:
+        url = args.url or f"http://127.0.0.1:{Config.LATENCY_EXPORTER_PORT}/latency"
+        with urllib.request.urlopen(url, timeout=5) as response:
+            snapshot = json.load(response)
+
+    print_report(snapshot)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,446 @@
+"""
+Market Data Sources
+Pluggable price feeds that push ticks into the trader instead of being polled
+"""
+import json
+import random
+import threading
+import time
+from collections import namedtuple
+
+import requests
+
+try:
+    from websockets.sync.client import connect as ws_connect
+    from websockets.sync.server import serve as ws_serve
+except ImportError:
+    # websockets ships with coinbase-advanced-py; without it only REST polling is available
+    ws_connect = None
+    ws_serve = None
+
+from config import Config
+from http_transport import get_transport
+from rate_limiter import get_rate_limiter, PRIORITY_LOW
+from structured_logging import get_logger
+
+
+logger = get_logger('market_data')
+
+
+# A single price update pushed to subscribers
+Tick = namedtuple('Tick', ['product_id', 'price', 'timestamp', 'sequence', 'best_bid', 'best_ask'])
+
+
+class SequenceGapError(Exception):
+    """Raised (and published to error listeners) when feed messages were skipped"""
+
+    def __init__(self, expected, received):
+        super().__init__(f"Sequence gap: expected {expected}, received {received}")
+        self.expected = expected
+        self.received = received
+
+
+class MarketDataSource:
+    """
+    Base class for price feeds
+
+    Subclasses run their own background thread and call _publish() for every
+    tick and _publish_error() for every failure. Listeners are called on that
+    background thread.
+
+    product_id may be a single product or a list; ticks carry their product.
+    """
+
+    name = "Market data"
+
+    def __init__(self, product_id=None):
+        product_id = product_id or Config.TRADING_PAIR
+        self.product_ids = [product_id] if isinstance(product_id, str) else list(product_id)
+        self.product_id = self.product_ids[0]
+        self.is_running = False
+        self.last_tick = None
+        self._tick_listeners = []
+        self._error_listeners = []
+
+    def subscribe(self, on_tick, on_error=None):
+        """Register callbacks for ticks and (optionally) errors"""
+        self._tick_listeners.append(on_tick)
+        if on_error is not None:
+            self._error_listeners.append(on_error)
+
+    def start(self):
+        """Start pushing ticks to subscribers"""
+        raise NotImplementedError
+
+    def stop(self):
+        """Stop the feed"""
+        self.is_running = False
+
+    def _publish(self, tick):
+        """Deliver a tick to every subscriber"""
+        self.last_tick = tick
+        for listener in self._tick_listeners:
+            try:
+                listener(tick)
+            except Exception as e:
+                logger.error(f"❌ Tick listener error: {e}")
+
+    def _publish_error(self, error):
+        """Deliver an error to every error subscriber"""
+        for listener in self._error_listeners:
+            try:
+                listener(error)
+            except Exception as e:
+                logger.error(f"❌ Error listener error: {e}")
+
+
+class RestPollingSource(MarketDataSource):
+    """
+    Polls the v2 spot price endpoint at a fixed interval (fallback source)
+
+    The endpoint takes one product per request, so several products are
+    polled in turn from the same thread.
+    """
+
+    SPOT_URL = "https://api.coinbase.com/v2/prices/{product_id}/spot"
+
+    def __init__(self, product_id=None, interval=None):
+        super().__init__(product_id)
+        self.interval = Config.PRICE_POLL_INTERVAL if interval is None else interval
+        self.name = f"REST poll ({self.interval * 1000:.0f}ms)"
+        self.http = get_transport()
+        self._thread = None
+
+    def start(self):
+        """Start the polling thread"""
+        if self.is_running:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)  # let a previous run finish before restarting
+        self.is_running = True
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def poll_once(self, product_id=None):
+        """Fetch the spot price of one product (default: the first) and publish it"""
+        product_id = product_id or self.product_id
+
+        # Background polling yields to every other public request
+        limiter = get_rate_limiter().public
+        limiter.acquire(PRIORITY_LOW)
+        response = self.http.get(self.SPOT_URL.format(product_id=product_id), timeout=10)
+        limiter.record_response(response)
+
+        if response.status_code != 200:
+            raise requests.RequestException(f"Status: {response.status_code}")
+
+        data = response.json()
+        if 'data' not in data or 'amount' not in data['data']:
+            raise ValueError("Invalid response format")
+
+        tick = Tick(product_id, float(data['data']['amount']), time.time(), None, None, None)
+        self._publish(tick)
+        return tick
+
+    def _run(self):
+        """Polling loop"""
+        while self.is_running:
+            for product_id in self.product_ids:
+                try:
+                    self.poll_once(product_id)
+                except (requests.RequestException, ValueError) as e:
+                    self._publish_error(e)
+            time.sleep(self.interval)
+
+
+class WebSocketTickerSource(MarketDataSource):
+    """
+    Streams the Advanced Trade WebSocket ticker channel (one connection for
+    every product in product_id)
+
+    - Reconnects with exponential backoff (with jitter) when the socket drops
+    - Tracks sequence_num and reports gaps as SequenceGapError
+    - Optionally starts a fallback source (e.g. RestPollingSource) after
+      `fallback_after` failed connection attempts, and stops it again once
+      the socket is back
+    - Optionally keeps an OrderBook current from the level2 channel; the
+      book is invalidated on a gap or disconnect until the next snapshot
+
+    Every ticker message carries the full latest price, so a gap never leaves
+    stale state behind; it is reported so callers can decide what to do.
+    """
+
+    name = "WebSocket ticker"
+
+    def __init__(self, product_id=None, url=None, channel='ticker', fallback=None,
+                 backoff_base=0.5, backoff_max=30.0, fallback_after=3, book=None):
+        super().__init__(product_id)
+        if ws_connect is None:
+            raise ImportError("websockets package is required for WebSocketTickerSource")
+
+        self.url = url or Config.COINBASE_WS_URL
+        self.channel = channel
+        self.fallback = fallback
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.fallback_after = fallback_after
+        self.book = book
+        self._products = frozenset(self.product_ids)
+
+        self.connected = False
+        self.reconnect_count = 0
+        self.gap_count = 0
+        self.fallback_active = False
+
+        self._last_sequence = None
+        self._ws = None
+        self._thread = None
+        self._stop_event = threading.Event()
+
+        if self.fallback is not None:
+            self.fallback.subscribe(self._publish, self._publish_error)
+
+    def start(self):
+        """Start the streaming thread"""
+        if self.is_running:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)  # let a previous run finish before restarting
+        self.is_running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop streaming and close the socket"""
+        self.is_running = False
+        self._stop_event.set()
+        ws = self._ws
+        if ws is not None:
+            try:
+                ws.close()
+            except Exception:
+                pass
+        self._stop_fallback()
+
+    def _subscribe_messages(self):
+        """Subscription messages sent after every (re)connect"""
+        messages = [
+            {'type': 'subscribe', 'product_ids': self.product_ids, 'channel': self.channel},
+            {'type': 'subscribe', 'product_ids': self.product_ids, 'channel': 'heartbeats'},
+        ]
+        if self.book is not None:
+            messages.append({'type': 'subscribe', 'product_ids': [self.product_id], 'channel': 'level2'})
+        return messages
+
+    def _backoff_delay(self, attempt):
+        """Exponential backoff, jittered between half and the full delay"""
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(delay / 2, delay)
+
+    def _run(self):
+        """Connect / stream / reconnect loop"""
+        failed_attempts = 0
+
+        while self.is_running:
+            try:
+                with ws_connect(self.url, open_timeout=10) as ws:
+                    self._ws = ws
+                    for message in self._subscribe_messages():
+                        ws.send(json.dumps(message))
+
+                    self.connected = True
+                    failed_attempts = 0
+                    self._last_sequence = None  # sequence_num restarts on every connection
+                    self._stop_fallback()
+
+                    for raw in ws:
+                        if not self.is_running:
+                            break
+                        self._handle_message(raw)
+            except Exception as e:
+                if self.is_running:
+                    self._publish_error(e)
+            finally:
+                self._ws = None
+                self.connected = False
+                if self.book is not None:
+                    self.book.invalidate()
+
+            if not self.is_running:
+                break
+
+            failed_attempts += 1
+            self.reconnect_count += 1
+
+            if self.fallback is not None and failed_attempts >= self.fallback_after:
+                self._start_fallback()
+
+            self._stop_event.wait(self._backoff_delay(failed_attempts))
+
+    def _handle_message(self, raw):
+        """Parse a feed message, check its sequence and publish ticker updates"""
+        try:
+            data = json.loads(raw)
+        except ValueError as e:
+            self._publish_error(e)
+            return
+
+        sequence = data.get('sequence_num')
+        if sequence is not None:
+            if self._last_sequence is not None:
+                if sequence <= self._last_sequence:
+                    return  # duplicate / replayed message
+                if sequence != self._last_sequence + 1:
+                    self.gap_count += 1
+                    if self.book is not None:
+                        self.book.invalidate()  # level2 updates were lost; wait for a snapshot
+                    self._publish_error(SequenceGapError(self._last_sequence + 1, sequence))
+            self._last_sequence = sequence
+
+        if data.get('channel') == 'l2_data':
+            if self.book is not None:
+                try:
+                    self.book.apply_level2(data)
+                except (KeyError, TypeError, ValueError) as e:
+                    self.book.invalidate()
+                    self._publish_error(ValueError(f"Invalid level2 message: {e}"))
+            return
+
+        if data.get('channel') not in ('ticker', 'ticker_batch'):
+            return
+
+        for event in data.get('events', []):
+            for ticker in event.get('tickers', []):
+                product_id = ticker.get('product_id')
+                if product_id not in self._products:
+                    continue
+                try:
+                    price = float(ticker['price'])
+                except (KeyError, TypeError, ValueError) as e:
+                    self._publish_error(ValueError(f"Invalid ticker message: {e}"))
+                    continue
+
+                best_bid = ticker.get('best_bid')
+                best_ask = ticker.get('best_ask')
+                self._publish(Tick(
+                    product_id,
+                    price,
+                    time.time(),
+                    sequence,
+                    float(best_bid) if best_bid else None,
+                    float(best_ask) if best_ask else None
+                ))
+
+    def _start_fallback(self):
+        """Start the fallback source while the socket is down"""
+        if self.fallback is not None and not self.fallback_active:
+            self.fallback_active = True
+            self.fallback.start()
+
+    def _stop_fallback(self):
+        """Stop the fallback source once the socket is back"""
+        if self.fallback is not None and self.fallback_active:
+            self.fallback_active = False
+            self.fallback.stop()
+
+
+class ReplayServer:
+    """
+    Local stand-in for the Coinbase WebSocket feed (tests / offline development)
+
+    Every connection waits for the client's first subscribe message, replays
+    `messages` (dicts are JSON-encoded) `interval` seconds apart and then
+    closes the connection if `close_when_done` is set, otherwise it stays open
+    until the server is stopped.
+    """
+
+    def __init__(self, messages, host='127.0.0.1', port=0, interval=0.0, close_when_done=False):
+        if ws_serve is None:
+            raise ImportError("websockets package is required for ReplayServer")
+
+        self.messages = list(messages)
+        self.interval = interval
+        self.close_when_done = close_when_done
+        self.connections = 0
+        self.received = []
+
+        self._server = ws_serve(self._handler, host, port)
+        self.port = self._server.socket.getsockname()[1]
+        self.url = f"ws://{host}:{self.port}"
+        self._thread = None
+        self._stopped = threading.Event()
+
+    def start(self):
+        """Serve connections in a background thread"""
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Shut the server down"""
+        self._stopped.set()
+        self._server.shutdown()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def _handler(self, ws):
+        """Replay the recorded messages to one client"""
+        self.connections += 1
+        subscribed = threading.Event()
+
+        def read_client_messages():
+            # Keep reading so the connection never stalls on unread frames
+            try:
+                for raw in ws:
+                    self.received.append(json.loads(raw))
+                    subscribed.set()
+            except Exception:
+                pass
+
+        threading.Thread(target=read_client_messages, daemon=True).start()
+
+        try:
+            subscribed.wait(timeout=10)
+
+            for message in self.messages:
+                if self._stopped.is_set():
+                    return
+                ws.send(message if isinstance(message, str) else json.dumps(message))
+                if self.interval:
+                    time.sleep(self.interval)
+
+            if not self.close_when_done:
+                self._stopped.wait()
+        except Exception:
+            pass
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def create_market_data_source(product_id=None, api=None):
+    """
+    Build the configured market data source
+
+    MARKET_DATA_SOURCE=websocket (default) streams the ticker channel with a
+    poller as fallback; MARKET_DATA_SOURCE=rest polls only. A list of
+    products shares one connection (or one polling thread).
+
+    With an authenticated `api` the poller is a QuotePoller (one best
+    bid/ask request per cycle for all products); without one it falls back
+    to the public spot price endpoint.
+    """
+    if api is not None:
+        from quote_poller import QuotePoller
+        poller = QuotePoller(product_id, api=api)
+    else:
+        poller = RestPollingSource(product_id)
+
+    if Config.MARKET_DATA_SOURCE.lower() == 'websocket' and ws_connect is not None:
+        return WebSocketTickerSource(product_id, fallback=poller)
+
+    return poller
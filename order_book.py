@@ -0,0 +1,409 @@
+"""
+Order Book
+In-memory L2 book seeded from get_product_book and kept current from updates
+
+Each side keeps its price levels in two parallel sorted lists (keys and
+sizes) searched with bisect, so a level update is a binary search plus one
+list insert/delete, and top-of-book is index 0. Bids are keyed by negated
+price so both sides are sorted best-first.
+
+Updates arrive either from the WebSocket level2 channel (apply_level2) or
+from polled snapshots (sync_snapshot, which applies only the levels that
+changed). Every change bumps `version`, so callers can cache results per
+book state.
+
+Benchmark:
+    python order_book.py --benchmark
+"""
+import argparse
+import random
+import threading
+import time
+from bisect import bisect_left, bisect_right
+
+from structured_logging import get_logger
+
+
+logger = get_logger('market_data')
+
+
+BID = 'bid'
+ASK = 'ask'
+
+
+class BookSide:
+    """Price levels of one side, best first"""
+
+    __slots__ = ('side', 'keys', 'sizes', '_sign')
+
+    def __init__(self, side):
+        self.side = side
+        self.keys = []   # ascending: ask prices, or negated bid prices
+        self.sizes = []
+        self._sign = -1.0 if side == BID else 1.0
+
+    def __len__(self):
+        return len(self.keys)
+
+    def update(self, price, size):
+        """Set the size at a price level (size 0 removes the level)"""
+        key = price * self._sign
+        keys = self.keys
+        i = bisect_left(keys, key)
+        if i < len(keys) and keys[i] == key:
+            if size > 0:
+                self.sizes[i] = size
+            else:
+                del keys[i]
+                del self.sizes[i]
+        elif size > 0:
+            keys.insert(i, key)
+            self.sizes.insert(i, size)
+
+    def clear(self):
+        self.keys.clear()
+        self.sizes.clear()
+
+    def best(self):
+        """(price, size) of the best level, or None"""
+        if not self.keys:
+            return None
+        return self.keys[0] * self._sign, self.sizes[0]
+
+    def levels(self, count=None):
+        """[(price, size), ...] best first"""
+        sign = self._sign
+        keys = self.keys if count is None else self.keys[:count]
+        return [(key * sign, size) for key, size in zip(keys, self.sizes)]
+
+    def size_at(self, price):
+        """Size resting at exactly `price` (0 if there is no level)"""
+        key = price * self._sign
+        i = bisect_left(self.keys, key)
+        if i < len(self.keys) and self.keys[i] == key:
+            return self.sizes[i]
+        return 0.0
+
+    def size_within(self, price):
+        """Total size at prices at least as good as `price`"""
+        return sum(self.sizes[:bisect_right(self.keys, price * self._sign)])
+
+    def walk(self, quantity=None, notional=None):
+        """
+        Fill `quantity` (base) or `notional` (quote) against the levels
+
+        Returns:
+            dict: filled, cost, levels (number touched), worst_price and
+                  complete (False if the side ran out of depth)
+        """
+        sign = self._sign
+        filled = cost = 0.0
+        levels = 0
+        worst = None
+
+        for key, size in zip(self.keys, self.sizes):
+            price = key * sign
+            remaining = quantity - filled if quantity is not None else (notional - cost) / price
+            take = min(size, remaining)
+            filled += take
+            cost += take * price
+            levels += 1
+            worst = price
+            if take >= remaining:
+                return {'filled': filled, 'cost': cost, 'levels': levels, 'worst_price': worst, 'complete': True}
+
+        return {'filled': filled, 'cost': cost, 'levels': levels, 'worst_price': worst, 'complete': False}
+
+
+class OrderBook:
+    """
+    Level 2 book for one product
+
+    Writers (feed thread) and readers (trading thread) share a lock; every
+    query holds it only for the walk over the levels it needs.
+    """
+
+    def __init__(self, product_id='BTC-USD'):
+        self.product_id = product_id
+        self.bids = BookSide(BID)
+        self.asks = BookSide(ASK)
+        self.version = 0
+        self.ready = False  # False until a snapshot has been loaded
+        self.updated_at = None
+        self._lock = threading.Lock()
+
+    def _side(self, side):
+        """'bid' -> bids, 'ask'/'offer' -> asks"""
+        side = side.lower()
+        if side in (BID, 'bids'):
+            return self.bids
+        if side in (ASK, 'asks', 'offer'):
+            return self.asks
+        raise ValueError(f"Unknown book side: {side}")
+
+    def _taken_side(self, side):
+        """Side an order takes liquidity from: BUY -> asks, SELL -> bids (or a book side)"""
+        side = side.lower()
+        if side == 'buy':
+            return self.asks
+        if side == 'sell':
+            return self.bids
+        return self._side(side)
+
+    # ==================== WRITES ====================
+
+    def load_snapshot(self, book):
+        """
+        Replace the book with a get_product_book / get_public_product_book response
+
+        Args:
+            book (dict): API response ({'pricebook': {...}}) or the pricebook itself
+        """
+        pricebook = book.get('pricebook', book)
+        with self._lock:
+            for side, levels in ((self.bids, pricebook.get('bids', [])), (self.asks, pricebook.get('asks', []))):
+                side.clear()
+                for level in levels:
+                    side.update(float(level['price']), float(level['size']))
+            self._touch()
+            self.ready = True
+
+    def sync_snapshot(self, book):
+        """
+        Apply a polled snapshot as a diff against the current levels
+
+        Returns:
+            int: Number of levels that changed (0 leaves `version` as is)
+        """
+        pricebook = book.get('pricebook', book)
+        changes = 0
+        with self._lock:
+            for side, levels in ((self.bids, pricebook.get('bids', [])), (self.asks, pricebook.get('asks', []))):
+                current = dict(side.levels())
+                incoming = {float(level['price']): float(level['size']) for level in levels}
+                for price in current.keys() - incoming.keys():
+                    side.update(price, 0.0)
+                    changes += 1
+                for price, size in incoming.items():
+                    if current.get(price) != size:
+                        side.update(price, size)
+                        changes += 1
+            if changes or not self.ready:
+                self._touch()
+            self.ready = True
+        return changes
+
+    def update(self, side, price, size):
+        """Set one level (size 0 removes it)"""
+        with self._lock:
+            self._side(side).update(price, size)
+            self._touch()
+
+    def apply_level2(self, message):
+        """
+        Apply a WebSocket level2 (l2_data) message
+
+        'snapshot' events replace the book, 'update' events set levels.
+
+        Returns:
+            int: Number of level updates applied
+        """
+        applied = 0
+        with self._lock:
+            for event in message.get('events', []):
+                if event.get('product_id', self.product_id) != self.product_id:
+                    continue
+                if event.get('type') == 'snapshot':
+                    self.bids.clear()
+                    self.asks.clear()
+                    self.ready = True
+                for level in event.get('updates', []):
+                    self._side(level['side']).update(float(level['price_level']), float(level['new_quantity']))
+                    applied += 1
+            if applied:
+                self._touch()
+        return applied
+
+    def invalidate(self):
+        """Mark the book stale (e.g. after a sequence gap) until the next snapshot"""
+        with self._lock:
+            self.ready = False
+            self.version += 1
+
+    def _touch(self):
+        self.version += 1
+        self.updated_at = time.time()
+
+    # ==================== QUERIES ====================
+
+    def best_bid(self):
+        """(price, size) or None"""
+        with self._lock:
+            return self.bids.best()
+
+    def best_ask(self):
+        """(price, size) or None"""
+        with self._lock:
+            return self.asks.best()
+
+    def mid_price(self):
+        """Midpoint of the best bid and ask (None if either side is empty)"""
+        with self._lock:
+            bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return (bid[0] + ask[0]) / 2
+
+    def spread(self):
+        """Best ask minus best bid (None if either side is empty)"""
+        with self._lock:
+            bid, ask = self.bids.best(), self.asks.best()
+        if bid is None or ask is None:
+            return None
+        return ask[0] - bid[0]
+
+    def levels(self, side, count=10):
+        """Top `count` levels of a side, best first"""
+        with self._lock:
+            return self._side(side).levels(count)
+
+    def depth(self, side, price):
+        """Total size on a side at prices at least as good as `price`"""
+        with self._lock:
+            return self._side(side).size_within(price)
+
+    def depth_for_size(self, side, quantity):
+        """
+        How deep a fill of `quantity` goes (side: BUY/SELL or bid/ask)
+
+        Returns:
+            dict: levels touched, worst_price and complete (enough depth)
+        """
+        with self._lock:
+            result = self._taken_side(side).walk(quantity=quantity)
+        return {'levels': result['levels'], 'worst_price': result['worst_price'], 'complete': result['complete']}
+
+    def vwap(self, side, quantity=None, notional=None):
+        """
+        Volume-weighted average price for taking `quantity` (base) or
+        spending `notional` (quote) from a side
+
+        side is the order side (BUY takes the asks, SELL the bids) or a
+        book side ('bid' / 'ask').
+
+        Returns:
+            dict: price (VWAP or None), filled, cost, levels, worst_price
+                  and complete
+        """
+        if (quantity is None) == (notional is None):
+            raise ValueError("Pass exactly one of quantity or notional")
+        with self._lock:
+            result = self._taken_side(side).walk(quantity=quantity, notional=notional)
+        result['price'] = result['cost'] / result['filled'] if result['filled'] > 0 else None
+        return result
+
+
+class BookPoller:
+    """
+    Keeps an OrderBook current by polling the public product book
+
+    Each poll is applied as a diff (sync_snapshot), so `version` only moves
+    when the book actually changed.
+    """
+
+    def __init__(self, api, book, interval=1.0, limit=None):
+        self.api = api
+        self.book = book
+        self.interval = interval
+        self.limit = limit
+        self.is_running = False
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def poll_once(self):
+        """Fetch one snapshot and apply it; returns the number of changed levels"""
+        return self.book.sync_snapshot(self.api.get_public_product_book(self.book.product_id, limit=self.limit))
+
+    def start(self):
+        if self.is_running:
+            return
+        self.is_running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self.is_running = False
+        self._stop_event.set()
+
+    def _run(self):
+        while self.is_running:
+            try:
+                self.poll_once()
+            except Exception as e:
+                logger.warning(f"⚠️  Order book poll failed: {e}")
+            self._stop_event.wait(self.interval)
+
+
+def benchmark(updates=100000, levels=1000, seed=1):
+    """
+    Apply random level updates around a mid price and time them
+
+    Returns:
+        dict: updates, seconds, updates_per_second, query_us (VWAP of 1 BTC)
+    """
+    rng = random.Random(seed)
+    book = OrderBook()
+    mid = 60000.0
+    book.load_snapshot({
+        'bids': [{'price': f"{mid - 0.01 * (i + 1):.2f}", 'size': '0.5'} for i in range(levels)],
+        'asks': [{'price': f"{mid + 0.01 * (i + 1):.2f}", 'size': '0.5'} for i in range(levels)]
+    })
+
+    sides = [BID if rng.random() < 0.5 else ASK for _ in range(updates)]
+    offsets = [round(rng.uniform(0.01, levels * 0.01), 2) for _ in range(updates)]
+    sizes = [0.0 if rng.random() < 0.3 else round(rng.uniform(0.01, 2.0), 4) for _ in range(updates)]
+
+    start = time.perf_counter()
+    for side, offset, size in zip(sides, offsets, sizes):
+        book.update(side, mid - offset if side == BID else mid + offset, size)
+    seconds = time.perf_counter() - start
+
+    queries = 10000
+    start = time.perf_counter()
+    for _ in range(queries):
+        book.vwap(ASK, quantity=1.0)
+    query_us = (time.perf_counter() - start) / queries * 1e6
+
+    return {
+        'updates': updates,
+        'seconds': seconds,
+        'updates_per_second': updates / seconds if seconds > 0 else float('inf'),
+        'query_us': query_us
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="L2 order book")
+    parser.add_argument('--benchmark', action='store_true', help="Time random level updates")
+    parser.add_argument('--updates', type=int, default=100000)
+    parser.add_argument('--levels', type=int, default=1000, help="Levels per side in the seed snapshot")
+    parser.add_argument('--product', default='BTC-USD', help="Print the live top of book for this product")
+    args = parser.parse_args()
+
+    if args.benchmark:
+        result = benchmark(args.updates, args.levels)
+        print(f"📚 {result['updates']:,} updates in {result['seconds']:.3f}s "
+              f"({result['updates_per_second']:,.0f}/s), VWAP(1 BTC) {result['query_us']:.1f}µs")
+        return
+
+    from coinbase_complete_api import CoinbaseCompleteAPI
+    book = OrderBook(args.product)
+    book.load_snapshot(CoinbaseCompleteAPI().get_public_product_book(args.product, limit=50))
+    print(f"📚 {args.product} bid {book.best_bid()} | ask {book.best_ask()} | spread {book.spread()}")
+    for side in (ASK, BID):
+        print(f"   1 BTC {side}: {book.vwap(side, quantity=1.0)}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+"""
+Order Execution Service
+One long-lived order path, warmed up before the first trigger
+
+Building TradingHelpers per trade re-created the API client, re-read the
+config and re-checked the key format between the price trigger and the
+order. The service is built once at start-up and warm_up() does the slow
+parts ahead of time: it validates the key (and its trade permission), opens
+a pooled connection to api.coinbase.com, pre-signs the order JWT, starts
+polling the order book for slippage estimates and caches the product rules
+orders are validated against.
+"""
+import threading
+import time
+from collections import deque
+
+from coinbase_complete_api import CoinbaseCompleteAPI
+from config import Config
+from latency import get_latency_recorder
+from metrics import get_registry
+from structured_logging import get_logger
+from trading_helpers import TradingHelpers
+
+
+logger = get_logger('orders')
+
+
+ORDERS_PATH = '/api/v3/brokerage/orders'
+
+
+class LatencyStats:
+    """Rolling window of durations in seconds"""
+
+    def __init__(self, window=500):
+        self.samples = deque(maxlen=window)
+        self.count = 0
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.count += 1
+
+    def summary(self):
+        """count / last / avg / max over the window (in ms)"""
+        if not self.samples:
+            return {'count': 0, 'last_ms': None, 'avg_ms': None, 'max_ms': None}
+        return {
+            'count': self.count,
+            'last_ms': self.samples[-1] * 1000,
+            'avg_ms': sum(self.samples) / len(self.samples) * 1000,
+            'max_ms': max(self.samples) * 1000
+        }
+
+
+class OrderExecutionService:
+    """
+    Market orders through one shared API client and TradingHelpers
+
+    - warm_up() validates credentials, opens the connection and pre-signs
+    - keepalive_interval > 0 pings /time in the background so the pooled
+      connection is still open when a trigger fires
+    - Latency: start-up to first order, trigger to submit (our own work
+      before the request leaves) and submit to acknowledgement
+    """
+
+    def __init__(self, api=None, helpers=None, keepalive_interval=None, clock=time.perf_counter, product_id=None):
+        self.created_at = clock()
+        self.clock = clock
+        self.api = api or CoinbaseCompleteAPI()
+        self.helpers = helpers or TradingHelpers(api=self.api, product_id=product_id)
+        self.keepalive_interval = Config.ORDER_KEEPALIVE_INTERVAL if keepalive_interval is None else keepalive_interval
+
+        self.ready = False
+        self.warmup_error = None
+        self.warmup_seconds = None
+        self.startup_to_first_order = None
+
+        self.trigger_to_submit = LatencyStats()
+        self.submit_to_ack = LatencyStats()
+
+        registry = get_registry()
+        orders = registry.counter('trader_orders_total', "Live market orders", ('side', 'result'))
+        seconds = registry.histogram('trader_order_seconds', "Order submit to acknowledgement", ('side',))
+        self._orders = {(side, ok): orders.labels(side, 'success' if ok else 'failed')
+                        for side in ('BUY', 'SELL') for ok in (True, False)}
+        self._order_seconds = {side: seconds.labels(side) for side in ('BUY', 'SELL')}
+
+        self._stop_event = threading.Event()
+        self._keepalive_thread = None
+
+    # ==================== START-UP ====================
+
+    def warm_up(self):
+        """
+        Do every per-order setup step once, ahead of the first trigger
+
+        Returns:
+            bool: True if live orders can be placed
+        """
+        start = self.clock()
+        self.ready = False
+        self.warmup_error = None
+
+        try:
+            if not self.api.is_live:
+                raise Exception("TRADING_MODE is not LIVE")
+            if not self.api.is_jwt_format:
+                raise Exception("API credentials must be in ECDSA format with PEM private key")
+
+            # Authenticated call: validates the key and opens the pooled connection
+            permissions = self.api.get_api_key_permissions()
+            if permissions.get('can_trade') is False:
+                raise Exception("API key has no trade permission")
+
+            # First order skips the ECDSA signature
+            self.api.jwt_cache.get_token('POST', ORDERS_PATH)
+
+            # Keep the slippage book current in the background (no fetch per order)
+            if self.helpers.slippage is not None:
+                self.helpers.slippage.start()
+
+            # Increments and size limits for local order validation
+            if self.helpers.products is not None:
+                try:
+                    self.helpers.products.ensure_loaded()
+                except Exception as e:
+                    logger.warning(f"⚠️  Product rules not loaded (fetched on first order): {e}")
+
+            self.ready = True
+            self.start_keepalive()
+
+        except Exception as e:
+            self.warmup_error = str(e)
+            logger.warning(f"⚠️  Order service not ready: {e}")
+
+        self.warmup_seconds = self.clock() - start
+        if self.ready:
+            logger.info(f"✅ Order service ready ({self.warmup_seconds * 1000:.0f}ms warm-up)")
+        return self.ready
+
+    def start_keepalive(self):
+        """Keep the pooled connection (and order JWT) fresh while idle"""
+        if self.keepalive_interval <= 0 or self._keepalive_thread is not None:
+            return
+        self._keepalive_thread = threading.Thread(target=self._keepalive, daemon=True)
+        self._keepalive_thread.start()
+
+    def _keepalive(self):
+        """Background ping loop"""
+        while not self._stop_event.wait(self.keepalive_interval):
+            try:
+                self.api.get_server_time()
+                self.api.jwt_cache.get_token('POST', ORDERS_PATH)
+            except Exception as e:
+                logger.warning(f"⚠️  Order service keep-alive failed: {e}")
+
+    def close(self):
+        """Stop the keep-alive thread and the slippage book poller"""
+        self._stop_event.set()
+        if self.helpers.slippage is not None:
+            self.helpers.slippage.stop()
+
+    # ==================== ORDERS ====================
+
+    def buy(self, usd_amount, trigger_time=None):
+        """Market buy usd_amount (see TradingHelpers.buy_btc_market)"""
+        return self._timed('BUY', self.helpers.buy_btc_market, usd_amount, trigger_time)
+
+    def sell(self, btc_amount, trigger_time=None):
+        """Market sell btc_amount (see TradingHelpers.sell_btc_market)"""
+        return self._timed('SELL', self.helpers.sell_btc_market, btc_amount, trigger_time)
+
+    def fills(self, result):
+        """
+        What a buy()/sell() result actually filled (see TradingHelpers.order_fills)
+
+        Split orders are read child by child, including a split that stopped
+        part way. Returns None if no order was placed or the fills are unknown.
+        """
+        order_ids = result.get('order_ids') or ([result['order_id']] if result.get('order_id') else [])
+        if not order_ids:
+            return None
+        return self.helpers.order_fills(order_ids)
+
+    def _timed(self, side, place, amount, trigger_time):
+        """Place an order and record its latencies"""
+        submitted = self.clock()
+        if trigger_time is not None:
+            self.trigger_to_submit.add(submitted - trigger_time)
+
+        result = place(amount)
+        # The trace ends at the acknowledgement; fills() polling would re-mark its stages
+        get_latency_recorder().finish()
+
+        acked = self.clock()
+        self.submit_to_ack.add(acked - submitted)
+        self._order_seconds[side].observe(acked - submitted)
+        self._orders[(side, bool(result.get('success')))].inc()
+        if self.startup_to_first_order is None:
+            self.startup_to_first_order = acked - self.created_at
+        return result
+
+    def latency_stats(self):
+        """Warm-up and order latencies"""
+        return {
+            'ready': self.ready,
+            'warmup_ms': self.warmup_seconds * 1000 if self.warmup_seconds is not None else None,
+            'startup_to_first_order_ms': (self.startup_to_first_order * 1000
+                                          if self.startup_to_first_order is not None else None),
+            'trigger_to_submit': self.trigger_to_submit.summary(),
+            'submit_to_ack': self.submit_to_ack.summary()
+        }
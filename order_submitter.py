@@ -0,0 +1,158 @@
+"""
+Order Submitter
+Idempotent order placement with retries and reconciliation
+
+Every attempt for one order reuses the same client_order_id, which Coinbase
+deduplicates, so a retry can never open a second position. When an attempt
+fails without a definite answer (timeout, dropped connection, 5xx) the
+order history is checked for that client_order_id before trying again.
+"""
+import random
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import requests
+
+from config import Config
+from structured_logging import fields, get_logger
+
+
+logger = get_logger('orders')
+
+
+# HTTP statuses worth another attempt (the request was not definitively rejected).
+# 429 is not here: CoinbaseCompleteAPI already backs off and resends it, and a
+# second retry loop on top would multiply the sends of one order.
+RETRYABLE_STATUSES = (408, 500, 502, 503, 504)
+
+
+class OrderSubmissionError(Exception):
+    """
+    Order placement gave up
+
+    `ambiguous` is True when the last failure was transient and the order
+    could not be found afterwards - check client_order_id before placing
+    the same order again.
+    """
+
+    def __init__(self, message, client_order_id, attempts, ambiguous=False):
+        super().__init__(message)
+        self.client_order_id = client_order_id
+        self.attempts = attempts
+        self.ambiguous = ambiguous
+
+
+def is_transient(error):
+    """True if the request may or may not have reached the exchange"""
+    if isinstance(error, (requests.Timeout, requests.ConnectionError)):
+        return True
+    if isinstance(error, requests.HTTPError) and error.response is not None:
+        return error.response.status_code in RETRYABLE_STATUSES
+    return False
+
+
+class OrderSubmitter:
+    """Places orders through CoinbaseCompleteAPI with retry and reconciliation"""
+
+    def __init__(self, api, max_attempts=None, backoff_base=None, backoff_max=None,
+                 sleep=time.sleep, clock=time.time):
+        self.api = api
+        self.max_attempts = max_attempts or Config.ORDER_MAX_ATTEMPTS
+        self.backoff_base = Config.ORDER_RETRY_BASE if backoff_base is None else backoff_base
+        self.backoff_max = Config.ORDER_RETRY_MAX if backoff_max is None else backoff_max
+        self.sleep = sleep
+        self.clock = clock
+
+    def _backoff_delay(self, attempt):
+        """Exponential backoff with full jitter"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1))))
+
+    def submit(self, product_id, side, order_configuration, client_order_id=None):
+        """
+        Place an order, retrying transient failures with the same client_order_id
+
+        Args:
+            product_id (str): e.g. 'BTC-USD'
+            side (str): 'BUY' or 'SELL'
+            order_configuration (dict): As for create_order
+            client_order_id (str): Idempotency key (generated if omitted)
+
+        Returns:
+            dict: create_order response plus 'client_order_id', 'attempts' and
+                  'reconciled' (True if the order was found in the history
+                  after an ambiguous failure). A rejected order is returned
+                  as-is with success False.
+
+        Raises:
+            OrderSubmissionError: Attempts exhausted or a non-retryable error
+        """
+        client_order_id = client_order_id or str(uuid.uuid4())
+        # Reconciliation looks back to shortly before the first attempt
+        since = datetime.fromtimestamp(self.clock() - 60, timezone.utc)
+        last_error = None
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                response = self.api.create_order(
+                    client_order_id=client_order_id,
+                    product_id=product_id,
+                    side=side,
+                    order_configuration=order_configuration
+                )
+                response.update({'client_order_id': client_order_id, 'attempts': attempt, 'reconciled': False})
+                return response
+
+            except Exception as e:
+                if not is_transient(e):
+                    raise OrderSubmissionError(f"Order rejected: {e}", client_order_id, attempt) from e
+                last_error = e
+
+            logger.warning(f"⚠️  Order attempt {attempt}/{self.max_attempts} failed ({last_error}), reconciling...",
+                           extra=fields(client_order_id=client_order_id, product_id=product_id, side=side, attempt=attempt))
+            order = self.reconcile(client_order_id, product_id, since)
+            if order is not None:
+                logger.info(f"✅ Order {order.get('order_id')} was placed despite the error",
+                            extra=fields(order_id=order.get('order_id'), client_order_id=client_order_id, attempt=attempt))
+                return {
+                    'success': True,
+                    'order_id': order.get('order_id'),
+                    'success_response': {
+                        'order_id': order.get('order_id'),
+                        'product_id': order.get('product_id', product_id),
+                        'side': order.get('side', side),
+                        'client_order_id': client_order_id
+                    },
+                    'order': order,
+                    'client_order_id': client_order_id,
+                    'attempts': attempt,
+                    'reconciled': True
+                }
+
+            if attempt < self.max_attempts:
+                self.sleep(self._backoff_delay(attempt))
+
+        raise OrderSubmissionError(
+            f"Order outcome unknown after {self.max_attempts} attempts: {last_error}",
+            client_order_id, self.max_attempts, ambiguous=True
+        )
+
+    def reconcile(self, client_order_id, product_id, since=None, order_id=None):
+        """
+        Look up an order by client_order_id (or by order_id via get_order)
+
+        Returns:
+            dict or None: The order, or None if it does not exist or the
+                          lookup itself failed
+        """
+        try:
+            if order_id:
+                return self.api.get_order(order_id).get('order')
+
+            start_date = since.strftime('%Y-%m-%dT%H:%M:%SZ') if since else None
+            for order in self.api.iter_orders(product_id=product_id, start_date=start_date):
+                if order.get('client_order_id') == client_order_id:
+                    return order
+        except Exception as e:
+            logger.warning(f"⚠️  Could not reconcile order {client_order_id}: {e}")
+        return None
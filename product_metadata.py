@@ -0,0 +1,242 @@
+"""
+Product Metadata
+Cached product rules (increments, size limits, status) and local order validation
+
+Coinbase rejects orders whose sizes are off the product's increments or
+outside its size limits, and each rejection costs a full round trip. The
+cache loads every product once (list_products at start-up), keeps the
+numbers as Decimals, and rounds and checks order sizes locally in a few
+microseconds before create_order is called.
+
+Entries older than the TTL are still served; a background get_product call
+refreshes them, so validation never waits on the network once a product
+has been loaded.
+"""
+import threading
+import time
+import weakref
+from decimal import Decimal, ROUND_DOWN, ROUND_UP
+
+from config import Config
+from structured_logging import get_logger
+
+
+logger = get_logger('orders')
+
+
+class OrderValidationError(ValueError):
+    """
+    An order the exchange would reject, caught before it was sent
+
+    `field` names the value that failed (quote_size, base_size,
+    limit_price or status).
+    """
+
+    def __init__(self, message, product_id, field=None):
+        super().__init__(message)
+        self.product_id = product_id
+        self.field = field
+
+
+def _decimal(value):
+    """Decimal from an API string or a float ('' and None -> None)"""
+    if value is None or value == '':
+        return None
+    return value if isinstance(value, Decimal) else Decimal(str(value))
+
+
+def _to_increment(value, increment, rounding=ROUND_DOWN):
+    """Round a positive Decimal to a multiple of increment"""
+    if not increment:
+        return value
+    # quantize() only fixes the exponent, so '0.01' always prints two places
+    return ((value / increment).to_integral_value(rounding=rounding) * increment).quantize(increment)
+
+
+class ProductRules:
+    """Trading rules of one product, as Decimals"""
+
+    __slots__ = ('product_id', 'base_increment', 'quote_increment', 'price_increment',
+                 'base_min_size', 'base_max_size', 'quote_min_size', 'quote_max_size',
+                 'tradable', 'limit_only', 'post_only', 'status')
+
+    def __init__(self, product):
+        self.product_id = product['product_id']
+        self.base_increment = _decimal(product.get('base_increment'))
+        self.quote_increment = _decimal(product.get('quote_increment'))
+        self.price_increment = _decimal(product.get('price_increment')) or self.quote_increment
+        self.base_min_size = _decimal(product.get('base_min_size'))
+        self.base_max_size = _decimal(product.get('base_max_size'))
+        self.quote_min_size = _decimal(product.get('quote_min_size'))
+        self.quote_max_size = _decimal(product.get('quote_max_size'))
+        self.status = product.get('status', 'online')
+        self.tradable = not (product.get('trading_disabled') or product.get('is_disabled')
+                             or product.get('cancel_only') or product.get('view_only')
+                             or self.status not in ('online', ''))
+        self.limit_only = bool(product.get('limit_only'))
+        self.post_only = bool(product.get('post_only'))
+
+    def _check_status(self, market):
+        if not self.tradable:
+            raise OrderValidationError(f"{self.product_id} is not open for trading ({self.status})",
+                                       self.product_id, 'status')
+        if self.post_only:
+            raise OrderValidationError(f"{self.product_id} is post-only", self.product_id, 'status')
+        if market and self.limit_only:
+            raise OrderValidationError(f"{self.product_id} accepts limit orders only", self.product_id, 'status')
+
+    def _check_range(self, value, minimum, maximum, field, unit):
+        if value <= 0 or (minimum is not None and value < minimum):
+            raise OrderValidationError(f"{self.product_id} {field} {value} is below the minimum {minimum} {unit}",
+                                       self.product_id, field)
+        if maximum is not None and value > maximum:
+            raise OrderValidationError(f"{self.product_id} {field} {value} is above the maximum {maximum} {unit}",
+                                       self.product_id, field)
+
+    def quote_size(self, amount):
+        """
+        Round a quote amount (market buy) down to quote_increment and check its limits
+
+        Returns:
+            str: The size to send
+        """
+        self._check_status(market=True)
+        size = _to_increment(_decimal(amount), self.quote_increment)
+        self._check_range(size, self.quote_min_size, self.quote_max_size, 'quote_size', 'quote')
+        return format(size, 'f')
+
+    def base_size(self, amount, market=True):
+        """
+        Round a base amount down to base_increment and check its limits
+
+        Returns:
+            str: The size to send
+        """
+        self._check_status(market=market)
+        size = _to_increment(_decimal(amount), self.base_increment)
+        self._check_range(size, self.base_min_size, self.base_max_size, 'base_size', 'base')
+        return format(size, 'f')
+
+    def limit_order(self, side, base_amount, limit_price):
+        """
+        Round a limit order: size down, price to the conservative side
+        (down for a buy, up for a sell) on price_increment
+
+        Returns:
+            tuple: (base_size, limit_price) strings
+        """
+        price = _to_increment(_decimal(limit_price), self.price_increment,
+                              ROUND_DOWN if side.upper() == 'BUY' else ROUND_UP)
+        if price <= 0:
+            raise OrderValidationError(f"{self.product_id} limit_price {price} is not positive",
+                                       self.product_id, 'limit_price')
+        size = self.base_size(base_amount, market=False)
+        if self.quote_min_size is not None and Decimal(size) * price < self.quote_min_size:
+            raise OrderValidationError(f"{self.product_id} order value {Decimal(size) * price} is below the "
+                                       f"minimum {self.quote_min_size} quote", self.product_id, 'base_size')
+        return size, format(price, 'f')
+
+    def minimum(self, side):
+        """Smallest market order amount (quote for BUY, base for SELL), or None"""
+        return self.quote_min_size if side.upper() == 'BUY' else self.base_min_size
+
+
+class ProductMetadataCache:
+    """
+    ProductRules per product, loaded in bulk and refreshed after `ttl` seconds
+
+    get() serves a stale entry at once and refreshes it in the background;
+    only a product never seen before is fetched synchronously.
+    """
+
+    def __init__(self, api, ttl=None, clock=time.monotonic):
+        self.api = api
+        self.ttl = Config.PRODUCT_METADATA_TTL if ttl is None else ttl
+        self.clock = clock
+        self._rules = {}
+        self._loaded_at = {}
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self.loaded = False
+
+    def ensure_loaded(self):
+        """
+        load() unless this cache has already been loaded
+
+        Every order service warms the same shared cache, so only the first
+        one pays for the list_products call.
+        """
+        with self._load_lock:
+            if not self.loaded:
+                self.load()
+
+    def load(self):
+        """
+        Load every product with one list_products call
+
+        Returns:
+            int: Number of products cached
+        """
+        products = self.api.list_products().get('products', [])
+        now = self.clock()
+        with self._lock:
+            for product in products:
+                if 'product_id' in product:
+                    self._store(product, now)
+            self.loaded = True
+        logger.info(f"📦 Product rules cached for {len(products)} products")
+        return len(products)
+
+    def _store(self, product, now):
+        rules = ProductRules(product)
+        self._rules[rules.product_id] = rules
+        self._loaded_at[rules.product_id] = now
+
+    def get(self, product_id):
+        """ProductRules for a product (fetched once if not loaded)"""
+        rules = self._rules.get(product_id)
+        if rules is None:
+            return self.refresh(product_id)
+        if self.clock() - self._loaded_at[product_id] > self.ttl:
+            self._refresh_async(product_id)
+        return rules
+
+    def refresh(self, product_id):
+        """Fetch one product now"""
+        product = self.api.get_product(product_id)
+        with self._lock:
+            self._store(product, self.clock())
+            return self._rules[product_id]
+
+    def _refresh_async(self, product_id):
+        with self._lock:
+            if product_id in self._refreshing:
+                return
+            self._refreshing.add(product_id)
+
+        def run():
+            try:
+                self.refresh(product_id)
+            except Exception as e:
+                logger.warning(f"⚠️  Product rules refresh failed for {product_id}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(product_id)
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+_shared_caches = weakref.WeakKeyDictionary()
+_shared_caches_lock = threading.Lock()
+
+
+def get_product_metadata(api):
+    """Process-wide ProductMetadataCache for an API client (one per client, created on first use)"""
+    cache = _shared_caches.get(api)
+    if cache is None:
+        with _shared_caches_lock:
+            cache = _shared_caches.get(api)
+            if cache is None:
+                cache = _shared_caches[api] = ProductMetadataCache(api)
+    return cache
@@ -0,0 +1,132 @@
+"""
+Quote Poller
+Best bid/ask for every watched product in one request per cycle
+
+Replaces one v2 spot request per product per cycle with a single
+get_best_bid_ask(product_ids=[...]) call. Changed quotes are published as
+ticks (price = mid) and as Quote records (bid, ask, mid, spread).
+
+The cycle follows the observed request latency: it is a multiple of the
+smoothed round trip, clamped to [min_interval, max_interval], and doubles
+after a failed request. A slow API is polled less often instead of piling
+up requests behind the rate limiter.
+"""
+import threading
+import time
+from collections import namedtuple
+
+from config import Config
+from market_data import MarketDataSource, Tick
+from structured_logging import get_logger
+
+
+logger = get_logger('market_data')
+
+
+Quote = namedtuple('Quote', ['product_id', 'bid', 'ask', 'mid', 'spread', 'timestamp'])
+
+
+class QuotePoller(MarketDataSource):
+    """
+    Polls get_best_bid_ask for all products at an adaptive interval
+
+    Requires an authenticated CoinbaseCompleteAPI (the endpoint is private).
+    """
+
+    def __init__(self, product_id=None, api=None, min_interval=None, max_interval=None,
+                 latency_factor=None, clock=time.monotonic):
+        super().__init__(product_id)
+        if api is None:
+            from coinbase_complete_api import CoinbaseCompleteAPI
+            api = CoinbaseCompleteAPI()
+        self.api = api
+        self.min_interval = Config.QUOTE_POLL_MIN_INTERVAL if min_interval is None else min_interval
+        self.max_interval = Config.QUOTE_POLL_MAX_INTERVAL if max_interval is None else max_interval
+        self.latency_factor = Config.QUOTE_POLL_LATENCY_FACTOR if latency_factor is None else latency_factor
+        self.clock = clock
+
+        self.interval = self.min_interval
+        self.latency = None  # smoothed request latency (seconds)
+        self.request_count = 0
+        self.quotes = {}
+        self.name = f"Quote poll ({len(self.product_ids)} products)"
+
+        self._quote_listeners = []
+        self._thread = None
+        self._stop_event = threading.Event()
+
+    def subscribe_quotes(self, on_quote):
+        """Register a callback for Quote records"""
+        self._quote_listeners.append(on_quote)
+
+    def start(self):
+        """Start the polling thread"""
+        if self.is_running:
+            return
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join(timeout=5)
+        self.is_running = True
+        self._stop_event.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop polling"""
+        self.is_running = False
+        self._stop_event.set()
+
+    def poll_once(self):
+        """
+        Fetch every product's best bid/ask in one request and publish changes
+
+        Returns:
+            list: Quotes that changed since the previous poll
+        """
+        start = self.clock()
+        response = self.api.get_best_bid_ask(self.product_ids)
+        self._record_latency(self.clock() - start)
+
+        now = time.time()
+        changed = []
+        for book in response.get('pricebooks', []):
+            product_id = book.get('product_id')
+            bids, asks = book.get('bids'), book.get('asks')
+            if product_id not in self.quotes and product_id not in self.product_ids:
+                continue
+            if not bids or not asks:
+                continue
+
+            bid, ask = float(bids[0]['price']), float(asks[0]['price'])
+            previous = self.quotes.get(product_id)
+            if previous is not None and previous.bid == bid and previous.ask == ask:
+                continue
+
+            quote = Quote(product_id, bid, ask, (bid + ask) / 2, ask - bid, now)
+            self.quotes[product_id] = quote
+            changed.append(quote)
+
+        for quote in changed:
+            self._publish(Tick(quote.product_id, quote.mid, quote.timestamp, None, quote.bid, quote.ask))
+            for listener in self._quote_listeners:
+                try:
+                    listener(quote)
+                except Exception as e:
+                    logger.error(f"❌ Quote listener error: {e}")
+        return changed
+
+    def _record_latency(self, seconds):
+        """Smooth the round trip and derive the next cycle time"""
+        self.request_count += 1
+        self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+        self.interval = min(self.max_interval, max(self.min_interval, self.latency * self.latency_factor))
+
+    def _run(self):
+        """Polling loop (the cycle includes the request itself)"""
+        while self.is_running:
+            started = self.clock()
+            try:
+                self.poll_once()
+            except Exception as e:
+                self.interval = min(self.max_interval, self.interval * 2)
+                self._publish_error(e)
+            self._stop_event.wait(max(0.0, self.interval - (self.clock() - started)))
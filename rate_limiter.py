@@ -0,0 +1,279 @@
+"""
+Rate Limiter
+Client-side token buckets for Coinbase public and private REST budgets
+
+Requests wait for a token instead of running into HTTP 429. Order placement
+is served ahead of other waiting calls, and a 429 (with or without
+Retry-After) pauses the bucket and lowers its rate until requests succeed
+again.
+"""
+import heapq
+import itertools
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+from config import Config
+from metrics import get_registry
+from structured_logging import get_logger
+
+
+logger = get_logger('rate_limit')
+
+
+# Lower value = served first
+PRIORITY_ORDER = 0    # order placement / cancellation
+PRIORITY_NORMAL = 1   # balances, fills, products
+PRIORITY_LOW = 2      # background price polling
+
+
+class RateLimitTimeout(Exception):
+    """No token became available within the requested timeout"""
+
+
+def parse_retry_after(value, now=None):
+    """
+    Seconds to wait from a Retry-After header (delta seconds or HTTP date)
+
+    Returns:
+        float or None: None if the header is missing or unreadable
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+        return max(0.0, when - (now if now is not None else time.time()))
+    except (TypeError, ValueError):
+        return None
+
+
+class RequestScheduler:
+    """
+    Token bucket with a priority queue of waiting callers
+
+    - `rate` tokens per second, up to `burst` saved up
+    - Waiting callers are served by priority, then arrival order
+    - on_rate_limited() blocks the bucket for Retry-After (or an exponential
+      backoff) and halves the effective rate; each success restores 5%
+    - metrics_hook(event) is called with a dict for every acquire and 429
+    """
+
+    def __init__(self, name, rate, burst=None, metrics_hook=None,
+                 backoff_base=1.0, backoff_max=60.0, min_rate_factor=0.1, clock=time.monotonic):
+        self.name = name
+        self.rate = float(rate)
+        self.burst = float(burst or rate)
+        self.metrics_hook = metrics_hook
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.min_rate_factor = min_rate_factor
+        self.clock = clock
+
+        self.rate_factor = 1.0
+        self.blocked_until = 0.0
+        self.consecutive_limited = 0
+
+        # Metrics
+        self.requests = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.wait_histogram = None  # metrics HistogramChild, see RateLimiter
+
+        self._tokens = self.burst
+        self._last = clock()
+        self._waiters = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+
+    @property
+    def effective_rate(self):
+        """Current tokens per second after adaptive backoff"""
+        return self.rate * self.rate_factor
+
+    def _refill(self, now):
+        """Add tokens for the time elapsed (none while blocked)"""
+        if now >= self.blocked_until:
+            start = max(self._last, self.blocked_until)
+            self._tokens = min(self.burst, self._tokens + (now - start) * self.effective_rate)
+        self._last = now
+
+    def _time_until_ready(self, now):
+        """Seconds until one token is available"""
+        wait = self.blocked_until - now
+        if self._tokens < 1:
+            wait = max(wait, (1 - self._tokens) / self.effective_rate)
+        return wait
+
+    def acquire(self, priority=PRIORITY_NORMAL, timeout=None):
+        """
+        Block until a request may be sent
+
+        Args:
+            priority (int): PRIORITY_ORDER, PRIORITY_NORMAL or PRIORITY_LOW
+            timeout (float): Give up after this many seconds
+
+        Returns:
+            float: Seconds spent waiting
+        """
+        start = self.clock()
+        entry = (priority, next(self._seq))
+
+        with self._cond:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = self.clock()
+                    self._refill(now)
+
+                    wait = None
+                    if self._waiters[0] == entry:
+                        wait = self._time_until_ready(now)
+                        if wait <= 0:
+                            self._tokens -= 1
+                            heapq.heappop(self._waiters)
+                            break
+
+                    if timeout is not None:
+                        remaining = start + timeout - now
+                        if remaining <= 0:
+                            raise RateLimitTimeout(f"{self.name}: no request slot within {timeout}s")
+                        wait = remaining if wait is None else min(wait, remaining)
+
+                    self._cond.wait(wait)
+            except BaseException:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+                    heapq.heapify(self._waiters)
+                raise
+            finally:
+                # Let the next caller in line re-check
+                self._cond.notify_all()
+
+            waited = self.clock() - start
+            self.requests += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            depth = len(self._waiters)
+
+        if self.wait_histogram is not None:
+            self.wait_histogram.observe(waited)
+        self._emit('acquire', priority=priority, wait=waited, queue_depth=depth)
+        return waited
+
+    def on_rate_limited(self, retry_after=None):
+        """Pause the bucket and lower its rate after an HTTP 429"""
+        with self._cond:
+            self.throttled += 1
+            self.consecutive_limited += 1
+
+            delay = parse_retry_after(retry_after)
+            if delay is None:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (self.consecutive_limited - 1))
+
+            now = self.clock()
+            self._refill(now)
+            self.blocked_until = max(self.blocked_until, now + delay)
+            self._tokens = 0.0
+            self.rate_factor = max(self.min_rate_factor, self.rate_factor / 2)
+            depth = len(self._waiters)
+            self._cond.notify_all()
+
+        self._emit('throttled', delay=delay, queue_depth=depth)
+        return delay
+
+    def on_success(self):
+        """Recover the rate gradually after successful requests"""
+        with self._cond:
+            self.consecutive_limited = 0
+            if self.rate_factor < 1.0:
+                self.rate_factor = min(1.0, self.rate_factor + 0.05)
+
+    def record_response(self, response):
+        """
+        Feed a response back into the scheduler
+
+        Returns:
+            bool: True if it was a 429 (the caller may retry)
+        """
+        if response.status_code == 429:
+            self.on_rate_limited(response.headers.get('Retry-After'))
+            return True
+        self.on_success()
+        return False
+
+    def _emit(self, event, **data):
+        """Send a metrics event to the hook"""
+        if self.metrics_hook is None:
+            return
+        data.update({'event': event, 'limiter': self.name, 'rate': self.effective_rate})
+        try:
+            self.metrics_hook(data)
+        except Exception as e:
+            logger.warning(f"⚠️  Rate limiter metrics hook error: {e}")
+
+    def stats(self):
+        """Scheduler counters"""
+        with self._cond:
+            return {
+                'requests': self.requests,
+                'throttled': self.throttled,
+                'queue_depth': len(self._waiters),
+                'avg_wait': (self.total_wait / self.requests) if self.requests else 0.0,
+                'max_wait': self.max_wait,
+                'rate': self.effective_rate,
+                'blocked_for': max(0.0, self.blocked_until - self.clock())
+            }
+
+
+class RateLimiter:
+    """Separate public and private budgets (Coinbase limits them independently)"""
+
+    def __init__(self, public_rate=None, private_rate=None, max_retries=None, metrics_hook=None):
+        self.max_retries = Config.RATE_LIMIT_MAX_RETRIES if max_retries is None else max_retries
+        self.public = RequestScheduler('public', public_rate or Config.RATE_LIMIT_PUBLIC, metrics_hook=metrics_hook)
+        self.private = RequestScheduler('private', private_rate or Config.RATE_LIMIT_PRIVATE, metrics_hook=metrics_hook)
+        self._register_metrics()
+
+    def _register_metrics(self):
+        """Export both budgets to the metrics registry"""
+        registry = get_registry()
+        requests = registry.counter('coinbase_requests_total', "REST requests sent", ('limiter',))
+        throttled = registry.counter('coinbase_rate_limited_total', "HTTP 429 responses", ('limiter',))
+        depth = registry.gauge('coinbase_rate_limit_queue_depth', "Requests waiting for a token", ('limiter',))
+        rate = registry.gauge('coinbase_rate_limit_rate', "Current requests per second after backoff", ('limiter',))
+        wait = registry.histogram('coinbase_rate_limit_wait_seconds', "Time spent waiting for a token", ('limiter',))
+
+        for scheduler in (self.public, self.private):
+            requests.labels(scheduler.name).set_function(lambda s=scheduler: s.requests)
+            throttled.labels(scheduler.name).set_function(lambda s=scheduler: s.throttled)
+            depth.labels(scheduler.name).set_function(lambda s=scheduler: len(s._waiters))
+            rate.labels(scheduler.name).set_function(lambda s=scheduler: s.effective_rate)
+            scheduler.wait_histogram = wait.labels(scheduler.name)
+
+    def set_metrics_hook(self, hook):
+        """Install one metrics hook on both budgets"""
+        self.public.metrics_hook = hook
+        self.private.metrics_hook = hook
+
+    def stats(self):
+        """Counters for both budgets"""
+        return {'public': self.public.stats(), 'private': self.private.stats()}
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter():
+    """Return the process-wide rate limiter (limits are per user / per IP)"""
+    global _shared_limiter
+    if _shared_limiter is None:
+        with _shared_lock:
+            if _shared_limiter is None:
+                _shared_limiter = RateLimiter()
+    return _shared_limiter
@@ -0,0 +1,149 @@
+"""
+Slippage Estimator
+Pre-trade fill price and slippage for a market order, from order book depth
+
+The estimator walks an OrderBook to predict the average fill price of a
+market order. The book is kept current by a feed, or by a background
+BookPoller on the public endpoint once start() is called, so an order never
+waits for a book request; without either it is fetched from
+get_product_book when older than max_age. Estimates are cached per book version, so
+checking the same size again before the book changes costs a dict lookup.
+
+Slippage is measured against the touch (best ask for a buy, best bid for a
+sell) and is positive when the fill is worse than the touch.
+"""
+import math
+import time
+
+from config import Config
+from order_book import BookPoller, OrderBook
+
+
+class SlippageEstimator:
+    """
+    Predicts fill price and slippage for market orders on one product
+
+    Pass `book` when a feed already keeps an OrderBook current; otherwise
+    the estimator owns one, polled in the background after start() or
+    refreshed on demand from get_product_book.
+    """
+
+    def __init__(self, api, product_id='BTC-USD', book=None, max_age=None, limit=None, clock=time.monotonic):
+        self.api = api
+        self.product_id = product_id
+        self.owns_book = book is None
+        self.book = book or OrderBook(product_id)
+        self.max_age = Config.SLIPPAGE_BOOK_MAX_AGE if max_age is None else max_age
+        self.limit = Config.SLIPPAGE_BOOK_LIMIT if limit is None else limit
+        self.clock = clock
+
+        self.poller = None
+        self.fetched_at = None
+        self.cache_hits = 0
+        self._cache = {}
+        self._cache_version = None
+
+    def start(self):
+        """Poll our own book every max_age seconds in the background (public endpoint)"""
+        if not self.owns_book or self.poller is not None:
+            return
+        self.poller = BookPoller(self.api, self.book, interval=self.max_age, limit=self.limit)
+        self.poller.start()
+
+    def stop(self):
+        """Stop the background poller"""
+        if self.poller is not None:
+            self.poller.stop()
+            self.poller = None
+
+    def refresh(self, force=False):
+        """
+        Re-fetch the book if we own it, nothing polls it and it is older than max_age
+
+        Polled snapshots are applied as diffs, so an unchanged book keeps its
+        version (and the cached estimates).
+        """
+        if not self.owns_book or self.poller is not None:
+            return
+        now = self.clock()
+        if not force and self.fetched_at is not None and now - self.fetched_at < self.max_age:
+            return
+        self.book.sync_snapshot(self.api.get_product_book(self.product_id, limit=self.limit))
+        self.fetched_at = now
+
+    def estimate(self, side, usd_amount=None, btc_amount=None):
+        """
+        Predict the fill of a market order
+
+        Args:
+            side (str): 'BUY' or 'SELL'
+            usd_amount (float): Quote to spend (buys)
+            btc_amount (float): Base to sell (or buy)
+
+        Returns:
+            dict: side, reference_price (touch), average_price, slippage_pct,
+                  worst_price, btc_amount, usd_amount, levels, complete
+                  (the book was deep enough) and book_version; None if the
+                  book is empty or stale
+        """
+        self.refresh()
+        book = self.book
+        if not book.ready:
+            return None
+
+        side = side.upper()
+        version = book.version
+        if version != self._cache_version:
+            self._cache.clear()
+            self._cache_version = version
+
+        key = (side, usd_amount, btc_amount)
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.cache_hits += 1
+            return cached
+
+        touch = book.best_ask() if side == 'BUY' else book.best_bid()
+        if touch is None:
+            return None
+        if btc_amount is not None:
+            walk = book.vwap(side, quantity=btc_amount)
+        else:
+            walk = book.vwap(side, notional=usd_amount)
+        if walk['price'] is None:
+            return None
+
+        reference = touch[0]
+        direction = 1 if side == 'BUY' else -1
+        result = {
+            'side': side,
+            'reference_price': reference,
+            'average_price': walk['price'],
+            'slippage_pct': direction * (walk['price'] - reference) / reference * 100,
+            'worst_price': walk['worst_price'],
+            'btc_amount': walk['filled'],
+            'usd_amount': walk['cost'],
+            'levels': walk['levels'],
+            'complete': walk['complete'],
+            'book_version': version
+        }
+        self._cache[key] = result
+        return result
+
+    def child_count(self, estimate, max_slippage_pct, max_children):
+        """
+        How many equal child orders keep each one near max_slippage_pct
+
+        Slippage grows roughly linearly with size through the top levels, so
+        the parent is split by the ratio of estimated to allowed slippage.
+        """
+        if estimate is None or max_slippage_pct <= 0:
+            return 1
+        if not estimate['complete']:
+            return max_children
+        return max(1, min(max_children, math.ceil(estimate['slippage_pct'] / max_slippage_pct)))
+
+    def limit_price(self, estimate, max_slippage_pct):
+        """Worst acceptable price for a limit IOC order (touch +/- max slippage)"""
+        direction = 1 if estimate['side'] == 'BUY' else -1
+        return estimate['reference_price'] * (1 + direction * max_slippage_pct / 100)
@@ -0,0 +1,187 @@
+"""
+Structured Logging
+Non-blocking, structured log output for the trading paths
+
+Records are put on an in-memory queue by a QueueHandler and written to the
+console (and optionally a JSON-lines file) by a QueueListener thread, so a
+slow terminal never stalls the price or order thread. Each subsystem logs
+under trader.<subsystem> with its own level (LOG_LEVELS), identical
+info/debug repeats are collapsed within LOG_REPEAT_WINDOW seconds (warnings,
+errors and the order and engine subsystems never are), and per-tick events
+are sampled with TickSampler.
+
+Usage:
+    logger = get_logger('engine')
+    logger.info("✓ BUY EXECUTED", extra=fields(price=price, btc_amount=qty))
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+import time
+
+from config import Config
+
+
+ROOT = 'trader'
+
+_listener = None
+_setup_lock = threading.Lock()
+
+
+def fields(**values):
+    """extra= payload attached to a record as structured fields"""
+    return {'fields': values}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, subsystem, msg and fields"""
+
+    def format(self, record):
+        event = {
+            'ts': round(record.created, 6),
+            'level': record.levelname,
+            'subsystem': record.name[len(ROOT) + 1:] if record.name.startswith(ROOT + '.') else record.name,
+            'msg': record.getMessage().strip(),
+            'thread': record.threadName
+        }
+        event.update(getattr(record, 'fields', None) or {})
+        if getattr(record, 'repeated', 0):
+            event['repeated'] = record.repeated
+        if record.exc_info:
+            event['exc'] = self.formatException(record.exc_info)
+        return json.dumps(event, default=str, ensure_ascii=False)
+
+
+class ConsoleFormatter(logging.Formatter):
+    """The message as the bot always printed it, plus a repeat count"""
+
+    def format(self, record):
+        message = super().format(record)
+        if getattr(record, 'repeated', 0):
+            message += f"  (repeated {record.repeated}x)"
+        return message
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Drop a message identical to one logged less than `window` seconds ago
+
+    Only records below WARNING from subsystems not in `exempt` are
+    collapsed, so failures and trade lines are always written. The next copy
+    let through after the window carries `repeated`, the number of copies
+    dropped in between.
+    """
+
+    def __init__(self, window, clock=time.monotonic, exempt=('orders', 'engine')):
+        super().__init__()
+        self.window = window
+        self.clock = clock
+        self.exempt = frozenset(f"{ROOT}.{name}" for name in exempt)
+        self._seen = {}  # (logger, level, message) -> [last emitted, dropped]
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.window <= 0 or record.levelno >= logging.WARNING or record.name in self.exempt:
+            return True
+        key = (record.name, record.levelno, record.getMessage())
+        now = self.clock()
+
+        with self._lock:
+            entry = self._seen.get(key)
+            if entry is not None and now - entry[0] < self.window:
+                entry[1] += 1
+                return False
+            if entry is not None and entry[1]:
+                record.repeated = entry[1]
+            self._seen[key] = [now, 0]
+            if len(self._seen) > 10000:
+                self._seen.clear()
+        return True
+
+
+class TickSampler:
+    """True on every `every`-th call (for per-tick debug events)"""
+
+    __slots__ = ('every', '_count')
+
+    def __init__(self, every=None):
+        self.every = max(1, Config.LOG_TICK_SAMPLE if every is None else every)
+        self._count = 0
+
+    def __call__(self):
+        self._count += 1
+        return self._count % self.every == 0
+
+
+def parse_levels(spec):
+    """'engine=DEBUG,api=WARNING' -> {'engine': 10, 'api': 30}"""
+    levels = {}
+    for item in filter(None, (part.strip() for part in (spec or '').split(','))):
+        name, _, level = item.partition('=')
+        levels[name.strip()] = logging.getLevelName(level.strip().upper())
+    return levels
+
+
+def setup_logging(level=None, levels=None, fmt=None, log_file=None, repeat_window=None, stream=None):
+    """
+    Route trader.* loggers through a queue to a background writer (idempotent)
+
+    Args:
+        level (str): Default level (Config.LOG_LEVEL)
+        levels (str): Per-subsystem levels, e.g. 'engine=DEBUG,api=WARNING'
+        fmt (str): Console format, 'text' or 'json' (Config.LOG_FORMAT)
+        log_file (str): Also write JSON lines here (Config.LOG_FILE)
+        repeat_window (float): Seconds identical messages are collapsed
+        stream: Console stream (default sys.stdout)
+    """
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            return _listener
+
+        root = logging.getLogger(ROOT)
+        root.setLevel(logging.getLevelName((level or Config.LOG_LEVEL).upper()))
+        root.propagate = False
+        for name, subsystem_level in parse_levels(Config.LOG_LEVELS if levels is None else levels).items():
+            logging.getLogger(f"{ROOT}.{name}").setLevel(subsystem_level)
+
+        console = logging.StreamHandler(stream or sys.stdout)
+        console.setFormatter(JsonFormatter() if (fmt or Config.LOG_FORMAT) == 'json' else ConsoleFormatter())
+        handlers = [console]
+
+        log_file = Config.LOG_FILE if log_file is None else log_file
+        if log_file:
+            file_handler = logging.FileHandler(log_file, encoding='utf-8')
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+
+        # The calling thread only filters and enqueues; the listener does the I/O
+        log_queue = queue.SimpleQueue()
+        queue_handler = logging.handlers.QueueHandler(log_queue)
+        queue_handler.addFilter(RepeatFilter(Config.LOG_REPEAT_WINDOW if repeat_window is None else repeat_window))
+        root.handlers[:] = [queue_handler]
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+
+def shutdown_logging():
+    """Flush queued records and stop the writer thread"""
+    global _listener
+    with _setup_lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
+
+
+def get_logger(subsystem):
+    """Logger for one subsystem (sets up the pipeline on first use)"""
+    if _listener is None:
+        setup_logging()
+    return logging.getLogger(f"{ROOT}.{subsystem}")
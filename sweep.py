@@ -0,0 +1,300 @@
+"""
+Parameter Sweep
+Grid search of the auto-loop settings over historical candles on all CPU cores
+
+The candle arrays are copied once into shared memory; worker processes map
+them instead of receiving a pickled copy per task. Finished combinations are
+appended to a JSONL checkpoint so an interrupted sweep resumes where it
+stopped.
+
+Usage:
+    python sweep.py --csv candles.csv --profit 0.5:3:0.25 --stop 0.5:3:0.5 \\
+        --rebuy 1:4:0.5 --size 100 --checkpoint sweep.jsonl --top 20
+"""
+import argparse
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from backtester import BacktestParams, load_candles, run_backtest
+from config import Config
+
+
+SWEEP_FIELDS = ('profit_rate', 'stop_loss', 'rebuy_drop', 'position_size')
+RESULT_FIELDS = ('trades_count', 'win_rate', 'total_profit', 'return_pct',
+                 'max_drawdown', 'max_drawdown_pct')
+LOWER_IS_BETTER = ('max_drawdown', 'max_drawdown_pct')
+
+# Fields stored in shared memory (one float64 row each)
+SHARED_FIELDS = ('time', 'open', 'high', 'low', 'close')
+
+
+# ==================== GRID ====================
+
+def parse_values(spec):
+    """
+    Parse '0.5:3:0.25' (inclusive range) or '1,1.5,2' into a list of floats
+    """
+    if ':' in spec:
+        start, stop, step = (float(x) for x in spec.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + step * k, 10) for k in range(count)]
+    return [float(x) for x in spec.split(',')]
+
+
+def build_grid(profit_pcts, stop_losses, rebuy_drops, position_sizes):
+    """
+    Every combination of the given values
+
+    Args:
+        profit_pcts (list): Net profit targets in percent (as in the GUI)
+        stop_losses (list): Stop loss percents
+        rebuy_drops (list): Rebuy drop percents
+        position_sizes (list): USD per trade
+
+    Returns:
+        list: Param dicts keyed by SWEEP_FIELDS (profit_rate as a decimal)
+    """
+    return [
+        {'profit_rate': round(p / 100, 10), 'stop_loss': s, 'rebuy_drop': r, 'position_size': size}
+        for p, s, r, size in itertools.product(profit_pcts, stop_losses, rebuy_drops, position_sizes)
+    ]
+
+
+def combo_key(combo):
+    """Stable identifier of a parameter combination"""
+    return json.dumps([combo[f] for f in SWEEP_FIELDS])
+
+
+# ==================== SHARED CANDLES ====================
+
+class SharedCandles:
+    """Candle arrays copied into one shared memory block"""
+
+    def __init__(self, candles):
+        self.shape = (len(SHARED_FIELDS), len(candles['close']))
+        self.shm = shared_memory.SharedMemory(create=True, size=max(1, 8 * self.shape[0] * self.shape[1]))
+
+        block = np.ndarray(self.shape, dtype=np.float64, buffer=self.shm.buf)
+        for row, name in enumerate(SHARED_FIELDS):
+            block[row] = candles[name]
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def close(self):
+        """Release and remove the block"""
+        self.shm.close()
+        self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Per-process state set by _init_worker
+_worker_shm = None
+_worker_candles = None
+
+
+def _init_worker(shm_name, shape):
+    """Map the shared candle block in a worker process"""
+    global _worker_shm, _worker_candles
+    _worker_shm = shared_memory.SharedMemory(name=shm_name)
+    block = np.ndarray(shape, dtype=np.float64, buffer=_worker_shm.buf)
+    _worker_candles = {name: block[row] for row, name in enumerate(SHARED_FIELDS)}
+
+
+def _evaluate_batch(combos, fill, initial_usd):
+    """Backtest a batch of combinations against the shared candles"""
+    rows = []
+    for combo in combos:
+        params = BacktestParams(initial_usd=initial_usd, **combo)
+        result = run_backtest(_worker_candles, params, fill=fill)
+        row = dict(combo)
+        row.update({field: result[field] for field in RESULT_FIELDS})
+        rows.append(row)
+    return rows
+
+
+# ==================== CHECKPOINT ====================
+
+def _fingerprint(candles, fill, initial_usd):
+    """Identifies the data a checkpoint belongs to"""
+    n = len(candles['close'])
+    return {
+        'bars': n,
+        'first_time': int(candles['time'][0]) if n else None,
+        'last_time': int(candles['time'][-1]) if n else None,
+        'fill': fill,
+        'initial_usd': initial_usd
+    }
+
+
+def load_checkpoint(path, fingerprint):
+    """
+    Read finished rows from a checkpoint
+
+    Returns:
+        dict: combo_key -> result row (empty if the file does not exist)
+    """
+    if not path or not os.path.exists(path):
+        return {}
+
+    with open(path) as f:
+        lines = f.read().split("\n")
+
+    if lines[0] and json.loads(lines[0]) != fingerprint:
+        raise Exception(f"Checkpoint {path} was created for different candles or settings")
+
+    if lines[-1]:
+        # Partial record from an interrupted write - drop it before appending
+        lines[-1] = ''
+        with open(path, 'w') as f:
+            f.write("\n".join(lines))
+
+    done = {}
+    for line in lines[1:]:
+        if line:
+            row = json.loads(line)
+            done[combo_key(row)] = row
+    return done
+
+
+# ==================== SWEEP ====================
+
+def run_sweep(candles, grid, workers=None, checkpoint=None, fill='intrabar',
+              initial_usd=1000.0, batch_size=32):
+    """
+    Backtest every combination in grid across a process pool
+
+    Args:
+        candles (dict): Candle arrays (see backtester.load_candles)
+        grid (list): Param dicts from build_grid
+        workers (int): Processes (default: all CPU cores)
+        checkpoint (str): JSONL file to resume from and append to
+        fill (str): Backtester fill model
+        initial_usd (float): Starting cash
+        batch_size (int): Combinations per task
+
+    Returns:
+        list: One result row per combination (resumed rows included)
+    """
+    fingerprint = _fingerprint(candles, fill, initial_usd)
+    done = load_checkpoint(checkpoint, fingerprint)
+    pending = [combo for combo in grid if combo_key(combo) not in done]
+
+    if done:
+        print(f"🔄 Resuming: {len(done)} done, {len(pending)} remaining")
+
+    out = None
+    if checkpoint:
+        write_header = not os.path.exists(checkpoint) or os.path.getsize(checkpoint) == 0
+        out = open(checkpoint, 'a')
+        if write_header:
+            out.write(json.dumps(fingerprint) + "\n")
+            out.flush()
+
+    try:
+        if pending:
+            with SharedCandles(candles) as shared:
+                with ProcessPoolExecutor(
+                    max_workers=workers or os.cpu_count(),
+                    initializer=_init_worker,
+                    initargs=(shared.name, shared.shape)
+                ) as pool:
+                    futures = [
+                        pool.submit(_evaluate_batch, pending[i:i + batch_size], fill, initial_usd)
+                        for i in range(0, len(pending), batch_size)
+                    ]
+                    total = len(done) + len(pending)
+                    try:
+                        for future in as_completed(futures):
+                            for row in future.result():
+                                done[combo_key(row)] = row
+                                if out:
+                                    out.write(json.dumps(row) + "\n")
+                            if out:
+                                out.flush()
+                            print(f"   {len(done)}/{total} combinations", end='\r')
+                    except KeyboardInterrupt:
+                        for future in futures:
+                            future.cancel()
+                        print(f"\n⏸️  Sweep interrupted - {len(done)} combinations saved, rerun to resume")
+                        raise
+    finally:
+        if out:
+            out.close()
+
+    print()
+    keys = {combo_key(combo) for combo in grid}
+    return [row for key, row in done.items() if key in keys]
+
+
+def rank(rows, metric='total_profit'):
+    """Sort rows best first by metric"""
+    return sorted(rows, key=lambda row: row[metric], reverse=metric not in LOWER_IS_BETTER)
+
+
+def print_table(rows, top=20, metric='total_profit'):
+    """Print the ranked results table"""
+    print("\n" + "="*86)
+    print(f"🏆 TOP {min(top, len(rows))} OF {len(rows)} COMBINATIONS (by {metric})")
+    print("="*86)
+    print(f"{'#':>3} {'Profit%':>8} {'Stop%':>6} {'Rebuy%':>7} {'Size$':>8} "
+          f"{'Trades':>7} {'Win%':>6} {'PnL $':>10} {'Return%':>8} {'MaxDD%':>7}")
+    for i, row in enumerate(rank(rows, metric)[:top], 1):
+        print(f"{i:>3} {row['profit_rate']*100:>8.2f} {row['stop_loss']:>6.2f} {row['rebuy_drop']:>7.2f} "
+              f"{row['position_size']:>8.2f} {row['trades_count']:>7} {row['win_rate']:>6.1f} "
+              f"{row['total_profit']:>+10.2f} {row['return_pct']:>+8.2f} {row['max_drawdown_pct']:>7.2f}")
+    print("="*86)
+
+
+def save_table(rows, path, metric='total_profit'):
+    """Write ranked rows to CSV"""
+    fields = SWEEP_FIELDS + RESULT_FIELDS
+    with open(path, 'w') as f:
+        f.write(','.join(fields) + "\n")
+        for row in rank(rows, metric):
+            f.write(','.join(str(row[field]) for field in fields) + "\n")
+
+
+def main():
+    """Command line interface"""
+    parser = argparse.ArgumentParser(description="Grid search of auto-loop parameters")
+    parser.add_argument('--csv', required=True, help="Candle file (.csv or .parquet)")
+    parser.add_argument('--profit', default=f"{Config.PROFIT_TARGET}", help="Net profit %% values, e.g. 0.5:3:0.25")
+    parser.add_argument('--stop', default=f"{Config.STOP_LOSS}", help="Stop loss %% values")
+    parser.add_argument('--rebuy', default="2.0", help="Rebuy drop %% values")
+    parser.add_argument('--size', default="100", help="Position size USD values")
+    parser.add_argument('--fill', default='intrabar', choices=['intrabar', 'close'])
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--checkpoint', default=None, help="JSONL file for resuming")
+    parser.add_argument('--sort', default='total_profit', choices=RESULT_FIELDS)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--out', default=None, help="Write the ranked table to CSV")
+    args = parser.parse_args()
+
+    candles = load_candles(args.csv)
+    grid = build_grid(parse_values(args.profit), parse_values(args.stop),
+                      parse_values(args.rebuy), parse_values(args.size))
+
+    print(f"\n🔍 Sweeping {len(grid):,} combinations over {len(candles['close']):,} bars")
+
+    rows = run_sweep(candles, grid, workers=args.workers, checkpoint=args.checkpoint, fill=args.fill)
+    print_table(rows, args.top, args.sort)
+
+    if args.out:
+        save_table(rows, args.out, args.sort)
+        print(f"✅ Results written to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
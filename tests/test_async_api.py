@@ -0,0 +1,146 @@
+"""
+Unit tests for the asyncio Coinbase client
+"""
+import unittest
+import asyncio
+import inspect
+import threading
+import time
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from coinbase_complete_api import CoinbaseCompleteAPI
+from async_coinbase_api import AsyncCoinbaseCompleteAPI
+
+
+class SlowAPI:
+    """Stand-in for CoinbaseCompleteAPI whose calls block for a fixed time"""
+
+    def __init__(self, delay=0.1):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._lock = threading.Lock()
+
+    def _slow(self, result):
+        with self._lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self._lock:
+            self.in_flight -= 1
+        return result
+
+    def list_accounts(self, limit=None, cursor=None):
+        return self._slow({'accounts': []})
+
+    def get_best_bid_ask(self, product_ids=None):
+        return self._slow({'pricebooks': product_ids})
+
+    def list_orders(self, **kwargs):
+        return self._slow({'orders': [], 'params': kwargs})
+
+    def list_fills(self, **kwargs):
+        return self._slow({'fills': []})
+
+    def get_product(self, product_id):
+        raise ValueError(f"unknown product {product_id}")
+
+
+class TestAsyncSurface(unittest.TestCase):
+    """Test that the async client mirrors the sync client"""
+
+    def test_every_endpoint_is_mirrored(self):
+        """Test that each public sync method has an awaitable twin"""
+        for name, _ in inspect.getmembers(CoinbaseCompleteAPI, inspect.isfunction):
+            if name.startswith('_') or name.startswith('iter_'):
+                continue
+            self.assertTrue(hasattr(AsyncCoinbaseCompleteAPI, name), name)
+            self.assertTrue(inspect.iscoroutinefunction(getattr(AsyncCoinbaseCompleteAPI, name)), name)
+
+    def test_arguments_passed_through(self):
+        """Test that args and kwargs reach the sync method"""
+        sync_api = Mock()
+        sync_api.list_orders.return_value = {'orders': []}
+        api = AsyncCoinbaseCompleteAPI(api=sync_api, max_concurrency=2)
+
+        result = asyncio.run(api.list_orders(product_id='BTC-USD', order_status='OPEN'))
+        api.close()
+
+        sync_api.list_orders.assert_called_once_with(product_id='BTC-USD', order_status='OPEN')
+        self.assertEqual(result, {'orders': []})
+
+
+class TestAsyncFanOut(unittest.TestCase):
+    """Test concurrent fan-out and the concurrency limit"""
+
+    def test_gather_runs_calls_concurrently(self):
+        """Test four independent calls take about one round trip"""
+        slow = SlowAPI(delay=0.2)
+        api = AsyncCoinbaseCompleteAPI(api=slow, max_concurrency=4)
+
+        async def refresh():
+            return await api.gather(
+                api.list_accounts(),
+                api.get_best_bid_ask(['BTC-USD']),
+                api.list_orders(order_status='OPEN'),
+                api.list_fills(product_id='BTC-USD'),
+            )
+
+        start = time.perf_counter()
+        results = asyncio.run(refresh())
+        elapsed = time.perf_counter() - start
+        api.close()
+
+        self.assertEqual(results[1], {'pricebooks': ['BTC-USD']})
+        self.assertEqual(slow.max_in_flight, 4)
+        self.assertLess(elapsed, 0.6)
+
+    def test_concurrency_limit_respected(self):
+        """Test that no more than max_concurrency calls are in flight"""
+        slow = SlowAPI(delay=0.05)
+        api = AsyncCoinbaseCompleteAPI(api=slow, max_concurrency=2)
+
+        async def burst():
+            return await api.gather(*[api.list_accounts() for _ in range(8)])
+
+        results = asyncio.run(burst())
+        api.close()
+
+        self.assertEqual(len(results), 8)
+        self.assertEqual(slow.max_in_flight, 2)
+
+    def test_gather_return_exceptions(self):
+        """Test that failures can be returned in place"""
+        api = AsyncCoinbaseCompleteAPI(api=SlowAPI(delay=0), max_concurrency=2)
+
+        async def mixed():
+            return await api.gather(
+                api.list_accounts(),
+                api.get_product('NOPE-USD'),
+                return_exceptions=True
+            )
+
+        results = asyncio.run(mixed())
+        api.close()
+
+        self.assertEqual(results[0], {'accounts': []})
+        self.assertIsInstance(results[1], ValueError)
+
+    def test_reusable_across_event_loops(self):
+        """Test the client works with more than one asyncio.run()"""
+        api = AsyncCoinbaseCompleteAPI(api=SlowAPI(delay=0), max_concurrency=2)
+
+        asyncio.run(api.list_accounts())
+        result = asyncio.run(api.list_accounts())
+        api.close()
+
+        self.assertEqual(result, {'accounts': []})
+
+
+if __name__ == '__main__':
+    unittest.main()
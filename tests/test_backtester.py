@@ -0,0 +1,188 @@
+"""
+Unit tests for the candle backtester
+"""
+import unittest
+import tempfile
+import os
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backtester import (
+    BacktestParams, candles_from_rows, fetch_candles, load_candles, save_candles,
+    run_backtest, run_engine_backtest
+)
+
+
+def make_candles(closes, spread=0.0, start=1700000000):
+    """Candle arrays around a close series"""
+    closes = np.asarray(closes, dtype=float)
+    opens = np.concatenate([[closes[0]], closes[:-1]])
+    return {
+        'time': start + 60 * np.arange(len(closes), dtype=np.int64),
+        'open': opens,
+        'high': np.maximum(opens, closes) + spread,
+        'low': np.minimum(opens, closes) - spread,
+        'close': closes,
+        'volume': np.ones(len(closes))
+    }
+
+
+def random_walk(n, seed=7, start=60000.0):
+    """Geometric random walk of closes"""
+    rng = np.random.default_rng(seed)
+    return start * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+
+
+class TestBacktestLoop(unittest.TestCase):
+    """Test the simulated auto-loop"""
+
+    def test_take_profit_then_rebuy(self):
+        """Test buy, auto sell at target, rebuy after the drop"""
+        params = BacktestParams()
+        target = params.sell_target(100.0)  # +2.7%
+        closes = [100.0, 101.0, target + 0.5, 102.0, 101.5, 101.2, 100.5]
+
+        result = run_backtest(make_candles(closes), params, fill='close')
+        first = result['trades'][0]
+
+        self.assertEqual(first['buy_price'], 100.0)
+        self.assertEqual(first['reason'], 'Auto Sell')
+        self.assertEqual(first['sell_price'], target + 0.5)
+        # Net profit is the 1.5% target plus the overshoot
+        self.assertGreater(first['net_profit'], 1.5)
+        # Rebuy 2% below the sale
+        self.assertEqual(result['trades'][1]['buy_index'], 6)
+        self.assertEqual(result['trades_count'], 1)
+
+    def test_stop_loss(self):
+        """Test the stop closes the position"""
+        result = run_backtest(make_candles([100.0, 99.5, 98.9, 98.0]), fill='close')
+        trade = result['trades'][0]
+
+        self.assertEqual(trade['reason'], 'Stop Loss')
+        self.assertEqual(trade['sell_index'], 2)
+        self.assertLess(result['total_profit'], 0)
+        self.assertEqual(result['win_rate'], 0.0)
+
+    def test_intrabar_fills_at_trigger(self):
+        """Test intrabar mode fills at the trigger price, not the close"""
+        params = BacktestParams(entry_price=95.0)
+        candles = make_candles([100.0, 100.0, 100.0], spread=6.0)
+
+        result = run_backtest(candles, params)
+
+        self.assertEqual(result['trades'][0]['buy_index'], 0)
+        self.assertEqual(result['trades'][0]['buy_price'], 95.0)
+
+    def test_gap_fills_at_open(self):
+        """Test a bar that opens past the stop fills at the open"""
+        candles = make_candles([100.0, 100.0, 90.0])
+
+        result = run_backtest(candles)
+
+        self.assertEqual(result['trades'][0]['sell_price'], 100.0 * 0.99)
+        candles['open'][2] = 95.0
+        result = run_backtest(candles)
+        self.assertEqual(result['trades'][0]['sell_price'], 95.0)
+
+    def test_drawdown(self):
+        """Test drawdown is measured on mark-to-market equity"""
+        result = run_backtest(make_candles([100.0, 100.0, 99.5, 100.0]), fill='close')
+
+        btc = 99.4 / 100.0
+        self.assertAlmostEqual(result['max_drawdown'], 0.6 + btc * 0.5, places=6)
+        self.assertEqual(result['trades_count'], 0)
+
+    def test_matches_engine_replay(self):
+        """Test the vectorized loop and TradingEngine make identical trades"""
+        candles = make_candles(random_walk(20000))
+
+        fast = run_backtest(candles, fill='close')
+        engine = run_engine_backtest(candles)
+
+        self.assertGreater(fast['trades_count'], 10)
+        self.assertEqual(len(fast['trades']), len(engine['trades']))
+        for a, b in zip(fast['trades'], engine['trades']):
+            self.assertEqual(a['buy_index'], b['buy_index'])
+            self.assertEqual(a.get('sell_index'), b.get('sell_index'))
+            self.assertEqual(a.get('reason'), b.get('reason'))
+        self.assertAlmostEqual(fast['total_profit'], engine['total_profit'], places=6)
+
+    def test_engine_replay_is_quiet(self):
+        """Test the replayed trades are not logged and the engine log level is restored"""
+        import logging
+        engine_logger = logging.getLogger('trader.engine')
+        level = engine_logger.level
+        records = []
+        handler = logging.Handler()
+        handler.emit = records.append
+        engine_logger.addHandler(handler)
+        try:
+            result = run_engine_backtest(make_candles(random_walk(2000)))
+        finally:
+            engine_logger.removeHandler(handler)
+
+        self.assertGreater(len(result['trades']), 0)
+        self.assertEqual(records, [])
+        self.assertEqual(engine_logger.level, level)
+
+    def test_year_of_minute_bars(self):
+        """Test a year of 1-minute bars runs in seconds"""
+        candles = make_candles(random_walk(525600), spread=20.0)
+
+        result = run_backtest(candles)
+
+        self.assertEqual(result['bars'], 525600)
+        self.assertLess(result['elapsed'], 5.0)
+
+
+class TestCandleData(unittest.TestCase):
+    """Test loading and fetching candles"""
+
+    def test_csv_round_trip(self):
+        """Test save/load keeps every bar"""
+        candles = make_candles(random_walk(100))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'candles.csv')
+            save_candles(candles, path)
+            loaded = load_candles(path)
+
+        np.testing.assert_array_equal(loaded['time'], candles['time'])
+        np.testing.assert_allclose(loaded['close'], candles['close'], rtol=1e-9)
+
+    def test_rows_sorted_and_deduplicated(self):
+        """Test API rows (newest first, overlapping) become ascending unique bars"""
+        rows = [
+            {'start': '120', 'open': '3', 'high': '3', 'low': '3', 'close': '3', 'volume': '1'},
+            {'start': '60', 'open': '2', 'high': '2', 'low': '2', 'close': '2', 'volume': '1'},
+            {'start': '60', 'open': '2', 'high': '2', 'low': '2', 'close': '2', 'volume': '1'},
+            {'start': '0', 'open': '1', 'high': '1', 'low': '1', 'close': '1', 'volume': '1'},
+        ]
+
+        candles = candles_from_rows(rows)
+
+        self.assertEqual(candles['time'].tolist(), [0, 60, 120])
+        self.assertEqual(candles['close'].tolist(), [1.0, 2.0, 3.0])
+
+    def test_fetch_chunks_requests(self):
+        """Test downloads are split into 300-candle requests"""
+        api = Mock()
+        api.get_public_product_candles.return_value = {'candles': []}
+
+        fetch_candles(api, 'BTC-USD', 0, 60 * 700, 'ONE_MINUTE')
+
+        calls = api.get_public_product_candles.call_args_list
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(calls[1][1]['start'], str(60 * 300))
+        self.assertEqual(calls[2][1]['end'], str(60 * 700))
+
+
+if __name__ == '__main__':
+    unittest.main()
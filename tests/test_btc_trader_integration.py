@@ -10,6 +10,8 @@ from pathlib import Path
 # Add parent directory to path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from market_data import Tick
+
 
 class TestBTCTraderRealBalanceIntegration(unittest.TestCase):
     """Test actual btc_trader.py code with real Coinbase balance"""
@@ -243,5 +245,121 @@ class TestBTCTraderRealBalanceIntegration(unittest.TestCase):
         print(f"   balance_btc: {trader.balance_btc}")
 
 
+class TestBTCTraderUIQueue(unittest.TestCase):
+    """Test the price thread -> Tk main loop hand-off"""
+    
+    @patch('btc_trader.tk.BooleanVar')
+    @patch('btc_trader.tk.IntVar')
+    @patch('btc_trader.tk.DoubleVar')
+    @patch('btc_trader.tk.StringVar')
+    @patch('btc_trader.tk.Tk')
+    @patch('btc_trader.CoinbaseCompleteAPI')
+    @patch('btc_trader.Config')
+    def setUp(self, mock_config, mock_api, mock_tk,
+              mock_stringvar, mock_doublevar, mock_intvar, mock_booleanvar):
+        """Create a trader without a real window"""
+        mock_tk.return_value = MagicMock()
+        mock_config.is_live_mode.return_value = False
+        mock_config.GUI_FPS = 30
+        mock_stringvar.side_effect = lambda *a, **k: MagicMock()
+        
+        from btc_trader import BTCTrader
+        
+        self.trader = BTCTrader()
+        self.trader.amount_labels = {}
+        for label in ['Initial Investment:', 'Buy Fee (0.6%):', 'Actual BTC Purchase:',
+                      '--- Current Position ---', 'Current BTC Value:', 'Current P/L (if sold now):',
+                      '--- At Target Price ---', 'Value at Target:', 'Sell Fee (0.6%):',
+                      'Final Profit (at target):']:
+            self.trader.amount_labels[label] = Mock()
+    
+    def test_refresh_loop_scheduled_at_gui_fps(self):
+        """Test the drain loop is scheduled with root.after"""
+        self.assertEqual(self.trader.ui_interval_ms, 33)
+        self.trader.root.after.assert_called_with(33, self.trader.process_ui_queue)
+    
+    def test_post_tick_does_not_touch_widgets(self):
+        """Test the producer side applies the tick to the engine and only queues the rendering"""
+        self.trader.post_tick(Tick('BTC-USD', 60000.0, None, 1, None, None))
+        
+        self.trader.price_var.set.assert_not_called()
+        self.assertEqual(self.trader.current_price, 60000.0)
+        self.assertEqual(self.trader.ui_queue.qsize(), 1)
+    
+    def test_ticks_are_coalesced_per_frame(self):
+        """Test only the newest queued tick is applied"""
+        for i, price in enumerate([60000.0, 60100.0, 60200.0]):
+            self.trader.post_tick(Tick('BTC-USD', price, None, i, None, None))
+        
+        with patch.object(self.trader, 'check_position') as mock_check:
+            self.trader.process_ui_queue()
+        
+        self.assertEqual(self.trader.current_price, 60200.0)
+        mock_check.assert_called_once()
+        self.trader.price_var.set.assert_called_once_with("$60,200.00")
+        self.assertTrue(self.trader.ui_queue.empty())
+    
+    def test_coalesced_ticks_reach_live_bars(self):
+        """Test ticks skipped for display still build the candles"""
+        for i, price in enumerate([60000.0, 59000.0, 60200.0]):
+            self.trader.post_tick(Tick('BTC-USD', price, 1000.0 + i * 0.1, i, None, None))
+        
+        with patch.object(self.trader, 'check_position'):
+            self.trader.process_ui_queue()
+        
+        bar = self.trader.engine.candles[60].current()
+        self.assertEqual((bar.open, bar.low, bar.close, bar.volume), (60000.0, 59000.0, 60200.0, 3.0))
+    
+    def test_trigger_inside_a_frame_is_acted_on(self):
+        """Test a price that touches the auto buy level between frames still buys"""
+        engine = self.trader.engine
+        engine.auto_buy_enabled = True
+        engine.auto_buy_price = 59500.0
+        
+        for i, price in enumerate([60000.0, 59000.0, 60200.0]):
+            self.trader.post_tick(Tick('BTC-USD', price, None, i, None, None))
+        
+        self.assertGreater(engine.balance_btc, 0)
+        self.assertEqual(engine.last_buy_price, 59000.0)
+    
+    def test_observer_updates_from_feed_thread_are_queued(self):
+        """Test engine events raised off the Tk thread are rendered by the drain loop"""
+        import threading
+        
+        worker = threading.Thread(target=self.trader.on_trigger, args=(self.trader.engine, 'BUY', 'executed'))
+        worker.start()
+        worker.join()
+        
+        self.trader.autobuy_status_var.set.assert_not_called()
+        self.trader.process_ui_queue()
+        self.trader.autobuy_status_var.set.assert_called_once_with("⚪ Auto Buy: Disabled (Executed)")
+    
+    def test_error_after_tick_is_kept_in_order(self):
+        """Test an error queued after the last tick still counts"""
+        self.trader.post_tick(Tick('BTC-USD', 60000.0, None, 1, None, None))
+        self.trader.post_price_error(Exception("down"))
+        
+        self.trader.process_ui_queue()
+        
+        self.assertEqual(self.trader.consecutive_errors, 1)
+        self.assertFalse(self.trader.price_connection_ok)
+    
+    def test_unchanged_widgets_are_skipped(self):
+        """Test labels are only reconfigured when their text changes"""
+        self.trader.current_price = 60000.0
+        self.trader.check_position()
+        self.trader.check_position()
+        
+        label = self.trader.amount_labels['Initial Investment:']
+        label.configure.assert_called_once_with(text='$100.00')
+        self.trader.target_price_var.set.assert_called_once()
+        
+        self.trader.current_price = 61000.0
+        self.trader.check_position()
+        
+        self.assertEqual(self.trader.entry_var.set.call_count, 2)
+        label.configure.assert_called_once()
+
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
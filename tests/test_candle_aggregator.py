@@ -0,0 +1,129 @@
+"""
+Unit tests for live candle aggregation
+"""
+import unittest
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from candle_aggregator import CandleAggregator, CandleSeries, series_name
+from market_data import Tick
+from trading_engine import TradingEngine, TradingObserver
+
+
+def tick(price, timestamp):
+    return Tick('BTC-USD', price, timestamp, None, None, None)
+
+
+class TestCandleSeries(unittest.TestCase):
+    """Test bar building in the ring buffers"""
+
+    def setUp(self):
+        self.series = CandleSeries(60, capacity=4)
+
+    def test_ohlc_within_bar(self):
+        """Test open, high, low, close and tick count of the forming bar"""
+        for price, ts in [(100.0, 60), (105.0, 70), (95.0, 80), (101.0, 119.9)]:
+            self.assertEqual(self.series.update(price, ts), 0)
+
+        self.assertEqual(tuple(self.series.current()), (60, 100.0, 105.0, 95.0, 101.0, 4.0))
+        self.assertEqual(len(self.series), 0)
+
+    def test_bar_closes_on_next_interval(self):
+        """Test the first tick of a new interval closes the bar"""
+        self.series.update(100.0, 60)
+        self.series.update(102.0, 90)
+
+        self.assertEqual(self.series.update(103.0, 120), 1)
+        self.assertEqual(tuple(self.series.bar()), (60, 100.0, 102.0, 100.0, 102.0, 2.0))
+        self.assertEqual(self.series.current().open, 103.0)
+
+    def test_quiet_intervals_filled_flat(self):
+        """Test missing intervals become flat zero-volume bars"""
+        self.series.update(100.0, 60)
+
+        self.assertEqual(self.series.update(110.0, 240), 3)
+        candles = self.series.arrays()
+        np.testing.assert_array_equal(candles['time'], [60, 120, 180])
+        np.testing.assert_array_equal(candles['close'], [100.0, 100.0, 100.0])
+        np.testing.assert_array_equal(candles['volume'], [1.0, 0.0, 0.0])
+
+    def test_ring_wraps(self):
+        """Test only the newest `capacity` bars are kept, oldest first"""
+        for minute in range(7):
+            self.series.update(float(minute), minute * 60)
+
+        candles = self.series.arrays()
+        np.testing.assert_array_equal(candles['time'], [120, 180, 240, 300])
+        np.testing.assert_array_equal(self.series.arrays(2)['close'], [4.0, 5.0])
+        self.assertEqual(self.series.total, 6)
+
+    def test_late_tick_ignored(self):
+        """Test a tick older than the forming bar changes nothing"""
+        self.series.update(100.0, 120)
+        self.assertEqual(self.series.update(50.0, 60), 0)
+        self.assertEqual(self.series.current().low, 100.0)
+
+
+class TestCandleAggregator(unittest.TestCase):
+    """Test intervals, listeners and store flushes"""
+
+    def test_intervals_and_listeners(self):
+        """Test each interval closes its own bars and notifies listeners"""
+        aggregator = CandleAggregator('BTC-USD', intervals=[1, 60], capacity=100)
+        closed = []
+        aggregator.add_listener(lambda seconds, bar: closed.append((seconds, bar.time)))
+
+        for ts in [0.2, 0.8, 1.1, 2.5, 61.0]:
+            aggregator.on_tick(tick(100.0, ts))
+
+        self.assertEqual([c for c in closed if c[0] == 60], [(60, 0)])
+        self.assertEqual(len(aggregator[1]), 61)  # 0..60, gaps filled
+        self.assertEqual(aggregator[1].bar(60).volume, 2.0)
+
+    def test_flushes_to_store(self):
+        """Test closed bars are written in batches under LIVE_ names"""
+        store = Mock()
+        aggregator = CandleAggregator('BTC-USD', intervals=[60], capacity=100, store=store, flush_every=3)
+
+        for minute in range(5):
+            aggregator.on_tick(tick(float(minute), minute * 60 + 1))
+        aggregator.close()
+
+        calls = store.append.call_args_list
+        self.assertEqual([c.args[2] for c in calls], ['LIVE_ONE_MINUTE', 'LIVE_ONE_MINUTE'])
+        np.testing.assert_array_equal(calls[0].args[1]['time'], [0, 60, 120])
+        np.testing.assert_array_equal(calls[1].args[1]['time'], [180])
+
+    def test_series_names(self):
+        """Test store labels for live series"""
+        self.assertEqual(series_name(1), 'LIVE_ONE_SECOND')
+        self.assertEqual(series_name(300), 'LIVE_FIVE_MINUTE')
+        self.assertEqual(series_name(7), 'LIVE_7S')
+
+
+class TestEngineBars(unittest.TestCase):
+    """Test the engine builds bars and notifies observers"""
+
+    def test_engine_bars(self):
+        """Test on_tick feeds the aggregator and on_bar reaches observers"""
+        engine = TradingEngine(api=Mock())
+        observer = Mock(spec=TradingObserver)
+        engine.add_observer(observer)
+
+        engine.on_tick(tick(60000.0, 1000.0))
+        engine.on_tick(tick(59000.0, 1000.5))
+        engine.on_tick(tick(60100.0, 1001.0))
+
+        observer.on_bar.assert_called_once()
+        _, seconds, bar = observer.on_bar.call_args.args
+        self.assertEqual((seconds, bar.low, bar.volume), (1, 59000.0, 2.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+"""
+Unit tests for the memory-mapped candle store
+"""
+import unittest
+import os
+import tempfile
+import threading
+from unittest.mock import Mock, patch
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import candle_store
+from candle_store import CandleStore, _union
+
+
+START = 1704067200  # 2024-01-01 00:00 UTC
+
+
+class FakeCandleAPI:
+    """Serves one-minute candles (close = minute index) for any window"""
+
+    def __init__(self, holes=()):
+        self.calls = []
+        self.holes = set(holes)  # bar times with no trades
+        self._lock = threading.Lock()
+
+    def get_public_product_candles(self, product_id, start, end, granularity):
+        with self._lock:
+            self.calls.append((int(start), int(end)))
+        # Newest first, end bound inclusive, like Coinbase
+        return {'candles': [
+            {'start': str(t), 'open': str(t), 'high': str(t + 1), 'low': str(t - 1),
+             'close': str((t - START) // 60), 'volume': '1.5'}
+            for t in range(int(end), int(start) - 1, -60) if t not in self.holes
+        ]}
+
+
+class TestCandleStore(unittest.TestCase):
+    """Test gap detection, downloads and range queries"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.api = FakeCandleAPI()
+        self.store = CandleStore(self.tmp.name, api=self.api, workers=4, flush_every=3)
+
+    def tearDown(self):
+        self.store._maps.clear()
+        self.tmp.cleanup()
+
+    def test_download_and_query(self):
+        """Test a range is chunked, stored and read back in order"""
+        candles = self.store.get('BTC-USD', START, START + 1000 * 60)
+
+        self.assertEqual(len(self.api.calls), 4)  # 300 bars per request
+        self.assertEqual(len(candles['time']), 1000)
+        np.testing.assert_array_equal(candles['close'], np.arange(1000, dtype=float))
+        self.assertEqual(candles['time'].dtype, np.int64)
+
+    def test_query_is_a_view(self):
+        """Test queries return slices of the memory-mapped columns"""
+        self.store.ensure('BTC-USD', START, START + 600 * 60)
+        candles = self.store.query('BTC-USD', START + 100 * 60, START + 200 * 60)
+
+        self.assertIsInstance(candles['close'].base, np.memmap)
+        self.assertEqual(candles['close'][0], 100.0)
+        self.assertEqual(len(candles['close']), 100)
+
+    def test_only_gaps_downloaded(self):
+        """Test a second request only fetches the uncovered part"""
+        self.store.ensure('BTC-USD', START, START + 300 * 60)
+        self.api.calls.clear()
+
+        stats = self.store.ensure('BTC-USD', START - 300 * 60, START + 600 * 60)
+
+        self.assertEqual(sorted(self.api.calls), [(START - 300 * 60, START), (START + 300 * 60, START + 600 * 60)])
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(self.store.coverage('BTC-USD').tolist(), [[START - 300 * 60, START + 600 * 60]])
+
+    def test_empty_windows_not_refetched(self):
+        """Test bars missing upstream do not count as gaps"""
+        self.api.holes = {START + 60 * k for k in range(10, 20)}
+        self.store.ensure('BTC-USD', START, START + 300 * 60)
+        self.api.calls.clear()
+
+        self.store.ensure('BTC-USD', START, START + 300 * 60)
+
+        self.assertEqual(self.api.calls, [])
+        self.assertEqual(len(self.store.query('BTC-USD', START, START + 300 * 60)['time']), 290)
+
+    def test_failed_chunk_retried(self):
+        """Test a failed chunk stays missing for the next call"""
+        api = Mock()
+        api.get_public_product_candles.side_effect = [Exception("timeout")]
+        store = CandleStore(self.tmp.name, api=api, workers=1)
+
+        stats = store.ensure('ETH-USD', START, START + 300 * 60)
+
+        self.assertEqual(stats['failed'], 1)
+        self.assertEqual(store.missing_ranges('ETH-USD', START, START + 300 * 60), [(START, START + 300 * 60)])
+
+    def test_append_replaces_bars(self):
+        """Test appended bars override stored ones at the same time"""
+        self.store.ensure('BTC-USD', START, START + 10 * 60)
+        self.store.append('BTC-USD', {
+            'time': np.array([START + 60], dtype=np.int64), 'open': np.array([1.0]), 'high': np.array([2.0]),
+            'low': np.array([0.5]), 'close': np.array([42.0]), 'volume': np.array([3.0])
+        })
+
+        candles = self.store.query('BTC-USD', START, START + 10 * 60)
+        self.assertEqual(len(candles['time']), 10)
+        self.assertEqual(candles['close'][1], 42.0)
+
+    def test_write_while_query_held(self):
+        """Test writes never replace or delete files a previous query still maps"""
+        self.store.ensure('BTC-USD', START, START + 300 * 60)
+        held = self.store.query('BTC-USD', START, START + 300 * 60)
+        held_dir = os.path.dirname(held['close'].base.filename)
+        replaced = []
+        real_replace = os.replace
+
+        def replace(src, dst):
+            replaced.append(os.path.abspath(dst))
+            real_replace(src, dst)
+
+        # Windows cannot delete the mapped files: rmtree(ignore_errors=True) leaves them
+        with patch.object(candle_store.os, 'replace', replace), patch.object(candle_store.shutil, 'rmtree'):
+            self.store.append('BTC-USD', {
+                'time': np.array([START + 60], dtype=np.int64), 'open': np.array([1.0]),
+                'high': np.array([2.0]), 'low': np.array([0.5]), 'close': np.array([42.0]),
+                'volume': np.array([3.0])
+            })
+            self.store.ensure('BTC-USD', START, START + 600 * 60)
+
+        self.assertFalse([path for path in replaced if path.startswith(os.path.abspath(held_dir))])
+        self.assertEqual(held['close'][1], 1.0)  # old view unchanged
+        self.assertEqual(self.store.query('BTC-USD', START, START + 600 * 60)['close'][1], 42.0)
+        self.assertEqual(len(self.store.query('BTC-USD', START, START + 600 * 60)['time']), 600)
+
+        # Once nothing maps it, the replaced segment is removed by the next write
+        del held
+        self.store.ensure('BTC-USD', START, START + 900 * 60)
+        self.assertFalse(os.path.exists(held_dir))
+        self.assertEqual(sorted(name for name in os.listdir(os.path.dirname(held_dir)) if name.startswith('seg-')),
+                         sorted(segment['name'] for segment in self.store.segments('BTC-USD')))
+
+    def test_live_appends_do_not_rewrite_history(self):
+        """Test appending newer bars writes a bounded amount, not the whole series"""
+        store = CandleStore(self.tmp.name, api=self.api, workers=4, segment_bars=300)
+        store.ensure('BTC-USD', START, START + 3000 * 60)
+        history = store.segments('BTC-USD')[0]['name']
+        saved = []
+        real_save = np.save
+
+        def save(path, array):
+            saved.append(len(array))
+            real_save(path, array)
+
+        with patch.object(candle_store.np, 'save', save):
+            for batch in range(50):
+                times = START + (3000 + batch * 60 + np.arange(60, dtype=np.int64)) * 60
+                store.append('BTC-USD', {'time': times, 'open': np.ones(60), 'high': np.ones(60),
+                                         'low': np.ones(60), 'close': np.full(60, float(batch)),
+                                         'volume': np.ones(60)})
+                self.assertLessEqual(max(saved), 300 + 60)
+                saved.clear()
+
+        segments = store.segments('BTC-USD')
+        self.assertEqual(segments[0]['name'], history)
+        self.assertEqual([segment['bars'] for segment in segments[1:]], [300] * 10)  # small flushes folded
+        candles = store.query('BTC-USD', START, START + 6000 * 60)
+        self.assertEqual(len(candles['time']), 6000)
+        self.assertEqual(candles['close'][-1], 49.0)
+        store._maps.clear()
+
+    def test_union(self):
+        """Test coverage ranges are merged"""
+        ranges = np.array([[50, 60], [0, 10], [10, 20], [15, 30]], dtype=np.int64)
+        self.assertEqual(_union(ranges).tolist(), [[0, 30], [50, 60]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ Tests all 48 endpoints
 """
 import unittest
 import os
+import time
 from unittest.mock import patch, Mock
 from pathlib import Path
 import sys
@@ -314,5 +315,104 @@ class TestDataAPIEndpoints(unittest.TestCase):
         self.assertIn('permissions', result)
 
 
+class TestPaginatedIterators(unittest.TestCase):
+    """Test cursor-following iterators"""
+    
+    def setUp(self):
+        """Set up test"""
+        self.api = CoinbaseCompleteAPI()
+    
+    def _pages(self, key, pages):
+        """Build a fake list_* method serving `pages` by cursor"""
+        calls = []
+        
+        def fetch(**params):
+            calls.append(params)
+            index = int(params.get('cursor') or 0)
+            has_next = index + 1 < len(pages)
+            return {
+                key: pages[index],
+                'has_next': has_next,
+                'cursor': str(index + 1) if has_next else ''
+            }
+        
+        return fetch, calls
+    
+    def test_iter_fills_follows_cursor(self):
+        """Test that all pages are read in order"""
+        fetch, calls = self._pages('fills', [[{'trade_id': 1}, {'trade_id': 2}], [{'trade_id': 3}], [{'trade_id': 4}]])
+        self.api.list_fills = fetch
+        
+        fills = list(self.api.iter_fills(product_id='BTC-USD', page_size=2))
+        
+        self.assertEqual([f['trade_id'] for f in fills], [1, 2, 3, 4])
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(calls[0]['limit'], 2)
+        self.assertEqual(calls[0]['product_id'], 'BTC-USD')
+        self.assertEqual(calls[1]['cursor'], '1')
+    
+    def test_iter_orders_and_accounts(self):
+        """Test the orders and accounts iterators"""
+        fetch_orders, _ = self._pages('orders', [[{'order_id': 'a'}], [{'order_id': 'b'}]])
+        fetch_accounts, _ = self._pages('accounts', [[{'currency': 'USD'}], [{'currency': 'BTC'}]])
+        self.api.list_orders = fetch_orders
+        self.api.list_accounts = fetch_accounts
+        
+        self.assertEqual([o['order_id'] for o in self.api.iter_orders(order_status='FILLED')], ['a', 'b'])
+        self.assertEqual([a['currency'] for a in self.api.iter_accounts()], ['USD', 'BTC'])
+    
+    def test_fills_without_has_next_use_cursor(self):
+        """Test that an empty cursor ends iteration when has_next is absent"""
+        responses = iter([
+            {'fills': [{'trade_id': 1}], 'cursor': 'next'},
+            {'fills': [{'trade_id': 2}], 'cursor': ''}
+        ])
+        self.api.list_fills = lambda **params: next(responses)
+        
+        self.assertEqual(len(list(self.api.iter_fills())), 2)
+    
+    def test_next_page_prefetched_while_consuming(self):
+        """Test that page 2 is requested before page 1 is fully consumed"""
+        fetch, calls = self._pages('fills', [[{'trade_id': 1}, {'trade_id': 2}], [{'trade_id': 3}]])
+        self.api.list_fills = fetch
+        
+        iterator = self.api.iter_fills()
+        next(iterator)
+        
+        deadline = time.time() + 2
+        while len(calls) < 2 and time.time() < deadline:
+            time.sleep(0.01)
+        
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(len(list(iterator)), 2)
+    
+    def test_early_stop_reads_no_further(self):
+        """Test that stopping early does not walk the remaining pages"""
+        fetch, calls = self._pages('fills', [[{'trade_id': i}] for i in range(10)])
+        self.api.list_fills = fetch
+        
+        for fill in self.api.iter_fills():
+            if fill['trade_id'] == 1:
+                break
+        
+        time.sleep(0.05)
+        self.assertLessEqual(len(calls), 3)
+    
+    def test_repeated_cursor_stops(self):
+        """Test that a cursor that never advances does not loop forever"""
+        self.api.list_fills = lambda **params: {'fills': [{'trade_id': 1}], 'has_next': True, 'cursor': 'same'}
+        
+        self.assertEqual(len(list(self.api.iter_fills())), 2)
+    
+    def test_list_fills_passes_cursor(self):
+        """Test that list_fills forwards the cursor parameter"""
+        with patch.object(self.api, '_make_request', return_value={'fills': []}) as mock_request:
+            self.api.list_fills(product_id='BTC-USD', cursor='abc')
+        
+        mock_request.assert_called_once_with(
+            'GET', '/orders/historical/fills', params={'product_id': 'BTC-USD', 'cursor': 'abc'}
+        )
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,179 @@
+"""
+Unit tests for the local fill ledger
+"""
+import unittest
+import tempfile
+import os
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from fill_ledger import FillLedger
+from trading_helpers import TradingHelpers
+
+
+def make_fill(n, side='BUY', price=60000.0, size=0.001, day=1):
+    """Fill dict shaped like list_fills output"""
+    return {
+        'entry_id': f'fill-{n}',
+        'trade_id': f'trade-{n}',
+        'order_id': f'order-{n}',
+        'side': side,
+        'price': str(price),
+        'size': str(size),
+        'commission': '0.5',
+        'trade_time': f'2024-01-{day:02d}T00:00:{n % 60:02d}Z'
+    }
+
+
+class TestFillLedger(unittest.TestCase):
+    """Test incremental sync and running totals"""
+
+    def setUp(self):
+        """Temporary database and mocked API"""
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.path = os.path.join(self.tmpdir.name, 'fills.sqlite3')
+        self.ledger = FillLedger(self.path)
+        self.addCleanup(self.ledger.close)
+        self.api = Mock()
+
+    def test_first_sync_downloads_everything(self):
+        """Test first sync requests fills without a start date"""
+        self.api.iter_fills.return_value = iter([
+            make_fill(1, price=60000), make_fill(2, price=62000), make_fill(3, side='SELL', price=70000)
+        ])
+
+        added = self.ledger.sync(self.api, 'BTC-USD')
+
+        self.api.iter_fills.assert_called_once_with(product_id='BTC-USD', start_date=None, page_size=100)
+        self.assertEqual(len(added), 3)
+        totals = self.ledger.average_entry('BTC-USD')
+        self.assertEqual(totals['buy_count'], 2)
+        self.assertEqual(totals['fill_count'], 3)
+        self.assertAlmostEqual(totals['total_btc_bought'], 0.002)
+        self.assertAlmostEqual(totals['average_price'], 61000.0)
+
+    def test_incremental_sync_uses_last_trade_time(self):
+        """Test later syncs only ask for newer fills and ignore overlap"""
+        self.api.iter_fills.return_value = iter([make_fill(1, day=1), make_fill(2, day=2)])
+        self.ledger.sync(self.api, 'BTC-USD')
+
+        # Start date is inclusive, so the newest known fill comes back again
+        self.api.iter_fills.return_value = iter([make_fill(2, day=2), make_fill(3, price=66000, day=3)])
+        added = self.ledger.sync(self.api, 'BTC-USD')
+
+        self.assertEqual(self.api.iter_fills.call_args[1]['start_date'], make_fill(2, day=2)['trade_time'])
+        self.assertEqual([f['entry_id'] for f in added], ['fill-3'])
+        totals = self.ledger.average_entry('BTC-USD')
+        self.assertEqual(totals['buy_count'], 3)
+        self.assertAlmostEqual(totals['average_price'], 62000.0)
+
+    def test_totals_persist_across_instances(self):
+        """Test that totals survive reopening the database"""
+        self.api.iter_fills.return_value = iter([make_fill(1, price=50000)])
+        self.ledger.sync(self.api, 'BTC-USD')
+        self.ledger.close()
+
+        reopened = FillLedger(self.path)
+        self.addCleanup(reopened.close)
+
+        self.assertAlmostEqual(reopened.average_entry('BTC-USD')['average_price'], 50000.0)
+        self.assertEqual(reopened.last_trade_time('BTC-USD'), make_fill(1)['trade_time'])
+
+    def test_products_are_separate(self):
+        """Test per-product totals"""
+        self.ledger.add_fills('BTC-USD', [make_fill(1, price=60000)])
+        self.ledger.add_fills('ETH-USD', [make_fill(2, price=3000)])
+
+        self.assertAlmostEqual(self.ledger.average_entry('BTC-USD')['average_price'], 60000.0)
+        self.assertAlmostEqual(self.ledger.average_entry('ETH-USD')['average_price'], 3000.0)
+
+    def test_empty_ledger(self):
+        """Test average entry before any sync"""
+        totals = self.ledger.average_entry('BTC-USD')
+
+        self.assertEqual(totals['average_price'], 0)
+        self.assertEqual(totals['fill_count'], 0)
+        self.assertIsNone(totals['last_trade_time'])
+
+    def test_resync_rebuilds_product(self):
+        """Test resync clears and downloads from scratch"""
+        self.ledger.add_fills('BTC-USD', [make_fill(1, price=10000)])
+        self.api.iter_fills.return_value = iter([make_fill(2, price=40000)])
+
+        self.ledger.resync(self.api, 'BTC-USD')
+
+        self.assertIsNone(self.api.iter_fills.call_args[1]['start_date'])
+        totals = self.ledger.average_entry('BTC-USD')
+        self.assertEqual(totals['fill_count'], 1)
+        self.assertAlmostEqual(totals['average_price'], 40000.0)
+
+    def test_compact_keeps_totals(self):
+        """Test pruning raw fills leaves the running totals intact"""
+        self.ledger.add_fills('BTC-USD', [make_fill(1, price=60000), make_fill(2, price=62000)])
+
+        removed = self.ledger.compact(keep_days=1)
+
+        self.assertEqual(removed, 2)
+        self.assertAlmostEqual(self.ledger.average_entry('BTC-USD')['average_price'], 61000.0)
+
+    def test_failed_sync_is_rolled_back(self):
+        """Test a page error leaves the ledger unchanged"""
+        def broken_pages(**kwargs):
+            yield make_fill(1)
+            raise Exception("network down")
+
+        self.api.iter_fills.side_effect = broken_pages
+
+        with self.assertRaises(Exception):
+            self.ledger.sync(self.api, 'BTC-USD')
+
+        self.assertEqual(self.ledger.average_entry('BTC-USD')['fill_count'], 0)
+        self.assertIsNone(self.ledger.last_trade_time('BTC-USD'))
+
+
+    def test_pages_fetched_outside_lock(self):
+        """Test no page request runs while the ledger lock or a transaction is held"""
+        held = []
+
+        def pages(**kwargs):
+            for i in range(3):
+                held.append(self.ledger._lock.locked() or self.ledger._conn.in_transaction)
+                yield make_fill(i, day=i + 1)
+
+        self.api.iter_fills.side_effect = pages
+
+        self.assertEqual(len(self.ledger.sync(self.api, 'BTC-USD')), 3)
+        self.assertEqual(held, [False, False, False])
+
+
+class TestTradingHelpersLedger(unittest.TestCase):
+    """Test TradingHelpers average entry through the ledger"""
+
+    def test_average_entry_from_ledger(self):
+        """Test the ledger path keeps the same result shape"""
+        ledger = FillLedger(':memory:')
+        self.addCleanup(ledger.close)
+        helpers = TradingHelpers(ledger=ledger)
+        helpers.api = Mock()
+        helpers.api.iter_fills.return_value = iter([make_fill(1, price=60000), make_fill(2, side='SELL')])
+
+        result = helpers.calculate_average_entry_price()
+
+        self.assertAlmostEqual(result['average_price'], 60000.0)
+        self.assertEqual(result['buy_count'], 1)
+        self.assertEqual([f['entry_id'] for f in result['fills']], ['fill-1'])
+
+        helpers.api.iter_fills.return_value = iter([])
+        result = helpers.calculate_average_entry_price()
+
+        self.assertAlmostEqual(result['average_price'], 60000.0)
+        self.assertEqual(result['fills'], [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,119 @@
+"""
+Unit tests for the shared HTTP transport
+Runs against a local keep-alive HTTP server
+"""
+import unittest
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import http_transport
+from http_transport import HttpTransport, get_transport
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """Serves a small JSON body, gzip-compressed when the client accepts it"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = json.dumps({'data': {'amount': '100000.00'}, 'path': self.path}).encode()
+        compressed = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if compressed:
+            body = gzip.compress(body)
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if compressed:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHttpTransport(unittest.TestCase):
+    """Test pooling, compression and metrics"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), KeepAliveHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        self.transport = HttpTransport(pool_connections=2, pool_maxsize=4, timeout=5)
+
+    def tearDown(self):
+        self.transport.close()
+
+    def test_connections_are_reused(self):
+        """Test that sequential requests share one keep-alive connection"""
+        for _ in range(5):
+            response = self.transport.get(f"{self.base_url}/v2/prices/BTC-USD/spot")
+            self.assertEqual(response.status_code, 200)
+
+        stats = self.transport.pool_stats()
+        host_stats = stats[self.base_url]
+
+        self.assertEqual(host_stats['requests'], 5)
+        self.assertEqual(host_stats['connections_opened'], 1)
+        self.assertEqual(host_stats['connections_reused'], 4)
+        self.assertEqual(host_stats['idle_connections'], 1)
+
+    def test_compressed_response_decoded(self):
+        """Test that gzip is requested and transparently decoded"""
+        response = self.transport.get(f"{self.base_url}/compressed")
+
+        self.assertIn('gzip', response.request.headers['Accept-Encoding'])
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(response.json()['data']['amount'], '100000.00')
+
+    def test_default_timeout_applied(self):
+        """Test that every request gets a timeout"""
+        calls = []
+        self.transport.session.request = lambda method, url, **kwargs: calls.append(kwargs)
+
+        self.transport.get(f"{self.base_url}/a")
+        self.transport.post(f"{self.base_url}/b", timeout=1)
+
+        self.assertEqual(calls[0]['timeout'], 5)
+        self.assertEqual(calls[1]['timeout'], 1)
+
+    def test_empty_stats_before_requests(self):
+        """Test that no pools are reported before any traffic"""
+        self.assertEqual(self.transport.pool_stats(), {})
+
+
+class TestSharedTransport(unittest.TestCase):
+    """Test the process-wide transport"""
+
+    def test_get_transport_is_singleton(self):
+        """Test that every client gets the same transport"""
+        self.assertIs(get_transport(), get_transport())
+
+    def test_clients_share_transport(self):
+        """Test that the Coinbase clients route through the shared transport"""
+        from coinbase_complete_api import CoinbaseCompleteAPI
+        from coinbase_advanced_trade_jwt import CoinbaseAdvancedTradeJWT
+
+        self.assertIs(CoinbaseCompleteAPI().http, http_transport.get_transport())
+        self.assertIs(CoinbaseAdvancedTradeJWT().http, http_transport.get_transport())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,149 @@
+"""
+Unit tests for streaming and batch indicators
+"""
+import unittest
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from candle_aggregator import Bar
+from indicators import ATR, EMA, RSI, BollingerBands, IndicatorSet, atr, benchmark, bollinger, ema, rsi
+from market_data import Tick
+from trading_engine import TradingEngine
+
+
+def random_bars(n=500, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 60000.0 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    spread = np.abs(rng.normal(0, 25.0, n))
+    return close + spread, close - spread, close
+
+
+def stream(indicator, *columns):
+    """Feed arrays through a streaming indicator, NaN while warming up"""
+    out = []
+    for row in zip(*(c.tolist() for c in columns)):
+        value = indicator.update(*row)
+        out.append(np.nan if value is None else value)
+    return np.array(out)
+
+
+class TestStreaming(unittest.TestCase):
+    """Test streaming formulas on small inputs"""
+
+    def test_ema(self):
+        """Test the SMA seed and the exponential update"""
+        indicator = EMA(3)
+        self.assertIsNone(indicator.update(1.0))
+        self.assertIsNone(indicator.update(2.0))
+        self.assertEqual(indicator.update(3.0), 2.0)
+        self.assertEqual(indicator.update(6.0), 4.0)
+
+    def test_rsi_extremes(self):
+        """Test RSI is 100 with only gains and 50 when flat"""
+        rising = RSI(3)
+        for price in [1.0, 2.0, 3.0, 4.0]:
+            rising.update(price)
+        self.assertEqual(rising.value, 100.0)
+
+        flat = RSI(3)
+        for _ in range(5):
+            flat.update(10.0)
+        self.assertEqual(flat.value, 50.0)
+
+    def test_atr_uses_previous_close(self):
+        """Test gaps count in the true range"""
+        indicator = ATR(2)
+        indicator.update(11.0, 9.0, 10.0)           # range 2
+        self.assertEqual(indicator.update(15.0, 14.0, 14.5), 3.5)  # gap: 15 - 10 = 5 -> (2 + 5) / 2
+
+    def test_bollinger_constant(self):
+        """Test a flat window has zero width"""
+        bands = BollingerBands(3, 2.0)
+        for _ in range(3):
+            value = bands.update(60000.0)
+        self.assertEqual(value, (60000.0, 60000.0, 60000.0))
+
+    def test_bollinger_window(self):
+        """Test the band follows only the last `period` values"""
+        bands = BollingerBands(2, 1.0)
+        for price in [100.0, 200.0, 10.0, 20.0]:
+            value = bands.update(price)
+        self.assertAlmostEqual(value.middle, 15.0)
+        self.assertAlmostEqual(value.upper, 20.0)
+
+
+class TestBatchMatchesStreaming(unittest.TestCase):
+    """Test both modes give bit-identical values"""
+
+    def setUp(self):
+        self.high, self.low, self.close = random_bars()
+
+    def test_ema(self):
+        np.testing.assert_array_equal(ema(self.close, 20), stream(EMA(20), self.close))
+
+    def test_rsi(self):
+        np.testing.assert_array_equal(rsi(self.close, 14), stream(RSI(14), self.close))
+
+    def test_atr(self):
+        np.testing.assert_array_equal(atr(self.high, self.low, self.close, 14),
+                                      stream(ATR(14), self.high, self.low, self.close))
+
+    def test_bollinger(self):
+        indicator = BollingerBands(20, 2.0)
+        streamed = [indicator.update(x) for x in self.close.tolist()]
+        bands = bollinger(self.close, 20, 2.0)
+        for i, value in enumerate(streamed):
+            expected = (np.nan, np.nan, np.nan) if value is None else value
+            np.testing.assert_array_equal([bands.middle[i], bands.upper[i], bands.lower[i]], expected)
+
+    def test_short_input(self):
+        """Test inputs shorter than the period are all NaN"""
+        self.assertTrue(np.isnan(rsi(self.close[:5], 14)).all())
+        self.assertTrue(np.isnan(bollinger(self.close[:5], 20).middle).all())
+
+    def test_benchmark(self):
+        """Test the benchmark reports identical values"""
+        self.assertTrue(benchmark(bars=2000)['identical'])
+
+
+class TestEngineRules(unittest.TestCase):
+    """Test the engine feeds indicators and gates auto buys"""
+
+    def setUp(self):
+        self.engine = TradingEngine(api=Mock())
+        self.engine.indicators = IndicatorSet(rsi_period=3)
+
+    def feed_minutes(self, prices):
+        for minute, price in enumerate(prices):
+            self.engine.on_tick(Tick('BTC-USD', price, minute * 60.0 + 1, None, None, None))
+
+    def test_indicators_follow_interval_bars(self):
+        """Test closed bars of the indicator interval update the indicators"""
+        self.feed_minutes([100.0, 101.0, 102.0, 103.0, 104.0])
+
+        self.assertEqual(self.engine.indicators.bars, 4)
+        self.assertEqual(self.engine.indicators.rsi.value, 100.0)
+
+    def test_rsi_holds_auto_buy(self):
+        """Test an armed auto buy waits while the RSI is above the limit"""
+        self.engine.rsi_buy_max = 30.0
+        self.feed_minutes([100.0, 101.0, 102.0, 103.0, 104.0])
+        self.engine.auto_buy_enabled = True
+        self.engine.auto_buy_price = 200.0
+
+        self.engine.on_tick(Tick('BTC-USD', 104.0, 300.5, None, None, None))
+        self.assertEqual(self.engine.balance_btc, 0)
+
+        self.engine.rsi_buy_max = None
+        self.engine.on_tick(Tick('BTC-USD', 104.0, 300.6, None, None, None))
+        self.assertGreater(self.engine.balance_btc, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
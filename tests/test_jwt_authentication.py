@@ -44,7 +44,7 @@ class TestJWTAuthentication(unittest.TestCase):
         # Should detect format (True if ECDSA, False if Ed25519)
         self.assertIsInstance(client.is_jwt_format, bool)
     
-    @patch('requests.get')
+    @patch('http_transport.HttpTransport.get')
     def test_get_spot_price(self, mock_get):
         """Test getting BTC spot price"""
         # Mock response
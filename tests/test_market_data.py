@@ -0,0 +1,304 @@
+"""
+Unit tests for market data sources
+Uses the local ReplayServer instead of the live Coinbase WebSocket feed
+"""
+import unittest
+import time
+from unittest.mock import patch, Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+import requests
+
+from market_data import (
+    Tick, SequenceGapError, MarketDataSource, RestPollingSource,
+    WebSocketTickerSource, ReplayServer, create_market_data_source
+)
+
+
+def ticker_message(sequence, price, product_id='BTC-USD'):
+    """Build a ticker channel message like the ones Coinbase sends"""
+    return {
+        'channel': 'ticker',
+        'client_id': '',
+        'timestamp': '2024-01-01T00:00:00.000000000Z',
+        'sequence_num': sequence,
+        'events': [{
+            'type': 'update',
+            'tickers': [{
+                'type': 'ticker',
+                'product_id': product_id,
+                'price': str(price),
+                'best_bid': str(price - 0.5),
+                'best_ask': str(price + 0.5)
+            }]
+        }]
+    }
+
+
+def wait_for(condition, timeout=5.0):
+    """Poll until condition() is true or the timeout expires"""
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if condition():
+            return True
+        time.sleep(0.01)
+    return False
+
+
+class TestMarketDataSource(unittest.TestCase):
+    """Test listener plumbing shared by all sources"""
+
+    def test_publish_reaches_all_listeners(self):
+        """Test that every subscriber receives the tick"""
+        source = MarketDataSource()
+        first, second = [], []
+        source.subscribe(first.append)
+        source.subscribe(second.append)
+
+        tick = Tick('BTC-USD', 100000.0, time.time(), 1, None, None)
+        source._publish(tick)
+
+        self.assertEqual(first, [tick])
+        self.assertEqual(second, [tick])
+        self.assertEqual(source.last_tick, tick)
+
+    def test_failing_listener_does_not_block_others(self):
+        """Test that a listener exception is contained"""
+        source = MarketDataSource()
+        received = []
+        source.subscribe(Mock(side_effect=RuntimeError("boom")))
+        source.subscribe(received.append)
+
+        source._publish(Tick('BTC-USD', 1.0, 0, None, None, None))
+
+        self.assertEqual(len(received), 1)
+
+
+class TestRestPollingSource(unittest.TestCase):
+    """Test the REST fallback source"""
+
+    @patch('http_transport.HttpTransport.get')
+    def test_poll_once_publishes_tick(self, mock_get):
+        """Test a successful poll"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'data': {'amount': '101234.56'}}
+        mock_get.return_value = mock_response
+
+        source = RestPollingSource(interval=0.01)
+        received = []
+        source.subscribe(received.append)
+        source.poll_once()
+
+        self.assertEqual(received[0].price, 101234.56)
+        self.assertEqual(received[0].product_id, 'BTC-USD')
+
+    @patch('http_transport.HttpTransport.get')
+    def test_bad_status_raises(self, mock_get):
+        """Test that non-200 responses are errors"""
+        mock_response = Mock()
+        mock_response.status_code = 429
+        mock_get.return_value = mock_response
+
+        with self.assertRaises(requests.RequestException):
+            RestPollingSource().poll_once()
+
+    @patch('http_transport.HttpTransport.get')
+    def test_loop_reports_errors(self, mock_get):
+        """Test that the polling loop forwards errors to listeners"""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {'error': 'bad'}
+        mock_get.return_value = mock_response
+
+        source = RestPollingSource(interval=0.01)
+        errors = []
+        source.subscribe(Mock(), errors.append)
+        source.start()
+        try:
+            self.assertTrue(wait_for(lambda: len(errors) >= 2))
+        finally:
+            source.stop()
+
+        self.assertIsInstance(errors[0], ValueError)
+
+
+class TestWebSocketTickerSource(unittest.TestCase):
+    """Test the streaming source against the local replay server"""
+
+    def test_streams_ticks(self):
+        """Test that replayed ticker messages become ticks"""
+        messages = [ticker_message(i, 100000 + i) for i in range(5)]
+
+        with ReplayServer(messages) as server:
+            source = WebSocketTickerSource(url=server.url)
+            received = []
+            source.subscribe(received.append)
+            source.start()
+            try:
+                self.assertTrue(wait_for(lambda: len(received) == 5))
+            finally:
+                source.stop()
+
+            self.assertEqual([t.price for t in received], [100000 + i for i in range(5)])
+            self.assertEqual(received[-1].best_bid, 100003.5)
+            self.assertEqual(server.received[0]['channel'], 'ticker')
+            self.assertEqual(server.received[0]['product_ids'], ['BTC-USD'])
+
+    def test_ignores_other_products(self):
+        """Test that tickers for other products are filtered out"""
+        messages = [ticker_message(0, 3000, 'ETH-USD'), ticker_message(1, 100000)]
+
+        with ReplayServer(messages) as server:
+            source = WebSocketTickerSource(url=server.url)
+            received = []
+            source.subscribe(received.append)
+            source.start()
+            try:
+                self.assertTrue(wait_for(lambda: len(received) == 1))
+            finally:
+                source.stop()
+
+        self.assertEqual(received[0].product_id, 'BTC-USD')
+
+    def test_multiplexes_products(self):
+        """Test several products share one connection"""
+        messages = [ticker_message(0, 3000, 'ETH-USD'), ticker_message(1, 100000), ticker_message(2, 150, 'SOL-USD')]
+
+        with ReplayServer(messages) as server:
+            source = WebSocketTickerSource(['BTC-USD', 'ETH-USD'], url=server.url)
+            received = []
+            source.subscribe(received.append)
+            source.start()
+            try:
+                self.assertTrue(wait_for(lambda: len(received) == 2))
+            finally:
+                source.stop()
+
+            self.assertEqual(server.received[0]['product_ids'], ['BTC-USD', 'ETH-USD'])
+        self.assertEqual([(t.product_id, t.price) for t in received], [('ETH-USD', 3000.0), ('BTC-USD', 100000.0)])
+
+    def test_detects_sequence_gap(self):
+        """Test that a skipped sequence number is reported"""
+        messages = [ticker_message(0, 1), ticker_message(1, 2), ticker_message(4, 3)]
+
+        with ReplayServer(messages) as server:
+            source = WebSocketTickerSource(url=server.url)
+            received, errors = [], []
+            source.subscribe(received.append, errors.append)
+            source.start()
+            try:
+                self.assertTrue(wait_for(lambda: len(received) == 3))
+            finally:
+                source.stop()
+
+        gaps = [e for e in errors if isinstance(e, SequenceGapError)]
+        self.assertEqual(len(gaps), 1)
+        self.assertEqual(gaps[0].expected, 2)
+        self.assertEqual(gaps[0].received, 4)
+        self.assertEqual(source.gap_count, 1)
+
+    def test_duplicate_messages_dropped(self):
+        """Test that replayed (old) sequence numbers are ignored"""
+        messages = [ticker_message(0, 1), ticker_message(1, 2), ticker_message(1, 2), ticker_message(2, 3)]
+
+        with ReplayServer(messages) as server:
+            source = WebSocketTickerSource(url=server.url)
+            received = []
+            source.subscribe(received.append)
+            source.start()
+            try:
+                self.assertTrue(wait_for(lambda: len(received) == 3))
+                time.sleep(0.05)
+            finally:
+                source.stop()
+
+        self.assertEqual([t.price for t in received], [1, 2, 3])
+
+    def test_reconnects_after_drop(self):
+        """Test reconnect with backoff when the server closes the socket"""
+        messages = [ticker_message(0, 1), ticker_message(1, 2)]
+
+        with ReplayServer(messages, close_when_done=True) as server:
+            source = WebSocketTickerSource(url=server.url, backoff_base=0.01, backoff_max=0.05)
+            received = []
+            source.subscribe(received.append)
+            source.start()
+            try:
+                self.assertTrue(wait_for(lambda: server.connections >= 2 and len(received) >= 4))
+            finally:
+                source.stop()
+
+        # Sequence restarts on each connection and must not be seen as a gap
+        self.assertEqual(source.gap_count, 0)
+        self.assertGreaterEqual(source.reconnect_count, 1)
+
+    def test_fallback_used_while_disconnected(self):
+        """Test that the fallback source runs when the socket cannot connect"""
+        fallback = MarketDataSource()
+        fallback.start = Mock()
+        fallback.stop = Mock()
+
+        # Reserve a port and close it again so nothing is listening there
+        server = ReplayServer([])
+        url = server.url
+        server.stop()
+
+        source = WebSocketTickerSource(url=url, fallback=fallback, backoff_base=0.01,
+                                       backoff_max=0.02, fallback_after=2)
+        errors = []
+        source.subscribe(Mock(), errors.append)
+        source.start()
+        try:
+            self.assertTrue(wait_for(lambda: fallback.start.called))
+        finally:
+            source.stop()
+
+        self.assertTrue(source.fallback_active is False)
+        fallback.stop.assert_called()
+        self.assertGreaterEqual(len(errors), 2)
+
+    def test_fallback_ticks_forwarded(self):
+        """Test that ticks from the fallback reach the streaming source's listeners"""
+        fallback = MarketDataSource()
+        source = WebSocketTickerSource(url='ws://127.0.0.1:1', fallback=fallback)
+        received = []
+        source.subscribe(received.append)
+
+        fallback._publish(Tick('BTC-USD', 99.0, 0, None, None, None))
+
+        self.assertEqual(received[0].price, 99.0)
+
+
+class TestCreateMarketDataSource(unittest.TestCase):
+    """Test source selection from configuration"""
+
+    @patch('market_data.Config')
+    def test_websocket_default(self, mock_config):
+        """Test websocket source with REST fallback"""
+        mock_config.MARKET_DATA_SOURCE = 'websocket'
+        mock_config.PRICE_POLL_INTERVAL = 0.1
+        mock_config.COINBASE_WS_URL = 'wss://example.invalid'
+
+        source = create_market_data_source('BTC-USD')
+
+        self.assertIsInstance(source, WebSocketTickerSource)
+        self.assertIsInstance(source.fallback, RestPollingSource)
+
+    @patch('market_data.Config')
+    def test_rest_only(self, mock_config):
+        """Test REST-only configuration"""
+        mock_config.MARKET_DATA_SOURCE = 'rest'
+        mock_config.PRICE_POLL_INTERVAL = 0.1
+
+        source = create_market_data_source('BTC-USD')
+
+        self.assertIsInstance(source, RestPollingSource)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+"""
+Unit tests for the metrics registry and exporter
+"""
+import unittest
+import socket
+import threading
+import time
+import urllib.request
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from market_data import Tick
+from metrics import MetricsRegistry, get_registry, start_metrics_server
+from rate_limiter import RateLimiter
+from trading_engine import TradingEngine
+
+
+class TestMetricTypes(unittest.TestCase):
+    """Test counters, gauges and histograms"""
+
+    def setUp(self):
+        self.registry = MetricsRegistry()
+
+    def test_counter_threads_without_locks(self):
+        """Test per-thread cells add up exactly"""
+        child = self.registry.counter('ticks_total', "Ticks").labels()
+
+        def work():
+            for _ in range(10000):
+                child.inc()
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(child.value(), 80000)
+
+    def test_gauge(self):
+        """Test set, inc/dec and scrape-time functions"""
+        gauge = self.registry.gauge('balance', "Balance", ('currency',))
+        usd = gauge.labels('USD')
+        usd.set(100.0)
+        usd.inc(5)
+        usd.dec(2)
+        gauge.labels(currency='BTC').set_function(lambda: 0.5)
+
+        self.assertEqual(usd.value(), 103.0)
+        self.assertIn('balance{currency="BTC"} 0.5', self.registry.render())
+
+    def test_histogram_render(self):
+        """Test cumulative buckets, sum and count"""
+        hist = self.registry.histogram('wait_seconds', "Wait", ('limiter',), buckets=(0.1, 1.0))
+        child = hist.labels('public')
+        for value in (0.05, 0.5, 0.5, 3.0):
+            child.observe(value)
+
+        text = self.registry.render()
+
+        self.assertIn('# TYPE wait_seconds histogram', text)
+        self.assertIn('wait_seconds_bucket{limiter="public",le="0.1"} 1', text)
+        self.assertIn('wait_seconds_bucket{limiter="public",le="1.0"} 3', text)
+        self.assertIn('wait_seconds_bucket{limiter="public",le="+Inf"} 4', text)
+        self.assertIn('wait_seconds_sum{limiter="public"} 4.05', text)
+        self.assertIn('wait_seconds_count{limiter="public"} 4', text)
+
+    def test_labels_are_reused(self):
+        """Test one child per label combination and label validation"""
+        counter = self.registry.counter('orders_total', "Orders", ('side', 'result'))
+
+        self.assertIs(counter.labels('BUY', 'success'), counter.labels(side='BUY', result='success'))
+        with self.assertRaises(ValueError):
+            counter.labels('BUY')
+
+    def test_registration(self):
+        """Test re-registering returns the same metric; conflicts fail"""
+        first = self.registry.counter('x_total', "X")
+
+        self.assertIs(self.registry.counter('x_total', "X"), first)
+        with self.assertRaises(ValueError):
+            self.registry.gauge('x_total', "X")
+
+    def test_label_escaping(self):
+        """Test quotes and backslashes in label values"""
+        self.registry.gauge('g', "G", ('name',)).labels('a"b\\c').set(1)
+
+        self.assertIn('g{name="a\\"b\\\\c"} 1', self.registry.render())
+
+    def test_increment_cost(self):
+        """Test the hot-path increment stays around a microsecond"""
+        child = self.registry.counter('fast_total', "Fast").labels()
+        start = time.perf_counter()
+        for _ in range(100000):
+            child.inc()
+        per_call = (time.perf_counter() - start) / 100000
+
+        self.assertLess(per_call, 5e-6)
+
+
+class TestExporter(unittest.TestCase):
+    """Test the /metrics endpoint"""
+
+    def test_scrape(self):
+        """Test the registry is served in the text format"""
+        registry = MetricsRegistry()
+        registry.counter('scrape_test_total', "Test").labels().inc(3)
+        with socket.socket() as s:
+            s.bind(('127.0.0.1', 0))
+            port = s.getsockname()[1]
+        server = start_metrics_server(port, registry=registry)
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/metrics", timeout=5) as response:
+            content_type = response.headers['Content-Type']
+            text = response.read().decode()
+
+        self.assertTrue(content_type.startswith('text/plain'))
+        self.assertIn('scrape_test_total 3', text)
+
+    def test_disabled(self):
+        """Test port 0 starts nothing"""
+        self.assertIsNone(start_metrics_server(0))
+
+
+class TestSubsystemMetrics(unittest.TestCase):
+    """Test the engine and rate limiter publish their state"""
+
+    def test_engine_state(self):
+        """Test ticks, balances and feed errors are exported"""
+        engine = TradingEngine(api=Mock(), product_id='ETH-USD')
+        engine.on_tick(Tick('ETH-USD', 3000.0, None, None, None, None))
+        engine.on_tick(Tick('ETH-USD', 3001.0, None, None, None, None))
+        engine.on_price_error(Exception("timeout"))
+
+        text = get_registry().render()
+
+        self.assertIn('trader_ticks_total{product="ETH-USD"} 2', text)
+        self.assertIn('trader_price{product="ETH-USD"} 3001.0', text)
+        self.assertIn('trader_balance{product="ETH-USD",currency="USD"} 1000.0', text)
+        self.assertIn('trader_feed_errors_total{product="ETH-USD"}', text)
+
+    def test_rate_limiter(self):
+        """Test request counts and wait times are exported"""
+        wait = get_registry().get('coinbase_rate_limit_wait_seconds')
+        before = wait.labels('private').value()[0][-1] if wait else 0
+        limiter = RateLimiter(public_rate=1000, private_rate=1000)
+        limiter.private.acquire()
+
+        text = get_registry().render()
+
+        self.assertIn('coinbase_requests_total{limiter="private"} 1', text)
+        self.assertIn(f'coinbase_rate_limit_wait_seconds_count{{limiter="private"}} {before + 1}', text)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,179 @@
+"""
+Unit tests for the L2 order book
+"""
+import unittest
+import json
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from market_data import WebSocketTickerSource, ws_connect
+from order_book import OrderBook, BookPoller, benchmark
+
+
+SNAPSHOT = {
+    'pricebook': {
+        'product_id': 'BTC-USD',
+        'bids': [
+            {'price': '59999.00', 'size': '0.5'},
+            {'price': '59998.00', 'size': '1.0'},
+            {'price': '59990.00', 'size': '2.0'}
+        ],
+        'asks': [
+            {'price': '60001.00', 'size': '0.25'},
+            {'price': '60002.00', 'size': '0.75'},
+            {'price': '60010.00', 'size': '3.0'}
+        ]
+    }
+}
+
+
+def level2_message(sequence, event_type, updates, product_id='BTC-USD'):
+    """Build an l2_data message like the ones Coinbase sends"""
+    return {
+        'channel': 'l2_data',
+        'sequence_num': sequence,
+        'events': [{
+            'type': event_type,
+            'product_id': product_id,
+            'updates': [
+                {'side': side, 'event_time': '2024-01-01T00:00:00Z', 'price_level': price, 'new_quantity': size}
+                for side, price, size in updates
+            ]
+        }]
+    }
+
+
+class TestOrderBook(unittest.TestCase):
+    """Test book maintenance and queries"""
+
+    def setUp(self):
+        self.book = OrderBook('BTC-USD')
+        self.book.load_snapshot(SNAPSHOT)
+
+    def test_snapshot_top_of_book(self):
+        """Test best levels, spread and mid after a snapshot"""
+        self.assertTrue(self.book.ready)
+        self.assertEqual(self.book.best_bid(), (59999.0, 0.5))
+        self.assertEqual(self.book.best_ask(), (60001.0, 0.25))
+        self.assertEqual(self.book.spread(), 2.0)
+        self.assertEqual(self.book.mid_price(), 60000.0)
+
+    def test_updates_keep_order(self):
+        """Test inserts, size changes and removals"""
+        version = self.book.version
+        self.book.update('bid', 60000.0, 0.1)     # new best bid
+        self.book.update('ask', 60002.0, 0.5)     # resize
+        self.book.update('ask', 60001.0, 0)       # remove best ask
+
+        self.assertEqual(self.book.best_bid(), (60000.0, 0.1))
+        self.assertEqual(self.book.levels('ask'), [(60002.0, 0.5), (60010.0, 3.0)])
+        self.assertEqual(self.book.levels('bid', 2), [(60000.0, 0.1), (59999.0, 0.5)])
+        self.assertEqual(self.book.version, version + 3)
+
+    def test_vwap_for_quantity(self):
+        """Test walking the asks for a base quantity"""
+        result = self.book.vwap('buy', quantity=1.0)
+
+        expected = (0.25 * 60001 + 0.75 * 60002) / 1.0
+        self.assertAlmostEqual(result['price'], expected)
+        self.assertEqual(result['levels'], 2)
+        self.assertEqual(result['worst_price'], 60002.0)
+        self.assertTrue(result['complete'])
+
+    def test_vwap_for_notional(self):
+        """Test walking the asks for a quote amount"""
+        result = self.book.vwap('ask', notional=30000.5)
+
+        self.assertAlmostEqual(result['cost'], 30000.5)
+        self.assertAlmostEqual(result['filled'], 0.25 + (30000.5 - 0.25 * 60001) / 60002)
+        self.assertTrue(result['complete'])
+
+    def test_vwap_beyond_depth(self):
+        """Test an order larger than the book is flagged incomplete"""
+        result = self.book.vwap('sell', quantity=10.0)
+
+        self.assertFalse(result['complete'])
+        self.assertEqual(result['filled'], 3.5)
+
+    def test_depth(self):
+        """Test size available up to a price and depth for a size"""
+        self.assertEqual(self.book.depth('bid', 59998.0), 1.5)
+        self.assertEqual(self.book.depth('ask', 60002.0), 1.0)
+        self.assertEqual(self.book.depth_for_size('ask', 2.0),
+                         {'levels': 3, 'worst_price': 60010.0, 'complete': True})
+
+    def test_sync_snapshot_applies_diff(self):
+        """Test a polled snapshot only changes what moved"""
+        version = self.book.version
+        self.assertEqual(self.book.sync_snapshot(SNAPSHOT), 0)
+        self.assertEqual(self.book.version, version)
+
+        changed = json.loads(json.dumps(SNAPSHOT))
+        changed['pricebook']['asks'][0]['size'] = '0.3'
+        del changed['pricebook']['bids'][2]
+
+        self.assertEqual(self.book.sync_snapshot(changed), 2)
+        self.assertEqual(self.book.best_ask(), (60001.0, 0.3))
+        self.assertEqual(len(self.book.levels('bid')), 2)
+
+    def test_poller(self):
+        """Test polling the public book"""
+        api = Mock()
+        api.get_public_product_book.return_value = SNAPSHOT
+        poller = BookPoller(api, OrderBook('BTC-USD'), limit=50)
+
+        poller.poll_once()
+
+        api.get_public_product_book.assert_called_once_with('BTC-USD', limit=50)
+        self.assertEqual(poller.book.best_bid(), (59999.0, 0.5))
+
+    def test_benchmark_rate(self):
+        """Test pure-Python updates stay well above 10k per second"""
+        result = benchmark(updates=20000, levels=500)
+
+        self.assertGreater(result['updates_per_second'], 10000)
+
+
+@unittest.skipIf(ws_connect is None, "websockets not installed")
+class TestLevel2Channel(unittest.TestCase):
+    """Test the WebSocket source keeps a book current"""
+
+    def setUp(self):
+        self.book = OrderBook('BTC-USD')
+        self.source = WebSocketTickerSource('BTC-USD', url='ws://127.0.0.1:1', book=self.book)
+        self.errors = []
+        self.source.subscribe(lambda tick: None, self.errors.append)
+
+    def test_subscribes_to_level2(self):
+        """Test the level2 channel is requested"""
+        channels = [m['channel'] for m in self.source._subscribe_messages()]
+        self.assertIn('level2', channels)
+
+    def test_snapshot_then_updates(self):
+        """Test l2_data snapshot and update events"""
+        self.source._handle_message(json.dumps(level2_message(1, 'snapshot', [
+            ('bid', '59999.00', '0.5'), ('offer', '60001.00', '0.25')
+        ])))
+        self.source._handle_message(json.dumps(level2_message(2, 'update', [
+            ('offer', '60001.00', '0'), ('offer', '60003.00', '1.5')
+        ])))
+
+        self.assertTrue(self.book.ready)
+        self.assertEqual(self.book.best_ask(), (60003.0, 1.5))
+        self.assertEqual(self.errors, [])
+
+    def test_gap_invalidates_book(self):
+        """Test a sequence gap marks the book stale"""
+        self.source._handle_message(json.dumps(level2_message(1, 'snapshot', [('bid', '59999.00', '0.5')])))
+        self.source._handle_message(json.dumps(level2_message(5, 'update', [('bid', '59998.00', '1')])))
+
+        self.assertFalse(self.book.ready)
+        self.assertEqual(len(self.errors), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,244 @@
+"""
+Unit tests for the order execution service
+"""
+import unittest
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from market_data import Tick
+from order_service import ORDERS_PATH, OrderExecutionService
+from trading_engine import TradingEngine
+from trading_helpers import TradingHelpers
+
+
+class FakeClock:
+    """Manually advanced clock"""
+
+    def __init__(self, now=100.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def live_api():
+    """Mocked API with valid live credentials"""
+    api = Mock()
+    api.is_live = True
+    api.is_jwt_format = True
+    api.get_api_key_permissions.return_value = {'can_view': True, 'can_trade': True}
+    return api
+
+
+class TestWarmUp(unittest.TestCase):
+    """Test start-up validation and pre-signing"""
+
+    def test_warm_up_ready(self):
+        """Test credentials are checked and the order JWT is pre-signed"""
+        api = live_api()
+        service = OrderExecutionService(api=api, helpers=Mock(), keepalive_interval=0)
+
+        self.assertTrue(service.warm_up())
+
+        api.get_api_key_permissions.assert_called_once()
+        api.jwt_cache.get_token.assert_called_once_with('POST', ORDERS_PATH)
+        self.assertIsNotNone(service.latency_stats()['warmup_ms'])
+
+    def test_warm_up_without_trade_permission(self):
+        """Test a view-only key is reported at start-up"""
+        api = live_api()
+        api.get_api_key_permissions.return_value = {'can_view': True, 'can_trade': False}
+        service = OrderExecutionService(api=api, helpers=Mock(), keepalive_interval=0)
+
+        self.assertFalse(service.warm_up())
+        self.assertIn('trade permission', service.warmup_error)
+
+    def test_warm_up_in_simulation(self):
+        """Test simulation mode makes no requests"""
+        api = live_api()
+        api.is_live = False
+        service = OrderExecutionService(api=api, helpers=Mock(), keepalive_interval=0)
+
+        self.assertFalse(service.warm_up())
+        api.get_api_key_permissions.assert_not_called()
+
+
+class TestOrderLatency(unittest.TestCase):
+    """Test orders reuse one helpers instance and are timed"""
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.helpers = Mock()
+        self.service = OrderExecutionService(api=live_api(), helpers=self.helpers,
+                                             keepalive_interval=0, clock=self.clock)
+
+    def test_latencies_recorded(self):
+        """Test trigger-to-submit, submit-to-ack and start-up-to-first-order"""
+        def place(amount):
+            self.clock.now += 0.080
+            return {'success': True, 'order_id': 'abc'}
+        self.helpers.buy_btc_market.side_effect = place
+        self.clock.now = 105.0
+
+        result = self.service.buy(100.0, trigger_time=104.998)
+
+        stats = self.service.latency_stats()
+        self.assertEqual(result['order_id'], 'abc')
+        self.assertAlmostEqual(stats['trigger_to_submit']['last_ms'], 2.0)
+        self.assertAlmostEqual(stats['submit_to_ack']['last_ms'], 80.0)
+        self.assertAlmostEqual(stats['startup_to_first_order_ms'], 5080.0)
+
+    def test_same_helpers_for_every_order(self):
+        """Test no per-trade client construction"""
+        self.helpers.sell_btc_market.return_value = {'success': True}
+
+        self.service.sell(0.001)
+        self.service.sell(0.002)
+
+        self.assertEqual(self.helpers.sell_btc_market.call_count, 2)
+        self.assertEqual(self.service.submit_to_ack.summary()['count'], 2)
+        self.assertEqual(self.service.trigger_to_submit.summary()['count'], 0)
+
+
+class TestEngineUsesService(unittest.TestCase):
+    """Test the engine places live orders through the injected service"""
+
+    def test_auto_buy_passes_trigger_time(self):
+        """Test an auto buy goes to the service with the tick's trigger time"""
+        service = Mock()
+        service.buy.return_value = {'success': True, 'order_id': 'abc'}
+        service.fills.return_value = None
+        engine = TradingEngine(api=Mock(), order_service=service)
+        engine.dry_run = False
+        engine.auto_buy_enabled = True
+        engine.auto_buy_price = 60000.0
+
+        engine.on_tick(Tick('BTC-USD', 59900.0, None, None, None, None))
+
+        args, kwargs = service.buy.call_args
+        self.assertEqual(args, (100.0,))
+        self.assertIsNotNone(kwargs['trigger_time'])
+        self.assertGreater(engine.balance_btc, 0)
+
+
+
+def fill(size, value, fees=0.0, complete=True):
+    return {'filled_size': size, 'filled_value': value, 'fees': fees,
+            'average_price': value / size if size else None, 'complete': complete}
+
+
+class TestOrderFills(unittest.TestCase):
+    """Test reading what placed orders filled"""
+
+    def setUp(self):
+        self.api = Mock()
+        self.helpers = TradingHelpers(api=self.api)
+        self.helpers.sleep = Mock()
+
+    def test_split_children_summed(self):
+        """Test fills of every child are added up into one average"""
+        self.api.get_order.side_effect = [
+            {'order': {'status': 'FILLED', 'filled_size': '0.001', 'filled_value': '60', 'total_fees': '0.36'}},
+            {'order': {'status': 'FILLED', 'filled_size': '0.001', 'filled_value': '62', 'total_fees': '0.37'}}
+        ]
+
+        result = OrderExecutionService(api=self.api, helpers=self.helpers, keepalive_interval=0).fills(
+            {'success': False, 'partial': True, 'order_id': 'a', 'order_ids': ['a', 'b']})
+
+        self.assertAlmostEqual(result['filled_size'], 0.002)
+        self.assertAlmostEqual(result['average_price'], 61000.0)
+        self.assertAlmostEqual(result['fees'], 0.73)
+        self.assertTrue(result['complete'])
+
+    def test_polls_until_final(self):
+        """Test an order still open is read again until it settles"""
+        self.api.get_order.side_effect = [
+            {'order': {'status': 'OPEN', 'filled_size': '0'}},
+            {'order': {'status': 'CANCELLED', 'filled_size': '0.0005', 'filled_value': '30'}}
+        ]
+
+        result = self.helpers.order_fills(['a'], timeout=5)
+
+        self.assertEqual(self.api.get_order.call_count, 2)
+        self.helpers.sleep.assert_called_once()
+        self.assertAlmostEqual(result['filled_size'], 0.0005)
+
+    def test_unreadable_order(self):
+        """Test a failed lookup reports the fills as unknown"""
+        self.api.get_order.side_effect = Exception("timeout")
+
+        self.assertIsNone(self.helpers.order_fills(['a']))
+
+
+class TestEngineBooksFills(unittest.TestCase):
+    """Test the engine books what live orders actually filled"""
+
+    def setUp(self):
+        self.service = Mock()
+        self.engine = TradingEngine(api=Mock(), order_service=self.service)
+        self.engine.dry_run = False
+        self.engine.current_price = 60000.0
+
+    def test_partial_split_buy_booked(self):
+        """Test a split buy that stopped part way books the children that filled"""
+        self.service.buy.return_value = {'success': False, 'partial': True, 'order_id': 'a',
+                                         'order_ids': ['a'], 'error': 'Split BUY stopped after 1/2'}
+        self.service.fills.return_value = fill(0.0008, 49.7, 0.3)
+
+        self.assertTrue(self.engine.execute_buy())
+
+        self.assertAlmostEqual(self.engine.balance_btc, 0.0008)
+        self.assertAlmostEqual(self.engine.balance_usd, 950.0)
+        self.assertAlmostEqual(self.engine.last_buy_price, 62125.0)
+        self.assertAlmostEqual(self.engine.position_cost, 50.0)
+        self.assertEqual(self.engine.position_size, 100.0)
+
+    def test_unfilled_ioc_not_booked(self):
+        """Test a limit IOC that filled nothing opens no position"""
+        self.service.buy.return_value = {'success': True, 'order_id': 'a'}
+        self.service.fills.return_value = fill(0.0, 0.0)
+
+        self.assertFalse(self.engine.execute_buy())
+
+        self.assertEqual(self.engine.balance_btc, 0)
+        self.assertEqual(self.engine.balance_usd, 1000.0)
+
+    def test_partial_sell_keeps_remainder(self):
+        """Test an incomplete sell leaves the unsold BTC as the open position"""
+        self.engine.balance_btc = 0.002
+        self.engine.last_buy_price = 50000.0
+        self.engine.position_cost = 100.0
+        self.service.sell.return_value = {'success': True, 'order_id': 'a'}
+        self.service.fills.return_value = fill(0.001, 60.0, 0.36)
+
+        self.assertFalse(self.engine.execute_sell("Take Profit"))
+
+        self.assertAlmostEqual(self.engine.balance_btc, 0.001)
+        self.assertAlmostEqual(self.engine.balance_usd, 1000.0 + 59.64)
+        self.assertAlmostEqual(self.engine.position_cost, 50.0)
+        self.assertAlmostEqual(self.engine.total_profit, 9.64)
+        self.assertEqual(self.engine.trades_count, 0)
+        self.assertEqual(self.engine.last_buy_price, 50000.0)
+
+    def test_full_sell_uses_actual_fees(self):
+        """Test a filled sell is booked at the average fill and reported fees"""
+        self.engine.balance_btc = 0.002
+        self.engine.last_buy_price = 50000.0
+        self.engine.position_cost = 100.0
+        self.service.sell.return_value = {'success': True, 'order_id': 'a'}
+        self.service.fills.return_value = fill(0.002, 121.0, 0.5)
+
+        self.assertTrue(self.engine.execute_sell("Take Profit"))
+
+        self.assertEqual(self.engine.balance_btc, 0)
+        self.assertAlmostEqual(self.engine.total_profit, 20.5)
+        self.assertEqual(self.engine.trades_count, 1)
+        self.assertEqual(self.engine.position_cost, 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,172 @@
+"""
+Unit tests for idempotent order submission
+"""
+import unittest
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+import requests
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from order_submitter import OrderSubmitter, OrderSubmissionError, is_transient
+from trading_helpers import TradingHelpers
+
+
+MARKET_BUY = {'market_market_ioc': {'quote_size': '100'}}
+
+
+def http_error(status):
+    """HTTPError carrying a response with the given status"""
+    response = Mock()
+    response.status_code = status
+    return requests.HTTPError(f"{status} error", response=response)
+
+
+class TestOrderSubmitter(unittest.TestCase):
+    """Test retries, idempotency keys and reconciliation"""
+
+    def setUp(self):
+        self.api = Mock()
+        self.api.iter_orders.return_value = iter([])
+        self.sleep = Mock()
+        self.submitter = OrderSubmitter(self.api, max_attempts=3, backoff_base=0.5, backoff_max=4.0,
+                                        sleep=self.sleep, clock=lambda: 1700000000.0)
+
+    def client_ids(self):
+        return [c[1]['client_order_id'] for c in self.api.create_order.call_args_list]
+
+    def test_first_attempt_succeeds(self):
+        """Test a clean submission is sent once"""
+        self.api.create_order.return_value = {'success': True, 'order_id': 'abc'}
+
+        result = self.submitter.submit('BTC-USD', 'BUY', MARKET_BUY, client_order_id='cid-1')
+
+        self.assertEqual(result['order_id'], 'abc')
+        self.assertEqual(result['attempts'], 1)
+        self.assertFalse(result['reconciled'])
+        self.assertEqual(self.client_ids(), ['cid-1'])
+        self.sleep.assert_not_called()
+
+    def test_timeout_retried_with_same_client_order_id(self):
+        """Test a timeout is reconciled, then retried with the same key"""
+        self.api.create_order.side_effect = [requests.Timeout("read timed out"), {'success': True, 'order_id': 'abc'}]
+
+        result = self.submitter.submit('BTC-USD', 'BUY', MARKET_BUY)
+
+        ids = self.client_ids()
+        self.assertEqual(len(ids), 2)
+        self.assertEqual(ids[0], ids[1])
+        self.assertEqual(result['attempts'], 2)
+        self.api.iter_orders.assert_called_once_with(product_id='BTC-USD', start_date='2023-11-14T22:12:20Z')
+        self.sleep.assert_called_once()
+
+    def test_ambiguous_order_found_in_history(self):
+        """Test an order that went through despite the timeout is not sent again"""
+        self.api.create_order.side_effect = requests.Timeout("read timed out")
+        self.api.iter_orders.side_effect = lambda **kwargs: iter([
+            {'order_id': 'other', 'client_order_id': 'someone-else'},
+            {'order_id': 'abc', 'client_order_id': 'cid-1', 'side': 'BUY', 'product_id': 'BTC-USD'}
+        ])
+
+        result = self.submitter.submit('BTC-USD', 'BUY', MARKET_BUY, client_order_id='cid-1')
+
+        self.assertTrue(result['success'])
+        self.assertTrue(result['reconciled'])
+        self.assertEqual(result['order_id'], 'abc')
+        self.assertEqual(self.api.create_order.call_count, 1)
+
+    def test_rejection_not_retried(self):
+        """Test a 4xx is final"""
+        self.api.create_order.side_effect = http_error(400)
+
+        with self.assertRaises(OrderSubmissionError) as ctx:
+            self.submitter.submit('BTC-USD', 'BUY', MARKET_BUY)
+
+        self.assertFalse(ctx.exception.ambiguous)
+        self.assertEqual(self.api.create_order.call_count, 1)
+        self.api.iter_orders.assert_not_called()
+
+    def test_rate_limit_left_to_api_client(self):
+        """Test a 429 the API client gave up on is not retried a second time"""
+        self.api.create_order.side_effect = http_error(429)
+
+        with self.assertRaises(OrderSubmissionError) as ctx:
+            self.submitter.submit('BTC-USD', 'BUY', MARKET_BUY)
+
+        self.assertFalse(ctx.exception.ambiguous)
+        self.assertEqual(self.api.create_order.call_count, 1)
+        self.sleep.assert_not_called()
+
+    def test_gives_up_ambiguous(self):
+        """Test exhausted retries report the client_order_id to check"""
+        self.api.create_order.side_effect = http_error(503)
+        self.api.iter_orders.side_effect = lambda **kwargs: iter([])
+
+        with self.assertRaises(OrderSubmissionError) as ctx:
+            self.submitter.submit('BTC-USD', 'SELL', MARKET_BUY, client_order_id='cid-2')
+
+        self.assertTrue(ctx.exception.ambiguous)
+        self.assertEqual(ctx.exception.client_order_id, 'cid-2')
+        self.assertEqual(self.client_ids(), ['cid-2'] * 3)
+        self.assertEqual(self.sleep.call_count, 2)
+
+    def test_backoff_bounds(self):
+        """Test jittered delays stay under the exponential cap"""
+        for attempt, cap in ((1, 0.5), (2, 1.0), (3, 2.0), (6, 4.0)):
+            for _ in range(20):
+                delay = self.submitter._backoff_delay(attempt)
+                self.assertGreaterEqual(delay, 0)
+                self.assertLessEqual(delay, cap)
+
+    def test_reconcile_by_order_id(self):
+        """Test a known order_id is looked up directly"""
+        self.api.get_order.return_value = {'order': {'order_id': 'abc', 'status': 'FILLED'}}
+
+        order = self.submitter.reconcile('cid-1', 'BTC-USD', order_id='abc')
+
+        self.assertEqual(order['status'], 'FILLED')
+        self.api.get_order.assert_called_once_with('abc')
+
+    def test_is_transient(self):
+        """Test which errors may have reached the exchange"""
+        self.assertTrue(is_transient(requests.ConnectionError()))
+        self.assertTrue(is_transient(http_error(502)))
+        self.assertFalse(is_transient(http_error(401)))
+        self.assertFalse(is_transient(ValueError("bad size")))
+
+
+class TestHelpersUseSubmitter(unittest.TestCase):
+    """Test TradingHelpers market orders go through the submitter"""
+
+    def test_ambiguous_buy_reported(self):
+        """Test an unknown outcome returns the client_order_id"""
+        helpers = TradingHelpers()
+        helpers.orders = Mock()
+        helpers.orders.submit.side_effect = OrderSubmissionError("unknown", 'cid-9', 4, ambiguous=True)
+
+        result = helpers.buy_btc_market(100)
+
+        self.assertFalse(result['success'])
+        self.assertTrue(result['ambiguous'])
+        self.assertEqual(result['client_order_id'], 'cid-9')
+
+    def test_sell_success(self):
+        """Test a successful sell passes the order id through"""
+        helpers = TradingHelpers()
+        helpers.orders = Mock()
+        helpers.orders.submit.return_value = {'success': True, 'order_id': 'abc', 'client_order_id': 'cid-3'}
+
+        result = helpers.sell_btc_market(0.001)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(result['order_id'], 'abc')
+        helpers.orders.submit.assert_called_once_with(
+            product_id='BTC-USD', side='SELL', order_configuration={'market_market_ioc': {'base_size': '0.001'}}
+        )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""
+Unit tests for product metadata caching and local order validation
+"""
+import sys
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import Mock
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from order_service import OrderExecutionService
+from product_metadata import OrderValidationError, ProductMetadataCache, ProductRules, get_product_metadata
+from trading_helpers import TradingHelpers
+
+
+BTC_USD = {
+    'product_id': 'BTC-USD',
+    'base_increment': '0.00000001',
+    'quote_increment': '0.01',
+    'price_increment': '0.01',
+    'base_min_size': '0.00000001',
+    'base_max_size': '3400',
+    'quote_min_size': '1',
+    'quote_max_size': '150000000',
+    'status': 'online',
+    'trading_disabled': False,
+    'is_disabled': False,
+    'cancel_only': False,
+    'limit_only': False,
+    'post_only': False
+}
+
+
+def product(**overrides):
+    return dict(BTC_USD, **overrides)
+
+
+class TestProductRules(unittest.TestCase):
+    """Test rounding and limit checks"""
+
+    def setUp(self):
+        self.rules = ProductRules(BTC_USD)
+
+    def test_quote_size_rounded_down(self):
+        """Test a quote size is cut to quote_increment"""
+        self.assertEqual(self.rules.quote_size(100.129), '100.12')
+        self.assertEqual(self.rules.quote_size(100.0), '100.00')
+
+    def test_base_size_rounded_down(self):
+        """Test a base size is cut to base_increment, never up"""
+        self.assertEqual(self.rules.base_size(0.123456789), '0.12345678')
+        self.assertEqual(self.rules.base_size(1 / 3), '0.33333333')
+
+    def test_non_decimal_increment(self):
+        """Test increments that are not powers of ten"""
+        rules = ProductRules(product(base_increment='0.005', base_min_size='0.005'))
+        self.assertEqual(rules.base_size(0.0149), '0.010')
+
+    def test_below_minimum_rejected(self):
+        """Test an order under the minimum size raises before anything is sent"""
+        with self.assertRaises(OrderValidationError) as cm:
+            self.rules.quote_size(0.5)
+        self.assertEqual(cm.exception.field, 'quote_size')
+        self.assertEqual(cm.exception.product_id, 'BTC-USD')
+
+    def test_rounds_to_zero_rejected(self):
+        """Test a size that rounds to nothing is rejected"""
+        with self.assertRaises(OrderValidationError):
+            self.rules.base_size(0.000000004)
+
+    def test_above_maximum_rejected(self):
+        """Test an order over the maximum size is rejected"""
+        with self.assertRaises(OrderValidationError):
+            self.rules.base_size(5000)
+
+    def test_status_rejected(self):
+        """Test disabled, cancel-only and limit-only products"""
+        for overrides in ({'trading_disabled': True}, {'cancel_only': True}, {'status': 'delisted'}):
+            with self.assertRaises(OrderValidationError):
+                ProductRules(product(**overrides)).quote_size(100)
+
+        limit_only = ProductRules(product(limit_only=True))
+        with self.assertRaises(OrderValidationError):
+            limit_only.quote_size(100)
+        self.assertEqual(limit_only.limit_order('BUY', 0.001, 60000.0), ('0.00100000', '60000.00'))
+
+    def test_limit_price_rounded_conservatively(self):
+        """Test buy limits round down and sell limits round up"""
+        rules = ProductRules(product(price_increment='0.5'))
+        self.assertEqual(rules.limit_order('BUY', 0.01, 60000.7)[1], '60000.5')
+        self.assertEqual(rules.limit_order('SELL', 0.01, 60000.2)[1], '60000.5')
+
+    def test_limit_notional_under_minimum(self):
+        """Test a limit order worth less than quote_min_size is rejected"""
+        with self.assertRaises(OrderValidationError):
+            self.rules.limit_order('BUY', 0.00001, 60000.0)
+
+    def test_validation_is_fast(self):
+        """Test a validation takes microseconds, not a round trip"""
+        start = time.perf_counter()
+        for _ in range(1000):
+            self.rules.quote_size(123.456)
+        self.assertLess((time.perf_counter() - start) / 1000, 0.0005)
+
+
+class TestProductMetadataCache(unittest.TestCase):
+    """Test loading and TTL refresh"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.api = Mock()
+        self.api.list_products.return_value = {'products': [BTC_USD, product(product_id='ETH-USD')]}
+        self.api.get_product.return_value = product(quote_min_size='10')
+        self.cache = ProductMetadataCache(self.api, ttl=60, clock=lambda: self.now)
+
+    def test_load_all(self):
+        """Test one list_products call caches every product"""
+        self.assertEqual(self.cache.load(), 2)
+        self.assertEqual(self.cache.get('ETH-USD').product_id, 'ETH-USD')
+        self.api.get_product.assert_not_called()
+
+    def test_unknown_product_fetched(self):
+        """Test a product not loaded is fetched once, then served from the cache"""
+        self.cache.get('BTC-USD')
+        self.cache.get('BTC-USD')
+        self.api.get_product.assert_called_once_with('BTC-USD')
+
+    def test_stale_entry_refreshed_in_background(self):
+        """Test an expired entry is served and refreshed"""
+        self.cache.load()
+        self.now = 61.0
+
+        rules = self.cache.get('BTC-USD')
+
+        self.assertEqual(rules.quote_min_size, 1)  # stale value served without waiting
+        for _ in range(100):
+            if self.cache.get('BTC-USD').quote_min_size == 10:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.cache.get('BTC-USD').quote_min_size, 10)
+        self.api.get_product.assert_called_with('BTC-USD')
+
+    def test_one_cache_per_api_client(self):
+        """Test every product's helpers share one cache, loaded by one list_products"""
+        self.api.get_api_key_permissions.return_value = {'can_trade': True}
+        services = [OrderExecutionService(api=self.api, product_id=product_id, keepalive_interval=0)
+                    for product_id in ('BTC-USD', 'ETH-USD', 'SOL-USD')]
+
+        for service in services:
+            service.warm_up()
+            if service.helpers.slippage is not None:
+                service.helpers.slippage.stop()
+
+        self.assertTrue(all(s.helpers.products is get_product_metadata(self.api) for s in services))
+        self.assertIsNot(get_product_metadata(Mock()), get_product_metadata(self.api))
+        self.api.list_products.assert_called_once()
+
+
+class TestValidatedOrders(unittest.TestCase):
+    """Test TradingHelpers rounding and rejecting orders before create_order"""
+
+    def setUp(self):
+        self.api = Mock()
+        self.api.get_product_book.side_effect = Exception("no book")
+        self.api.get_product.return_value = BTC_USD
+        self.api.create_order.return_value = {'success': True, 'order_id': 'abc'}
+        self.helpers = TradingHelpers(api=self.api)
+
+    def test_order_sizes_rounded(self):
+        """Test market orders are sent with sizes on the increments"""
+        self.helpers.buy_btc_market(100.129)
+        self.helpers.sell_btc_market(0.123456789)
+
+        configurations = [c.kwargs['order_configuration'] for c in self.api.create_order.call_args_list]
+        self.assertEqual(configurations, [
+            {'market_market_ioc': {'quote_size': '100.12'}},
+            {'market_market_ioc': {'base_size': '0.12345678'}}
+        ])
+
+    def test_invalid_order_not_sent(self):
+        """Test an order under the minimum never reaches create_order"""
+        result = self.helpers.buy_btc_market(0.5)
+
+        self.assertFalse(result['success'])
+        self.assertTrue(result['rejected'])
+        self.assertIn('minimum', result['error'])
+        self.api.create_order.assert_not_called()
+
+    def test_metadata_unavailable_does_not_block(self):
+        """Test orders go out unvalidated if the product rules cannot be fetched"""
+        self.api.get_product.side_effect = Exception("timeout")
+
+        result = self.helpers.buy_btc_market(100.0)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.api.create_order.call_args.kwargs['order_configuration'],
+                         {'market_market_ioc': {'quote_size': '100.0'}})
+
+
+if __name__ == '__main__':
+    unittest.main()
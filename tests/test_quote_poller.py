@@ -0,0 +1,151 @@
+"""
+Unit tests for the batched best bid/ask poller
+"""
+import unittest
+from unittest.mock import patch, Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from market_data import create_market_data_source, RestPollingSource, WebSocketTickerSource, ws_connect
+from quote_poller import QuotePoller
+
+
+def pricebook(product_id, bid, ask):
+    return {
+        'product_id': product_id,
+        'bids': [{'price': str(bid), 'size': '1.0'}],
+        'asks': [{'price': str(ask), 'size': '1.0'}],
+        'time': '2024-01-01T00:00:00Z'
+    }
+
+
+class TestQuotePoller(unittest.TestCase):
+    """Test batching, publishing and the adaptive cycle"""
+
+    def setUp(self):
+        self.api = Mock()
+        self.api.get_best_bid_ask.return_value = {'pricebooks': [
+            pricebook('BTC-USD', 59999.0, 60001.0),
+            pricebook('ETH-USD', 2999.5, 3000.5)
+        ]}
+        self.now = 0.0
+        self.poller = QuotePoller(['BTC-USD', 'ETH-USD'], api=self.api, min_interval=0.2,
+                                  max_interval=5.0, latency_factor=2.0, clock=lambda: self.now)
+        self.ticks = []
+        self.quotes = []
+        self.poller.subscribe(self.ticks.append)
+        self.poller.subscribe_quotes(self.quotes.append)
+
+    def test_one_request_for_all_products(self):
+        """Test every product is fetched in a single call"""
+        self.poller.poll_once()
+
+        self.api.get_best_bid_ask.assert_called_once_with(['BTC-USD', 'ETH-USD'])
+        self.assertEqual([t.product_id for t in self.ticks], ['BTC-USD', 'ETH-USD'])
+
+    def test_quote_fields(self):
+        """Test mid, spread and bid/ask on ticks and quotes"""
+        self.poller.poll_once()
+
+        btc = self.poller.quotes['BTC-USD']
+        self.assertEqual((btc.bid, btc.ask, btc.mid, btc.spread), (59999.0, 60001.0, 60000.0, 2.0))
+        self.assertEqual(self.ticks[0].price, 60000.0)
+        self.assertEqual((self.ticks[0].best_bid, self.ticks[0].best_ask), (59999.0, 60001.0))
+        self.assertEqual(len(self.quotes), 2)
+
+    def test_only_changes_published(self):
+        """Test unchanged quotes are not republished"""
+        self.poller.poll_once()
+        self.api.get_best_bid_ask.return_value = {'pricebooks': [
+            pricebook('BTC-USD', 60000.0, 60002.0),
+            pricebook('ETH-USD', 2999.5, 3000.5)
+        ]}
+
+        changed = self.poller.poll_once()
+
+        self.assertEqual([q.product_id for q in changed], ['BTC-USD'])
+        self.assertEqual(len(self.ticks), 3)
+
+    def test_empty_side_skipped(self):
+        """Test a product with an empty side publishes nothing"""
+        self.api.get_best_bid_ask.return_value = {'pricebooks': [
+            {'product_id': 'BTC-USD', 'bids': [], 'asks': [{'price': '60001', 'size': '1'}]}
+        ]}
+
+        self.assertEqual(self.poller.poll_once(), [])
+        self.assertEqual(self.ticks, [])
+
+    def test_interval_follows_latency(self):
+        """Test the cycle is latency x factor, clamped"""
+        def slow(product_ids):
+            self.now += latency
+            return {'pricebooks': []}
+        self.api.get_best_bid_ask.side_effect = slow
+
+        latency = 0.01
+        self.poller.poll_once()
+        self.assertEqual(self.poller.interval, 0.2)  # floor
+
+        latency = 0.5
+        self.poller.poll_once()
+        self.assertAlmostEqual(self.poller.latency, 0.8 * 0.01 + 0.2 * 0.5)
+        self.assertAlmostEqual(self.poller.interval, 2 * self.poller.latency)
+
+        for _ in range(50):
+            latency = 10.0
+            self.poller.poll_once()
+        self.assertEqual(self.poller.interval, 5.0)  # ceiling
+
+    def test_errors_back_off(self):
+        """Test a failed request doubles the cycle and is reported"""
+        errors = []
+        self.poller.subscribe(lambda tick: None, errors.append)
+        self.api.get_best_bid_ask.side_effect = Exception("timeout")
+        self.poller.is_running = True
+        self.poller._stop_event.wait = Mock(side_effect=lambda seconds: self.poller.stop())
+
+        self.poller._run()
+
+        self.assertEqual(self.poller.interval, 0.4)
+        self.assertEqual(len(errors), 1)
+
+
+class TestFactory(unittest.TestCase):
+    """Test the factory picks the batched poller with an authenticated API"""
+
+    @patch('market_data.Config')
+    def test_rest_with_api(self, mock_config):
+        """Test REST mode polls quotes when an API is given"""
+        mock_config.MARKET_DATA_SOURCE = 'rest'
+
+        source = create_market_data_source(['BTC-USD', 'ETH-USD'], api=Mock())
+
+        self.assertIsInstance(source, QuotePoller)
+        self.assertEqual(source.product_ids, ['BTC-USD', 'ETH-USD'])
+
+    @patch('market_data.Config')
+    def test_rest_without_api(self, mock_config):
+        """Test the public spot poller without credentials"""
+        mock_config.MARKET_DATA_SOURCE = 'rest'
+        mock_config.PRICE_POLL_INTERVAL = 0.1
+
+        self.assertIsInstance(create_market_data_source('BTC-USD'), RestPollingSource)
+
+    @unittest.skipIf(ws_connect is None, "websockets not installed")
+    @patch('market_data.Config')
+    def test_websocket_fallback(self, mock_config):
+        """Test the WebSocket source falls back to the quote poller"""
+        mock_config.MARKET_DATA_SOURCE = 'websocket'
+        mock_config.COINBASE_WS_URL = 'wss://example.invalid'
+
+        source = create_market_data_source('BTC-USD', api=Mock())
+
+        self.assertIsInstance(source, WebSocketTickerSource)
+        self.assertIsInstance(source.fallback, QuotePoller)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,195 @@
+"""
+Unit tests for pre-trade slippage estimation and slippage-aware orders
+"""
+import time
+import unittest
+from unittest.mock import patch, Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from slippage import SlippageEstimator
+from trading_helpers import TradingHelpers
+
+
+BOOK = {
+    'pricebook': {
+        'product_id': 'BTC-USD',
+        'bids': [
+            {'price': '59990.00', 'size': '0.01'},
+            {'price': '59900.00', 'size': '0.02'},
+            {'price': '59000.00', 'size': '1.0'}
+        ],
+        'asks': [
+            {'price': '60010.00', 'size': '0.01'},
+            {'price': '60100.00', 'size': '0.02'},
+            {'price': '61000.00', 'size': '1.0'}
+        ]
+    }
+}
+
+
+class TestSlippageEstimator(unittest.TestCase):
+    """Test book walks and caching"""
+
+    def setUp(self):
+        self.api = Mock()
+        self.api.get_product_book.return_value = BOOK
+        self.now = 0.0
+        self.estimator = SlippageEstimator(self.api, max_age=2.0, limit=50, clock=lambda: self.now)
+
+    def test_small_buy_at_touch(self):
+        """Test an order inside the best level has no slippage"""
+        estimate = self.estimator.estimate('BUY', usd_amount=300.0)
+
+        self.api.get_product_book.assert_called_once_with('BTC-USD', limit=50)
+        self.assertAlmostEqual(estimate['average_price'], 60010.0)
+        self.assertAlmostEqual(estimate['slippage_pct'], 0.0)
+        self.assertTrue(estimate['complete'])
+
+    def test_sell_through_levels(self):
+        """Test a sell walks the bids and reports positive slippage"""
+        estimate = self.estimator.estimate('SELL', btc_amount=0.03)
+
+        expected = (0.01 * 59990 + 0.02 * 59900) / 0.03
+        self.assertAlmostEqual(estimate['average_price'], expected)
+        self.assertAlmostEqual(estimate['slippage_pct'], (59990 - expected) / 59990 * 100)
+        self.assertEqual(estimate['levels'], 2)
+
+    def test_cached_per_book_version(self):
+        """Test repeated checks hit the cache until the book changes"""
+        first = self.estimator.estimate('BUY', usd_amount=5000.0)
+        self.now = 5.0  # stale: re-fetched, but unchanged -> same version
+        second = self.estimator.estimate('BUY', usd_amount=5000.0)
+
+        self.assertIs(first, second)
+        self.assertEqual(self.estimator.cache_hits, 1)
+        self.assertEqual(self.api.get_product_book.call_count, 2)
+
+        self.estimator.book.update('ask', 60010.0, 0)
+        third = self.estimator.estimate('BUY', usd_amount=5000.0)
+        self.assertGreater(third['average_price'], first['average_price'])
+
+    def test_shared_book_not_fetched(self):
+        """Test a feed-maintained book is used as is"""
+        book = Mock()
+        book.ready = False
+        estimator = SlippageEstimator(self.api, book=book)
+
+        self.assertIsNone(estimator.estimate('BUY', usd_amount=100.0))
+        self.api.get_product_book.assert_not_called()
+
+    def test_polled_book_not_fetched_per_order(self):
+        """Test a started estimator reads the polled public book and never fetches on estimate"""
+        self.api.get_public_product_book.return_value = BOOK
+        self.estimator.start()
+        try:
+            for _ in range(100):
+                if self.estimator.book.ready:
+                    break
+                time.sleep(0.01)
+
+            estimate = self.estimator.estimate('BUY', usd_amount=300.0)
+        finally:
+            self.estimator.stop()
+
+        self.assertAlmostEqual(estimate['average_price'], 60010.0)
+        self.api.get_public_product_book.assert_called_with('BTC-USD', limit=50)
+        self.api.get_product_book.assert_not_called()
+        self.assertIsNone(self.estimator.poller)
+
+    def test_child_count_and_limit_price(self):
+        """Test split size and limit bound"""
+        estimate = {'side': 'BUY', 'reference_price': 60000.0, 'slippage_pct': 1.2, 'complete': True}
+
+        self.assertEqual(self.estimator.child_count(estimate, 0.5, 5), 3)
+        self.assertEqual(self.estimator.child_count(dict(estimate, complete=False), 0.5, 5), 5)
+        self.assertAlmostEqual(self.estimator.limit_price(estimate, 0.5), 60300.0)
+
+
+class TestSlippageAwareOrders(unittest.TestCase):
+    """Test TradingHelpers acting on the estimate"""
+
+    def setUp(self):
+        self.api = Mock()
+        self.api.get_product_book.return_value = BOOK
+        self.api.create_order.return_value = {'success': True, 'order_id': 'abc'}
+        self.helpers = TradingHelpers(api=self.api)
+        self.helpers.sleep = Mock()
+
+    def placed_configurations(self):
+        return [c.kwargs['order_configuration'] for c in self.api.create_order.call_args_list]
+
+    @patch('trading_helpers.Config')
+    def test_small_order_stays_market(self, mock_config):
+        """Test orders under the threshold are unchanged"""
+        mock_config.SLIPPAGE_MAX_PCT = 0.5
+        mock_config.SLIPPAGE_ACTION = 'split'
+
+        result = self.helpers.buy_btc_market(100.0)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(self.placed_configurations(), [{'market_market_ioc': {'quote_size': '100.0'}}])
+        self.assertAlmostEqual(result['estimate']['average_price'], 60010.0)
+
+    @patch('trading_helpers.Config')
+    def test_large_order_split(self, mock_config):
+        """Test an order over the threshold is split into child orders"""
+        mock_config.SLIPPAGE_MAX_PCT = 0.5
+        mock_config.SLIPPAGE_ACTION = 'split'
+        mock_config.ORDER_MAX_CHILDREN = 4
+        mock_config.ORDER_SPLIT_DELAY = 1.0
+
+        result = self.helpers.sell_btc_market(0.5)
+
+        self.assertTrue(result['success'])
+        self.assertEqual(len(result['children']), 4)
+        self.assertEqual(self.placed_configurations()[0], {'market_market_ioc': {'base_size': '0.125'}})
+        self.assertEqual(self.helpers.sleep.call_count, 3)
+
+    @patch('trading_helpers.Config')
+    def test_split_stops_on_failure(self, mock_config):
+        """Test a failed child stops the split and is reported"""
+        mock_config.SLIPPAGE_MAX_PCT = 0.5
+        mock_config.SLIPPAGE_ACTION = 'split'
+        mock_config.ORDER_MAX_CHILDREN = 3
+        mock_config.ORDER_SPLIT_DELAY = 0
+        self.api.create_order.side_effect = [
+            {'success': True, 'order_id': 'a'},
+            {'success': False, 'error_response': {'message': 'INSUFFICIENT_FUND'}}
+        ]
+
+        result = self.helpers.sell_btc_market(0.5)
+
+        self.assertFalse(result['success'])
+        self.assertTrue(result['partial'])
+        self.assertEqual(result['order_ids'], ['a'])
+        self.assertIn('1/3', result['error'])
+
+    @patch('trading_helpers.Config')
+    def test_large_order_limit_ioc(self, mock_config):
+        """Test an order over the threshold becomes a limit IOC at the bound"""
+        mock_config.SLIPPAGE_MAX_PCT = 0.5
+        mock_config.SLIPPAGE_ACTION = 'limit'
+
+        self.helpers.buy_btc_market(6010.0)
+
+        limit_price = 60010.0 * 1.005
+        self.assertEqual(self.placed_configurations(), [{
+            'sor_limit_ioc': {'base_size': f"{6010.0 / limit_price:.8f}", 'limit_price': f"{limit_price:.2f}"}
+        }])
+
+    def test_book_failure_does_not_block_order(self):
+        """Test the order goes out as a market order if the book is unavailable"""
+        self.api.get_product_book.side_effect = Exception("timeout")
+
+        result = self.helpers.buy_btc_market(100.0)
+
+        self.assertTrue(result['success'])
+        self.assertIsNone(result['estimate'])
+
+
+if __name__ == '__main__':
+    unittest.main()
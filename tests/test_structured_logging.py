@@ -0,0 +1,153 @@
+"""
+Unit tests for the queued structured logging pipeline
+"""
+import unittest
+import io
+import json
+import logging
+import time
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from structured_logging import (
+    JsonFormatter, RepeatFilter, TickSampler, fields, get_logger, parse_levels,
+    setup_logging, shutdown_logging
+)
+
+
+def make_record(msg, name='trader.engine', level=logging.INFO, **extra):
+    record = logging.LogRecord(name, level, __file__, 1, msg, None, None)
+    record.__dict__.update(extra)
+    return record
+
+
+class SlowStream(io.StringIO):
+    """Console that takes a while per write"""
+
+    def write(self, text):
+        time.sleep(0.05)
+        return super().write(text)
+
+
+class TestFormatting(unittest.TestCase):
+    """Test record formatting and helpers"""
+
+    def test_json_fields(self):
+        """Test subsystem, stripped message and structured fields"""
+        record = make_record("\n✓ BUY EXECUTED [DRY RUN]:", **fields(price=60000.0, side='BUY'))
+        record.repeated = 3
+
+        event = json.loads(JsonFormatter().format(record))
+
+        self.assertEqual(event['subsystem'], 'engine')
+        self.assertEqual(event['level'], 'INFO')
+        self.assertEqual(event['msg'], "✓ BUY EXECUTED [DRY RUN]:")
+        self.assertEqual(event['price'], 60000.0)
+        self.assertEqual(event['side'], 'BUY')
+        self.assertEqual(event['repeated'], 3)
+
+    def test_parse_levels(self):
+        """Test per-subsystem level spec"""
+        self.assertEqual(parse_levels("engine=debug, api=WARNING,"),
+                         {'engine': logging.DEBUG, 'api': logging.WARNING})
+        self.assertEqual(parse_levels(''), {})
+
+    def test_tick_sampler(self):
+        """Test every Nth call is let through"""
+        sample = TickSampler(every=10)
+
+        self.assertEqual(sum(sample() for _ in range(100)), 10)
+
+
+class TestRepeatFilter(unittest.TestCase):
+    """Test collapsing of identical messages"""
+
+    def setUp(self):
+        self.now = 0.0
+        self.filter = RepeatFilter(window=10, clock=lambda: self.now)
+
+    def test_repeats_dropped_then_counted(self):
+        """Test repeats inside the window are dropped and counted on the next one"""
+        self.assertTrue(self.filter.filter(make_record("🔄 Reconnecting", name='trader.market_data')))
+        for _ in range(5):
+            self.now += 1
+            self.assertFalse(self.filter.filter(make_record("🔄 Reconnecting", name='trader.market_data')))
+
+        self.now = 20.0
+        record = make_record("🔄 Reconnecting", name='trader.market_data')
+        self.assertTrue(self.filter.filter(record))
+        self.assertEqual(record.repeated, 5)
+
+    def test_different_messages_pass(self):
+        """Test only exact repeats from the same logger are collapsed"""
+        self.assertTrue(self.filter.filter(make_record("a")))
+        self.assertTrue(self.filter.filter(make_record("b")))
+        self.assertTrue(self.filter.filter(make_record("a", name='trader.api')))
+        self.assertTrue(self.filter.filter(make_record("a", level=logging.ERROR)))
+
+    def test_warnings_and_trade_lines_kept(self):
+        """Test warnings, errors and order/engine lines are never collapsed"""
+        for _ in range(3):
+            self.assertTrue(self.filter.filter(make_record("❌ REAL BUY ORDER FAILED: timeout", level=logging.ERROR)))
+            self.assertTrue(self.filter.filter(make_record("⚠️  Feed stale", name='trader.api', level=logging.WARNING)))
+            self.assertTrue(self.filter.filter(make_record("🔴 EXECUTING REAL BUY ORDER...")))
+            self.assertTrue(self.filter.filter(make_record("✅ Order placed", name='trader.orders')))
+
+    def test_window_zero_keeps_everything(self):
+        """Test a zero window disables collapsing"""
+        repeat_filter = RepeatFilter(window=0)
+
+        self.assertTrue(all(repeat_filter.filter(make_record("a")) for _ in range(3)))
+
+
+class TestPipeline(unittest.TestCase):
+    """Test the queue handler and background writer"""
+
+    def setUp(self):
+        shutdown_logging()
+        self.addCleanup(self._restore)
+
+    def _restore(self):
+        shutdown_logging()
+        for name in ('engine', 'api'):
+            logging.getLogger(f"trader.{name}").setLevel(logging.NOTSET)
+        setup_logging()
+
+    def test_subsystem_levels_and_json(self):
+        """Test per-subsystem levels and JSON output"""
+        stream = io.StringIO()
+        setup_logging(level='INFO', levels='engine=DEBUG,api=WARNING', fmt='json', log_file='',
+                      repeat_window=0, stream=stream)
+
+        get_logger('engine').debug("tick")
+        get_logger('api').info("dropped")
+        get_logger('api').warning("⚠️  rate limited", extra=fields(attempt=1))
+        get_logger('orders').debug("dropped")
+        shutdown_logging()
+
+        events = [json.loads(line) for line in stream.getvalue().splitlines()]
+        self.assertEqual([(e['subsystem'], e['msg']) for e in events],
+                         [('engine', 'tick'), ('api', '⚠️  rate limited')])
+        self.assertEqual(events[1]['attempt'], 1)
+
+    def test_logging_does_not_wait_for_console(self):
+        """Test the calling thread only enqueues"""
+        stream = SlowStream()
+        setup_logging(level='INFO', levels='', fmt='text', log_file='', repeat_window=0, stream=stream)
+        logger = get_logger('engine')
+
+        start = time.perf_counter()
+        for i in range(20):
+            logger.info(f"message {i}")
+        elapsed = time.perf_counter() - start
+        shutdown_logging()
+
+        self.assertLess(elapsed, 0.5)  # writing takes >= 1s
+        self.assertEqual(len(stream.getvalue().splitlines()), 20)
+
+
+if __name__ == '__main__':
+    unittest.main()
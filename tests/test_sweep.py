@@ -0,0 +1,116 @@
+"""
+Unit tests for the parameter sweep
+"""
+import unittest
+import tempfile
+import json
+import os
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backtester import BacktestParams, run_backtest
+from sweep import SharedCandles, build_grid, parse_values, rank, run_sweep
+
+
+def make_candles(n=5000, seed=3):
+    """Random walk candles"""
+    rng = np.random.default_rng(seed)
+    close = 60000.0 * np.exp(np.cumsum(rng.normal(0, 0.002, n)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    return {
+        'time': 1700000000 + 60 * np.arange(n, dtype=np.int64),
+        'open': open_,
+        'high': np.maximum(open_, close) + 10,
+        'low': np.minimum(open_, close) - 10,
+        'close': close,
+        'volume': np.ones(n)
+    }
+
+
+class TestGrid(unittest.TestCase):
+    """Test grid construction"""
+
+    def test_parse_range_inclusive(self):
+        """Test start:stop:step includes the stop value"""
+        self.assertEqual(parse_values('0.5:1.5:0.25'), [0.5, 0.75, 1.0, 1.25, 1.5])
+        self.assertEqual(parse_values('1,2.5'), [1.0, 2.5])
+
+    def test_build_grid(self):
+        """Test every combination is produced with profit as a decimal"""
+        grid = build_grid([1.0, 2.0], [0.5, 1.0], [2.0], [100.0, 200.0])
+
+        self.assertEqual(len(grid), 8)
+        self.assertEqual(grid[0], {'profit_rate': 0.01, 'stop_loss': 0.5, 'rebuy_drop': 2.0, 'position_size': 100.0})
+
+
+class TestSweep(unittest.TestCase):
+    """Test the process pool sweep"""
+
+    def setUp(self):
+        """Shared candles and a temporary checkpoint"""
+        self.candles = make_candles()
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmpdir.cleanup)
+        self.checkpoint = os.path.join(self.tmpdir.name, 'sweep.jsonl')
+
+    def test_shared_candles_round_trip(self):
+        """Test the shared block holds the candle arrays"""
+        with SharedCandles(self.candles) as shared:
+            block = np.ndarray(shared.shape, dtype=np.float64, buffer=shared.shm.buf)
+            np.testing.assert_array_equal(block[4], self.candles['close'])
+
+    def test_results_match_direct_backtest(self):
+        """Test worker results equal running the backtester in-process"""
+        grid = build_grid([1.0, 2.0], [1.0, 2.0], [2.0], [100.0])
+
+        rows = run_sweep(self.candles, grid, workers=2, batch_size=1)
+
+        self.assertEqual(len(rows), 4)
+        for row in rows:
+            params = BacktestParams(**{k: row[k] for k in ('profit_rate', 'stop_loss', 'rebuy_drop', 'position_size')})
+            expected = run_backtest(self.candles, params)
+            self.assertAlmostEqual(row['total_profit'], expected['total_profit'])
+            self.assertEqual(row['trades_count'], expected['trades_count'])
+
+    def test_resume_from_checkpoint(self):
+        """Test finished combinations are not recomputed"""
+        first = build_grid([1.0, 2.0], [1.0], [2.0], [100.0])
+        run_sweep(self.candles, first, workers=1, checkpoint=self.checkpoint)
+
+        # Simulate an interrupted write
+        with open(self.checkpoint, 'a') as f:
+            f.write('{"profit_rate": 0.03, "stop')
+
+        full = build_grid([1.0, 2.0, 3.0], [1.0], [2.0], [100.0])
+        rows = run_sweep(self.candles, full, workers=1, checkpoint=self.checkpoint)
+
+        with open(self.checkpoint) as f:
+            lines = f.read().splitlines()
+
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(len(lines), 1 + 3)  # header + one row per combination
+        self.assertEqual(json.loads(lines[0])['bars'], 5000)
+
+    def test_checkpoint_for_other_data_rejected(self):
+        """Test resuming against different candles fails loudly"""
+        grid = build_grid([1.0], [1.0], [2.0], [100.0])
+        run_sweep(self.candles, grid, workers=1, checkpoint=self.checkpoint)
+
+        with self.assertRaises(Exception):
+            run_sweep(make_candles(n=4000), grid, workers=1, checkpoint=self.checkpoint)
+
+    def test_rank(self):
+        """Test ranking direction per metric"""
+        rows = [{'total_profit': 1, 'max_drawdown': 5}, {'total_profit': 3, 'max_drawdown': 9}]
+
+        self.assertEqual(rank(rows, 'total_profit')[0]['total_profit'], 3)
+        self.assertEqual(rank(rows, 'max_drawdown')[0]['max_drawdown'], 5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,293 @@
+"""
+Unit tests for the headless trading engine
+"""
+import threading
+import unittest
+import time
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from market_data import Tick
+from trading_engine import MultiProductEngine, TradingEngine, TradingObserver
+
+
+def tick(price):
+    """Tick for BTC-USD"""
+    return Tick('BTC-USD', price, None, None, None, None)
+
+
+class RecordingObserver(TradingObserver):
+    """Collects engine events"""
+
+    def __init__(self):
+        self.ticks = 0
+        self.trades = []
+        self.triggers = []
+
+    def on_tick(self, engine, tick):
+        self.ticks += 1
+
+    def on_trade(self, engine, trade):
+        self.trades.append(trade)
+
+    def on_trigger(self, engine, side, reason):
+        self.triggers.append((side, reason))
+
+
+class TestTradingEngine(unittest.TestCase):
+    """Test strategy decisions without Tk"""
+
+    def setUp(self):
+        """Dry-run engine with a mocked API"""
+        self.engine = TradingEngine(api=Mock())
+        self.observer = RecordingObserver()
+        self.engine.add_observer(self.observer)
+
+    def test_tick_updates_price_and_notifies(self):
+        """Test on_tick applies the price"""
+        self.engine.on_tick(tick(60000.0))
+
+        self.assertEqual(self.engine.current_price, 60000.0)
+        self.assertEqual(self.engine.tick_count, 1)
+        self.assertEqual(self.observer.ticks, 1)
+
+    def test_auto_buy_trigger(self):
+        """Test auto buy fires once at the trigger price"""
+        self.engine.auto_buy_enabled = True
+        self.engine.auto_buy_price = 59000.0
+
+        self.engine.on_tick(tick(59500.0))
+        self.assertEqual(self.engine.balance_btc, 0)
+
+        self.engine.on_tick(tick(58900.0))
+
+        self.assertAlmostEqual(self.engine.balance_btc, 99.4 / 58900.0)
+        self.assertEqual(self.engine.balance_usd, 900.0)
+        self.assertEqual(self.engine.last_buy_price, 58900.0)
+        self.assertFalse(self.engine.auto_buy_enabled)
+        self.assertEqual(self.observer.trades[0]['side'], 'BUY')
+        self.assertIn(('BUY', 'executed'), self.observer.triggers)
+
+    def test_auto_loop(self):
+        """Test buy arms auto sell and sell arms auto buy"""
+        self.engine.auto_mode = True
+        self.engine.on_tick(tick(60000.0))
+        self.engine.execute_buy()
+
+        self.assertTrue(self.engine.auto_sell_enabled)
+        self.assertAlmostEqual(self.engine.auto_sell_price, 60000.0 * 1.027)
+        self.assertEqual(self.observer.triggers[-1], ('SELL', 'armed'))
+
+        self.engine.on_tick(tick(62000.0))
+
+        self.assertEqual(self.engine.balance_btc, 0)
+        self.assertEqual(self.engine.trades_count, 1)
+        self.assertEqual(self.engine.winning_trades, 1)
+        self.assertTrue(self.engine.auto_buy_enabled)
+        self.assertAlmostEqual(self.engine.auto_buy_price, 62000.0 * 0.98)
+        self.assertIn(('BUY', 'armed'), self.observer.triggers)
+
+    def test_stop_loss(self):
+        """Test auto mode sells when the price drops past the stop loss"""
+        self.engine.on_tick(tick(60000.0))
+        self.engine.execute_buy()
+        self.engine.auto_mode = True
+        self.engine.auto_sell_enabled = False
+
+        self.engine.on_tick(tick(59500.0))
+        self.assertGreater(self.engine.balance_btc, 0)
+
+        self.engine.on_tick(tick(59300.0))
+
+        self.assertEqual(self.engine.balance_btc, 0)
+        self.assertEqual(self.observer.trades[-1]['reason'], 'Stop Loss')
+        self.assertLess(self.engine.total_profit, 0)
+
+    def test_manual_mode_never_exits(self):
+        """Test take profit / stop loss are ignored outside auto mode"""
+        self.engine.on_tick(tick(60000.0))
+        self.engine.execute_buy()
+
+        self.engine.on_tick(tick(30000.0))
+        self.engine.on_tick(tick(90000.0))
+
+        self.assertGreater(self.engine.balance_btc, 0)
+
+    def test_insufficient_funds(self):
+        """Test buy is rejected without enough USD"""
+        self.engine.balance_usd = 50.0
+        self.engine.on_tick(tick(60000.0))
+
+        self.assertFalse(self.engine.execute_buy())
+        self.assertEqual(self.engine.balance_btc, 0)
+
+    def test_position_summary_without_position(self):
+        """Test potential trade numbers at the current price"""
+        self.assertIsNone(self.engine.position_summary())
+
+        self.engine.on_tick(tick(50000.0))
+        summary = self.engine.position_summary()
+
+        self.assertFalse(summary['has_position'])
+        self.assertEqual(summary['cost_basis'], 100.0)
+        self.assertAlmostEqual(summary['buy_fee'], 0.6)
+        # Net profit at target is exactly the configured 1.5%
+        self.assertAlmostEqual(summary['potential_profit'], 1.5)
+
+    def test_position_summary_real_balance(self):
+        """Test real balances use BTC value as cost basis"""
+        self.engine.using_real_balance = True
+        self.engine.balance_btc = 0.001
+        self.engine.last_buy_price = 70000.0
+        self.engine.on_tick(tick(100000.0))
+
+        summary = self.engine.position_summary()
+
+        self.assertAlmostEqual(summary['cost_basis'], 70.0)
+        self.assertEqual(summary['buy_fee'], 0.0)
+        self.assertAlmostEqual(summary['unrealized_pl'], 30.0)
+        self.assertTrue(summary['trailing'])
+
+    def test_observer_errors_do_not_break_engine(self):
+        """Test a failing observer is isolated"""
+        broken = Mock()
+        broken.on_tick.side_effect = Exception("boom")
+        self.engine.add_observer(broken)
+
+        self.engine.on_tick(tick(60000.0))
+
+        self.assertEqual(self.observer.ticks, 1)
+
+    def test_tick_throughput(self):
+        """Test the hot path handles thousands of ticks per second"""
+        self.engine.remove_observer(self.observer)
+        self.engine.auto_buy_enabled = True
+        self.engine.auto_buy_price = 1.0
+        ticks = [tick(60000.0 + (i % 100)) for i in range(20000)]
+
+        start = time.perf_counter()
+        for t in ticks:
+            self.engine.on_tick(t)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(self.engine.tick_count, 20000)
+        self.assertLess(elapsed, 2.0)
+
+
+class TestMultiProductEngine(unittest.TestCase):
+    """Test many products behind one feed"""
+
+    def setUp(self):
+        self.api = Mock()
+        self.products = [f"COIN{i}-USD" for i in range(50)]
+        self.engines = MultiProductEngine(self.products, api=self.api)
+
+    def test_ticks_routed_per_product(self):
+        """Test each product keeps its own price and triggers"""
+        self.engines['COIN1-USD'].auto_buy_enabled = True
+        self.engines['COIN1-USD'].auto_buy_price = 10.0
+
+        self.engines.on_tick(Tick('COIN1-USD', 9.5, None, None, None, None))
+        self.engines.on_tick(Tick('COIN2-USD', 9.5, None, None, None, None))
+        self.engines.on_tick(Tick('OTHER-USD', 1.0, None, None, None, None))
+
+        self.assertGreater(self.engines['COIN1-USD'].balance_btc, 0)
+        self.assertEqual(self.engines['COIN2-USD'].balance_btc, 0)
+        self.assertEqual(self.engines['COIN2-USD'].current_price, 9.5)
+        self.assertEqual(self.engines.statistics()['products']['COIN1-USD']['trades'], 0)
+
+    def test_configure_all(self):
+        """Test shared settings reach every product"""
+        self.engines.configure(position_size=25.0, auto_mode=True)
+
+        self.assertTrue(all(e.position_size == 25.0 and e.auto_mode for e in self.engines))
+        self.assertEqual(len(self.engines), 50)
+
+    def test_real_balances_one_request(self):
+        """Test balances come from one accounts call, quote split evenly"""
+        engines = MultiProductEngine(['BTC-USD', 'ETH-USD'], api=self.api)
+        self.api.list_accounts.return_value = {'accounts': [
+            {'currency': 'USD', 'available_balance': {'value': '1000'}},
+            {'currency': 'ETH', 'available_balance': {'value': '0'}},
+            {'currency': 'BTC', 'available_balance': {'value': '0'}}
+        ]}
+
+        engines.load_real_balances()
+
+        self.api.list_accounts.assert_called_once()
+        self.assertEqual(engines['BTC-USD'].balance_usd, 500.0)
+        self.assertEqual(engines['ETH-USD'].balance_usd, 500.0)
+
+    def test_fifty_products_at_ten_hertz(self):
+        """Test 50 products x 10 Hz uses a small fraction of one core"""
+        self.engines.configure(auto_mode=True, auto_sell_enabled=True, auto_sell_price=1e9)
+        ticks = [Tick(product_id, 100.0 + (i % 7), None, None, None, None)
+                 for i in range(20) for product_id in self.products]  # 2 seconds of ticks
+
+        start = time.perf_counter()
+        for t in ticks:
+            self.engines.on_tick(t)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(sum(e.tick_count for e in self.engines), 1000)
+        self.assertLess(elapsed, 0.5)
+
+    def test_order_does_not_stall_other_products(self):
+        """Test a slow live order holds up only its own product's ticks"""
+        release = threading.Event()
+        slow = self.engines['COIN1-USD']
+        slow.auto_buy_enabled = True
+        slow.auto_buy_price = 10.0
+        slow.dry_run = False
+        slow.order_service = Mock()
+        slow.order_service.buy.side_effect = lambda *a, **k: release.wait(5) and {'success': False}
+        self.engines.start_workers()
+        self.addCleanup(self.engines.close)
+        self.addCleanup(release.set)
+
+        start = time.perf_counter()
+        self.engines.on_tick(Tick('COIN1-USD', 9.5, None, None, None, None))
+        self.engines.on_tick(Tick('COIN1-USD', 9.6, None, None, None, None))
+        self.engines.on_tick(Tick('COIN2-USD', 9.5, None, None, None, None))
+        for _ in range(200):
+            if self.engines['COIN2-USD'].current_price == 9.5:
+                break
+            time.sleep(0.005)
+
+        self.assertLess(time.perf_counter() - start, 1.0)
+        self.assertEqual(self.engines['COIN2-USD'].current_price, 9.5)
+        self.assertEqual(slow.current_price, 9.5)  # its next tick waits behind the order
+        release.set()
+        self.engines.close()
+        self.assertEqual(slow.current_price, 9.6)
+
+    def test_queue_wait_counts_toward_latency(self):
+        """Test a queued tick is traced from its arrival, not from when its worker took it"""
+        engine = self.engines['COIN1-USD']
+        engine.auto_buy_enabled = True
+        engine.auto_buy_price = 10.0
+        engine.dry_run = False
+        engine.order_service = Mock()
+        engine.order_service.buy.return_value = {'success': False}
+
+        class SlowObserver(TradingObserver):
+            def on_tick(self, engine, tick):
+                if tick.price > 10.0:
+                    time.sleep(0.2)
+
+        engine.add_observer(SlowObserver())
+        self.engines.start_workers()
+        self.engines.on_tick(Tick('COIN1-USD', 11.0, None, None, None, None))  # keeps the worker busy
+        self.engines.on_tick(Tick('COIN1-USD', 9.5, None, None, None, None))
+        arrived = time.perf_counter()
+        self.engines.close()
+
+        self.assertLessEqual(engine.order_service.buy.call_args.kwargs['trigger_time'], arrived)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+"""
+Unit tests for TradingHelpers
+"""
+import unittest
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from trading_helpers import TradingHelpers
+
+
+class TestAverageEntryPrice(unittest.TestCase):
+    """Test average entry price calculation"""
+    
+    def setUp(self):
+        """Set up helpers with a mocked API"""
+        self.helpers = TradingHelpers()
+        self.helpers.api = Mock()
+    
+    def test_average_uses_every_page(self):
+        """Test that fills beyond the first page are included"""
+        fills = [{'side': 'BUY', 'size': '0.001', 'price': str(60000 + i)} for i in range(250)]
+        fills.append({'side': 'SELL', 'size': '0.001', 'price': '90000'})
+        self.helpers.api.iter_fills.return_value = iter(fills)
+        
+        result = self.helpers.calculate_average_entry_price(limit=100)
+        
+        self.helpers.api.iter_fills.assert_called_once_with(product_id='BTC-USD', page_size=100)
+        self.assertEqual(result['buy_count'], 250)
+        self.assertAlmostEqual(result['total_btc_bought'], 0.25)
+        self.assertAlmostEqual(result['average_price'], 60124.5, places=4)
+    
+    def test_no_fills(self):
+        """Test empty fill history"""
+        self.helpers.api.iter_fills.return_value = iter([])
+        
+        result = self.helpers.calculate_average_entry_price()
+        
+        self.assertEqual(result['average_price'], 0)
+        self.assertEqual(result['fills'], [])
+    
+    def test_api_error(self):
+        """Test that errors are reported, not raised"""
+        self.helpers.api.iter_fills.side_effect = Exception("boom")
+        
+        result = self.helpers.calculate_average_entry_price()
+        
+        self.assertEqual(result['average_price'], 0)
+        self.assertEqual(result['error'], 'boom')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,163 @@
+"""
+Unit tests for the trailing stop
+"""
+import unittest
+from unittest.mock import Mock
+from pathlib import Path
+import sys
+
+import numpy as np
+
+# Add parent directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from backtester import BacktestParams, run_backtest, run_engine_backtest
+from market_data import Tick
+from trading_engine import TradingEngine
+from trailing_stop import TrailingStop, trailing_stop_levels
+
+
+class TestTrailingStop(unittest.TestCase):
+    """Test the high-water-mark stop"""
+
+    def setUp(self):
+        self.stop = TrailingStop(stop_pct=1.0, activation_pct=5.0, atr_multiple=0.0)
+        self.stop.reset(100.0)
+
+    def test_fixed_until_activation(self):
+        """Test the stop stays at the stop loss below the entry"""
+        self.stop.update(104.0)
+        self.assertAlmostEqual(self.stop.stop_price, 99.0)
+        self.assertFalse(self.stop.active)
+        self.assertTrue(self.stop.update(99.0))
+
+    def test_ratchets_up_never_down(self):
+        """Test new highs raise the stop and pullbacks leave it"""
+        self.stop.update(110.0)
+        self.assertAlmostEqual(self.stop.stop_price, 108.9)
+        self.assertTrue(self.stop.active)
+
+        self.assertFalse(self.stop.update(109.0))
+        self.assertAlmostEqual(self.stop.stop_price, 108.9)
+        self.assertEqual(self.stop.high, 110.0)
+        self.assertTrue(self.stop.update(108.5))
+
+    def test_atr_distance(self):
+        """Test the trail distance in ATRs"""
+        stop = TrailingStop(stop_pct=1.0, activation_pct=5.0, atr_multiple=2.0)
+        stop.reset(100.0)
+
+        stop.update(110.0, atr=1.5)
+        self.assertAlmostEqual(stop.stop_price, 107.0)
+        stop.update(111.0)  # no ATR yet: percent distance
+        self.assertAlmostEqual(stop.stop_price, 109.89)
+
+    def test_clear(self):
+        """Test no stop without a position"""
+        self.stop.clear()
+        self.assertIsNone(self.stop.stop_price)
+        self.assertFalse(self.stop.update(1.0))
+
+    def test_levels_match_streaming(self):
+        """Test the vectorized levels replay the streaming stop bar by bar"""
+        rng = np.random.default_rng(3)
+        high = 100.0 * np.exp(np.cumsum(rng.normal(0.002, 0.01, 400)))
+        atr = np.abs(rng.normal(1.0, 0.3, 400))
+        atr[:20] = np.nan
+
+        for atr_multiple in (0.0, 2.5):
+            stop = TrailingStop(stop_pct=1.0, activation_pct=5.0, atr_multiple=atr_multiple)
+            stop.reset(100.0)
+            expected = []
+            for price, value in zip(high.tolist(), atr.tolist()):
+                expected.append(stop.stop_price)
+                stop.update(price, None if np.isnan(value) else value)
+
+            levels = trailing_stop_levels(high, 100.0, 1.0, 5.0, atr, atr_multiple)
+            np.testing.assert_allclose(levels, expected, rtol=0, atol=1e-9)
+
+
+class TestEngineTrailingStop(unittest.TestCase):
+    """Test the engine keeps the stop per tick"""
+
+    def setUp(self):
+        self.engine = TradingEngine(api=Mock())
+        self.engine.auto_mode = True
+        self.engine.current_price = 60000.0
+        self.engine.execute_buy()
+        self.engine.auto_sell_enabled = False  # exits only (the auto-loop arms a sell at the target)
+
+    def tick(self, price):
+        self.engine.on_tick(Tick('BTC-USD', price, None, None, None, None))
+
+    def test_stop_does_not_follow_price_down(self):
+        """Test a pullback keeps the stop at the high-water level"""
+        self.tick(66000.0)
+        high_stop = self.engine.position_summary()['stop_price']
+        self.tick(65500.0)
+
+        summary = self.engine.position_summary()
+        self.assertAlmostEqual(high_stop, 66000.0 * 0.99)
+        self.assertAlmostEqual(summary['stop_price'], high_stop)
+        self.assertEqual(summary['high_water'], 66000.0)
+        self.assertGreater(self.engine.balance_btc, 0)
+
+    def test_trailing_stop_sells(self):
+        """Test hitting the trailed stop sells with its own reason"""
+        trades = []
+        self.engine.add_observer(Mock(on_trade=lambda engine, trade: trades.append(trade)))
+
+        self.tick(66000.0)
+        self.tick(65300.0)
+
+        self.assertEqual(self.engine.balance_btc, 0)
+        self.assertEqual(trades[-1]['reason'], 'Trailing Stop')
+        self.assertIsNone(self.engine.trailing_stop.stop_price)
+
+    def test_stop_loss_below_entry(self):
+        """Test the fixed stop loss still applies before activation"""
+        self.tick(59400.0)
+        self.assertEqual(self.engine.balance_btc, 0)
+
+
+class TestBacktestTrailingStop(unittest.TestCase):
+    """Test the backtester replays the trailing stop like the engine"""
+
+    def test_fast_mode_matches_engine(self):
+        """Test trailing exits agree between the NumPy and engine replays"""
+        closes = np.concatenate([
+            np.linspace(60000, 66000, 30), np.linspace(66000, 64000, 20),
+            np.linspace(64000, 62500, 20), np.linspace(62500, 69000, 40), np.linspace(69000, 60000, 40)
+        ])
+        candles = {
+            'time': 1700000000 + 60 * np.arange(len(closes), dtype=np.int64),
+            'open': closes, 'high': closes, 'low': closes, 'close': closes, 'volume': np.ones(len(closes))
+        }
+        params = BacktestParams(profit_rate=0.5, stop_loss=1.0, rebuy_drop=50.0, entry_price=None)
+
+        fast = run_backtest(candles, params, fill='close')
+        engine = run_engine_backtest(candles, params)
+
+        self.assertEqual(fast['trades'][0]['reason'], 'Trailing Stop')
+        self.assertEqual(len(fast['trades']), len(engine['trades']))
+        for a, b in zip(fast['trades'], engine['trades']):
+            self.assertEqual(a.get('reason'), b.get('reason'))
+            self.assertEqual(a.get('sell_index'), b.get('sell_index'))
+            self.assertAlmostEqual(a.get('sell_price', 0), b.get('sell_price', 0))
+
+    def test_fixed_stop_option(self):
+        """Test trailing_activation=None keeps the fixed stop"""
+        closes = np.concatenate([np.linspace(60000, 66000, 30), np.linspace(66000, 50000, 30)])
+        candles = {
+            'time': np.arange(len(closes), dtype=np.int64),
+            'open': closes, 'high': closes, 'low': closes, 'close': closes, 'volume': np.ones(len(closes))
+        }
+        params = BacktestParams(profit_rate=0.5, trailing_activation=None, rebuy_drop=50.0)
+
+        trade = run_backtest(candles, params, fill='close')['trades'][0]
+        self.assertEqual(trade['reason'], 'Stop Loss')
+        self.assertLess(trade['sell_price'], 60000)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,1148 @@
+"""
+Trading Engine
+GUI-free strategy core: balances, triggers, position math and order decisions
+
+BTCTrader is a Tk view over this engine; the same engine runs headless as a
+daemon:
+
+    python trading_engine.py --product BTC-USD --auto --auto-buy 60000
+    python trading_engine.py --product BTC-USD,ETH-USD,SOL-USD --auto
+"""
+import argparse
+import logging
+import queue
+import signal
+import threading
+import time
+import weakref
+
+from candle_aggregator import CandleAggregator, attach_live_store
+from coinbase_complete_api import CoinbaseCompleteAPI
+from indicators import IndicatorSet
+from http_transport import get_transport
+from config import Config
+from latency import get_latency_recorder, start_exporter
+from metrics import get_registry, start_metrics_server
+from order_service import OrderExecutionService
+from structured_logging import TickSampler, fields, get_logger
+from trailing_stop import TrailingStop
+
+
+logger = get_logger('engine')
+
+SPOT_URL = "https://api.coinbase.com/v2/prices/{product_id}/spot"
+
+# A remainder worth less than this after a partial sell is dust (below Coinbase's minimum order)
+DUST_USD = 1.0
+
+
+def split_product(product_id):
+    """'ETH-USD' -> ('ETH', 'USD')"""
+    base, _, quote = product_id.partition('-')
+    return base, quote or 'USD'
+
+
+class TradingObserver:
+    """
+    Receives engine events (override what you need)
+
+    Callbacks run on the thread that drove the engine (the market data
+    thread for the daemon, the Tk main loop for the GUI).
+    """
+
+    def on_tick(self, engine, tick):
+        """A price tick was applied"""
+
+    def on_trade(self, engine, trade):
+        """A buy or sell was executed (trade['side'] is 'BUY' or 'SELL')"""
+
+    def on_trigger(self, engine, side, reason):
+        """
+        Auto buy ('BUY') or auto sell ('SELL') trigger changed
+
+        reason is 'armed' (auto-loop set a new trigger price) or
+        'executed' (the trigger fired and was disabled)
+        """
+
+    def on_feed_error(self, engine, error):
+        """The market data source reported an error"""
+
+    def on_bar(self, engine, seconds, bar):
+        """A candle_aggregator.Bar of `seconds` closed (live bars built from ticks)"""
+
+
+class TradingEngine:
+    """
+    Strategy state and decisions without any GUI dependency
+
+    on_tick() is the hot path: it only compares the price against the
+    armed triggers and, in auto mode with an open position, the exit levels.
+    Display numbers are computed on demand by position_summary().
+    """
+
+    def __init__(self, api=None, product_id=None, order_service=None):
+        self.api = api or CoinbaseCompleteAPI()
+        self.product_id = product_id or Config.TRADING_PAIR
+        self.base_currency, self.quote_currency = split_product(self.product_id)
+        self.order_service = order_service  # built on the first live order if not injected
+        self.latency = get_latency_recorder()
+        self.using_real_balance = False
+
+        # Trading variables
+        self.balance_usd = 1000.0  # Default mock balance
+        self.balance_btc = 0.0     # Default mock balance
+        self.last_buy_price = 0.0
+        self.current_price = 0.0
+        self.manual_entry_price = 0.0  # For existing BTC positions
+
+        # Strategy parameters
+        self.profit_rate = 0.015   # 1.5% net profit target
+        self.stop_loss = 1.0       # 1.0% stop loss
+        self.position_size = 100.0 # $100 per trade
+        self.position_cost = 0.0   # USD paid for the open position (fees included), 0 = position_size
+        self.buy_fee_rate = 0.006  # 0.6% buy fee
+        self.sell_fee_rate = 0.006 # 0.6% sell fee
+        self.rebuy_drop = 2.0      # 2.0% price drop for rebuy in auto-loop
+        self.rsi_buy_max = Config.RSI_BUY_MAX or None  # auto buys only at or below this RSI (None = off)
+
+        # Trading mode
+        self.auto_mode = False
+        self.dry_run = True
+
+        # Auto buy settings
+        self.auto_buy_enabled = False
+        self.auto_buy_price = 0.0
+        self.auto_buy_executed = False  # Track if auto-buy was already executed
+
+        # Auto sell settings
+        self.auto_sell_enabled = False
+        self.auto_sell_price = 0.0
+
+        # Statistics
+        self.trades_count = 0
+        self.winning_trades = 0
+        self.total_profit = 0.0
+        self.tick_count = 0
+
+        self.observers = []
+        self._lock = threading.RLock()
+        self._log_tick = TickSampler()
+
+        # Live OHLCV bars (1s/1m/5m by default) for strategies and the GUI
+        self.candles = CandleAggregator(self.product_id)
+        self.candles.add_listener(self._on_bar)
+
+        # EMA / RSI / ATR / Bollinger over the INDICATOR_INTERVAL bars
+        self.indicators = IndicatorSet()
+        self.indicator_interval = Config.INDICATOR_INTERVAL
+
+        # High-water-mark stop of the open position (follows stop_loss)
+        self.trailing_stop = TrailingStop(self.stop_loss)
+
+        self._register_metrics()
+
+    def _register_metrics(self):
+        """
+        Export engine state to the metrics registry
+
+        Everything except feed errors is read from the engine at scrape
+        time, so on_tick does no extra work. The registry only holds a weak
+        reference to the engine.
+        """
+        registry = get_registry()
+        ref = weakref.ref(self)
+        product = self.product_id
+
+        def reader(attr):
+            return lambda: getattr(ref(), attr, float('nan'))
+
+        for metric, name, documentation, attr in (
+            (registry.counter, 'trader_ticks_total', "Price ticks applied", 'tick_count'),
+            (registry.counter, 'trader_trades_total', "Completed round trips", 'trades_count'),
+            (registry.counter, 'trader_winning_trades_total', "Round trips closed in profit", 'winning_trades'),
+            (registry.gauge, 'trader_total_profit_usd', "Net profit of completed trades", 'total_profit'),
+            (registry.gauge, 'trader_price', "Last applied price", 'current_price'),
+        ):
+            metric(name, documentation, ('product',)).labels(product).set_function(reader(attr))
+
+        balance = registry.gauge('trader_balance', "Balance used by the strategy", ('product', 'currency'))
+        balance.labels(product, self.quote_currency).set_function(reader('balance_usd'))
+        balance.labels(product, self.base_currency).set_function(reader('balance_btc'))
+
+        self._feed_errors = registry.counter(
+            'trader_feed_errors_total', "Market data errors", ('product',)
+        ).labels(product)
+
+    def add_observer(self, observer):
+        """Register a TradingObserver"""
+        self.observers.append(observer)
+
+    def remove_observer(self, observer):
+        """Unregister a TradingObserver"""
+        if observer in self.observers:
+            self.observers.remove(observer)
+
+    def _notify(self, event, *args):
+        """Call one observer hook on every observer (errors are logged, not raised)"""
+        for observer in list(self.observers):
+            try:
+                getattr(observer, event)(self, *args)
+            except Exception as e:
+                logger.error(f"❌ Observer error ({event}): {e}")
+
+    # ==================== BALANCE ====================
+
+    def load_real_balance(self, accounts=None, quote_share=1.0):
+        """
+        Load real balance from Coinbase
+
+        Args:
+            accounts (dict): A list_accounts() response to reuse (fetched if None)
+            quote_share (float): Fraction of the quote balance this product may use
+        """
+        try:
+            if accounts is None:
+                logger.info("\n🔄 Loading real balance from Coinbase...")
+                accounts = self.api.list_accounts()
+
+            # Extract quote (USD) and base (BTC) balances
+            for account in accounts.get('accounts', []):
+                currency = account.get('currency')
+                available = float(account.get('available_balance', {}).get('value', 0))
+
+                if currency == self.quote_currency:
+                    self.balance_usd = available * quote_share
+                elif currency == self.base_currency:
+                    self.balance_btc = available
+
+            self.using_real_balance = True
+
+            logger.info(f"✅ Real balance loaded ({self.product_id}):\n"
+                        f"   {self.quote_currency}: ${self.balance_usd:.2f}\n"
+                        f"   {self.base_currency}: {self.balance_btc:.8f}",
+                        extra=fields(product_id=self.product_id, usd=self.balance_usd, btc=self.balance_btc))
+
+            # Update Position Size to reflect real BTC value
+            if self.balance_btc > 0:
+                try:
+                    # Get current price
+                    response = get_transport().get(SPOT_URL.format(product_id=self.product_id), timeout=5)
+                    if response.status_code == 200:
+                        btc_price = float(response.json()['data']['amount'])
+                        btc_value_usd = self.balance_btc * btc_price
+                        self.position_size = btc_value_usd
+
+                        logger.info(f"   {self.base_currency} Value: ${btc_value_usd:.2f} (at ${btc_price:,.2f})\n"
+                                    f"   ✅ Position Size updated to: ${btc_value_usd:.2f}")
+                except Exception:
+                    pass
+
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load real balance: {e}\n"
+                           f"   Using mock balance: {self.quote_currency}: ${self.balance_usd:.2f}, "
+                           f"{self.base_currency}: {self.balance_btc:.8f}")
+            self.using_real_balance = False
+
+    # ==================== MARKET DATA ====================
+
+    def on_tick(self, tick, received=None):
+        """
+        Apply a price tick and act on triggers and exit levels
+
+        received is the perf_counter() time the tick arrived, if it was
+        queued before reaching the engine (latency traces start there).
+        """
+        triggered = time.perf_counter() if received is None else received
+
+        with self._lock:
+            self.current_price = tick.price
+            self.tick_count += 1
+            self.candles.on_tick(tick)
+            if self._log_tick() and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("📊 %s tick #%d: $%.2f", self.product_id, self.tick_count, tick.price)
+
+            # Check auto buy trigger
+            if (self.auto_buy_enabled and
+                not self.auto_buy_executed and
+                self.balance_btc == 0 and
+                self.current_price <= self.auto_buy_price and
+                self.entry_allowed()):
+
+                logger.info(f"\n🤖 AUTO BUY TRIGGERED!\n"
+                            f"   Current Price: ${self.current_price:,.2f}\n"
+                            f"   Trigger Price: ${self.auto_buy_price:,.2f}",
+                            extra=fields(product_id=self.product_id, price=self.current_price,
+                                         trigger_price=self.auto_buy_price))
+
+                # Execute auto buy (uses current price automatically)
+                self._begin_trace('auto_buy', triggered)
+                self.auto_buy_executed = True
+                self.execute_buy(trigger_time=triggered)
+                self.latency.finish()
+
+                # Disable auto buy after execution
+                self.auto_buy_enabled = False
+                self._notify('on_trigger', 'BUY', 'executed')
+
+            # Check auto sell trigger
+            if (self.auto_sell_enabled and
+                self.balance_btc > 0 and
+                self.current_price >= self.auto_sell_price):
+
+                logger.info(f"\n🤖 AUTO SELL TRIGGERED!\n"
+                            f"   Current Price: ${self.current_price:,.2f}\n"
+                            f"   Trigger Price: ${self.auto_sell_price:,.2f}",
+                            extra=fields(product_id=self.product_id, price=self.current_price,
+                                         trigger_price=self.auto_sell_price))
+
+                # Execute auto sell
+                self._begin_trace('auto_sell', triggered)
+                self.execute_sell("Auto Sell", trigger_time=triggered)
+                self.latency.finish()
+
+                # Disable auto sell after execution
+                self.auto_sell_enabled = False
+                self._notify('on_trigger', 'SELL', 'executed')
+
+            # Ratchet the trailing stop (state only, no requests)
+            if self.balance_btc > 0 and self.last_buy_price > 0:
+                self._position_stop().update(self.current_price, self.indicators.atr.value)
+
+            # Take profit / stop loss only matter in auto mode with a position
+            if self.auto_mode and self.balance_btc > 0:
+                self.check_exit(self.position_summary(), trigger_time=triggered)
+
+        self._notify('on_tick', tick)
+
+    def _on_bar(self, seconds, bar):
+        """Update the indicators from their interval's bars and tell observers"""
+        if seconds == self.indicator_interval:
+            self.indicators.update(bar)
+        self._notify('on_bar', seconds, bar)
+
+    def entry_allowed(self):
+        """
+        Indicator filter for auto buys
+
+        With rsi_buy_max set, an armed auto buy waits until the RSI is at or
+        below it. Until the RSI has warmed up, buys are not held back.
+        """
+        if self.rsi_buy_max is None:
+            return True
+        value = self.indicators.rsi.value
+        return value is None or value <= self.rsi_buy_max
+
+    def _position_stop(self):
+        """The trailing stop of the open position, following entry and stop_loss changes"""
+        stop = self.trailing_stop
+        if stop.entry_price != self.last_buy_price:
+            stop.reset(self.last_buy_price)  # entry set outside execute_buy (manual entry, real balance)
+        stop.stop_pct = self.stop_loss
+        return stop
+
+    def on_price_error(self, error):
+        """Forward a market data error to observers"""
+        self._feed_errors.inc()
+        self._notify('on_feed_error', error)
+
+    # ==================== POSITION ====================
+
+    def position_summary(self):
+        """
+        Position and target numbers for the current price
+
+        Returns:
+            dict or None: None until a price is known, otherwise {
+                'has_position': bool,
+                'entry_price': float,
+                'btc_amount': float,
+                'cost_basis': float,         # Initial Investment
+                'buy_fee': float,
+                'net_investment': float,     # Actual BTC Purchase
+                'position_value': float,     # Current BTC Value
+                'unrealized_pl': float,      # None without a position
+                'value_at_target': float,
+                'sell_fee': float,
+                'potential_profit': float,
+                'target_price': float,
+                'stop_price': float,         # trailing stop level with an entry price
+                'high_water': float,         # highest price since entry
+                'stop_active': bool,         # stop trails the high instead of the entry
+                'profit_pct': float,
+                'target_pct_increase': float,
+                'trailing': bool             # targets based on current price
+            }
+        """
+        if self.current_price <= 0:
+            return None
+
+        price = self.current_price
+        profit_target_pct = self.profit_rate * 100  # Convert to percentage
+        buy_fee_pct = self.buy_fee_rate * 100       # 0.6%
+        sell_fee_pct = self.sell_fee_rate * 100     # 0.6%
+
+        if self.balance_btc > 0:
+            # Active position - use CORRECT formula
+            btc_amount = self.balance_btc
+            position_value = btc_amount * price
+
+            if self.using_real_balance:
+                # REAL COINBASE BALANCE - Always use actual BTC value
+                if self.last_buy_price > 0:
+                    # Manual entry price was set
+                    entry_price = self.last_buy_price
+                    cost_basis = btc_amount * entry_price
+                else:
+                    # No entry price yet - use current value
+                    entry_price = price
+                    cost_basis = position_value
+                buy_fee = 0.0
+                net_investment = cost_basis
+            elif self.last_buy_price > 0:
+                # NORMAL TRADING SCENARIO (bought through app)
+                entry_price = self.last_buy_price
+                cost_basis = self.position_cost or self.position_size
+                buy_fee = cost_basis * self.buy_fee_rate
+                net_investment = cost_basis - buy_fee
+            else:
+                # No entry price
+                entry_price = price
+                cost_basis = position_value
+                buy_fee = 0.0
+                net_investment = cost_basis
+
+            # LOGIC CORRECTION:
+            # - For OPEN & PROFITABLE position: Use current price as base
+            # - For NEW position: Use entry price as base
+            trailing = self.last_buy_price > 0 and price > entry_price * 1.05
+
+            if trailing:
+                # TARGET = Current Price × (1 + Profit Target % + Sell Fee %)
+                target_price = price * (1 + (profit_target_pct + sell_fee_pct) / 100)
+            else:
+                # TARGET = Entry Price × (1 + Profit Target % + Buy Fee % + Sell Fee %)
+                target_price = entry_price * (1 + (profit_target_pct + buy_fee_pct + sell_fee_pct) / 100)
+
+            # Calculate P/L
+            unrealized_pl = position_value - cost_basis
+
+            # Avoid division by zero if last_buy_price is 0
+            if self.last_buy_price > 0:
+                profit_pct = ((price - self.last_buy_price) / self.last_buy_price * 100)
+            else:
+                # If no entry price recorded, use current position value vs cost basis
+                profit_pct = ((position_value - cost_basis) / cost_basis * 100) if cost_basis > 0 else 0
+
+            if trailing:
+                # Value at Target = Current Value × (1 + Profit Target % / 100)
+                value_at_target = position_value * (1 + profit_target_pct / 100)
+                sell_fee = value_at_target * self.sell_fee_rate
+                potential_profit = value_at_target - position_value - sell_fee
+            else:
+                # Value at Target = Initial Investment × (1 + Profit Target % / 100)
+                value_at_target = cost_basis * (1 + profit_target_pct / 100)
+                sell_fee = value_at_target * self.sell_fee_rate
+                potential_profit = value_at_target - cost_basis - sell_fee
+
+            # Stop loss follows the high-water mark once the position is 5% up (never moves down)
+            if self.last_buy_price > 0:
+                stop = self._position_stop()
+                stop_price, high_water, stop_active = stop.stop_price, max(stop.high, price), stop.active
+            else:
+                stop_price, high_water, stop_active = price * (1 - self.stop_loss / 100), price, False
+
+            if self.last_buy_price > 0:
+                target_pct_increase = ((target_price - self.last_buy_price) / self.last_buy_price) * 100
+            else:
+                target_pct_increase = 0
+
+            return {
+                'has_position': True,
+                'entry_price': entry_price,
+                'btc_amount': btc_amount,
+                'cost_basis': cost_basis,
+                'buy_fee': buy_fee,
+                'net_investment': net_investment,
+                'position_value': position_value,
+                'unrealized_pl': unrealized_pl,
+                'value_at_target': value_at_target,
+                'sell_fee': sell_fee,
+                'potential_profit': potential_profit,
+                'target_price': target_price,
+                'stop_price': stop_price,
+                'high_water': high_water,
+                'stop_active': stop_active,
+                'profit_pct': profit_pct,
+                'target_pct_increase': target_pct_increase,
+                'trailing': trailing
+            }
+
+        # No position - show potential trade entered at the current price
+        initial_investment = self.position_size
+        buy_fee = initial_investment * self.buy_fee_rate
+        net_investment = initial_investment - buy_fee
+
+        btc_amount = net_investment / price
+        current_value = btc_amount * price
+
+        # Apply CORRECT formula for target price
+        desired_net_proceeds = initial_investment * (1 + self.profit_rate)
+        required_gross_proceeds = desired_net_proceeds / (1 - self.sell_fee_rate)
+        target_price = required_gross_proceeds / btc_amount
+
+        gross_sell_value = btc_amount * target_price
+        sell_fee = gross_sell_value * self.sell_fee_rate
+        potential_profit = gross_sell_value - sell_fee - initial_investment
+
+        return {
+            'has_position': False,
+            'entry_price': price,
+            'btc_amount': btc_amount,
+            'cost_basis': initial_investment,
+            'buy_fee': buy_fee,
+            'net_investment': net_investment,
+            'position_value': current_value,
+            'unrealized_pl': None,
+            'value_at_target': gross_sell_value,
+            'sell_fee': sell_fee,
+            'potential_profit': potential_profit,
+            'target_price': target_price,
+            'stop_price': price * (1 - self.stop_loss / 100),
+            'high_water': price,
+            'stop_active': False,
+            'profit_pct': 0.0,
+            'target_pct_increase': 0.0,
+            'trailing': False
+        }
+
+    def check_exit(self, summary, trigger_time=None):
+        """
+        Sell on take profit or stop loss (auto mode only)
+
+        Args:
+            summary (dict): position_summary() for the current price
+            trigger_time (float): time.perf_counter() of the tick being checked
+
+        Returns:
+            bool: True if a sell was executed
+        """
+        if not self.auto_mode or summary is None or not summary['has_position']:
+            return False
+
+        profit_pct = summary['profit_pct']
+
+        if self.last_buy_price > 0 and profit_pct >= summary['target_pct_increase']:
+            logger.info(f"\n🎯 Target reached! Price: ${self.current_price:,.2f} >= ${summary['target_price']:,.2f}")
+            return self._traced_sell("Take Profit", 'take_profit', trigger_time)
+        elif summary['stop_active'] and self.current_price <= summary['stop_price']:
+            logger.info(f"\n🛑 Trailing stop hit! Price: ${self.current_price:,.2f} <= ${summary['stop_price']:,.2f} "
+                        f"(high ${summary['high_water']:,.2f})")
+            return self._traced_sell("Trailing Stop", 'stop_loss', trigger_time)
+        elif (self.current_price <= summary['stop_price'] if self.last_buy_price > 0
+              else profit_pct <= -self.stop_loss):
+            logger.info(f"\n🛑 Stop Loss triggered! Price dropped {profit_pct:.2f}%")
+            return self._traced_sell("Stop Loss", 'stop_loss', trigger_time)
+        return False
+
+    def _traced_sell(self, reason, trace_name, trigger_time):
+        """Sell, tracing latency when a tick triggered it"""
+        if trigger_time is None:
+            return self.execute_sell(reason)
+        self._begin_trace(trace_name, trigger_time)
+        try:
+            return self.execute_sell(reason, trigger_time=trigger_time)
+        finally:
+            self.latency.finish()
+
+    def _begin_trace(self, name, trigger_time):
+        """Start a latency trace at the tick's arrival and mark the trigger decision"""
+        self.latency.start(name, int(trigger_time * 1e9))
+        self.latency.mark('trigger_evaluated')
+
+    def evaluate(self):
+        """Check exit conditions and return the up-to-date position summary"""
+        with self._lock:
+            summary = self.position_summary()
+            if self.check_exit(summary):
+                summary = self.position_summary()
+            return summary
+
+    # ==================== ORDERS ====================
+
+    def get_order_service(self):
+        """The injected order service, or one built (and warmed) on first use"""
+        if self.order_service is None:
+            self.order_service = OrderExecutionService(api=self.api, product_id=self.product_id)
+            self.order_service.warm_up()
+        return self.order_service
+
+    @staticmethod
+    def _estimated_fill_price(result, fallback):
+        """Average fill predicted from the order book, if the order result has one"""
+        estimate = result.get('estimate')
+        if estimate and estimate.get('complete') and estimate.get('average_price'):
+            return estimate['average_price']
+        return fallback
+
+    def execute_buy(self, trigger_time=None):
+        """
+        Buy position_size USD at the current price
+
+        Args:
+            trigger_time (float): time.perf_counter() when the trigger fired
+
+        Returns:
+            bool: True if the buy was executed
+        """
+        with self._lock:
+            try:
+                # Use current market price as entry
+                entry_price = self.current_price
+
+                if entry_price <= 0:
+                    logger.error("\n❌ Invalid entry price - no price data available")
+                    return False
+
+                # Calculate buy using CORRECT formula
+                buy_fee = self.position_size * self.buy_fee_rate
+                net_investment = self.position_size - buy_fee
+                btc_amount = net_investment / entry_price
+
+                # Validate balance
+                if self.position_size > self.balance_usd:
+                    logger.error(f"\n❌ Insufficient funds! Need ${self.position_size:.2f}, have ${self.balance_usd:.2f}")
+                    return False
+
+                order_id = None
+                cost = self.position_size
+
+                # Execute REAL buy order if in LIVE mode
+                if not self.dry_run:
+                    logger.info(f"\n🔴 EXECUTING REAL BUY ORDER...")
+                    result = self.get_order_service().buy(self.position_size, trigger_time=trigger_time)
+
+                    if not result.get('success') and not result.get('partial'):
+                        logger.error(f"\n❌ REAL BUY ORDER FAILED: {result.get('error')}")
+                        return False
+
+                    order_id = result.get('order_id')
+                    fill = self.get_order_service().fills(result)
+                    if fill is None:
+                        # Fills unknown: book the order as sent, at the book-walk estimate
+                        logger.warning("⚠️  Buy fills not confirmed, booking the estimated fill")
+                        entry_price = self._estimated_fill_price(result, entry_price)
+                        btc_amount = net_investment / entry_price
+                    elif fill['filled_size'] <= 0:
+                        logger.error(f"\n❌ REAL BUY ORDER FILLED NOTHING: {result.get('error') or 'no liquidity in range'}")
+                        return False
+                    else:
+                        # Book what actually filled (an IOC or a stopped split may fill part)
+                        entry_price = fill['average_price']
+                        btc_amount = fill['filled_size']
+                        buy_fee = fill['fees']
+                        net_investment = fill['filled_value']
+                        cost = net_investment + buy_fee
+                        if not result.get('success') or cost < self.position_size * 0.99:
+                            logger.warning(f"⚠️  PARTIAL BUY: ${cost:.2f} of ${self.position_size:.2f} filled",
+                                           extra=fields(product_id=self.product_id, order_id=order_id,
+                                                        cost=cost, position_size=self.position_size))
+                    logger.info(f"✅ REAL BUY ORDER EXECUTED: Order ID {order_id}")
+
+                # Update balances
+                self.balance_usd -= cost
+                self.balance_btc = btc_amount
+                self.last_buy_price = entry_price
+                self.position_cost = cost
+                self.trailing_stop.reset(entry_price)
+
+                # Calculate target price using CORRECT formula
+                desired_net = cost * (1 + self.profit_rate)
+                required_gross = desired_net / (1 - self.sell_fee_rate)
+                target_price = required_gross / btc_amount
+                stop_price = entry_price * (1 - self.stop_loss / 100)
+
+                # Verification
+                expected_net_profit = cost * self.profit_rate
+
+                mode_indicator = " [DRY RUN]" if self.dry_run else " [LIVE]"
+                logger.info(f"\n✓ BUY EXECUTED{mode_indicator}:\n"
+                            f"   Entry Price: ${entry_price:,.2f}\n"
+                            f"   Position: ${cost:.2f}\n"
+                            f"   Buy Fee ({self.buy_fee_rate*100}%): ${buy_fee:.2f}\n"
+                            f"   Net Investment: ${net_investment:.2f}\n"
+                            f"   BTC Qty: {btc_amount:.8f}\n"
+                            f"\n   🎯 TARGET PRICE: ${target_price:,.2f}\n"
+                            f"      Formula: [${cost:.2f} × (1 + {self.profit_rate*100}%)] / (1 - {self.sell_fee_rate*100}%) / {btc_amount:.8f}\n"
+                            f"      Expected Net Profit: ${expected_net_profit:.2f}\n"
+                            f"\n   🛑 STOP LOSS: ${stop_price:,.2f} (-{self.stop_loss}%)",
+                            extra=fields(side='BUY', product_id=self.product_id, dry_run=self.dry_run, order_id=order_id,
+                                         price=entry_price, position_size=cost, fee=buy_fee,
+                                         btc_amount=btc_amount, target_price=target_price, stop_price=stop_price))
+
+                self._notify('on_trade', {
+                    'side': 'BUY',
+                    'price': entry_price,
+                    'btc_amount': btc_amount,
+                    'usd_amount': cost,
+                    'fee': buy_fee,
+                    'reason': 'Buy',
+                    'dry_run': self.dry_run,
+                    'order_id': order_id
+                })
+
+                # AUTO-LOOP: Calculate sell target and activate Auto Sell
+                if self.auto_mode or self.auto_sell_enabled:
+                    profit_target_pct = self.profit_rate * 100
+                    buy_fee_pct = self.buy_fee_rate * 100
+                    sell_fee_pct = self.sell_fee_rate * 100
+
+                    # Target = Entry × (1 + Profit% + Buy Fee% + Sell Fee%)
+                    self.auto_sell_price = entry_price * (1 + (profit_target_pct + buy_fee_pct + sell_fee_pct) / 100)
+                    self.auto_sell_enabled = True
+
+                    logger.info(f"\n🔄 AUTO-LOOP ACTIVATED:\n"
+                                f"   Bought at: ${entry_price:,.2f}\n"
+                                f"   Target price: ${self.auto_sell_price:,.2f} (+{profit_target_pct + buy_fee_pct + sell_fee_pct:.1f}%)\n"
+                                f"   🤖 Auto Sell ENABLED - Waiting for target")
+
+                    self._notify('on_trigger', 'SELL', 'armed')
+
+                return True
+
+            except Exception as e:
+                logger.exception(f"❌ Buy error: {str(e)}")
+                return False
+
+    def execute_sell(self, reason, trigger_time=None):
+        """
+        Sell the whole BTC balance at the current price
+
+        A live order is booked as filled: if only part of the balance sold,
+        the rest stays as the open position (with its share of the cost) and
+        False is returned.
+
+        Args:
+            reason (str): Shown in the trade report
+            trigger_time (float): time.perf_counter() when the trigger fired
+
+        Returns:
+            bool: True if the sell was executed
+        """
+        with self._lock:
+            try:
+                btc_qty = self.balance_btc  # Store before clearing
+                sale_price = self.current_price
+                sold = btc_qty
+                sell_fee = None
+                order_id = None
+
+                # Execute REAL sell order if in LIVE mode
+                if not self.dry_run:
+                    logger.info(f"\n🔴 EXECUTING REAL SELL ORDER...")
+                    result = self.get_order_service().sell(btc_qty, trigger_time=trigger_time)
+
+                    if not result.get('success') and not result.get('partial'):
+                        logger.error(f"\n❌ REAL SELL ORDER FAILED: {result.get('error')}")
+                        return False
+
+                    order_id = result.get('order_id')
+                    fill = self.get_order_service().fills(result)
+                    if fill is None:
+                        # Fills unknown: book the whole balance at the book-walk estimate
+                        logger.warning("⚠️  Sell fills not confirmed, booking the estimated fill")
+                        sale_price = self._estimated_fill_price(result, sale_price)
+                    elif fill['filled_size'] <= 0:
+                        logger.error(f"\n❌ REAL SELL ORDER FILLED NOTHING: {result.get('error') or 'no liquidity in range'}")
+                        return False
+                    else:
+                        sold = min(fill['filled_size'], btc_qty)
+                        sale_price = fill['average_price']
+                        sell_fee = fill['fees']
+                    logger.info(f"✅ REAL SELL ORDER EXECUTED: Order ID {order_id}")
+
+                # Calculate sell (what filled; the estimate when fills are unknown)
+                gross_proceeds = sold * sale_price
+                if sell_fee is None:
+                    sell_fee = gross_proceeds * self.sell_fee_rate
+                net_proceeds = gross_proceeds - sell_fee
+
+                # Calculate profit on the share of the position sold
+                position_cost = self.position_cost or self.position_size
+                cost_basis = position_cost * sold / btc_qty if btc_qty > 0 else position_cost
+                net_profit = net_proceeds - cost_basis
+                profit_pct = (net_profit / cost_basis) * 100
+
+                # Part of the balance left (worth selling): the position stays open
+                remaining = btc_qty - sold
+                if remaining * sale_price >= DUST_USD:
+                    return self._book_partial_sell(reason, order_id, sold, remaining, sale_price, sell_fee,
+                                                   net_proceeds, cost_basis, net_profit)
+
+                self.trades_count += 1
+                if net_profit > 0:
+                    self.winning_trades += 1
+                self.total_profit += net_profit
+
+                self.balance_usd += net_proceeds
+                self.balance_btc = 0
+                self.last_buy_price = 0
+                self.position_cost = 0.0
+                self.trailing_stop.clear()
+
+                mode_indicator = " [DRY RUN]" if self.dry_run else " [LIVE]"
+                logger.info(f"\n✓ SELL EXECUTED ({reason}){mode_indicator}:\n"
+                            f"   Sale Price: ${sale_price:,.2f}\n"
+                            f"   BTC Qty: {sold:.8f}\n"
+                            f"   Gross Value: ${gross_proceeds:.2f}\n"
+                            f"   Sell Fee ({self.sell_fee_rate*100}%): ${sell_fee:.2f}\n"
+                            f"   Net Proceeds: ${net_proceeds:.2f}\n"
+                            f"   Cost Basis: ${cost_basis:.2f}\n"
+                            f"   Net Profit/Loss: ${net_profit:+.2f} ({profit_pct:+.2f}%)",
+                            extra=fields(side='SELL', reason=reason, product_id=self.product_id, dry_run=self.dry_run,
+                                         order_id=order_id, price=sale_price, btc_amount=sold,
+                                         fee=sell_fee, net_proceeds=net_proceeds, net_profit=net_profit))
+
+                # Reset auto buy flag so it can trigger again
+                self.auto_buy_executed = False
+
+                self._notify('on_trade', {
+                    'side': 'SELL',
+                    'price': sale_price,
+                    'btc_amount': sold,
+                    'usd_amount': net_proceeds,
+                    'fee': sell_fee,
+                    'net_profit': net_profit,
+                    'reason': reason,
+                    'dry_run': self.dry_run,
+                    'order_id': order_id
+                })
+
+                # AUTO-LOOP: Calculate rebuy price and activate Auto Buy
+                if self.auto_mode or self.auto_buy_enabled:
+                    # Rebuy price: Sell price - X% (to profit on the cycle)
+                    self.auto_buy_price = self.current_price * (1 - self.rebuy_drop / 100)
+                    self.auto_buy_enabled = True
+
+                    logger.info(f"\n🔄 AUTO-LOOP ACTIVATED:\n"
+                                f"   Sold at: ${self.current_price:,.2f}\n"
+                                f"   Rebuy price: ${self.auto_buy_price:,.2f} (-{self.rebuy_drop}%)\n"
+                                f"   🤖 Auto Buy ENABLED - Waiting for price to drop")
+
+                    self._notify('on_trigger', 'BUY', 'armed')
+
+                return True
+
+            except Exception as e:
+                logger.exception(f"❌ Sell error: {str(e)}")
+                return False
+
+    def _book_partial_sell(self, reason, order_id, sold, remaining, sale_price, sell_fee,
+                           net_proceeds, cost_basis, net_profit):
+        """Book the filled part of a sell; the rest stays the open position (not a completed trade)"""
+        self.balance_usd += net_proceeds
+        self.balance_btc = remaining
+        self.position_cost = (self.position_cost or self.position_size) - cost_basis
+        self.total_profit += net_profit
+
+        logger.warning(f"\n⚠️  PARTIAL SELL ({reason}) [LIVE]:\n"
+                       f"   Sold: {sold:.8f} @ ${sale_price:,.2f}\n"
+                       f"   Net Proceeds: ${net_proceeds:.2f}\n"
+                       f"   Net Profit/Loss: ${net_profit:+.2f}\n"
+                       f"   Still held: {remaining:.8f}",
+                       extra=fields(side='SELL', reason=reason, product_id=self.product_id, order_id=order_id,
+                                    price=sale_price, btc_amount=sold, remaining=remaining, fee=sell_fee,
+                                    net_proceeds=net_proceeds, net_profit=net_profit))
+
+        self._notify('on_trade', {
+            'side': 'SELL',
+            'price': sale_price,
+            'btc_amount': sold,
+            'usd_amount': net_proceeds,
+            'fee': sell_fee,
+            'net_profit': net_profit,
+            'reason': reason,
+            'dry_run': False,
+            'order_id': order_id,
+            'partial': True
+        })
+        return False
+
+    def statistics(self):
+        """Trade count, win rate, profit and ROI against the $1000 mock start"""
+        win_rate = (self.winning_trades / self.trades_count * 100) if self.trades_count > 0 else 0
+        return {
+            'trades': self.trades_count,
+            'win_rate': win_rate,
+            'total_profit': self.total_profit,
+            'roi': (self.balance_usd - 1000) / 1000 * 100
+        }
+
+
+class EngineWorker:
+    """
+    Applies one product's ticks, and the orders they trigger, on its own thread
+
+    A live order blocks inside on_tick (submission, retries, fill polling);
+    on a worker it only holds up that product's ticks, which stay in order.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, name=f"engine-{engine.product_id}", daemon=True)
+        self._thread.start()
+
+    def submit(self, tick, received=None):
+        """Queue a tick, stamped with its arrival so the queue wait counts toward its latency"""
+        self._queue.put((tick, time.perf_counter() if received is None else received))
+
+    def stop(self, timeout=None):
+        """Finish the queued ticks (and any order in flight), then exit"""
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            try:
+                self.engine.on_tick(*item)
+            except Exception as e:
+                logger.error(f"❌ {self.engine.product_id} tick failed: {e}",
+                             extra=fields(product_id=self.engine.product_id))
+
+
+class MultiProductEngine:
+    """
+    One TradingEngine per product behind a single market data feed
+
+    Every product keeps its own balances, position and triggers. on_tick
+    routes a tick to its product's engine with one dict lookup, so the work
+    per tick does not grow with the number of products. The engines share
+    one API client (connection pool, JWT cache and rate limits).
+
+    Live, each engine runs on its own EngineWorker (start_workers), so an
+    order placed for one product never stalls the feed or the others.
+    """
+
+    def __init__(self, product_ids, api=None):
+        self.api = api or CoinbaseCompleteAPI()
+        self.engines = {
+            product_id: TradingEngine(api=self.api, product_id=product_id)
+            for product_id in dict.fromkeys(product_ids)
+        }
+        self.workers = {}
+
+    @property
+    def product_ids(self):
+        return list(self.engines)
+
+    def __getitem__(self, product_id):
+        return self.engines[product_id]
+
+    def __iter__(self):
+        return iter(self.engines.values())
+
+    def __len__(self):
+        return len(self.engines)
+
+    def configure(self, **settings):
+        """Set the same engine attributes (position_size, dry_run, ...) on every product"""
+        for engine in self.engines.values():
+            for name, value in settings.items():
+                setattr(engine, name, value)
+
+    def add_observer(self, observer_factory):
+        """Register observer_factory(engine) on every engine (observers keep per-engine state)"""
+        for engine in self.engines.values():
+            engine.add_observer(observer_factory(engine))
+
+    # ==================== MARKET DATA ====================
+
+    def on_tick(self, tick):
+        """Route a tick to its product's worker, or straight to its engine when none run"""
+        worker = self.workers.get(tick.product_id)
+        if worker is not None:
+            worker.submit(tick, time.perf_counter())
+            return
+        engine = self.engines.get(tick.product_id)
+        if engine is not None:
+            engine.on_tick(tick)
+
+    def start_workers(self):
+        """Give every engine its own tick thread (done by warm_up)"""
+        for product_id, engine in self.engines.items():
+            if product_id not in self.workers:
+                self.workers[product_id] = EngineWorker(engine)
+
+    def on_price_error(self, error):
+        """A feed error affects every product on the feed"""
+        for engine in self.engines.values():
+            engine.on_price_error(error)
+
+    # ==================== START-UP ====================
+
+    def load_real_balances(self):
+        """
+        Load balances with one list_accounts call
+
+        Each quote currency (USD) is split evenly across the products
+        quoted in it; base balances belong to their product.
+        """
+        try:
+            logger.info("\n🔄 Loading real balance from Coinbase...")
+            accounts = self.api.list_accounts()
+        except Exception as e:
+            logger.warning(f"⚠️  Could not load real balance: {e}")
+            return
+
+        per_quote = {}
+        for engine in self.engines.values():
+            per_quote[engine.quote_currency] = per_quote.get(engine.quote_currency, 0) + 1
+        for engine in self.engines.values():
+            engine.load_real_balance(accounts, quote_share=1 / per_quote[engine.quote_currency])
+
+    def warm_up(self):
+        """
+        Build and warm an order service per product, then start the workers
+
+        Only the first keeps the shared connection alive; the others would
+        ping the same pooled connection.
+        """
+        for i, engine in enumerate(self.engines.values()):
+            engine.order_service = OrderExecutionService(
+                api=self.api, product_id=engine.product_id, keepalive_interval=None if i == 0 else 0
+            )
+            engine.order_service.warm_up()
+        self.start_workers()
+
+    def close(self):
+        """Drain the workers, stop the order services' keep-alive threads and store pending bars"""
+        workers, self.workers = list(self.workers.values()), {}
+        for worker in workers:
+            worker.stop()
+        for engine in self.engines.values():
+            if engine.order_service is not None:
+                engine.order_service.close()
+            engine.candles.close()
+
+    def statistics(self):
+        """Totals across products plus each product's statistics"""
+        per_product = {product_id: engine.statistics() for product_id, engine in self.engines.items()}
+        trades = sum(engine.trades_count for engine in self.engines.values())
+        wins = sum(engine.winning_trades for engine in self.engines.values())
+        return {
+            'trades': trades,
+            'win_rate': wins / trades * 100 if trades else 0,
+            'total_profit': sum(engine.total_profit for engine in self.engines.values()),
+            'products': per_product
+        }
+
+
+class ConsoleObserver(TradingObserver):
+    """Prints trades, trigger changes and a periodic status line"""
+
+    def __init__(self, status_interval=10.0):
+        self.status_interval = status_interval
+        self._last_status = time.time()
+        self._last_ticks = 0
+
+    def on_tick(self, engine, tick):
+        now = time.time()
+        if now - self._last_status >= self.status_interval:
+            rate = (engine.tick_count - self._last_ticks) / (now - self._last_status)
+            stats = engine.statistics()
+            print(f"📊 {engine.product_id} ${engine.current_price:,.2f} | {rate:,.0f} ticks/s | "
+                  f"Trades: {stats['trades']} | Profit: ${stats['total_profit']:.2f}")
+            self._last_status = now
+            self._last_ticks = engine.tick_count
+
+    def on_trigger(self, engine, side, reason):
+        price = engine.auto_buy_price if side == 'BUY' else engine.auto_sell_price
+        print(f"🤖 Auto {'Buy' if side == 'BUY' else 'Sell'} {reason} (${price:,.2f})")
+
+    def on_feed_error(self, engine, error):
+        print(f"❌ Price error: {error}")
+
+
+def main():
+    """Run the engine headless against the live price feed"""
+    from market_data import create_market_data_source
+
+    parser = argparse.ArgumentParser(description="Headless trading engine")
+    parser.add_argument('--product', default=','.join(Config.TRADING_PAIRS),
+                        help="Product or comma-separated products (one engine each, one feed)")
+    parser.add_argument('--size', type=float, default=100.0, help="Position size in USD (per product)")
+    parser.add_argument('--profit', type=float, default=Config.PROFIT_TARGET, help="Net profit target (%%)")
+    parser.add_argument('--stop', type=float, default=Config.STOP_LOSS, help="Stop loss (%%)")
+    parser.add_argument('--rebuy-drop', type=float, default=2.0, help="Auto-loop rebuy drop (%%)")
+    parser.add_argument('--auto', action='store_true', help="Take profit / stop loss automatically")
+    parser.add_argument('--auto-buy', type=float, default=None, help="Arm auto buy at this price")
+    parser.add_argument('--auto-sell', type=float, default=None, help="Arm auto sell at this price")
+    parser.add_argument('--rsi-buy-max', type=float, default=Config.RSI_BUY_MAX,
+                        help="Hold auto buys until the RSI is at or below this (0 = off)")
+    parser.add_argument('--live', action='store_true', help="Place real orders (requires TRADING_MODE=LIVE)")
+    parser.add_argument('--status-interval', type=float, default=10.0)
+    parser.add_argument('--latency-port', type=int, default=Config.LATENCY_EXPORTER_PORT,
+                        help="Serve trigger-to-order latency histograms on this port (0 = off)")
+    parser.add_argument('--metrics-port', type=int, default=Config.METRICS_PORT,
+                        help="Serve Prometheus metrics on this port (0 = off)")
+    args = parser.parse_args()
+
+    products = [p.strip() for p in args.product.split(',') if p.strip()]
+    dry_run = not (args.live and Config.is_live_mode())
+    engines = MultiProductEngine(products)
+    engines.configure(
+        position_size=args.size,
+        profit_rate=args.profit / 100,
+        stop_loss=args.stop,
+        rebuy_drop=args.rebuy_drop,
+        rsi_buy_max=args.rsi_buy_max or None,
+        auto_mode=args.auto,
+        dry_run=dry_run
+    )
+
+    if Config.is_live_mode() and engines.api.is_jwt_format:
+        engines.load_real_balances()
+
+    if not dry_run:
+        # Validate the key and open the connection before the first trigger
+        engines.warm_up()
+
+    if args.auto_buy:
+        engines.configure(auto_buy_enabled=True, auto_buy_price=args.auto_buy)
+    if args.auto_sell:
+        engines.configure(auto_sell_enabled=True, auto_sell_price=args.auto_sell)
+
+    engines.add_observer(lambda engine: ConsoleObserver(args.status_interval))
+    start_exporter(args.latency_port)
+    start_metrics_server(args.metrics_port)
+
+    api = engines.api if Config.is_live_mode() and engines.api.is_jwt_format else None
+    source = create_market_data_source(engines.product_ids, api=api)
+    attach_live_store(engine.candles for engine in engines)
+    source.subscribe(engines.on_tick, engines.on_price_error)
+
+    stop = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+
+    print(f"\n📊 Trading engine started: {', '.join(engines.product_ids)} via {source.name}")
+    print(f"   Mode: {'AUTO' if args.auto else 'MANUAL'} | {'DRY RUN' if dry_run else 'LIVE'}")
+
+    source.start()
+    stop.wait()
+    source.stop()
+    engines.close()
+
+    stats = engines.statistics()
+    print(f"\n⏸️  Stopped | Trades: {stats['trades']} | Win: {stats['win_rate']:.1f}% | "
+          f"Profit: ${stats['total_profit']:.2f}")
+    if len(engines) > 1:
+        for product_id, product_stats in stats['products'].items():
+            print(f"   {product_id}: {product_stats['trades']} trades | ${product_stats['total_profit']:+.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -2,130 +2,381 @@
 Trading Helper Functions
 Simplified interfaces for buy, sell, and average entry price calculations
 """
+import time
+from decimal import Decimal
+
 from coinbase_complete_api import CoinbaseCompleteAPI
 from config import Config
-import uuid
+from latency import mark
+from order_submitter import OrderSubmitter, OrderSubmissionError
+from product_metadata import OrderValidationError, get_product_metadata
+from slippage import SlippageEstimator
+from structured_logging import fields, get_logger
+
+
+logger = get_logger('orders')
+
+
+# Order statuses after which filled_size no longer changes
+FINAL_STATUSES = ('FILLED', 'CANCELLED', 'EXPIRED', 'FAILED')
 
 
 class TradingHelpers:
     """Helper functions for trading operations"""
     
-    def __init__(self):
-        self.api = CoinbaseCompleteAPI()
+    def __init__(self, ledger=None, api=None, product_id=None, products=None):
+        self.api = api or CoinbaseCompleteAPI()
+        self.product_id = product_id or Config.TRADING_PAIR
+        self.ledger = ledger  # optional FillLedger for incremental average entry
+        self.orders = OrderSubmitter(self.api)
+        self.slippage = SlippageEstimator(self.api, self.product_id) if Config.SLIPPAGE_CHECK else None
+        # Shared by every helper on this API client: one list_products for all products
+        self.products = (products or get_product_metadata(self.api)) if Config.ORDER_VALIDATION else None
+        self.sleep = time.sleep
+    
+    # ==================== PRE-TRADE ====================
+    
+    def product_rules(self):
+        """
+        Cached increments and size limits of the product (see ProductMetadataCache)
+        
+        Returns:
+            ProductRules or None: None if validation is off or the product is unavailable
+        """
+        if self.products is None:
+            return None
+        try:
+            return self.products.get(self.product_id)
+        except Exception as e:
+            logger.warning(f"⚠️  Product rules unavailable, order not pre-validated: {e}")
+            return None
+    
+    def estimate_slippage(self, side, usd_amount=None, btc_amount=None):
+        """
+        Predicted average fill and slippage of a market order (see SlippageEstimator)
+        
+        Returns:
+            dict or None: None if the check is off or the book is unavailable
+        """
+        if self.slippage is None:
+            return None
+        try:
+            return self.slippage.estimate(side, usd_amount=usd_amount, btc_amount=btc_amount)
+        except Exception as e:
+            logger.warning(f"⚠️  Slippage estimate unavailable: {e}")
+            return None
+    
+    def _slippage_action(self, estimate):
+        """'market', or SLIPPAGE_ACTION ('split' / 'limit') when the estimate is over SLIPPAGE_MAX_PCT"""
+        if estimate is None or (estimate['complete'] and estimate['slippage_pct'] <= Config.SLIPPAGE_MAX_PCT):
+            return 'market'
+        logger.warning(f"⚠️  Estimated slippage {estimate['slippage_pct']:.3f}% on {estimate['side']} "
+                       f"(avg ${estimate['average_price']:,.2f} vs ${estimate['reference_price']:,.2f}"
+                       f"{'' if estimate['complete'] else ', book too thin'})",
+                       extra=fields(**estimate))
+        action = Config.SLIPPAGE_ACTION.lower()
+        return action if action in ('split', 'limit') else 'market'
     
-    def buy_btc_market(self, usd_amount):
+    def _order_configuration(self, side, amount, estimate=None):
+        """
+        Market IOC order, or a limit IOC at the slippage bound when `estimate` is given
+        
+        Sizes and prices are rounded to the product's increments and checked
+        against its limits when the product rules are cached.
+        
+        Args:
+            side (str): 'BUY' (amount in USD) or 'SELL' (amount in BTC)
+        
+        Raises:
+            OrderValidationError: The exchange would reject the order
+        """
+        rules = self.product_rules()
+        if estimate is None:
+            if side == "BUY":
+                size_key, size = "quote_size", rules.quote_size(amount) if rules else str(amount)
+            else:
+                size_key, size = "base_size", rules.base_size(amount) if rules else str(amount)
+            return {"market_market_ioc": {size_key: size}}
+        
+        limit_price = self.slippage.limit_price(estimate, Config.SLIPPAGE_MAX_PCT)
+        base_size = amount / limit_price if side == "BUY" else amount
+        if rules:
+            base_size, limit_price = rules.limit_order(side, base_size, limit_price)
+        else:
+            base_size, limit_price = f"{base_size:.8f}", f"{limit_price:.2f}"
+        return {
+            "sor_limit_ioc": {
+                "base_size": base_size,
+                "limit_price": limit_price
+            }
+        }
+    
+    def _split_order(self, side, amount, estimate):
+        """
+        Place a large order as equal child market orders, ORDER_SPLIT_DELAY apart
+        
+        Stops at the first failed child; the result lists every child placed.
+        Fewer children are placed if equal ones would be under the minimum size.
+        """
+        count = self.slippage.child_count(estimate, Config.SLIPPAGE_MAX_PCT, Config.ORDER_MAX_CHILDREN)
+        rules = self.product_rules()
+        minimum = rules.minimum(side) if rules else None
+        if minimum:
+            count = max(1, min(count, int(Decimal(str(amount)) / minimum)))
+        place = self.buy_btc_market if side == "BUY" else self.sell_btc_market
+        child_amount = amount / count
+        logger.info(f"✂️  Splitting {side} into {count} child orders",
+                    extra=fields(side=side, amount=amount, children=count))
+        
+        children = []
+        for i in range(count):
+            if i:
+                self.sleep(Config.ORDER_SPLIT_DELAY)
+            result = place(child_amount, split=False)
+            children.append(result)
+            if not result.get('success'):
+                break
+        
+        placed = [child for child in children if child.get('success')]
+        result = {
+            'success': len(placed) == count,
+            'order_id': placed[0].get('order_id') if placed else None,
+            'order_ids': [child.get('order_id') for child in placed],
+            'client_order_id': children[-1].get('client_order_id'),
+            'children': children,
+            'estimate': estimate
+        }
+        if not result['success']:
+            result['error'] = f"Split {side} stopped after {len(placed)}/{count} child orders: {children[-1].get('error')}"
+            result['partial'] = bool(placed)
+        return result
+    
+    # ==================== FILLS ====================
+    
+    def order_fills(self, order_ids, timeout=None):
+        """
+        What placed orders actually filled, from get_order
+        
+        Market and IOC orders settle within moments; each order is polled
+        until its status is final or ORDER_FILL_TIMEOUT runs out (then the
+        fills so far are returned with complete False).
+        
+        Args:
+            order_ids (list): Order IDs (one order, or the children of a split)
+            
+        Returns:
+            dict or None: None if an order could not be read, otherwise {
+                'filled_size': float,    # base (BTC)
+                'filled_value': float,   # quote (USD), before fees
+                'fees': float,
+                'average_price': float,  # None if nothing filled
+                'complete': bool         # every order reached a final status
+            }
+        """
+        timeout = Config.ORDER_FILL_TIMEOUT if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        filled_size = filled_value = fees = 0.0
+        complete = True
+        
+        try:
+            for order_id in order_ids:
+                while True:
+                    order = self.api.get_order(order_id).get('order') or {}
+                    size = float(order.get('filled_size') or 0)
+                    value = float(order.get('filled_value') or 0)
+                    fee = float(order.get('total_fees') or 0)
+                    if order.get('status') in FINAL_STATUSES:
+                        break
+                    if time.monotonic() >= deadline:
+                        complete = False
+                        break
+                    self.sleep(Config.ORDER_FILL_POLL)
+                filled_size += size
+                filled_value += value
+                fees += fee
+        except Exception as e:
+            logger.warning(f"⚠️  Could not read order fills: {e}")
+            return None
+        
+        return {
+            'filled_size': filled_size,
+            'filled_value': filled_value,
+            'fees': fees,
+            'average_price': filled_value / filled_size if filled_size > 0 else None,
+            'complete': complete
+        }
+    
+    # ==================== ORDERS ====================
+    
+    def buy_btc_market(self, usd_amount, split=True):
         """
         Buy BTC with USD at market price
         
+        When the estimated slippage is over SLIPPAGE_MAX_PCT the order is
+        split or sent as a limit IOC, depending on SLIPPAGE_ACTION.
+        
         Args:
             usd_amount (float): Amount of USD to spend
+            split (bool): Allow splitting into child orders
             
         Returns:
-            dict: Order response or error
+            dict: Order response or error (with the slippage 'estimate')
         """
         try:
-            client_order_id = str(uuid.uuid4())
+            estimate = self.estimate_slippage('BUY', usd_amount=usd_amount)
+            action = self._slippage_action(estimate) if split else 'market'
+            if action == 'split':
+                return self._split_order("BUY", usd_amount, estimate)
             
-            # Market order configuration
-            order_configuration = {
-                "market_market_ioc": {
-                    "quote_size": str(usd_amount)
-                }
-            }
+            order_configuration = self._order_configuration("BUY", usd_amount, estimate if action == 'limit' else None)
+            mark('order_built')
             
-            # Create buy order
-            response = self.api.create_order(
-                client_order_id=client_order_id,
-                product_id="BTC-USD",
+            # Create buy order (retried with the same client_order_id)
+            response = self.orders.submit(
+                product_id=self.product_id,
                 side="BUY",
                 order_configuration=order_configuration
             )
             
             if response.get('success'):
-                print(f"\n✅ BUY ORDER EXECUTED")
-                print(f"   Amount: ${usd_amount:.2f}")
-                print(f"   Order ID: {response.get('order_id', 'N/A')}")
+                logger.info(f"\n✅ BUY ORDER EXECUTED\n"
+                            f"   Amount: ${usd_amount:.2f}\n"
+                            f"   Order ID: {response.get('order_id', 'N/A')}",
+                            extra=fields(order_id=response.get('order_id'), client_order_id=response.get('client_order_id'),
+                                         quote_size=usd_amount, attempts=response.get('attempts')))
                 return {
                     'success': True,
                     'order_id': response.get('order_id'),
-                    'response': response
+                    'client_order_id': response['client_order_id'],
+                    'response': response,
+                    'estimate': estimate
                 }
             else:
                 error_msg = response.get('error_response', {}).get('message', 'Unknown error')
-                print(f"\n❌ BUY ORDER FAILED: {error_msg}")
+                logger.error(f"\n❌ BUY ORDER FAILED: {error_msg}")
                 return {
                     'success': False,
                     'error': error_msg,
+                    'client_order_id': response['client_order_id'],
                     'response': response
                 }
+        
+        except OrderSubmissionError as e:
+            logger.error(f"\n❌ BUY ORDER FAILED: {e}",
+                         extra=fields(client_order_id=e.client_order_id, attempts=e.attempts, ambiguous=e.ambiguous))
+            if e.ambiguous:
+                logger.warning(f"⚠️  Check client_order_id {e.client_order_id} before retrying manually")
+            return {
+                'success': False,
+                'error': str(e),
+                'client_order_id': e.client_order_id,
+                'ambiguous': e.ambiguous
+            }
+                
+        except OrderValidationError as e:
+            logger.error(f"\n❌ BUY ORDER REJECTED (not sent): {e}",
+                         extra=fields(product_id=e.product_id, field=e.field, quote_size=usd_amount))
+            return {
+                'success': False,
+                'error': str(e),
+                'rejected': True
+            }
                 
         except Exception as e:
-            print(f"\n❌ Error creating buy order: {e}")
+            logger.error(f"\n❌ Error creating buy order: {e}")
             return {
                 'success': False,
                 'error': str(e)
             }
     
-    def sell_btc_market(self, btc_amount):
+    def sell_btc_market(self, btc_amount, split=True):
         """
         Sell BTC for USD at market price
         
+        When the estimated slippage is over SLIPPAGE_MAX_PCT the order is
+        split or sent as a limit IOC, depending on SLIPPAGE_ACTION.
+        
         Args:
             btc_amount (float): Amount of BTC to sell
+            split (bool): Allow splitting into child orders
             
         Returns:
-            dict: Order response or error
+            dict: Order response or error (with the slippage 'estimate')
         """
         try:
-            client_order_id = str(uuid.uuid4())
+            estimate = self.estimate_slippage('SELL', btc_amount=btc_amount)
+            action = self._slippage_action(estimate) if split else 'market'
+            if action == 'split':
+                return self._split_order("SELL", btc_amount, estimate)
             
-            # Market order configuration
-            order_configuration = {
-                "market_market_ioc": {
-                    "base_size": str(btc_amount)
-                }
-            }
+            order_configuration = self._order_configuration("SELL", btc_amount, estimate if action == 'limit' else None)
+            mark('order_built')
             
-            # Create sell order
-            response = self.api.create_order(
-                client_order_id=client_order_id,
-                product_id="BTC-USD",
+            # Create sell order (retried with the same client_order_id)
+            response = self.orders.submit(
+                product_id=self.product_id,
                 side="SELL",
                 order_configuration=order_configuration
             )
             
             if response.get('success'):
-                print(f"\n✅ SELL ORDER EXECUTED")
-                print(f"   BTC Amount: {btc_amount:.8f}")
-                print(f"   Order ID: {response.get('order_id', 'N/A')}")
+                logger.info(f"\n✅ SELL ORDER EXECUTED\n"
+                            f"   BTC Amount: {btc_amount:.8f}\n"
+                            f"   Order ID: {response.get('order_id', 'N/A')}",
+                            extra=fields(order_id=response.get('order_id'), client_order_id=response.get('client_order_id'),
+                                         base_size=btc_amount, attempts=response.get('attempts')))
                 return {
                     'success': True,
                     'order_id': response.get('order_id'),
-                    'response': response
+                    'client_order_id': response['client_order_id'],
+                    'response': response,
+                    'estimate': estimate
                 }
             else:
                 error_msg = response.get('error_response', {}).get('message', 'Unknown error')
-                print(f"\n❌ SELL ORDER FAILED: {error_msg}")
+                logger.error(f"\n❌ SELL ORDER FAILED: {error_msg}")
                 return {
                     'success': False,
                     'error': error_msg,
+                    'client_order_id': response['client_order_id'],
                     'response': response
                 }
+        
+        except OrderSubmissionError as e:
+            logger.error(f"\n❌ SELL ORDER FAILED: {e}",
+                         extra=fields(client_order_id=e.client_order_id, attempts=e.attempts, ambiguous=e.ambiguous))
+            if e.ambiguous:
+                logger.warning(f"⚠️  Check client_order_id {e.client_order_id} before retrying manually")
+            return {
+                'success': False,
+                'error': str(e),
+                'client_order_id': e.client_order_id,
+                'ambiguous': e.ambiguous
+            }
+                
+        except OrderValidationError as e:
+            logger.error(f"\n❌ SELL ORDER REJECTED (not sent): {e}",
+                         extra=fields(product_id=e.product_id, field=e.field, base_size=btc_amount))
+            return {
+                'success': False,
+                'error': str(e),
+                'rejected': True
+            }
                 
         except Exception as e:
-            print(f"\n❌ Error creating sell order: {e}")
+            logger.error(f"\n❌ Error creating sell order: {e}")
             return {
                 'success': False,
                 'error': str(e)
             }
     
-    def calculate_average_entry_price(self, product_id='BTC-USD', limit=100):
+    def calculate_average_entry_price(self, product_id=None, limit=100):
         """
         Calculate average entry price from historical fills
         
         Args:
-            product_id (str): Product ID (default: BTC-USD)
-            limit (int): Number of fills to retrieve
+            product_id (str): Product ID (default: the helpers' product)
+            limit (int): Fills requested per page (every page is read)
             
         Returns:
             dict: {
@@ -135,32 +386,26 @@ class TradingHelpers:
                 'buy_count': int,
                 'fills': list
             }
+            
+            With a ledger only fills newer than the last sync are fetched,
+            and 'fills' holds just the newly synced BUY fills.
         """
+        product_id = product_id or self.product_id
+        if self.ledger is not None:
+            return self._average_entry_from_ledger(product_id, limit)
+        
         try:
-            print(f"\n🔄 Calculating average entry price for {product_id}...")
+            logger.info(f"\n🔄 Calculating average entry price for {product_id}...")
             
-            # Get historical fills
-            fills_response = self.api.list_fills(product_id=product_id, limit=limit)
-            
-            if not fills_response.get('fills'):
-                print("❌ No fills found")
-                return {
-                    'average_price': 0,
-                    'total_btc_bought': 0,
-                    'total_usd_spent': 0,
-                    'buy_count': 0,
-                    'fills': []
-                }
-            
-            fills = fills_response.get('fills', [])
-            
-            # Calculate weighted average for BUY orders
+            # Calculate weighted average for BUY orders across every page of fills
             total_btc_bought = 0.0
             total_usd_spent = 0.0
             buy_count = 0
             buy_fills = []
+            fill_count = 0
             
-            for fill in fills:
+            for fill in self.api.iter_fills(product_id=product_id, page_size=limit):
+                fill_count += 1
                 side = fill.get('side')
                 size = float(fill.get('size', 0))
                 price = float(fill.get('price', 0))
@@ -172,16 +417,28 @@ class TradingHelpers:
                     buy_count += 1
                     buy_fills.append(fill)
                     
-                    print(f"  BUY: {size:.8f} BTC @ ${price:,.2f} = ${cost:,.2f}")
+                    logger.debug("  BUY: %.8f BTC @ $%.2f = $%.2f", size, price, cost)
+            
+            if fill_count == 0:
+                logger.error("❌ No fills found")
+                return {
+                    'average_price': 0,
+                    'total_btc_bought': 0,
+                    'total_usd_spent': 0,
+                    'buy_count': 0,
+                    'fills': []
+                }
             
             if total_btc_bought > 0:
                 average_price = total_usd_spent / total_btc_bought
                 
-                print(f"\n✅ Average Entry Price Calculated:")
-                print(f"   Total BTC Bought: {total_btc_bought:.8f}")
-                print(f"   Total USD Spent:  ${total_usd_spent:,.2f}")
-                print(f"   Number of Buys:   {buy_count}")
-                print(f"   ⭐ AVERAGE PRICE: ${average_price:,.2f}")
+                logger.info(f"\n✅ Average Entry Price Calculated:\n"
+                            f"   Total BTC Bought: {total_btc_bought:.8f}\n"
+                            f"   Total USD Spent:  ${total_usd_spent:,.2f}\n"
+                            f"   Number of Buys:   {buy_count}\n"
+                            f"   ⭐ AVERAGE PRICE: ${average_price:,.2f}",
+                            extra=fields(product_id=product_id, average_price=average_price, buy_count=buy_count,
+                                         total_btc_bought=total_btc_bought, total_usd_spent=total_usd_spent))
                 
                 return {
                     'average_price': average_price,
@@ -191,7 +448,7 @@ class TradingHelpers:
                     'fills': buy_fills
                 }
             else:
-                print("❌ No BUY orders found")
+                logger.error("❌ No BUY orders found")
                 return {
                     'average_price': 0,
                     'total_btc_bought': 0,
@@ -201,7 +458,39 @@ class TradingHelpers:
                 }
                 
         except Exception as e:
-            print(f"❌ Error calculating average entry price: {e}")
+            logger.error(f"❌ Error calculating average entry price: {e}")
+            return {
+                'average_price': 0,
+                'total_btc_bought': 0,
+                'total_usd_spent': 0,
+                'buy_count': 0,
+                'fills': [],
+                'error': str(e)
+            }
+    
+    def _average_entry_from_ledger(self, product_id, limit):
+        """Incremental sync into the fill ledger, then read its running totals"""
+        try:
+            new_fills = self.ledger.sync(self.api, product_id, page_size=limit)
+            totals = self.ledger.average_entry(product_id)
+            
+            logger.info(f"\n✅ Average Entry Price (ledger, {len(new_fills)} new fills):\n"
+                        f"   Total BTC Bought: {totals['total_btc_bought']:.8f}\n"
+                        f"   Total USD Spent:  ${totals['total_usd_spent']:,.2f}\n"
+                        f"   Number of Buys:   {totals['buy_count']}\n"
+                        f"   ⭐ AVERAGE PRICE: ${totals['average_price']:,.2f}",
+                        extra=fields(product_id=product_id, new_fills=len(new_fills), **totals))
+            
+            return {
+                'average_price': totals['average_price'],
+                'total_btc_bought': totals['total_btc_bought'],
+                'total_usd_spent': totals['total_usd_spent'],
+                'buy_count': totals['buy_count'],
+                'fills': [f for f in new_fills if f.get('side') == 'BUY']
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Error updating fill ledger: {e}")
             return {
                 'average_price': 0,
                 'total_btc_bought': 0,
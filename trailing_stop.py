@@ -0,0 +1,110 @@
+"""
+Trailing Stop
+Stop level that follows the high-water mark of an open position and never moves down
+
+Until the price has risen `activation_pct` above the entry, the stop is the
+fixed stop loss below the entry. From then on every new high raises it to
+high - distance, where distance is stop_pct of the high or, with
+atr_multiple set and an ATR available, atr_multiple x ATR. A pullback
+leaves the stop where it is.
+
+The state is four floats per position and an update is a comparison, so
+the engine evaluates it on every tick. trailing_stop_levels() computes the
+same levels over bar arrays for the backtester.
+"""
+import numpy as np
+
+from config import Config
+
+
+class TrailingStop:
+    """High-water-mark stop for one position"""
+
+    def __init__(self, stop_pct=None, activation_pct=None, atr_multiple=None):
+        self.stop_pct = Config.STOP_LOSS if stop_pct is None else stop_pct
+        self.activation_pct = Config.TRAILING_ACTIVATION_PCT if activation_pct is None else activation_pct
+        self.atr_multiple = Config.TRAILING_ATR_MULTIPLE if atr_multiple is None else atr_multiple
+        self.clear()
+
+    def clear(self):
+        """Forget the position"""
+        self.entry_price = None
+        self.high = 0.0
+        self.trail = 0.0  # trailing level, 0 until activated
+
+    def reset(self, entry_price):
+        """Start tracking a position opened at entry_price"""
+        self.entry_price = entry_price
+        self.high = entry_price
+        self.trail = 0.0
+
+    @property
+    def active(self):
+        """True once the trailing level is above the fixed stop loss"""
+        return self.entry_price is not None and self.trail > self.entry_price * (1 - self.stop_pct / 100)
+
+    @property
+    def stop_price(self):
+        """Current stop level (None without a position)"""
+        if self.entry_price is None:
+            return None
+        floor = self.entry_price * (1 - self.stop_pct / 100)
+        return self.trail if self.trail > floor else floor
+
+    def update(self, price, atr=None):
+        """
+        Apply a price
+
+        Args:
+            price (float): Tick price
+            atr (float): Current ATR (used when atr_multiple > 0)
+
+        Returns:
+            bool: True if the price is at or below the stop
+        """
+        if self.entry_price is None:
+            return False
+        if price > self.high:
+            self.high = price
+            if price > self.entry_price * (1 + self.activation_pct / 100):
+                if self.atr_multiple > 0 and atr:
+                    level = price - self.atr_multiple * atr
+                else:
+                    level = price * (1 - self.stop_pct / 100)
+                if level > self.trail:
+                    self.trail = level
+        return price <= self.stop_price
+
+
+def trailing_stop_levels(high, entry_price, stop_pct, activation_pct, atr=None, atr_multiple=0.0):
+    """
+    Stop level in force at the start of each bar after an entry
+
+    Bar k's level includes the highs of bars 0..k-1, matching a TrailingStop
+    updated tick by tick (a bar's own high can only raise the stop after the
+    bar has traded through it).
+
+    Args:
+        high (ndarray): Highs of the bars after the entry bar
+        atr (ndarray): ATR known at each bar (same length; NaN while warming up)
+
+    Returns:
+        ndarray: Stop level per bar
+    """
+    floor = entry_price * (1 - stop_pct / 100)
+    levels = np.full(len(high), floor)
+    if len(high) < 2:
+        return levels
+
+    # A bar raises the stop only if it makes a new high above the activation price
+    previous_high = np.maximum.accumulate(np.concatenate(([entry_price], high[:-1])))
+    new_high = (high > previous_high) & (high > entry_price * (1 + activation_pct / 100))
+
+    candidates = high * (1 - stop_pct / 100)
+    if atr_multiple > 0 and atr is not None:
+        usable = ~np.isnan(atr) & (atr != 0)
+        candidates = np.where(usable, high - atr_multiple * np.where(usable, atr, 0.0), candidates)
+    candidates = np.where(new_high, candidates, 0.0)
+
+    levels[1:] = np.maximum(floor, np.maximum.accumulate(candidates)[:-1])
+    return levels